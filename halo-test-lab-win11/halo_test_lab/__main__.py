@@ -0,0 +1,79 @@
+"""Headless entry point: same orchestration as the GUI, without importing Qt.
+
+    python -m halo_test_lab run --profile staging --suites pytest,k6 [--k6-script examples/k6/basic.js]
+    python -m halo_test_lab profiles
+    python -m halo_test_lab gui
+
+Only argparse is imported up front; the runner (and yaml with it) loads once a command needs it.
+STARTUP_MS (interpreter start excluded) is printed before the suites start and checked against
+--startup-budget-ms; `python -X importtime -m halo_test_lab run ...` shows where time goes.
+"""
+from __future__ import annotations
+import time
+
+_T0 = time.perf_counter()
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+STARTUP_BUDGET_MS = 150.0
+
+def _configs_dir() -> Path:
+    return Path(__file__).resolve().parents[1] / "configs"
+
+def _resolve_profile(name: str) -> Path:
+    p = Path(name)
+    if p.suffix in (".yaml", ".yml") or p.exists():
+        return p
+    return _configs_dir() / f"{name}.yaml"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab", description="Halo Test Lab")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="run suites headless (CI / Linux runners)")
+    run.add_argument("--profile", required=True, help="name under configs/ or a YAML path")
+    run.add_argument("--suites", default="pytest", help="comma-separated: pytest,k6,loadgen")
+    run.add_argument("--k6-script", type=Path, default=None, help="default: examples/k6/basic.js")
+    run.add_argument("--runs-dir", type=Path, default=None, help="default: runs/ next to configs/")
+    run.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                     help="warn when startup (imports + argument parsing) exceeds this")
+    sub.add_parser("profiles", help="list profiles in configs/")
+    sub.add_parser("gui", help="launch the desktop GUI")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "profiles":
+        for p in sorted(_configs_dir().glob("*.yaml")):
+            print(p.stem)
+        return 0
+    if args.cmd == "gui":
+        from .gui import main as gui_main
+        gui_main()
+        return 0
+
+    env_path = _resolve_profile(args.profile)
+    if not env_path.is_file():
+        print(f"RUN_ERROR=profile not found: {env_path}", file=sys.stderr)
+        return 2
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+
+    from .runner import REPO_ROOT, SUITES, run_profile
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown or not suites:
+        print(f"RUN_ERROR=unknown suite(s): {', '.join(unknown) or '-'} (known: {', '.join(SUITES)})", file=sys.stderr)
+        return 2
+    k6_script = args.k6_script or (REPO_ROOT / "examples" / "k6" / "basic.js" if "k6" in suites else None)
+
+    startup_ms = (time.perf_counter() - _T0) * 1000.0
+    print(f"STARTUP_MS={startup_ms:.1f} BUDGET_MS={args.startup_budget_ms:g}", flush=True)
+    if startup_ms > args.startup_budget_ms:
+        print(f"STARTUP_OVER_BUDGET=1 (check `python -X importtime -m halo_test_lab run ...`)", file=sys.stderr)
+
+    code, out_dir = run_profile(env_path, suites, k6_script, log=lambda line: print(line, flush=True),
+                                runs_dir=args.runs_dir)
+    print(f"RUN_EXIT={code} RUN_DIR={out_dir}")
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,6 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-import yaml
 
 @dataclass(frozen=True)
 class EnvConfig:
@@ -14,8 +13,45 @@ class EnvConfig:
     health_url: str | None = None
     # Optional explicit path to k6 executable (useful when PATH is not reliable)
     k6_exe: str | None = None
+    # Built-in load engine settings (halo_test_lab.loadgen): scenario, rate_per_s, duration_s, max_active
+    loadgen: dict = field(default_factory=dict)
+    # Suites run concurrently; 0 = all selected suites at once
+    max_parallel_suites: int = 0
+    # Per-suite resource isolation, e.g. {"k6": {"cpus": [2, 3], "priority": "high"}}
+    suite_resources: dict = field(default_factory=dict)
+    # >1 splits pytest across worker processes, balanced on durations from earlier runs/
+    pytest_shards: int = 1
+    # Network shaping between suites and SUT (halo_test_lab.netem), e.g. {"profile": "3g", "latency_ms": 200}
+    network: dict = field(default_factory=dict)
+    # Local simulators (halo_test_lab.supervisor): overrides of the built-ins or extra services
+    simulators: dict = field(default_factory=dict)
+    # Live k6 metrics + early abort (halo_test_lab.k6live); None = off, {} = defaults
+    k6_live: dict | None = None
+    # >1 runs k6 as N processes over disjoint execution segments, summaries merged from raw points
+    k6_shards: int = 1
+    # /proc resource sampling of suites and SUT (halo_test_lab.telemetry); None = off, {} = defaults
+    telemetry: dict | None = field(default_factory=dict)
+    # Run artifact store (halo_test_lab.store): {"pack": true, "keep_full": 20}
+    artifacts: dict = field(default_factory=dict)
+
+def _k6_live(v) -> dict | None:
+    # `k6_live: true` or a settings block; `false` / `{enabled: false}` / absent = off
+    if v is True:
+        return {}
+    if not isinstance(v, dict) or v.get("enabled", True) is False:
+        return None
+    return {k: x for k, x in v.items() if k != "enabled"}
+
+def _telemetry(v) -> dict | None:
+    # on unless `telemetry: false` / `{enabled: false}`
+    if v is None or v is True:
+        return {}
+    if not isinstance(v, dict) or v.get("enabled", True) is False:
+        return None
+    return {k: x for k, x in v.items() if k != "enabled"}
 
 def load_env_config(path: Path) -> EnvConfig:
+    import yaml  # lazy: keeps `python -m halo_test_lab --help` and the GUI window fast to appear
     data = yaml.safe_load(path.read_text(encoding="utf-8"))
     return EnvConfig(
         name=data.get("name", path.stem),
@@ -25,4 +61,14 @@ def load_env_config(path: Path) -> EnvConfig:
         timeout_s=int(data.get("timeout_s", 30)),
         health_url=data.get("health_url"),
         k6_exe=data.get("k6_exe"),
+        loadgen=dict(data.get("loadgen") or {}),
+        max_parallel_suites=int(data.get("max_parallel_suites", 0)),
+        suite_resources=dict(data.get("suite_resources") or {}),
+        pytest_shards=int(data.get("pytest_shards", 1)),
+        network=dict(data.get("network") or {}),
+        simulators=dict(data.get("simulators") or {}),
+        k6_live=_k6_live(data.get("k6_live")),
+        k6_shards=int(data.get("k6_shards", 1)),
+        telemetry=_telemetry(data.get("telemetry")),
+        artifacts=dict(data.get("artifacts") or {}),
     )
@@ -1,12 +1,18 @@
 from __future__ import annotations
+import html
 import json
 import os
 import shutil
 import subprocess
 import sys
-from dataclasses import dataclass
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Deque, List, Dict, Optional
 
 @dataclass
 class RunResult:
@@ -15,8 +21,167 @@ class RunResult:
     stdout_path: Path
     stderr_path: Path
     artifact_paths: List[Path]
+    # live metrics summary for the manifest (k6 with k6_live)
+    live: Optional[dict] = None
 
-def _run(cmd: List[str], cwd: Path, out_dir: Path, name: str, env: Optional[Dict[str, str]] = None) -> RunResult:
+@dataclass(frozen=True)
+class SuiteResources:
+    # CPU indices the suite's process may run on (None = no pinning)
+    cpus: Optional[List[int]] = None
+    # "idle" | "below_normal" | "normal" | "above_normal" | "high" (None = inherit)
+    priority: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, d: Optional[dict]) -> "SuiteResources":
+        d = d or {}
+        cpus = d.get("cpus")
+        return cls(cpus=[int(c) for c in cpus] if cpus else None, priority=d.get("priority"))
+
+_NICE = {"idle": 19, "below_normal": 10, "normal": 0, "above_normal": -5, "high": -10}
+_WIN_PRIORITY_CLASS = {
+    "idle": "IDLE_PRIORITY_CLASS",
+    "below_normal": "BELOW_NORMAL_PRIORITY_CLASS",
+    "normal": "NORMAL_PRIORITY_CLASS",
+    "above_normal": "ABOVE_NORMAL_PRIORITY_CLASS",
+    "high": "HIGH_PRIORITY_CLASS",
+}
+
+def _creationflags(res: Optional[SuiteResources]) -> int:
+    if os.name != "nt" or not res or not res.priority:
+        return 0
+    return getattr(subprocess, _WIN_PRIORITY_CLASS.get(res.priority, ""), 0)
+
+def _posix_prefix(res: Optional[SuiteResources]) -> tuple:
+    """(command prefix, cpus handled, priority handled) - taskset/nice set affinity and niceness
+    in the child before exec, so every thread it starts later (k6's Go runtime starts its
+    threads at once) inherits them; changing them from here after Popen only reaches the main thread."""
+    prefix: List[str] = []
+    cpus_done = prio_done = False
+    if os.name == "nt" or not res:
+        return prefix, cpus_done, prio_done
+    if res.cpus and hasattr(os, "sched_getaffinity"):
+        cpus = sorted(set(res.cpus) & os.sched_getaffinity(0))
+        taskset = shutil.which("taskset")
+        if not cpus:
+            cpus_done = True  # none of them usable here: leave the suite unpinned
+        elif taskset:
+            prefix += [taskset, "-c", ",".join(str(c) for c in cpus)]
+            cpus_done = True
+    if res.priority in _NICE and hasattr(os, "getpriority"):
+        delta = _NICE[res.priority] - os.getpriority(os.PRIO_PROCESS, 0)
+        nice = shutil.which("nice")
+        if delta == 0:
+            prio_done = True
+        elif nice:
+            # GNU nice still runs the command when it may not raise priority (best-effort, as before)
+            prefix += [nice, "-n", str(delta)]
+            prio_done = True
+    return prefix, cpus_done, prio_done
+
+def _tasks(pid: int) -> List[int]:
+    try:
+        return [int(t) for t in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        return [pid]
+
+def _apply_resources(p: subprocess.Popen, res: Optional[SuiteResources], cpus_done: bool = False,
+                     prio_done: bool = False) -> None:
+    # Best-effort: an unprivileged user may not raise priority; the suite still runs.
+    # Fallback for what _posix_prefix couldn't do up front (no taskset/nice on PATH): every
+    # thread of the child as of now.
+    if not res:
+        return
+    if res.cpus and not cpus_done:
+        try:
+            if hasattr(os, "sched_setaffinity"):
+                for tid in _tasks(p.pid):
+                    os.sched_setaffinity(tid, set(res.cpus))
+            elif os.name == "nt":
+                _win_set_affinity(p.pid, sum(1 << c for c in res.cpus))
+        except (OSError, AttributeError, ValueError):
+            pass
+    if res.priority and not prio_done and hasattr(os, "setpriority"):
+        try:
+            for tid in _tasks(p.pid):
+                os.setpriority(os.PRIO_PROCESS, tid, _NICE.get(res.priority, 0))
+        except (OSError, PermissionError):
+            pass
+
+def _win_set_affinity(pid: int, mask: int) -> None:
+    # process-wide on Windows: applies to every thread, present and future
+    import ctypes
+    from ctypes import wintypes
+    k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    k32.OpenProcess.restype = wintypes.HANDLE
+    k32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    k32.SetProcessAffinityMask.argtypes = (wintypes.HANDLE, ctypes.c_size_t)
+    k32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    PROCESS_SET_INFORMATION, PROCESS_QUERY_INFORMATION = 0x0200, 0x0400
+    h = k32.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
+    if not h:
+        raise OSError(ctypes.get_last_error(), "OpenProcess failed")
+    try:
+        if not k32.SetProcessAffinityMask(h, mask):
+            raise OSError(ctypes.get_last_error(), "SetProcessAffinityMask failed")
+    finally:
+        k32.CloseHandle(h)
+
+# on_output receives one decoded line at a time, from reader threads
+OutputSink = Callable[[str], None]
+
+class LineBatcher:
+    """Collects lines from any thread and hands them to `sink` as one chunk per frame.
+
+    At most `max_pending` lines wait between frames; older ones are dropped (and counted)
+    so a burst of output can't outrun the consumer. The log files always get everything.
+    """
+
+    def __init__(self, sink: Callable[[str], None], fps: float = 10.0, max_pending: int = 5000):
+        self._sink = sink
+        self._interval = 1.0 / fps
+        self._pending: Deque[str] = deque(maxlen=max_pending)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="log-batcher", daemon=True)
+        self._thread.start()
+
+    def push(self, line: str) -> None:
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            lines, dropped = list(self._pending), self._dropped
+            self._pending.clear()
+            self._dropped = 0
+        if dropped:
+            lines.insert(0, f"[log] ... {dropped} lines not shown (see *.log files)")
+        if lines:
+            self._sink("\n".join(lines))
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+def _pump(pipe, fh, prefix: str, on_output: OutputSink) -> None:
+    # bounded readline: a child that never prints a newline can't grow this unbounded
+    for raw in iter(lambda: pipe.readline(65536), b""):
+        fh.write(raw)
+        fh.flush()
+        on_output(prefix + raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+    pipe.close()
+
+def _run(cmd: List[str], cwd: Path, out_dir: Path, name: str, env: Optional[Dict[str, str]] = None,
+         resources: Optional[SuiteResources] = None, on_output: Optional[OutputSink] = None,
+         on_spawn: Optional[Callable[[subprocess.Popen], None]] = None) -> RunResult:
     out_dir.mkdir(parents=True, exist_ok=True)
     stdout_path = out_dir / f"{name}.stdout.log"
     stderr_path = out_dir / f"{name}.stderr.log"
@@ -24,20 +189,146 @@ def _run(cmd: List[str], cwd: Path, out_dir: Path, name: str, env: Optional[Dict
     merged_env = os.environ.copy()
     if env:
         merged_env.update(env)
+    prefix, cpus_done, prio_done = _posix_prefix(resources)
+    cmd = prefix + list(cmd)
 
-    with stdout_path.open("w", encoding="utf-8") as so, stderr_path.open("w", encoding="utf-8") as se:
-        p = subprocess.Popen(cmd, cwd=str(cwd), stdout=so, stderr=se, text=True, env=merged_env)
-        code = p.wait()
+    if on_output is None:
+        with stdout_path.open("w", encoding="utf-8") as so, stderr_path.open("w", encoding="utf-8") as se:
+            p = subprocess.Popen(cmd, cwd=str(cwd), stdout=so, stderr=se, text=True, env=merged_env,
+                                 creationflags=_creationflags(resources))
+            _apply_resources(p, resources, cpus_done, prio_done)
+            if on_spawn:
+                on_spawn(p)
+            code = p.wait()
+    else:
+        # children buffer stdout when it's a pipe; ask Python ones not to
+        merged_env.setdefault("PYTHONUNBUFFERED", "1")
+        with stdout_path.open("wb") as so, stderr_path.open("wb") as se:
+            p = subprocess.Popen(cmd, cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=merged_env,
+                                 creationflags=_creationflags(resources))
+            _apply_resources(p, resources, cpus_done, prio_done)
+            if on_spawn:
+                on_spawn(p)
+            pumps = [threading.Thread(target=_pump, args=(p.stdout, so, f"[{name}] ", on_output), daemon=True),
+                     threading.Thread(target=_pump, args=(p.stderr, se, f"[{name}:err] ", on_output), daemon=True)]
+            for t in pumps:
+                t.start()
+            code = p.wait()
+            for t in pumps:
+                t.join()
 
     return RunResult(name=name, exit_code=code, stdout_path=stdout_path, stderr_path=stderr_path, artifact_paths=[stdout_path, stderr_path])
 
-def run_pytest(repo_root: Path, out_dir: Path, marker: str = "e2e", extra_env: Optional[Dict[str, str]] = None) -> RunResult:
+def run_pytest(repo_root: Path, out_dir: Path, marker: str = "e2e", extra_env: Optional[Dict[str, str]] = None,
+               resources: Optional[SuiteResources] = None, shards: int = 1, runs_dir: Optional[Path] = None,
+               on_output: Optional[OutputSink] = None) -> RunResult:
+    if shards > 1:
+        return run_pytest_sharded(repo_root, out_dir, marker, shards, extra_env, resources, runs_dir, on_output)
     junit = out_dir / "pytest-junit.xml"
+    report = out_dir / "report.json"
     cmd = [sys.executable, "-m", "pytest", "-m", marker, "--junitxml", str(junit), "-q"]
-    rr = _run(cmd, cwd=repo_root, out_dir=out_dir, name="pytest", env=extra_env)
+    json_report = _has_json_report()
+    if json_report:
+        # same artifacts as a sharded run (which merges per-shard report.json files)
+        cmd += ["--json-report", "--json-report-file", str(report)]
+    rr = _run(cmd, cwd=repo_root, out_dir=out_dir, name="pytest", env=extra_env, resources=resources, on_output=on_output)
     rr.artifact_paths.append(junit)
+    if json_report and report.exists():
+        rr.artifact_paths.append(report)
     return rr
 
+def _merge_logs(parts: List[tuple], out_path: Path) -> Path:
+    """Concatenate (label, log) pairs into one log with a header per part."""
+    with out_path.open("wb") as out:
+        for label, path in parts:
+            out.write(f"===== {label} =====\n".encode("utf-8"))
+            try:
+                with path.open("rb") as f:
+                    shutil.copyfileobj(f, out)
+            except OSError:
+                continue
+    return out_path
+
+# Collects node IDs in-process so the result doesn't depend on -q/-qq in the project's addopts.
+_COLLECT = """
+import sys, pytest
+ids = []
+class _Collect:
+    def pytest_collection_finish(self, session):
+        ids.extend(item.nodeid for item in session.items)
+code = pytest.main(["--collect-only", "-p", "no:cacheprovider"] + sys.argv[2:], plugins=[_Collect()])
+open(sys.argv[1], "w", encoding="utf-8").write("\\n".join(ids))
+sys.exit(0 if code in (0, 5) else int(code))
+"""
+
+def _has_json_report() -> bool:
+    import importlib.util
+    return importlib.util.find_spec("pytest_jsonreport") is not None
+
+def run_pytest_sharded(repo_root: Path, out_dir: Path, marker: str = "e2e", shards: int = 2,
+                       extra_env: Optional[Dict[str, str]] = None, resources: Optional[SuiteResources] = None,
+                       runs_dir: Optional[Path] = None, on_output: Optional[OutputSink] = None) -> RunResult:
+    """Split the collected tests across `shards` pytest processes, balanced on historical durations.
+
+    Per-shard reports are merged back into pytest-junit.xml (and report.json when
+    pytest-json-report is installed), the same names a single-process run produces.
+    """
+    from .sharding import balance, estimated_loads, load_durations, merge_exit_codes, merge_json_reports, merge_junit
+
+    ids_file = out_dir / "collected.txt"
+    rr = _run([sys.executable, "-c", _COLLECT, str(ids_file), "-m", marker], cwd=repo_root, out_dir=out_dir,
+              name="pytest-collect", env=extra_env)
+    if rr.exit_code != 0:
+        return rr
+    ids = [l for l in ids_file.read_text(encoding="utf-8").splitlines() if l.strip()]
+    if not ids:
+        # nothing selected: a plain run reports it the usual way (exit 5)
+        return run_pytest(repo_root, out_dir, marker, extra_env, resources, on_output=on_output)
+
+    durations = load_durations(runs_dir or (repo_root / "runs"))
+    plan = balance(ids, durations, shards)
+    json_report = _has_json_report()
+    (out_dir / "shards.json").write_text(json.dumps({
+        "shards": len(plan),
+        "estimated_s": estimated_loads(plan, durations),
+        "tests": plan,
+    }, indent=2), encoding="utf-8")
+
+    def shard(i: int) -> RunResult:
+        sdir = out_dir / f"shard-{i}"
+        sdir.mkdir(parents=True, exist_ok=True)
+        # @argsfile keeps long ID lists clear of the Windows command-line limit
+        args_file = sdir / "tests.args"
+        args_file.write_text("\n".join(plan[i]) + "\n", encoding="utf-8")
+        cmd = [sys.executable, "-m", "pytest", "-m", marker, "--junitxml", str(sdir / "pytest-junit.xml"), "-q"]
+        if json_report:
+            cmd += ["--json-report", "--json-report-file", str(sdir / "report.json")]
+        cmd.append("@" + str(args_file))
+        return _run(cmd, cwd=repo_root, out_dir=sdir, name=f"pytest-shard{i}", env=extra_env, resources=resources,
+                    on_output=on_output)
+
+    with ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix="pytest-shard") as ex:
+        results = list(ex.map(shard, range(len(plan))))
+
+    artifacts = [ids_file, out_dir / "shards.json"]
+    junit = merge_junit([out_dir / f"shard-{i}" / "pytest-junit.xml" for i in range(len(plan))], out_dir / "pytest-junit.xml")
+    if junit:
+        artifacts.append(junit)
+    if json_report:
+        report = merge_json_reports([out_dir / f"shard-{i}" / "report.json" for i in range(len(plan))], out_dir / "report.json")
+        if report:
+            artifacts.append(report)
+    # pytest.stdout.log / .stderr.log as from a single-process run: collection, then each shard
+    stdout = _merge_logs([("collect", rr.stdout_path)] + [(f"shard {i}", r.stdout_path) for i, r in enumerate(results)],
+                         out_dir / "pytest.stdout.log")
+    stderr = _merge_logs([("collect", rr.stderr_path)] + [(f"shard {i}", r.stderr_path) for i, r in enumerate(results)],
+                         out_dir / "pytest.stderr.log")
+    artifacts = [stdout, stderr] + artifacts
+    for r in results:
+        artifacts += [r.stdout_path, r.stderr_path]
+    return RunResult(name="pytest", exit_code=merge_exit_codes([r.exit_code for r in results]),
+                     stdout_path=stdout, stderr_path=stderr, artifact_paths=artifacts)
+
 def _find_k6(k6_exe: str | None = None) -> str:
     # 1) explicit config path
     if k6_exe:
@@ -57,15 +348,244 @@ def _find_k6(k6_exe: str | None = None) -> str:
             return c
     raise FileNotFoundError("k6 executable not found (set PATH or set k6_exe in config YAML)")
 
-def run_k6(repo_root: Path, out_dir: Path, script: Path, extra_env: Optional[Dict[str, str]] = None, k6_exe: str | None = None) -> RunResult:
+def run_k6(repo_root: Path, out_dir: Path, script: Path, extra_env: Optional[Dict[str, str]] = None, k6_exe: str | None = None,
+           resources: Optional[SuiteResources] = None, on_output: Optional[OutputSink] = None,
+           live: Optional[dict] = None, shards: int = 1) -> RunResult:
+    """`live` (the profile's k6_live settings) adds the NDJSON output and tails it while k6 runs."""
+    if shards > 1:
+        return run_k6_sharded(repo_root, out_dir, script, shards, extra_env, k6_exe, resources, on_output, live)
     summary = out_dir / "k6-summary.json"
     exe = _find_k6(k6_exe)
     cmd = [exe, "run", str(script), "--summary-export", str(summary)]
-    rr = _run(cmd, cwd=repo_root, out_dir=out_dir, name="k6", env=extra_env)
+    if live is None:
+        rr = _run(cmd, cwd=repo_root, out_dir=out_dir, name="k6", env=extra_env, resources=resources, on_output=on_output)
+        rr.artifact_paths.append(summary)
+        return rr
+
+    from .k6live import ABORT_EXIT_CODE, LiveK6Monitor
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stream = out_dir / "k6-metrics.ndjson"
+    stream.unlink(missing_ok=True)
+    report = out_dir / "k6-live.json"
+    mon = LiveK6Monitor(stream, settings=live, on_output=on_output)
+    try:
+        rr = _run(cmd + ["--out", f"json={stream}"], cwd=repo_root, out_dir=out_dir, name="k6", env=extra_env,
+                  resources=resources, on_output=on_output, on_spawn=mon.attach)
+    finally:
+        mon.close()
+        report.write_text(json.dumps(mon.report(), indent=2), encoding="utf-8")
+    rr.live = mon.manifest_summary()
+    if mon.aborted:
+        # k6 stopped by us exits 105 (SIGINT) or 1 (terminate); the verdict is the lost threshold
+        rr.exit_code = ABORT_EXIT_CODE
+    rr.artifact_paths += [summary, stream, report]
+    return rr
+
+def _segments(n: int) -> List[str]:
+    # "0,1/4,2/4,3/4,1": the shared sequence keeps VU/iteration partitioning identical in every process
+    return ["0"] + [f"{i}/{n}" for i in range(1, n)] + ["1"]
+
+def run_k6_sharded(repo_root: Path, out_dir: Path, script: Path, shards: int, extra_env: Optional[Dict[str, str]] = None,
+                   k6_exe: str | None = None, resources: Optional[SuiteResources] = None,
+                   on_output: Optional[OutputSink] = None, live: Optional[dict] = None) -> RunResult:
+    """N k6 processes over disjoint execution segments of one script, supervised together.
+
+    Every shard writes NDJSON; the raw points of all shards feed one set of histograms, so the
+    merged k6-summary.json has the run's real percentiles (not averages of per-shard ones) and
+    thresholds are judged on the whole run. Shards are pinned round-robin to resources.cpus.
+    """
+    from .k6live import ABORT_EXIT_CODE, LiveK6Monitor
+    out_dir.mkdir(parents=True, exist_ok=True)
+    exe = _find_k6(k6_exe)
+    seq = _segments(shards)
+    streams = [out_dir / f"k6-shard{i}.ndjson" for i in range(shards)]
+    for p in streams:
+        p.unlink(missing_ok=True)
+    summary = out_dir / "k6-summary.json"
+    report = out_dir / "k6-live.json"
+    # without k6_live the monitor only merges (no live lines, no abort)
+    mon = LiveK6Monitor(streams, settings=live if live is not None else {"abort": False},
+                        on_output=on_output if live is not None else None)
+
+    def shard(i: int) -> RunResult:
+        res = resources
+        if resources and resources.cpus:
+            res = SuiteResources(cpus=[resources.cpus[i % len(resources.cpus)]], priority=resources.priority)
+        cmd = [exe, "run", str(script), "--execution-segment", f"{seq[i]}:{seq[i + 1]}",
+               "--execution-segment-sequence", ",".join(seq),
+               "--summary-export", str(out_dir / f"k6-shard{i}-summary.json"), "--out", f"json={streams[i]}"]
+        return _run(cmd, cwd=repo_root, out_dir=out_dir, name=f"k6-shard{i}", env=extra_env, resources=res,
+                    on_output=on_output, on_spawn=mon.attach)
+
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=shards, thread_name_prefix="k6-shard") as ex:
+            results = list(ex.map(shard, range(shards)))
+    finally:
+        mon.close()
+    wall = time.perf_counter() - t0
+    merged = mon.live.summary_export(wall)
+    merged["shards"] = {"count": shards, "segments": [f"{seq[i]}:{seq[i + 1]}" for i in range(shards)],
+                        "exit_codes": [r.exit_code for r in results]}
+    summary.write_text(json.dumps(merged, indent=2), encoding="utf-8")
+    report.write_text(json.dumps(mon.report(), indent=2), encoding="utf-8")
+
+    # a shard's own 99 only judged its slice; the merged thresholds decide. Other codes are real errors,
+    # except after a live abort: then every shard was stopped by us (105 / 1) and the verdict is 99.
+    errors = [r.exit_code for r in results if r.exit_code not in (0, ABORT_EXIT_CODE)]
+    if mon.aborted:
+        code = ABORT_EXIT_CODE
+    else:
+        code = max(errors) if errors else ABORT_EXIT_CODE if mon.live.thresholds_failed() else 0
+    artifacts = [summary, report]
+    for i, r in enumerate(results):
+        artifacts += [out_dir / f"k6-shard{i}-summary.json", streams[i], r.stdout_path, r.stderr_path]
+    rr = RunResult(name="k6", exit_code=code, stdout_path=results[0].stdout_path, stderr_path=results[0].stderr_path,
+                   artifact_paths=artifacts)
+    rr.live = dict(mon.manifest_summary(), shards=shards)
+    return rr
+
+def run_loadgen(repo_root: Path, out_dir: Path, settings: Optional[dict] = None, extra_env: Optional[Dict[str, str]] = None,
+                resources: Optional[SuiteResources] = None, on_output: Optional[OutputSink] = None) -> RunResult:
+    # Summary goes next to k6-summary.json so both perf results live in the same suite dir.
+    settings = settings or {}
+    summary = out_dir / "loadgen-summary.json"
+    cmd = [
+        sys.executable, "-m", "halo_test_lab.loadgen",
+        "--scenario", str(settings.get("scenario", "session_lock_switch")),
+        "--rate", str(settings.get("rate_per_s", 10)),
+        "--duration", str(settings.get("duration_s", 30)),
+        "--max-active", str(settings.get("max_active", 10000)),
+        "--summary-export", str(summary),
+    ]
+    rr = _run(cmd, cwd=repo_root, out_dir=out_dir, name="loadgen", env=extra_env, resources=resources, on_output=on_output)
     rr.artifact_paths.append(summary)
     return rr
 
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+@dataclass
+class SuiteSpec:
+    name: str
+    # called with the suite's resources; typically a closure around run_pytest/run_k6/run_loadgen
+    run: Callable[[Optional[SuiteResources]], RunResult]
+    resources: Optional[SuiteResources] = None
+
+@dataclass
+class SuiteOutcome:
+    name: str
+    exit_code: int
+    started_utc: str
+    ended_utc: str
+    wall_s: float
+    artifact_paths: List[Path] = field(default_factory=list)
+    error: Optional[str] = None
+    resources: Optional[SuiteResources] = None
+    live: Optional[dict] = None
+
+    def to_manifest(self) -> dict:
+        d = {
+            "name": self.name,
+            "exit_code": self.exit_code,
+            "started_utc": self.started_utc,
+            "ended_utc": self.ended_utc,
+            "wall_s": round(self.wall_s, 3),
+            "artifacts": [str(p) for p in self.artifact_paths],
+        }
+        if self.resources and (self.resources.cpus or self.resources.priority):
+            d["resources"] = {"cpus": self.resources.cpus, "priority": self.resources.priority}
+        if self.live:
+            d["live"] = self.live
+        if self.error:
+            d["error"] = self.error
+        return d
+
+def run_suites(specs: List[SuiteSpec], max_parallel: int = 0,
+               on_event: Optional[Callable[[str, str, Optional[SuiteOutcome]], None]] = None) -> List[SuiteOutcome]:
+    """Run independent suites concurrently (max_parallel <= 0: all at once).
+
+    on_event(name, "start" | "done", outcome) is called from worker threads.
+    Outcomes are returned in spec order.
+    """
+    if not specs:
+        return []
+    workers = len(specs) if max_parallel <= 0 else min(max_parallel, len(specs))
+
+    def _one(spec: SuiteSpec) -> SuiteOutcome:
+        if on_event:
+            on_event(spec.name, "start", None)
+        started = _utc_now_iso()
+        t0 = time.perf_counter()
+        try:
+            rr = spec.run(spec.resources)
+            out = SuiteOutcome(spec.name, rr.exit_code, started, _utc_now_iso(), time.perf_counter() - t0,
+                               list(rr.artifact_paths), resources=spec.resources, live=rr.live)
+        except Exception as e:
+            out = SuiteOutcome(spec.name, 1, started, _utc_now_iso(), time.perf_counter() - t0,
+                               error=f"{type(e).__name__}: {e}", resources=spec.resources)
+        if on_event:
+            on_event(spec.name, "done", out)
+        return out
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="suite") as ex:
+        return list(ex.map(_one, specs))
+
 def write_run_manifest(out_dir: Path, manifest: dict) -> Path:
     path = out_dir / "run-manifest.json"
     path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
     return path
+
+def write_run_index(out_dir: Path, manifest: dict) -> Path:
+    """index.html of a run folder: suites with their artifacts, the manifest and resource telemetry."""
+    def href(p: str) -> str:
+        if not Path(p).is_absolute():
+            return Path(p).as_posix()
+        try:
+            return Path(p).resolve().relative_to(out_dir.resolve()).as_posix()
+        except ValueError:
+            return Path(p).as_uri() if Path(p).is_absolute() else p
+
+    def link(p: str) -> str:
+        # artifacts beyond the store's retention keep their entry but not their file
+        if not (out_dir / href(p)).exists() and not Path(p).exists():
+            return f"{html.escape(Path(p).name)} (pruned)"
+        return f'<a href="{html.escape(href(p))}">{html.escape(Path(p).name)}</a>'
+
+    rows = []
+    for s in manifest.get("suites", []):
+        links = " ".join(link(a) for a in s.get("artifacts", []))
+        rows.append(f'<li><b>{html.escape(s["name"])}</b> exit={s["exit_code"]} ({s["wall_s"]}s) {links}</li>')
+    reports = ['<li><a href="run-manifest.json">Run manifest (json)</a></li>']
+    tel = manifest.get("telemetry") or {}
+    if tel.get("summary"):
+        reports.append(f'<li>Resource telemetry: {link(tel["summary"])} (summary), {link(tel["series"])} (series)</li>')
+    if manifest.get("network"):
+        reports.append('<li><a href="netem.json">Network shaping stats (json)</a></li>')
+    hints = "".join(f"<li>{html.escape(h)}</li>" for h in tel.get("hints", []))
+
+    page = f"""<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+  <title>Halo Test Lab run {html.escape(manifest.get("timestamp", ""))}</title>
+  <style>body {{ font-family: Arial, sans-serif; margin: 24px; }} a {{ text-decoration:none; }}</style>
+</head>
+<body>
+  <h1>Run {html.escape(manifest.get("timestamp", ""))}</h1>
+  <p><b>Profile</b>: {html.escape(str((manifest.get("env") or {}).get("name", "")))} &middot; <b>Wall (s)</b>: {manifest.get("wall_s", "-")}</p>
+  <h2>Suites</h2>
+  <ul>
+    {"".join(rows)}
+  </ul>
+  <h2>Reports</h2>
+  <ul>
+    {"".join(reports)}
+  </ul>
+  {f"<h2>Resource hints</h2><ul>{hints}</ul>" if hints else ""}
+</body>
+</html>
+"""
+    path = out_dir / "index.html"
+    path.write_text(page, encoding="utf-8")
+    return path
@@ -1,89 +1,34 @@
 from __future__ import annotations
 import sys
 from pathlib import Path
-from datetime import datetime
 from PySide6.QtCore import QThread, Signal
 from PySide6.QtWidgets import (
     QApplication, QComboBox, QCheckBox, QFileDialog, QGridLayout, QGroupBox, QHBoxLayout,
     QLabel, QLineEdit, QMainWindow, QMessageBox, QPushButton, QPlainTextEdit, QVBoxLayout, QWidget
 )
 
-from .config import load_env_config
-from .executor import run_pytest, run_k6, write_run_manifest
+from .runner import REPO_ROOT, run_profile
 
-REPO_ROOT = Path(__file__).resolve().parents[1]
+# Suite output arrives in batches (runner.LOG_FPS per second); the widget keeps at most
+# LOG_MAX_BLOCKS lines so multi-hour soak runs don't grow memory. Full logs are on disk.
+LOG_MAX_BLOCKS = 20000
 
 class RunnerThread(QThread):
     log = Signal(str)
     done = Signal(int, str)
 
-    def __init__(self, env_path: Path, do_pytest: bool, do_k6: bool, k6_script: Path | None):
+    def __init__(self, env_path: Path, do_pytest: bool, do_k6: bool, k6_script: Path | None, do_loadgen: bool = False):
         super().__init__()
         self.env_path = env_path
         self.do_pytest = do_pytest
         self.do_k6 = do_k6
         self.k6_script = k6_script
+        self.do_loadgen = do_loadgen
 
     def run(self) -> None:
-        ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-        out_dir = REPO_ROOT / "runs" / ts
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        env = load_env_config(self.env_path)
-        # Prefer explicit health_url; otherwise fall back to base_url (user chooses what it means).
-        health_url = env.health_url or env.base_url
-
-        extra_env = {
-            "HALO_BASE_URL": env.base_url,
-            "HALO_HEALTH_URL": health_url,
-            "HALO_CLIENT_ID": env.client_id,
-            "HALO_API_KEY": env.api_key,
-        }
-
-        manifest = {
-            "timestamp": ts,
-            "env": env.__dict__,
-            "repo_root": str(REPO_ROOT),
-            "suites": [],
-        }
-
-        exit_code = 0
-
-        try:
-            self.log.emit(f"[Run] Output dir: {out_dir}")
-            self.log.emit(f"[Env] {env.name} => base_url={env.base_url}")
-            self.log.emit(f"[Env] health_url={health_url}")
-
-            if self.do_pytest:
-                self.log.emit("[Suite] pytest (E2E/Regression) starting...")
-                rr = run_pytest(REPO_ROOT, out_dir / "pytest", marker="e2e", extra_env=extra_env)
-                manifest["suites"].append({
-                    "name": "pytest",
-                    "exit_code": rr.exit_code,
-                    "artifacts": [str(p) for p in rr.artifact_paths]
-                })
-                self.log.emit(f"[Suite] pytest done (exit={rr.exit_code})")
-                exit_code = max(exit_code, rr.exit_code)
-
-            if self.do_k6:
-                if not self.k6_script:
-                    raise RuntimeError("k6 script not selected")
-                self.log.emit("[Suite] k6 (Load/Perf) starting...")
-                rr = run_k6(REPO_ROOT, out_dir / "k6", script=self.k6_script, extra_env=extra_env, k6_exe=env.k6_exe)
-                manifest["suites"].append({
-                    "name": "k6",
-                    "exit_code": rr.exit_code,
-                    "artifacts": [str(p) for p in rr.artifact_paths]
-                })
-                self.log.emit(f"[Suite] k6 done (exit={rr.exit_code})")
-                exit_code = max(exit_code, rr.exit_code)
-
-            mpath = write_run_manifest(out_dir, manifest)
-            self.log.emit(f"[Manifest] {mpath}")
-            self.done.emit(exit_code, str(out_dir))
-        except Exception as e:
-            self.log.emit(f"[Error] {e}")
-            self.done.emit(1, str(out_dir))
+        suites = [name for name, on in (("pytest", self.do_pytest), ("k6", self.do_k6), ("loadgen", self.do_loadgen)) if on]
+        code, out_dir = run_profile(self.env_path, suites, self.k6_script, log=self.log.emit)
+        self.done.emit(code, str(out_dir))
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -99,6 +44,9 @@ class MainWindow(QMainWindow):
         self.k6_cb = QCheckBox("Run k6 (Load / Performance)")
         self.k6_cb.setChecked(True)
 
+        self.loadgen_cb = QCheckBox("Run built-in load engine (conversation sessions)")
+        self.loadgen_cb.setChecked(False)
+
         self.k6_path = QLineEdit(str(REPO_ROOT / "examples" / "k6" / "basic.js"))
         self.k6_browse = QPushButton("Browse…")
         self.k6_browse.clicked.connect(self._browse_k6)
@@ -108,6 +56,7 @@ class MainWindow(QMainWindow):
 
         self.log = QPlainTextEdit()
         self.log.setReadOnly(True)
+        self.log.setMaximumBlockCount(LOG_MAX_BLOCKS)
 
         layout = QVBoxLayout()
 
@@ -124,6 +73,7 @@ class MainWindow(QMainWindow):
         grid.addWidget(QLabel("k6 script:"), 2, 0)
         grid.addWidget(self.k6_path, 2, 1)
         grid.addWidget(self.k6_browse, 2, 2)
+        grid.addWidget(self.loadgen_cb, 3, 0, 1, 2)
         suite_box.setLayout(grid)
 
         layout.addWidget(env_box)
@@ -173,10 +123,11 @@ class MainWindow(QMainWindow):
         do_pytest = self.pytest_cb.isChecked()
         do_k6 = self.k6_cb.isChecked()
         k6_script = Path(self.k6_path.text()) if do_k6 else None
+        do_loadgen = self.loadgen_cb.isChecked()
 
         self.run_btn.setEnabled(False)
         self._append("=== Starting run ===")
-        self.worker = RunnerThread(env_path, do_pytest, do_k6, k6_script)
+        self.worker = RunnerThread(env_path, do_pytest, do_k6, k6_script, do_loadgen)
         self.worker.log.connect(self._append)
         self.worker.done.connect(self._done)
         self.worker.start()
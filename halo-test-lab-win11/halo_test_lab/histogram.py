@@ -0,0 +1,110 @@
+from __future__ import annotations
+import math
+from typing import Dict, Iterable, Optional
+
+# HDR-style log-linear latency histogram (values in microseconds).
+# Values below 2**_SUB_BITS (256 us) are exact; above, each power of two is split
+# into 128 linear sub-buckets (the top _SUB_BITS = 8 significant bits are kept),
+# i.e. < 1% relative error across the whole range, with at most a few thousand
+# sparse buckets whatever the sample count.
+# Histograms from different processes/shards merge exactly (counts add up),
+# which is what makes merged percentiles correct.
+
+_SUB_BITS = 8
+_SUB_COUNT = 1 << _SUB_BITS          # 256 linear buckets for small values
+_HALF = _SUB_COUNT >> 1              # 128 sub-buckets per power of two above that
+
+def _index(v: int) -> int:
+    if v < _SUB_COUNT:
+        return v
+    shift = v.bit_length() - _SUB_BITS
+    return _SUB_COUNT + (shift - 1) * _HALF + ((v >> shift) - _HALF)
+
+def _upper(idx: int) -> int:
+    # highest value that maps to idx (HDR "highest equivalent value")
+    if idx < _SUB_COUNT:
+        return idx
+    shift = (idx - _SUB_COUNT) // _HALF + 1
+    sub = (idx - _SUB_COUNT) % _HALF + _HALF
+    return ((sub + 1) << shift) - 1
+
+class LatencyHistogram:
+    __slots__ = ("counts", "total", "sum_us", "min_us", "max_us")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    def record(self, value_us: float, count: int = 1) -> None:
+        v = max(0, int(value_us))
+        i = _index(v)
+        self.counts[i] = self.counts.get(i, 0) + count
+        self.total += count
+        self.sum_us += v * count
+        if self.min_us is None or v < self.min_us:
+            self.min_us = v
+        if self.max_us is None or v > self.max_us:
+            self.max_us = v
+
+    def record_ms(self, value_ms: float) -> None:
+        self.record(value_ms * 1000.0)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        for i, n in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + n
+        self.total += other.total
+        self.sum_us += other.sum_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        if other.max_us is not None and (self.max_us is None or other.max_us > self.max_us):
+            self.max_us = other.max_us
+        return self
+
+    def percentile(self, p: float) -> float:
+        """Value (us) at percentile p (0..100); 0.0 when empty."""
+        if not self.total:
+            return 0.0
+        rank = min(self.total, max(1, math.ceil(p / 100.0 * self.total - 1e-9)))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return float(min(_upper(i), self.max_us))
+        return float(self.max_us or 0)
+
+    def mean(self) -> float:
+        return self.sum_us / self.total if self.total else 0.0
+
+    def summary_ms(self, percentiles: Iterable[float] = (50, 90, 95, 99, 99.9)) -> dict:
+        out = {
+            "count": self.total,
+            "min": (self.min_us or 0) / 1000.0,
+            "mean": round(self.mean() / 1000.0, 3),
+            "max": (self.max_us or 0) / 1000.0,
+        }
+        for p in percentiles:
+            out[f"p{p:g}"] = self.percentile(p) / 1000.0
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "unit": "us",
+            "total": self.total,
+            "sum": self.sum_us,
+            "min": self.min_us,
+            "max": self.max_us,
+            "counts": {str(i): n for i, n in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "LatencyHistogram":
+        h = cls()
+        h.counts = {int(i): int(n) for i, n in (d.get("counts") or {}).items()}
+        h.total = int(d.get("total") or sum(h.counts.values()))
+        h.sum_us = int(d.get("sum") or 0)
+        h.min_us = d.get("min")
+        h.max_us = d.get("max")
+        return h
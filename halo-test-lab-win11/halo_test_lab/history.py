@@ -0,0 +1,340 @@
+"""SQLite index over runs/<ts>/ artifacts.
+
+Each finished run is ingested once (manifest, pytest JUnit, k6 / loadgen summaries);
+re-ingesting is skipped unless the run's artifacts changed, so backfilling old runs is
+incremental. Trend queries then hit the index instead of re-parsing every folder.
+
+    python -m halo_test_lab.history ingest                 # backfill runs/ (incremental)
+    python -m halo_test_lab.history slowest --last 10
+    python -m halo_test_lab.history p95 --metric http_req_duration --last 20
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_RUNS_DIR = REPO_ROOT / "runs"
+DB_NAME = "history.sqlite"
+
+# profile keys never written to the index
+_SECRET_KEYS = {"api_key", "client_secret", "token", "password"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_dir TEXT NOT NULL UNIQUE,
+    ts TEXT NOT NULL,
+    env_name TEXT,
+    base_url TEXT,
+    env_json TEXT,
+    exit_code INTEGER,
+    wall_s REAL,
+    fingerprint TEXT NOT NULL,
+    ingested_utc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs(ts);
+CREATE TABLE IF NOT EXISTS suites (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    exit_code INTEGER,
+    started_utc TEXT,
+    ended_utc TEXT,
+    wall_s REAL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS tests (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    classname TEXT NOT NULL,
+    name TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration_s REAL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS tests_key ON tests(classname, name);
+CREATE INDEX IF NOT EXISTS tests_run ON tests(run_id);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    stat TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS metrics_key ON metrics(metric, endpoint, stat);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics(run_id);
+"""
+
+# files that make up a run, relative to runs/<ts>/
+_ARTIFACTS = ("run-manifest.json", "pytest/pytest-junit.xml", "k6/k6-summary.json", "k6/loadgen-summary.json")
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+def _fingerprint(run_dir: Path) -> Optional[str]:
+    h = hashlib.sha256()
+    found = False
+    for rel in _ARTIFACTS:
+        p = run_dir / rel
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        found = True
+        h.update(f"{rel}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest() if found else None
+
+def _redact(env: dict) -> dict:
+    return {k: ("***" if k in _SECRET_KEYS and v else v) for k, v in (env or {}).items()}
+
+# --- parsers -------------------------------------------------------------------
+
+def parse_junit(path: Path) -> Iterator[Tuple[str, str, str, float, Optional[str]]]:
+    """(classname, name, outcome, duration_s, message) per testcase."""
+    root = ET.parse(path).getroot()
+    for tc in root.iter("testcase"):
+        outcome, message = "passed", None
+        for tag in ("failure", "error", "skipped"):
+            el = tc.find(tag)
+            if el is not None:
+                outcome = {"failure": "failed", "error": "error", "skipped": "skipped"}[tag]
+                message = (el.get("message") or "")[:500] or None
+                break
+        try:
+            dur = float(tc.get("time") or 0.0)
+        except ValueError:
+            dur = 0.0
+        yield tc.get("classname", ""), tc.get("name", ""), outcome, dur, message
+
+_K6_TAGGED = re.compile(r"^(?P<metric>[^{]+)\{(?P<tags>.*)\}$")
+
+def _k6_stat(key: str) -> str:
+    # k6 uses "p(95)" / "med"; the index uses p95 / p50
+    m = re.fullmatch(r"p\((\d+(?:\.\d+)?)\)", key)
+    if m:
+        return "p" + m.group(1)
+    return {"med": "p50"}.get(key, key)
+
+def _k6_endpoint(tags: str) -> str:
+    # "name:GET /api/x" or "url:https://...,method:GET" -> prefer name, then url
+    parts = dict(t.split(":", 1) for t in tags.split(",") if ":" in t)
+    return parts.get("name") or parts.get("url") or tags
+
+def parse_k6_summary(path: Path) -> Iterator[Tuple[str, str, str, float]]:
+    """(metric, endpoint, stat, value) from `k6 run --summary-export`.
+
+    Untagged metrics are stored with endpoint "*"; per-endpoint rows exist for tagged
+    submetrics such as http_req_duration{name:GET /health} (k6 exports those when a
+    threshold references them).
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for key, stats in (data.get("metrics") or {}).items():
+        m = _K6_TAGGED.match(key)
+        metric, endpoint = (m.group("metric"), _k6_endpoint(m.group("tags"))) if m else (key, "*")
+        for stat, value in (stats or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield metric, endpoint, _k6_stat(stat), float(value)
+
+def parse_loadgen_summary(path: Path) -> Iterator[Tuple[str, str, str, float]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    lat = data.get("latency_ms") or {}
+    groups = [("overall", "*", lat.get("overall") or {})]
+    groups += [("turn", f"turn:{k}", v) for k, v in (lat.get("per_turn") or {}).items()]
+    groups += [("reason", f"reason:{k}", v) for k, v in (lat.get("per_routing_reason") or {}).items()]
+    for _, endpoint, stats in groups:
+        for stat, value in stats.items():
+            if isinstance(value, (int, float)):
+                yield "latency_ms", endpoint, stat, float(value)
+    for stat, value in (data.get("service_time_ms") or {}).items():
+        if isinstance(value, (int, float)):
+            yield "service_time_ms", "*", stat, float(value)
+    for stat, value in (data.get("requests") or {}).items():
+        if isinstance(value, (int, float)):
+            yield "requests", "*", stat, float(value)
+
+# --- index ---------------------------------------------------------------------
+
+class RunHistory:
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ingest
+
+    def ingest_run(self, run_dir: Path, force: bool = False) -> bool:
+        """Index one runs/<ts> folder. Returns False when it was already up to date (or empty)."""
+        run_dir = run_dir.resolve()
+        fp = _fingerprint(run_dir)
+        if fp is None:
+            return False
+        row = self.conn.execute("SELECT id, fingerprint FROM runs WHERE run_dir = ?", (str(run_dir),)).fetchone()
+        if row and row["fingerprint"] == fp and not force:
+            return False
+
+        manifest: dict = {}
+        mpath = run_dir / "run-manifest.json"
+        if mpath.exists():
+            try:
+                manifest = json.loads(mpath.read_text(encoding="utf-8"))
+            except ValueError:
+                manifest = {}
+        env = manifest.get("env") or {}
+        suites = manifest.get("suites") or []
+        exit_code = max([int(s.get("exit_code") or 0) for s in suites], default=None)
+
+        with self.conn:
+            if row:
+                self.conn.execute("DELETE FROM runs WHERE id = ?", (row["id"],))
+            cur = self.conn.execute(
+                "INSERT INTO runs(run_dir, ts, env_name, base_url, env_json, exit_code, wall_s, fingerprint, ingested_utc) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(run_dir), str(manifest.get("timestamp") or run_dir.name), env.get("name"), env.get("base_url"),
+                 json.dumps(_redact(env), sort_keys=True), exit_code, manifest.get("wall_s"), fp, _utc_now_iso()))
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO suites(run_id, name, exit_code, started_utc, ended_utc, wall_s) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, s.get("name"), s.get("exit_code"), s.get("started_utc"), s.get("ended_utc"), s.get("wall_s"))
+                 for s in suites if s.get("name")])
+
+            junit = run_dir / "pytest" / "pytest-junit.xml"
+            if junit.exists():
+                try:
+                    self.conn.executemany("INSERT INTO tests(run_id, classname, name, outcome, duration_s, message) VALUES (?, ?, ?, ?, ?, ?)",
+                                          ((run_id, *t) for t in parse_junit(junit)))
+                except ET.ParseError:
+                    pass
+            for source, rel, parser in (("k6", "k6/k6-summary.json", parse_k6_summary),
+                                        ("loadgen", "k6/loadgen-summary.json", parse_loadgen_summary)):
+                p = run_dir / rel
+                if p.exists():
+                    try:
+                        self.conn.executemany("INSERT INTO metrics(run_id, source, metric, endpoint, stat, value) VALUES (?, ?, ?, ?, ?, ?)",
+                                              ((run_id, source, *m) for m in parser(p)))
+                    except ValueError:
+                        pass
+        return True
+
+    def ingest_all(self, runs_dir: Path, force: bool = False) -> Tuple[int, int]:
+        """Backfill every runs/<ts> folder; returns (ingested, up_to_date)."""
+        ingested = skipped = 0
+        for d in sorted(p for p in runs_dir.iterdir() if p.is_dir()) if runs_dir.exists() else []:
+            if self.ingest_run(d, force=force):
+                ingested += 1
+            else:
+                skipped += 1
+        return ingested, skipped
+
+    # queries
+
+    def _last_run_ids(self, last_runs: int, env_name: Optional[str]) -> List[int]:
+        sql = "SELECT id FROM runs" + (" WHERE env_name = ?" if env_name else "") + " ORDER BY ts DESC LIMIT ?"
+        args: tuple = (env_name, last_runs) if env_name else (last_runs,)
+        return [r["id"] for r in self.conn.execute(sql, args)]
+
+    def slowest_tests(self, last_runs: int = 10, limit: int = 20, env_name: Optional[str] = None) -> List[dict]:
+        """Tests with the highest mean duration over the last N runs (skipped tests excluded)."""
+        ids = self._last_run_ids(last_runs, env_name)
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"SELECT t.classname, t.name, COUNT(*) AS runs, AVG(t.duration_s) AS mean_s, MAX(t.duration_s) AS max_s, "
+            f"SUM(t.outcome IN ('failed', 'error')) AS failures "
+            f"FROM tests t WHERE t.run_id IN ({marks}) AND t.outcome != 'skipped' "
+            f"GROUP BY t.classname, t.name ORDER BY mean_s DESC LIMIT ?", (*ids, limit))
+        return [{"test": f"{r['classname']}::{r['name']}", "runs": r["runs"], "mean_s": round(r["mean_s"], 3),
+                 "max_s": round(r["max_s"], 3), "failures": r["failures"]} for r in rows]
+
+    def p95_trend(self, metric: str = "http_req_duration", endpoint: Optional[str] = None, last_runs: int = 20,
+                  env_name: Optional[str] = None, stat: str = "p95") -> List[dict]:
+        """One row per (run, endpoint), oldest first."""
+        ids = self._last_run_ids(last_runs, env_name)
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        sql = (f"SELECT r.ts, r.env_name, m.source, m.endpoint, m.value FROM metrics m JOIN runs r ON r.id = m.run_id "
+               f"WHERE m.run_id IN ({marks}) AND m.metric = ? AND m.stat = ?")
+        args: list = [*ids, metric, stat]
+        if endpoint:
+            sql += " AND m.endpoint = ?"
+            args.append(endpoint)
+        sql += " ORDER BY m.endpoint, r.ts"
+        return [{"ts": r["ts"], "env": r["env_name"], "source": r["source"], "endpoint": r["endpoint"], stat: r["value"]}
+                for r in self.conn.execute(sql, args)]
+
+def ingest_run_dir(run_dir: Path, db_path: Optional[Path] = None) -> bool:
+    """Index a just-finished run (used by the GUI runner)."""
+    with RunHistory(db_path or run_dir.parent / DB_NAME) as h:
+        return h.ingest_run(run_dir)
+
+# --- CLI -----------------------------------------------------------------------
+
+def _print_table(rows: List[dict]) -> None:
+    if not rows:
+        print("(no data)")
+        return
+    cols = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in cols))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab.history", description="Halo Test Lab run history index")
+    ap.add_argument("--runs-dir", type=Path, default=DEFAULT_RUNS_DIR)
+    ap.add_argument("--db", type=Path, default=None, help=f"default: <runs-dir>/{DB_NAME}")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest", help="index new/changed runs (incremental backfill)")
+    ing.add_argument("--force", action="store_true", help="re-index every run")
+    sl = sub.add_parser("slowest", help="slowest tests over the last N runs")
+    sl.add_argument("--last", type=int, default=10)
+    sl.add_argument("--limit", type=int, default=20)
+    sl.add_argument("--env", default=None, help="profile name filter")
+    sl.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    tr = sub.add_parser("p95", help="p95 trend per endpoint")
+    tr.add_argument("--metric", default="http_req_duration")
+    tr.add_argument("--endpoint", default=None)
+    tr.add_argument("--stat", default="p95")
+    tr.add_argument("--last", type=int, default=20)
+    tr.add_argument("--env", default=None, help="profile name filter")
+    tr.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = ap.parse_args(argv)
+
+    with RunHistory(args.db or args.runs_dir / DB_NAME) as h:
+        if args.cmd == "ingest":
+            done, skipped = h.ingest_all(args.runs_dir, force=args.force)
+            print(f"HISTORY_INGESTED={done} UP_TO_DATE={skipped} DB={h.db_path}")
+            return 0
+        if args.cmd == "slowest":
+            rows = h.slowest_tests(args.last, args.limit, args.env)
+        else:
+            rows = h.p95_trend(args.metric, args.endpoint, args.last, args.env, args.stat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        _print_table(rows)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
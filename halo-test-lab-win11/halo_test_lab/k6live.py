@@ -0,0 +1,481 @@
+"""Live k6 metrics: tail `k6 run --out json=...` while k6 runs, rolling percentiles, early abort.
+
+k6 writes one JSON object per line: "Metric" records (type, thresholds) and "Point" records
+(metric, time, value, tags). Points are folded into memory-bounded series per metric and per
+`name` tag (http_* metrics, as k6 submetrics `http_req_duration{name:GET /health}`):
+
+- trends go into LatencyHistogram (sparse, < 1% error) - one cumulative, plus one per second
+  for the last `window_s` seconds (rolling p50/p95/p99);
+- counters / rates / gauges keep per-second sums, so RPS and error rate are rolling too;
+- at most `max_series` series; further tag values only count towards the metric's total.
+
+Thresholds come from the script's own `options.thresholds` (the Metric records carry them) or
+from `k6_live.thresholds` in the profile. A threshold is *lost* when it can't recover (count/max
+over the limit, min under it) or when it has been failing on the cumulative data for `sustain_s`
+after `grace_s` and `min_samples`; with `abort` on, k6 is stopped there instead of at the end.
+
+    python -m halo_test_lab.k6live runs/<ts>/k6/k6-metrics.ndjson        # summarize a finished run
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .histogram import LatencyHistogram
+
+DEFAULTS = {
+    "window_s": 30,         # rolling window for the live numbers
+    "report_s": 5.0,        # live line / timeline point every N seconds
+    "max_series": 200,
+    "abort": True,
+    "grace_s": 30.0,        # no statistical abort before this much data time
+    "sustain_s": 15.0,      # ... and only after failing this long without a break
+    "min_samples": 100,
+    "thresholds": {},       # extra/overriding thresholds: {metric[{tag:value}]: [expr, ...]}
+}
+POLL_S = 0.2
+TIMELINE_MAX = 720          # 1 h at report_s=5
+ABORT_EXIT_CODE = 99        # k6's own "thresholds have been crossed"
+STOP_GRACE_S = 15.0
+_TAGGED = ("http_",)        # metrics split per `name` tag
+
+class _Slot:
+    __slots__ = ("hist", "count", "nonzero", "sum", "last")
+
+    def __init__(self, trend: bool):
+        self.hist = LatencyHistogram() if trend else None
+        self.count = 0
+        self.nonzero = 0
+        self.sum = 0.0
+        self.last = 0.0
+
+    def add(self, v: float) -> None:
+        if self.hist is not None:
+            self.hist.record_ms(v)
+        self.count += 1
+        self.sum += v
+        self.last = v
+        if v:
+            self.nonzero += 1
+
+class _Series:
+    __slots__ = ("kind", "total", "ring")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.total = _Slot(kind == "trend")
+        self.ring: Deque[Tuple[int, _Slot]] = deque()
+
+    def add(self, sec: int, v: float, window_s: int) -> None:
+        self.total.add(v)
+        # sharded runs interleave sources a little: look back a few slots before opening one
+        for i in range(-1, -min(4, len(self.ring)) - 1, -1):
+            if self.ring[i][0] == sec:
+                self.ring[i][1].add(v)
+                return
+        slot = _Slot(self.kind == "trend")
+        slot.add(v)
+        self.ring.append((sec, slot))
+        while self.ring and self.ring[0][0] <= sec - window_s:
+            self.ring.popleft()
+
+    def window(self, now: int, window_s: int) -> _Slot:
+        w = _Slot(self.kind == "trend")
+        for sec, s in self.ring:
+            if sec > now - window_s:
+                if w.hist is not None:
+                    w.hist.merge(s.hist)
+                w.count += s.count
+                w.nonzero += s.nonzero
+                w.sum += s.sum
+                w.last = s.last
+        return w
+
+def _stats(kind: str, s: _Slot, span_s: float) -> dict:
+    if kind == "trend":
+        h = s.hist
+        return {"count": h.total, "avg": round(h.mean() / 1000.0, 3), "min": (h.min_us or 0) / 1000.0,
+                "p50": h.percentile(50) / 1000.0, "p95": h.percentile(95) / 1000.0, "p99": h.percentile(99) / 1000.0,
+                "max": (h.max_us or 0) / 1000.0}
+    if kind == "counter":
+        return {"count": s.sum, "rate": round(s.sum / span_s, 3) if span_s else 0.0}
+    if kind == "rate":
+        return {"rate": round(s.nonzero / s.count, 5) if s.count else 0.0, "passes": s.nonzero, "fails": s.count - s.nonzero}
+    return {"value": s.last}
+
+# --- thresholds ---------------------------------------------------------------------
+
+_EXPR = re.compile(r"^\s*(?P<agg>avg|min|max|med|count|rate|value|p\((?P<p>[\d.]+)\))\s*(?P<op><=|>=|===|==|!=|<|>)\s*(?P<v>-?[\d.]+(?:e-?\d+)?)\s*$")
+_OPS = {"<": lambda a, b: a < b, "<=": lambda a, b: a <= b, ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+        "==": lambda a, b: a == b, "===": lambda a, b: a == b, "!=": lambda a, b: a != b}
+# aggregates that can only move one way: once over the limit, the threshold is lost for good
+_MONOTONIC = {("count", "<"), ("count", "<="), ("max", "<"), ("max", "<="), ("min", ">"), ("min", ">=")}
+
+class Threshold:
+    def __init__(self, target: str, expr: str):
+        self.target = target
+        self.expr = expr
+        m = _EXPR.match(expr)
+        self.agg = m.group("agg") if m else None
+        self.p = float(m.group("p")) if m and m.group("p") else None
+        self.op = m.group("op") if m else None
+        self.limit = float(m.group("v")) if m else 0.0
+        self.ok: Optional[bool] = None
+        self.value: Optional[float] = None
+        self.failing_since: Optional[int] = None
+        self.lost = False
+        self.reason = "" if m else "unsupported expression"
+
+    def observe(self, kind: str, s: _Slot, span_s: float) -> Optional[float]:
+        agg = self.agg
+        if kind == "trend":
+            h = s.hist
+            table = {"avg": h.mean() / 1000.0, "min": (h.min_us or 0) / 1000.0, "max": (h.max_us or 0) / 1000.0,
+                     "med": h.percentile(50) / 1000.0, "count": float(h.total)}
+            return h.percentile(self.p) / 1000.0 if agg.startswith("p(") else table.get(agg)
+        if kind == "counter":
+            return {"count": s.sum, "rate": s.sum / span_s if span_s else 0.0}.get(agg)
+        if kind == "rate":
+            return s.nonzero / s.count if agg == "rate" and s.count else None
+        return s.last if agg == "value" else None
+
+    def to_dict(self) -> dict:
+        return {"target": self.target, "expr": self.expr, "ok": self.ok, "value": self.value, "lost": self.lost,
+                **({"reason": self.reason} if self.reason else {})}
+
+# --- aggregator -------------------------------------------------------------------
+
+class K6Live:
+    """Folds k6 NDJSON records into rolling series and tracks thresholds (not thread-safe)."""
+
+    def __init__(self, settings: Optional[dict] = None):
+        self.cfg = dict(DEFAULTS, **(settings or {}))
+        self.window_s = int(self.cfg["window_s"])
+        self.kinds: Dict[str, str] = {}
+        self.series: Dict[str, _Series] = {}
+        self.thresholds: Dict[Tuple[str, str], Threshold] = {}
+        self.points = 0
+        self.bad_lines = 0
+        self.dropped_series = 0
+        self.gauges: Dict[str, Dict[int, List[float]]] = {}  # metric -> source -> [last, min, max]
+        self.first_sec: Optional[int] = None
+        self.now_sec: Optional[int] = None
+        self._ts_key = ""
+        self._ts_sec = 0
+        for target, exprs in (self.cfg.get("thresholds") or {}).items():
+            for e in ([exprs] if isinstance(exprs, str) else exprs):
+                self.thresholds[(target, e)] = Threshold(target, e)
+
+    def _sec(self, ts: str) -> int:
+        key = ts[:19]  # whole seconds; consecutive points mostly share them
+        if key != self._ts_key:
+            self._ts_key = key
+            self._ts_sec = int(datetime.fromisoformat(key).replace(tzinfo=timezone.utc).timestamp())
+        return self._ts_sec
+
+    def ingest_line(self, line: str, source: int = 0) -> None:
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            self.bad_lines += 1
+            return
+        self.ingest(rec, source)
+
+    def ingest(self, rec: dict, source: int = 0) -> None:
+        """`source` tells k6 processes apart (sharded runs): their gauges (vus...) add up."""
+        data = rec.get("data") or {}
+        name = rec.get("metric") or data.get("name")
+        if rec.get("type") == "Metric":
+            self.kinds[name] = data.get("type", "trend")
+            for t in data.get("thresholds") or []:
+                expr = t.get("threshold") if isinstance(t, dict) else t
+                if expr and (name, expr) not in self.thresholds:
+                    self.thresholds[(name, expr)] = Threshold(name, expr)
+            return
+        if rec.get("type") != "Point":
+            return
+        try:
+            sec = self._sec(data["time"])
+            v = float(data["value"])
+        except (KeyError, TypeError, ValueError):
+            self.bad_lines += 1
+            return
+        self.points += 1
+        if self.first_sec is None:
+            self.first_sec = sec
+        if self.now_sec is None or sec > self.now_sec:
+            self.now_sec = sec
+        kind = self.kinds.get(name, "trend")
+        self._series(name, kind).add(sec, v, self.window_s)
+        if kind == "gauge":
+            g = self.gauges.setdefault(name, {}).get(source)
+            self.gauges[name][source] = [v, min(v, g[1]), max(v, g[2])] if g else [v, v, v]
+        tag = (data.get("tags") or {}).get("name")
+        if tag and name.startswith(_TAGGED):
+            s = self._series(f"{name}{{name:{tag}}}", kind, tagged=True)
+            if s is not None:
+                s.add(sec, v, self.window_s)
+
+    def _series(self, key: str, kind: str, tagged: bool = False) -> Optional[_Series]:
+        s = self.series.get(key)
+        if s is None:
+            if tagged and len(self.series) >= int(self.cfg["max_series"]):
+                self.dropped_series += 1
+                return None
+            s = self.series[key] = _Series(kind)
+        return s
+
+    @property
+    def elapsed_s(self) -> int:
+        return (self.now_sec - self.first_sec + 1) if self.now_sec is not None else 0
+
+    def snapshot(self, per_series: bool = False) -> dict:
+        now = self.now_sec or 0
+        span = min(self.window_s, self.elapsed_s) or 1
+
+        def win(name: str) -> Optional[dict]:
+            s = self.series.get(name)
+            return _stats(s.kind, s.window(now, self.window_s), span) if s else None
+
+        reqs, failed, dur = win("http_reqs"), win("http_req_failed"), win("http_req_duration")
+        out = {
+            "t_s": self.elapsed_s,
+            "points": self.points,
+            "rps": reqs["rate"] if reqs else 0.0,
+            "error_rate": failed["rate"] if failed else 0.0,
+            "http_req_duration": {k: dur[k] for k in ("p50", "p95", "p99")} if dur else None,
+        }
+        if per_series:
+            total_span = self.elapsed_s or 1
+            out["window_s"] = self.window_s
+            out["series"] = {k: {"window": _stats(s.kind, s.window(now, self.window_s), span),
+                                 "total": _stats(s.kind, s.total, total_span)} for k, s in sorted(self.series.items())}
+        return out
+
+    def evaluate(self) -> List[Threshold]:
+        """Update every threshold on the cumulative data; returns the newly lost ones."""
+        lost = []
+        elapsed = self.elapsed_s
+        for th in self.thresholds.values():
+            s = self.series.get(th.target)
+            if th.agg is None or th.lost or s is None:
+                continue
+            th.value = th.observe(s.kind, s.total, elapsed)
+            if th.value is None:
+                th.reason = f"{th.agg} not available for a {s.kind}"
+                continue
+            th.ok = _OPS[th.op](th.value, th.limit)
+            if th.ok:
+                th.failing_since = None
+                continue
+            if th.failing_since is None:
+                th.failing_since = self.now_sec
+            if (th.agg, th.op) in _MONOTONIC:
+                th.lost, th.reason = True, "can no longer pass"
+            elif (elapsed >= float(self.cfg["grace_s"]) and s.total.count >= int(self.cfg["min_samples"])
+                  and self.now_sec - th.failing_since >= float(self.cfg["sustain_s"])):
+                th.lost, th.reason = True, f"failing for {self.now_sec - th.failing_since}s"
+            if th.lost:
+                lost.append(th)
+        return lost
+
+    def summary_export(self, duration_s: float) -> dict:
+        """Metrics in the `k6 run --summary-export` layout, computed from the raw points.
+
+        Trend percentiles come from the merged histograms (not averaged per source); counters
+        and rate passes/fails add up. A gauge's value is the sum of the sources' last values;
+        with several sources its min/max are kept per shard only. Call evaluate() first.
+        """
+        referenced = {t.target for t in self.thresholds.values()}
+        metrics = {}
+        for key, s in sorted(self.series.items()):
+            if "{" in key and key not in referenced:
+                continue  # like k6: submetrics only when a threshold references them
+            t = s.total
+            if s.kind == "trend":
+                h = t.hist
+                m = {"avg": round(h.mean() / 1000.0, 3), "min": (h.min_us or 0) / 1000.0, "med": h.percentile(50) / 1000.0,
+                     "max": (h.max_us or 0) / 1000.0, "p(90)": h.percentile(90) / 1000.0,
+                     "p(95)": h.percentile(95) / 1000.0, "p(99)": h.percentile(99) / 1000.0}
+            elif s.kind == "counter":
+                m = {"count": t.sum, "rate": round(t.sum / duration_s, 3) if duration_s else 0.0}
+            elif s.kind == "rate":
+                m = {"passes": t.nonzero, "fails": t.count - t.nonzero, "value": round(t.nonzero / t.count, 6) if t.count else 0.0}
+            else:
+                g = self.gauges.get(key, {})
+                if len(g) > 1:
+                    # the sources' extremes don't coincide in time, so their sum is no run-wide min/max
+                    m = {"value": sum(x[0] for x in g.values()),
+                         "per_shard": [{"value": x[0], "min": x[1], "max": x[2]} for _, x in sorted(g.items())]}
+                else:
+                    last, lo, hi = next(iter(g.values()), (t.last, t.last, t.last))
+                    m = {"value": last, "min": lo, "max": hi}
+            # summary-export convention: true = the threshold failed
+            ths = {th.expr: not th.ok for th in self.thresholds.values() if th.target == key and th.ok is not None}
+            if ths:
+                m["thresholds"] = ths
+            metrics[key] = m
+        return {"metrics": metrics}
+
+    def thresholds_failed(self) -> List[Threshold]:
+        return [t for t in self.thresholds.values() if t.ok is False]
+
+def live_line(snap: dict) -> str:
+    d = snap.get("http_req_duration") or {}
+    return (f"[k6:live] t={snap['t_s']}s rps={snap['rps']:.1f} err={snap['error_rate'] * 100:.2f}% "
+            f"p50={d.get('p50', 0):.1f}ms p95={d.get('p95', 0):.1f}ms p99={d.get('p99', 0):.1f}ms")
+
+# --- tailing running k6 processes -------------------------------------------------
+
+class LiveK6Monitor:
+    """Tails the NDJSON file(s) of running k6 process(es) on one thread; stops k6 when a threshold is lost.
+
+    With several paths (sharded k6) every shard feeds the same series, so the merged
+    histograms give the percentiles of the whole run.
+    """
+
+    def __init__(self, paths, settings: Optional[dict] = None, on_output: Optional[Callable[[str], None]] = None):
+        self.paths: List[Path] = [paths] if isinstance(paths, Path) else list(paths)
+        self.live = K6Live(settings)
+        self.on_output = on_output or (lambda line: None)
+        self.timeline: Deque[dict] = deque(maxlen=TIMELINE_MAX)
+        self.aborted: Optional[str] = None
+        self._reported = 0
+        self._procs: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="k6-live", daemon=True)
+
+    def attach(self, proc: subprocess.Popen) -> None:
+        """Called right after each k6 is spawned; tailing starts with the first one."""
+        with self._lock:
+            self._procs.append(proc)
+            if self._thread.ident is None:
+                self._thread.start()
+        if self.aborted:
+            self._stop_k6()
+
+    def _loop(self) -> None:
+        tails = [[path, None, b""] for path in self.paths]  # path, file, partial line
+        next_report = time.monotonic() + float(self.live.cfg["report_s"])
+        try:
+            while True:
+                finished = self._done.is_set()  # set once every k6 has exited: drain, then stop
+                got = False
+                for src, t in enumerate(tails):
+                    if t[1] is None and t[0].exists():
+                        t[1] = t[0].open("rb")
+                    chunk = t[1].read(1 << 20) if t[1] is not None else b""
+                    if chunk:
+                        got = True
+                        *lines, t[2] = (t[2] + chunk).split(b"\n")
+                        for line in lines:
+                            if line.strip():
+                                self.live.ingest_line(line.decode("utf-8", "replace"), src)
+                now = time.monotonic()
+                if now >= next_report:
+                    next_report = now + float(self.live.cfg["report_s"])
+                    self._report()
+                if not got:
+                    if finished:
+                        break
+                    time.sleep(POLL_S)
+        finally:
+            for src, (_, fh, rest) in enumerate(tails):
+                if rest.strip():
+                    self.live.ingest_line(rest.decode("utf-8", "replace"), src)
+                if fh is not None:
+                    fh.close()
+
+    def _report(self) -> None:
+        if not self.live.points:
+            return
+        snap = self.live.snapshot()
+        self._reported = self.live.points
+        self.timeline.append(snap)
+        self.on_output(live_line(snap))
+        lost = self.live.evaluate()
+        if lost and self.aborted is None and self.live.cfg["abort"]:
+            self.aborted = "; ".join(f"{t.target} {t.expr} ({t.value:g}, {t.reason})" for t in lost)
+            self.on_output(f"[k6:live] threshold lost, stopping k6: {self.aborted}")
+            self._stop_k6()
+
+    def _stop_k6(self) -> None:
+        with self._lock:
+            procs = [p for p in self._procs if p.poll() is None]
+        for p in procs:
+            # SIGINT = k6's own graceful stop (teardown + summary export); Windows has no SIGINT for a child
+            if os.name == "nt":
+                p.terminate()
+            else:
+                p.send_signal(signal.SIGINT)
+
+            def _kill_later(p=p) -> None:
+                try:
+                    p.wait(timeout=STOP_GRACE_S)
+                except subprocess.TimeoutExpired:
+                    p.kill()
+            threading.Thread(target=_kill_later, daemon=True).start()
+
+    def close(self) -> None:
+        """After k6 exited: drain the rest of the file(s) and take the final snapshot."""
+        self._done.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        elif self._thread.ident is None:
+            self._loop()  # never attached (k6 failed to start): read whatever is there
+        self.live.evaluate()
+        if self.live.points != self._reported:
+            snap = self.live.snapshot()
+            self.timeline.append(snap)
+            self.on_output(live_line(snap))
+
+    def report(self) -> dict:
+        return {
+            "tool": "halo_test_lab.k6live",
+            "settings": {k: v for k, v in self.live.cfg.items() if k != "thresholds"},
+            "sources": [str(p) for p in self.paths],
+            "aborted": self.aborted,
+            "points": self.live.points,
+            "bad_lines": self.live.bad_lines,
+            "dropped_series": self.live.dropped_series,
+            "final": self.live.snapshot(per_series=True),
+            "thresholds": [t.to_dict() for t in self.live.thresholds.values()],
+            "timeline": list(self.timeline),
+        }
+
+    def manifest_summary(self) -> dict:
+        """The compact part that goes into run-manifest.json."""
+        snap = self.live.snapshot()
+        return {"rps": snap["rps"], "error_rate": snap["error_rate"], "http_req_duration": snap["http_req_duration"],
+                "t_s": snap["t_s"], "aborted": self.aborted,
+                "thresholds_lost": [f"{t.target} {t.expr}" for t in self.live.thresholds.values() if t.lost]}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab.k6live", description="Summarize a k6 NDJSON stream")
+    ap.add_argument("ndjson", type=Path)
+    ap.add_argument("--window", type=int, default=DEFAULTS["window_s"])
+    ap.add_argument("--report", type=Path, default=None, help="write the full JSON report here")
+    args = ap.parse_args(argv)
+
+    mon = LiveK6Monitor(args.ndjson, {"window_s": args.window, "abort": False}, on_output=print)
+    mon.close()
+    rep = mon.report()
+    if args.report:
+        args.report.write_text(json.dumps(rep, indent=2), encoding="utf-8")
+    for t in rep["thresholds"]:
+        print(f"K6_THRESHOLD={t['target']} {t['expr']} OK={t['ok']} VALUE={t['value']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Open-loop load engine for multi-turn conversation sessions (k6 alternative).
+
+Sessions arrive at a fixed rate whatever the SUT is doing; every turn's latency is
+measured from its *intended* start time, so a slow SUT (or a saturated generator)
+shows up in the percentiles instead of silently lowering the offered load
+(coordinated-omission correction).
+
+    python -m halo_test_lab.loadgen --scenario session_lock_switch --rate 50 --duration 60 \
+        --summary-export runs/<ts>/k6/loadgen-summary.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .histogram import LatencyHistogram
+
+ENDPOINT = "/api/v1/conversation/message"
+MAX_REASON_KEYS = 64
+
+@dataclass(frozen=True)
+class Turn:
+    utterance: str
+    think_s: float = 0.0
+    # expected ai_routing_reason prefix; a mismatch counts as a failed check, not an error
+    expect_reason: Optional[str] = None
+
+# Mirrors tests/test_provider_session_lock_switch_e2e.py
+SCENARIOS: Dict[str, List[Turn]] = {
+    "session_lock_switch": [
+        Turn("ciao", expect_reason="default_policy:"),
+        Turn("ciao", expect_reason="session_locked:"),
+        Turn("usa eco", expect_reason="explicit_override:"),
+        Turn("ciao", expect_reason="session_locked:"),
+        Turn("use perplexity", expect_reason="explicit_override:"),
+        Turn("ciao", expect_reason="session_locked:"),
+    ],
+    "single_turn": [Turn("ciao")],
+}
+
+def load_scenario(name_or_path: str) -> List[Turn]:
+    if name_or_path in SCENARIOS:
+        return SCENARIOS[name_or_path]
+    data = json.loads(Path(name_or_path).read_text(encoding="utf-8"))
+    return [Turn(t["utterance"], float(t.get("think_s", 0.0)), t.get("expect_reason")) for t in data["turns"]]
+
+@dataclass
+class LoadStats:
+    per_turn: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    per_reason: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    overall: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+    requests: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    checks_failed: int = 0
+    sessions_completed: int = 0
+    sessions_failed: int = 0
+    max_schedule_lag_s: float = 0.0
+
+    def record(self, turn_no: int, reason: str, latency_s: float, service_s: float) -> None:
+        us = latency_s * 1e6
+        self.requests += 1
+        self.overall.record(us)
+        self.service.record(service_s * 1e6)
+        self.per_turn.setdefault(f"turn_{turn_no}", LatencyHistogram()).record(us)
+        if reason not in self.per_reason and len(self.per_reason) >= MAX_REASON_KEYS:
+            reason = "other"
+        self.per_reason.setdefault(reason, LatencyHistogram()).record(us)
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+def _turn_order(per_turn: Dict[str, LatencyHistogram]):
+    return sorted(per_turn.items(), key=lambda kv: int(kv[0].split("_", 1)[1]))
+
+async def _session(client, url: str, turns: List[Turn], intended: float, stats: LoadStats,
+                   gate: asyncio.Semaphore, timeout_s: float) -> None:
+    session_id = f"s-load-{uuid.uuid4().hex[:10]}"
+    ok = True
+    async with gate:
+        for n, turn in enumerate(turns, start=1):
+            sent = time.perf_counter()
+            reason = ""
+            try:
+                r = await client.post(url, json={"session_id": session_id, "user_utterance": turn.utterance},
+                                      headers={"Content-Type": "application/json; charset=utf-8"}, timeout=timeout_s)
+                if r.status_code != 200:
+                    reason = f"error:http_{r.status_code}"
+                else:
+                    reason = str(r.json().get("ai_routing_reason") or "unknown")
+                    if turn.expect_reason and not reason.startswith(turn.expect_reason):
+                        stats.checks_failed += 1
+            except Exception as e:
+                reason = f"error:{type(e).__name__}"
+            done = time.perf_counter()
+            stats.record(n, reason, done - intended, done - sent)
+            if reason.startswith("error:"):
+                stats.error(reason[6:])
+                ok = False
+                break
+            intended = done + turn.think_s
+            if turn.think_s:
+                await asyncio.sleep(turn.think_s)
+    if ok:
+        stats.sessions_completed += 1
+    else:
+        stats.sessions_failed += 1
+
+async def run_load(base_url: str, turns: List[Turn], rate_per_s: float, duration_s: float,
+                   max_active: int = 10_000, timeout_s: float = 30.0) -> dict:
+    import httpx  # lazy: only the load suite needs it
+
+    url = base_url.rstrip("/") + ENDPOINT
+    stats = LoadStats()
+    gate = asyncio.Semaphore(max_active)
+    n_sessions = int(rate_per_s * duration_s)
+    limits = httpx.Limits(max_connections=max_active, max_keepalive_connections=max_active)
+    started_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout_s) as client:
+        t0 = time.perf_counter()
+        active = set()
+        for i in range(n_sessions):
+            intended = t0 + i / rate_per_s
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                stats.max_schedule_lag_s = max(stats.max_schedule_lag_s, -delay)
+            # the intended start is kept even when we are late: that lag is part of the latency
+            task = asyncio.create_task(_session(client, url, turns, intended, stats, gate, timeout_s))
+            active.add(task)
+            task.add_done_callback(active.discard)
+        if active:
+            await asyncio.gather(*active)
+        wall = time.perf_counter() - t0
+
+    return {
+        "tool": "halo_test_lab.loadgen",
+        "started_utc": started_utc,
+        "endpoint": url,
+        "turns": [t.utterance for t in turns],
+        "rate_per_s": rate_per_s,
+        "duration_s": duration_s,
+        "wall_s": round(wall, 3),
+        "sessions": {"scheduled": n_sessions, "completed": stats.sessions_completed, "failed": stats.sessions_failed},
+        "requests": {
+            "total": stats.requests,
+            "rps": round(stats.requests / wall, 2) if wall else 0.0,
+            "errors": stats.errors,
+            "error_rate": round(sum(stats.errors.values()) / stats.requests, 6) if stats.requests else 0.0,
+            "checks_failed": stats.checks_failed,
+        },
+        "max_schedule_lag_ms": round(stats.max_schedule_lag_s * 1000.0, 3),
+        # latency = response time - intended start (CO-corrected); service_time = response time - actual send
+        "latency_ms": {
+            "overall": stats.overall.summary_ms(),
+            "per_turn": {k: h.summary_ms() for k, h in _turn_order(stats.per_turn)},
+            "per_routing_reason": {k: h.summary_ms() for k, h in sorted(stats.per_reason.items())},
+        },
+        "service_time_ms": stats.service.summary_ms(),
+        "histograms": {
+            "overall": stats.overall.to_dict(),
+            "per_turn": {k: h.to_dict() for k, h in _turn_order(stats.per_turn)},
+            "per_routing_reason": {k: h.to_dict() for k, h in sorted(stats.per_reason.items())},
+        },
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab.loadgen",
+                                 description="Open-loop conversation load engine")
+    ap.add_argument("--base-url", default=os.environ.get("HALO_BACKEND_URL") or os.environ.get("HALO_BASE_URL") or "http://127.0.0.1:8000")
+    ap.add_argument("--scenario", default="session_lock_switch", help="built-in name or path to a JSON scenario")
+    ap.add_argument("--rate", type=float, default=10.0, help="new sessions per second")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    ap.add_argument("--max-active", type=int, default=10_000, help="cap on concurrently active sessions")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--max-error-rate", type=float, default=0.01, help="exit 1 above this error rate")
+    ap.add_argument("--summary-export", type=Path, default=Path("loadgen-summary.json"))
+    args = ap.parse_args(argv)
+
+    turns = load_scenario(args.scenario)
+    summary = asyncio.run(run_load(args.base_url, turns, args.rate, args.duration, args.max_active, args.timeout))
+    summary["scenario"] = args.scenario
+    args.summary_export.parent.mkdir(parents=True, exist_ok=True)
+    args.summary_export.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    ov = summary["latency_ms"]["overall"]
+    req = summary["requests"]
+    print(f"[loadgen] sessions={summary['sessions']} requests={req['total']} rps={req['rps']} "
+          f"error_rate={req['error_rate']} p50={ov['p50']}ms p95={ov['p95']}ms p99={ov['p99']}ms")
+    print(f"[loadgen] summary: {args.summary_export}")
+    return 1 if req["error_rate"] > args.max_error_rate else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
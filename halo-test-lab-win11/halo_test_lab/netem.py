@@ -0,0 +1,524 @@
+"""Network-condition proxy: asyncio TCP proxy with latency, jitter, bandwidth, loss and resets.
+
+Sits between the suites and the SUT so pairing/conversation flows run over a phone- or
+watch-like link instead of loopback. Plain http targets are forwarded directly, one
+listener per target (point each base URL at its listener); https targets go through
+HTTP CONNECT (HTTPS_PROXY), so TLS stays end to end. Every TCP connection is a flow with bytes and round trips counted
+(a round trip = a client burst answered by a server burst), which shows how chatty a
+protocol is.
+
+The link model works per direction: a chunk waits for the link (bandwidth, FIFO), then
+for the one-way latency plus jitter; delivery order is preserved as in TCP. There is one
+link per direction per proxy: every connection and listener shares the profile's
+`down_kbps`/`up_kbps`, as a connection pool or parallel suites share a phone's radio, while
+latency, jitter and loss are drawn per connection. Packet loss
+can't be dropped at this layer, so `loss_pct` adds a retransmission delay to the chunk.
+`reset_pct` resets that share of connections (RST) within their first RESET_WINDOW_BYTES,
+i.e. mid request/response on a typical API call.
+
+Profiles come from the `network:` block of configs/*.yaml (a preset name plus overrides):
+
+    network:
+      profile: 3g
+      latency_ms: 200
+
+    python -m halo_test_lab.netem --target 127.0.0.1:8080 --listen 127.0.0.1:18080 --profile 3g --stats runs/netem.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+CHUNK = 16 * 1024
+QUEUE_CHUNKS = 64          # per direction; bounds memory when the link is slower than the sender
+RESET_WINDOW_BYTES = 1024  # a reset lands inside the first exchange of an API call
+MIN_RTO_S = 0.2            # TCP minimum retransmission timeout
+MAX_FLOW_RECORDS = 10_000  # per-flow detail kept in stats; totals are always complete
+
+# env vars holding a SUT URL, and what the suites fall back to when one is unset
+# (tests/test_gateway_pairing_*.py, tests/test_provider_*_e2e.py)
+SUT_URL_KEYS = ("HALO_BASE_URL", "HALO_HEALTH_URL", "HALO_GATEWAY_BASE_URL", "HALO_BACKEND_URL")
+SUT_URL_DEFAULTS = {"HALO_GATEWAY_BASE_URL": "http://127.0.0.1:8080", "HALO_BACKEND_URL": "http://127.0.0.1:8000"}
+
+@dataclass(frozen=True)
+class LinkProfile:
+    # one-way delay added to each direction (RTT grows by 2 x latency)
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # 0 = unlimited; down = SUT -> client, up = client -> SUT
+    down_kbps: float = 0.0
+    up_kbps: float = 0.0
+    loss_pct: float = 0.0
+    # share of connections reset mid-flow
+    reset_pct: float = 0.0
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, d: Optional[dict]) -> "LinkProfile":
+        d = {k: v for k, v in (d or {}).items() if k != "listen"}
+        name = d.pop("profile", None)
+        if name is not None and name not in PROFILES:
+            raise ValueError(f"unknown network profile {name!r} (known: {', '.join(PROFILES)})")
+        unknown = set(d) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"unknown network settings: {', '.join(sorted(unknown))}")
+        base = PROFILES[name] if name else cls()
+        return replace(base, **{k: v if k == "seed" or v is None else float(v) for k, v in d.items()})
+
+PROFILES: Dict[str, LinkProfile] = {
+    "lan": LinkProfile(),
+    "wifi": LinkProfile(latency_ms=5, jitter_ms=2, down_kbps=50_000, up_kbps=20_000, loss_pct=0.1),
+    "4g": LinkProfile(latency_ms=35, jitter_ms=10, down_kbps=12_000, up_kbps=4_000, loss_pct=0.5),
+    "3g": LinkProfile(latency_ms=150, jitter_ms=40, down_kbps=1_600, up_kbps=768, loss_pct=1.0),
+    "edge": LinkProfile(latency_ms=300, jitter_ms=80, down_kbps=240, up_kbps=200, loss_pct=2.0),
+    # watch -> phone (BLE) -> cellular
+    "watch_ble": LinkProfile(latency_ms=80, jitter_ms=30, down_kbps=250, up_kbps=120, loss_pct=1.0),
+}
+
+class _Link:
+    """One direction of the shaped link, shared by every flow: bandwidth, FIFO."""
+
+    def __init__(self, kbps: float):
+        self.bps = kbps * 1000.0
+        self.busy_until = 0.0
+
+    def transmit(self, n: int, now: float) -> float:
+        """When n bytes queued at `now` have gone through the link."""
+        start = max(now, self.busy_until)
+        self.busy_until = start + (n * 8.0 / self.bps if self.bps > 0 else 0.0)
+        return self.busy_until
+
+class _Path:
+    """One direction of one flow over a shared _Link: latency, jitter, loss, in-order delivery."""
+
+    def __init__(self, profile: LinkProfile, link: _Link, rng: random.Random):
+        self.p = profile
+        self.link = link
+        self.rng = rng
+        self.last_delivery = 0.0
+
+    def schedule(self, n: int, now: float) -> float:
+        sent = self.link.transmit(n, now)
+        delay = self.p.latency_ms / 1000.0
+        if self.p.jitter_ms:
+            delay = max(0.0, delay + self.rng.gauss(0.0, self.p.jitter_ms / 1000.0))
+        if self.p.loss_pct and self.rng.random() < self.p.loss_pct / 100.0:
+            delay += max(MIN_RTO_S, 2 * self.p.latency_ms / 1000.0)
+        self.last_delivery = max(sent + delay, self.last_delivery)
+        return self.last_delivery
+
+@dataclass
+class Flow:
+    id: int
+    client: str
+    target: str
+    opened_at: float
+    bytes_up: int = 0
+    bytes_down: int = 0
+    requests: int = 0      # client bursts
+    round_trips: int = 0   # client burst followed by a server burst
+    reset: bool = False
+    error: Optional[str] = None
+    duration_ms: float = 0.0
+    _last: str = ""
+    _reset_after: Optional[int] = None
+
+    def on_data(self, direction: str, n: int) -> bool:
+        """Count n bytes; True when the flow has to be reset now."""
+        if direction == "up":
+            self.bytes_up += n
+            if self._last != "up":
+                self.requests += 1
+        else:
+            self.bytes_down += n
+            if self._last == "up":
+                self.round_trips += 1
+        self._last = direction
+        return self._reset_after is not None and self.bytes_up + self.bytes_down >= self._reset_after
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if not k.startswith("_") and k != "opened_at"}
+
+class _Reset(Exception):
+    pass
+
+def _abort(writer: Optional[asyncio.StreamWriter]) -> None:
+    if writer is None:
+        return
+    sock = writer.get_extra_info("socket")
+    try:
+        if sock is not None:
+            # linger 0: close sends RST, like a dropped mobile link
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    except OSError:
+        pass
+    writer.transport.abort()
+
+class NetemProxy:
+    def __init__(self, profile: LinkProfile, target: Optional[Tuple[str, int]] = None,
+                 listen: Tuple[str, int] = ("127.0.0.1", 0), connect_timeout_s: float = 10.0):
+        self.profile = profile
+        self.target = target  # None = CONNECT only
+        self.listen = listen
+        self.connect_timeout_s = connect_timeout_s
+        self.rng = random.Random(profile.seed)
+        self.up = _Link(profile.up_kbps)
+        self.down = _Link(profile.down_kbps)
+        self.flows: List[Flow] = []
+        self.totals = {"flows": 0, "bytes_up": 0, "bytes_down": 0, "requests": 0, "round_trips": 0,
+                       "resets": 0, "connect_failures": 0}
+        self.server: Optional[asyncio.AbstractServer] = None
+        # every listener after the first, and {"listen", "target"} of all of them for stats
+        self.extra: List[asyncio.AbstractServer] = []
+        self.listeners: List[dict] = []
+        self._next_id = 0
+        self._open: Dict[asyncio.Task, List[asyncio.StreamWriter]] = {}
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def start(self) -> "NetemProxy":
+        self.server = await asyncio.start_server(partial(self._handle, target=self.target), self.listen[0], self.listen[1],
+                                                 backlog=1024)
+        self._listening(self.target, self.address)
+        return self
+
+    def _listening(self, target: Optional[Tuple[str, int]], address: Tuple[str, int]) -> None:
+        self.listeners.append({"listen": f"{address[0]}:{address[1]}", "target": f"{target[0]}:{target[1]}" if target else None})
+
+    async def add_listener(self, target: Optional[Tuple[str, int]],
+                           listen: Tuple[str, int] = ("127.0.0.1", 0)) -> Tuple[str, int]:
+        """Another listener on the same link model and stats, forwarding to `target` (None = CONNECT only)."""
+        server = await asyncio.start_server(partial(self._handle, target=target), listen[0], listen[1], backlog=1024)
+        self.extra.append(server)
+        address = server.sockets[0].getsockname()[:2]
+        self._listening(target, address)
+        return address
+
+    async def _open_target(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                           target: Optional[Tuple[str, int]]) -> Tuple[str, int, bytes, bool]:
+        """(host, port, first bytes to forward, is CONNECT). CONNECT picks the target per connection."""
+        first = await reader.read(CHUNK)
+        if first.startswith(b"CONNECT "):
+            while b"\r\n\r\n" not in first and len(first) < 65536:
+                more = await reader.read(CHUNK)
+                if not more:
+                    break
+                first += more
+            head, _, rest = first.partition(b"\r\n\r\n")
+            authority = head.split(b" ", 2)[1].decode("ascii", "replace")
+            host, _, port = authority.rpartition(":")
+            return host.strip("[]"), int(port or 443), rest, True
+        if target is None:
+            writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            raise ConnectionError("no target (CONNECT only)")
+        return target[0], target[1], first, False
+
+    async def _handle(self, c_reader: asyncio.StreamReader, c_writer: asyncio.StreamWriter,
+                      target: Optional[Tuple[str, int]] = None) -> None:
+        self._next_id += 1
+        peer = c_writer.get_extra_info("peername") or ("?", 0)
+        flow = Flow(self._next_id, f"{peer[0]}:{peer[1]}", "", time.perf_counter())
+        if self.profile.reset_pct and self.rng.random() < self.profile.reset_pct / 100.0:
+            flow._reset_after = self.rng.randint(1, RESET_WINDOW_BYTES)
+        s_writer = None
+        conn = self._open[asyncio.current_task()] = [c_writer]
+        try:
+            host, port, first, tunnel = await self._open_target(c_reader, c_writer, target)
+            flow.target = f"{host}:{port}"
+            try:
+                s_reader, s_writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.connect_timeout_s)
+            except (OSError, asyncio.TimeoutError) as e:
+                self.totals["connect_failures"] += 1
+                if tunnel:
+                    c_writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+                raise ConnectionError(f"connect {flow.target}: {type(e).__name__}")
+            conn.append(s_writer)
+            if tunnel:
+                c_writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            rng = random.Random(self.rng.random())
+            up = _Path(self.profile, self.up, rng)
+            down = _Path(self.profile, self.down, rng)
+            pipes = [asyncio.ensure_future(self._pipe(c_reader, s_writer, up, flow, "up", first)),
+                     asyncio.ensure_future(self._pipe(s_reader, c_writer, down, flow, "down", b""))]
+            try:
+                await asyncio.gather(*pipes)
+            finally:
+                for p in pipes:
+                    p.cancel()
+                await asyncio.gather(*pipes, return_exceptions=True)
+        except _Reset:
+            flow.reset = True
+            _abort(c_writer)
+            _abort(s_writer)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+            flow.error = str(e) or type(e).__name__
+        finally:
+            for w in (c_writer, s_writer):
+                if w is not None and not w.transport.is_closing():
+                    w.close()
+            self._open.pop(asyncio.current_task(), None)
+            self._finish(flow)
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, link: _Path,
+                    flow: Flow, direction: str, first: bytes) -> None:
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_CHUNKS)
+
+        async def deliver() -> None:
+            while True:
+                item = await q.get()
+                if item is None:
+                    break
+                at, data = item
+                delay = at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(data)
+                await writer.drain()
+            if writer.can_write_eof() and not writer.transport.is_closing():
+                writer.write_eof()
+
+        sender = asyncio.ensure_future(deliver())
+
+        async def put(item) -> None:
+            if not q.full():
+                q.put_nowait(item)
+                return
+            # link slower than the sender: wait for room, unless the other side went away
+            putter = asyncio.ensure_future(q.put(item))
+            await asyncio.wait({putter, sender}, return_when=asyncio.FIRST_COMPLETED)
+            if not putter.done():
+                putter.cancel()
+                sender.result()
+                raise ConnectionError("peer closed")
+
+        try:
+            data = first
+            while True:
+                if data:
+                    if flow.on_data(direction, len(data)):
+                        raise _Reset()
+                    await put((link.schedule(len(data), loop.time()), data))
+                data = await reader.read(CHUNK)
+                if not data:
+                    break
+            await put(None)
+            await sender
+        finally:
+            if not sender.done():
+                sender.cancel()
+
+    def _finish(self, flow: Flow) -> None:
+        flow.duration_ms = round((time.perf_counter() - flow.opened_at) * 1000.0, 3)
+        t = self.totals
+        t["flows"] += 1
+        t["bytes_up"] += flow.bytes_up
+        t["bytes_down"] += flow.bytes_down
+        t["requests"] += flow.requests
+        t["round_trips"] += flow.round_trips
+        t["resets"] += int(flow.reset)
+        if len(self.flows) < MAX_FLOW_RECORDS:
+            self.flows.append(flow)
+
+    def stats(self) -> dict:
+        n = self.totals["flows"]
+        return {
+            "tool": "halo_test_lab.netem",
+            "profile": asdict(self.profile),
+            "target": f"{self.target[0]}:{self.target[1]}" if self.target else None,
+            "listeners": list(self.listeners),
+            "totals": dict(self.totals),
+            "per_flow_avg": {k: round(self.totals[k] / n, 2) for k in ("bytes_up", "bytes_down", "round_trips")} if n else {},
+            "flows": [f.to_dict() for f in self.flows],
+            "flows_truncated": n > len(self.flows),
+        }
+
+    async def close(self) -> None:
+        """Stop accepting, drop open connections (keep-alive clients) and wait for their stats."""
+        servers = self.extra + ([self.server] if self.server is not None else [])
+        for srv in servers:
+            srv.close()
+        handlers = list(self._open)
+        for writers in self._open.values():
+            for w in writers:
+                w.transport.abort()
+        if handlers:
+            await asyncio.wait(handlers, timeout=5)
+        for srv in servers:
+            await srv.wait_closed()
+
+# --- background runner (GUI / tests) -------------------------------------------------
+
+class ProxyHandle:
+    def __init__(self, proxy: NetemProxy, loop: asyncio.AbstractEventLoop, thread: threading.Thread):
+        self.proxy = proxy
+        self._loop = loop
+        self._thread = thread
+        host, port = proxy.address
+        self.url = f"http://{host}:{port}"
+
+    def stats(self) -> dict:
+        return asyncio.run_coroutine_threadsafe(self._stats(), self._loop).result(timeout=10)
+
+    async def _stats(self) -> dict:
+        return self.proxy.stats()
+
+    def add_target(self, target: Optional[Tuple[str, int]], listen: Tuple[str, int] = ("127.0.0.1", 0)) -> str:
+        """URL of a new listener forwarding to target (None = CONNECT only)."""
+        host, port = asyncio.run_coroutine_threadsafe(self.proxy.add_listener(target, listen), self._loop).result(timeout=10)
+        return f"http://{host}:{port}"
+
+    def stop(self) -> dict:
+        async def _close():
+            await self.proxy.close()
+            return self.proxy.stats()
+        stats = asyncio.run_coroutine_threadsafe(_close(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        return stats
+
+def run_in_thread(profile: LinkProfile, target: Optional[Tuple[str, int]] = None,
+                  listen: Tuple[str, int] = ("127.0.0.1", 0)) -> ProxyHandle:
+    proxy = NetemProxy(profile, target, listen)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    box = {}
+
+    def _target():
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(proxy.start())
+        except BaseException as e:
+            box["error"] = e
+        finally:
+            started.set()
+        if "error" not in box:
+            loop.run_forever()
+        loop.close()
+
+    t = threading.Thread(target=_target, name="netem-proxy", daemon=True)
+    t.start()
+    started.wait()
+    if "error" in box:
+        raise box["error"]
+    return ProxyHandle(proxy, loop, t)
+
+def parse_hostport(s: str, default_port: int = 0) -> Tuple[str, int]:
+    host, sep, port = s.rpartition(":")
+    if not sep:
+        return s, default_port
+    return host.strip("[]"), int(port)
+
+def start_for_env(network: dict, base_url: str, extra_env: Dict[str, str],
+                  environ: Optional[Dict[str, str]] = None) -> Tuple[ProxyHandle, Dict[str, str]]:
+    """Start the proxy for a profile's `network:` block and return the env the suites should use.
+
+    Every SUT URL (SUT_URL_KEYS: from extra_env, else the environment, else the suites'
+    defaults) is routed through the proxy, so suites that don't use the profile's base URL
+    are shaped too. Each distinct http host:port gets its own listener and the variables
+    pointing there are rewritten to it (set explicitly even when they were only defaults);
+    https targets are reached through CONNECT via HTTPS_PROXY so certificates still verify.
+    The profile's `listen` address is used for the base URL's listener.
+    """
+    from urllib.parse import urlsplit, urlunsplit
+
+    environ = os.environ if environ is None else environ
+    profile = LinkProfile.from_dict(network)
+    listen = parse_hostport(str(network.get("listen", "127.0.0.1:0")))
+    urls = {key: v for key in SUT_URL_KEYS if (v := extra_env.get(key) or environ.get(key) or SUT_URL_DEFAULTS.get(key))}
+    urls.setdefault("HALO_BASE_URL", base_url)
+
+    def http_target(url: str) -> Optional[Tuple[str, int]]:
+        u = urlsplit(url)
+        return (u.hostname or "127.0.0.1", u.port or 80) if u.scheme == "http" else None
+
+    # insertion order: the base URL's target first (it gets the profile's listen address)
+    targets: Dict[Tuple[str, int], List[str]] = {t: [] for t in [http_target(base_url)] if t}
+    tunneled = False
+    for key, v in urls.items():
+        t = http_target(v)
+        if t:
+            targets.setdefault(t, []).append(key)
+        elif urlsplit(v).scheme == "https":
+            tunneled = True
+
+    env = dict(extra_env)
+    order = list(targets)
+    handle = run_in_thread(profile, order[0] if order else None, listen)
+    for i, target in enumerate(order):
+        proxied = urlsplit(handle.url if i == 0 else handle.add_target(target)).netloc
+        for key in targets[target]:
+            env[key] = urlunsplit(urlsplit(urls[key])._replace(netloc=proxied))
+    if tunneled:
+        connect_url = handle.add_target(None) if order else handle.url
+        env.update(HTTPS_PROXY=connect_url, https_proxy=connect_url)
+    return handle, env
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab.netem", description="Network-condition TCP proxy")
+    ap.add_argument("--target", default=None, help="HOST:PORT to forward to (omit for CONNECT-only)")
+    ap.add_argument("--listen", default="127.0.0.1:18080")
+    ap.add_argument("--config", type=Path, default=None, help="profile YAML with a network: block")
+    ap.add_argument("--profile", default=None, help=f"preset: {', '.join(PROFILES)}")
+    for f in fields(LinkProfile):
+        ap.add_argument("--" + f.name.replace("_", "-"), type=int if f.name == "seed" else float, default=None)
+    ap.add_argument("--duration", type=float, default=0.0, help="stop after N seconds (0 = until Ctrl+C)")
+    ap.add_argument("--stats", type=Path, default=None, help="write flow stats JSON here on exit")
+    args = ap.parse_args(argv)
+
+    network: dict = {}
+    if args.config:
+        from .config import load_env_config
+        network = dict(load_env_config(args.config).network)
+    if args.profile:
+        network["profile"] = args.profile
+    for f in fields(LinkProfile):
+        v = getattr(args, f.name)
+        if v is not None:
+            network[f.name] = v
+    profile = LinkProfile.from_dict(network)
+    target = parse_hostport(args.target, 80) if args.target else None
+
+    async def serve() -> dict:
+        proxy = await NetemProxy(profile, target, parse_hostport(args.listen)).start()
+        host, port = proxy.address
+        print(f"NETEM_LISTEN={host}:{port} TARGET={args.target or 'CONNECT'} PROFILE={json.dumps(asdict(profile))}", flush=True)
+        try:
+            await asyncio.sleep(args.duration if args.duration > 0 else float("inf"))
+        except asyncio.CancelledError:
+            pass
+        await proxy.close()
+        return proxy.stats()
+
+    loop = asyncio.new_event_loop()
+    main_task = loop.create_task(serve())
+    try:
+        stats = loop.run_until_complete(main_task)
+    except KeyboardInterrupt:
+        main_task.cancel()
+        stats = loop.run_until_complete(main_task)
+    finally:
+        loop.close()
+    if args.stats:
+        args.stats.parent.mkdir(parents=True, exist_ok=True)
+        args.stats.write_text(json.dumps(stats, indent=2), encoding="utf-8")
+    t = stats["totals"]
+    print(f"NETEM_FLOWS={t['flows']} BYTES_UP={t['bytes_up']} BYTES_DOWN={t['bytes_down']} "
+          f"ROUND_TRIPS={t['round_trips']} RESETS={t['resets']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Run orchestration shared by the GUI and the headless CLI (no Qt in here).
+
+One run = one timestamped folder under runs/: the selected suites (run side by side, see
+executor.run_suites), optional network shaping, resource telemetry (Linux), run-manifest.json,
+index.html, the artifact store (dedup, gzip, retention) and the history index. Modules only some
+runs need (netem, telemetry, store, history) are imported when used.
+"""
+from __future__ import annotations
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Tuple
+
+from .config import load_env_config
+from .executor import LineBatcher, SuiteResources, SuiteSpec, run_pytest, run_k6, run_loadgen, run_suites, write_run_index, write_run_manifest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SUITES = ("pytest", "k6", "loadgen")
+
+# Live suite output reaches the sink in batches (LOG_FPS per second)
+LOG_FPS = 10.0
+
+def run_profile(env_path: Path, suites: Sequence[str], k6_script: Optional[Path] = None,
+                log: Callable[[str], None] = print, runs_dir: Optional[Path] = None) -> Tuple[int, Path]:
+    """Run `suites` against the profile at `env_path`; returns (exit code, run folder)."""
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        raise ValueError(f"unknown suite(s): {', '.join(unknown)} (known: {', '.join(SUITES)})")
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out_dir = (runs_dir or REPO_ROOT / "runs") / ts
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    env = load_env_config(env_path)
+    # Prefer explicit health_url; otherwise fall back to base_url (user chooses what it means).
+    health_url = env.health_url or env.base_url
+
+    extra_env = {
+        "HALO_BASE_URL": env.base_url,
+        "HALO_HEALTH_URL": health_url,
+        "HALO_CLIENT_ID": env.client_id,
+        "HALO_API_KEY": env.api_key,
+    }
+
+    manifest = {
+        "timestamp": ts,
+        "env": env.__dict__,
+        "repo_root": str(REPO_ROOT),
+        "suites": [],
+    }
+
+    exit_code = 0
+    batcher = LineBatcher(log, fps=LOG_FPS)
+    stream = batcher.push
+    netem = None
+    sampler = None
+
+    try:
+        log(f"[Run] Output dir: {out_dir}")
+        log(f"[Env] {env.name} => base_url={env.base_url}")
+        log(f"[Env] health_url={health_url}")
+        if env.network:
+            from .netem import start_for_env
+            # all suites talk to the target through the shaping proxy
+            netem, extra_env = start_for_env(env.network, env.base_url, extra_env)
+            log(f"[Network] profile={env.network.get('profile', 'custom')} via {netem.url}")
+
+        if env.telemetry is not None:
+            from . import telemetry
+            if telemetry.available():
+                # suites are children of this process; supervised simulators are found via their state files
+                sampler = telemetry.ProcSampler(out_dir / "telemetry", env.telemetry,
+                                                supervisor_state=REPO_ROOT / "runs" / "supervisor", on_output=stream).start()
+                log(f"[Telemetry] sampling every {sampler.interval_s:g}s")
+            else:
+                log("[Telemetry] skipped: no /proc on this platform")
+
+        if "k6" in suites and not k6_script:
+            raise RuntimeError("k6 script not selected")
+
+        def res(name: str) -> SuiteResources:
+            return SuiteResources.from_dict(env.suite_resources.get(name))
+
+        # Suites write to separate output folders/files, so they can run side by side.
+        specs = []
+        if "pytest" in suites:
+            specs.append(SuiteSpec("pytest", lambda r: run_pytest(
+                REPO_ROOT, out_dir / "pytest", marker="e2e", extra_env=extra_env, resources=r,
+                shards=env.pytest_shards, runs_dir=REPO_ROOT / "runs", on_output=stream), res("pytest")))
+        if "k6" in suites:
+            specs.append(SuiteSpec("k6", lambda r: run_k6(
+                REPO_ROOT, out_dir / "k6", script=k6_script, extra_env=extra_env, k6_exe=env.k6_exe, resources=r, on_output=stream,
+                live=env.k6_live, shards=env.k6_shards), res("k6")))
+        if "loadgen" in suites:
+            specs.append(SuiteSpec("loadgen", lambda r: run_loadgen(
+                REPO_ROOT, out_dir / "k6", settings=env.loadgen, extra_env=extra_env, resources=r, on_output=stream), res("loadgen")))
+
+        def on_event(name: str, phase: str, out) -> None:
+            # through the batcher so status lines stay in order with the suite output
+            if phase == "start":
+                stream(f"[Suite] {name} starting...")
+            elif out.error:
+                stream(f"[Suite] {name} failed: {out.error}")
+            else:
+                stream(f"[Suite] {name} done (exit={out.exit_code}, {out.wall_s:.1f}s)")
+
+        manifest["max_parallel_suites"] = env.max_parallel_suites
+        t0 = time.perf_counter()
+        outcomes = run_suites(specs, max_parallel=env.max_parallel_suites, on_event=on_event)
+        manifest["wall_s"] = round(time.perf_counter() - t0, 3)
+        for out in outcomes:
+            manifest["suites"].append(out.to_manifest())
+            exit_code = max(exit_code, out.exit_code)
+        if netem is not None:
+            stats = netem.stop()
+            netem = None
+            (out_dir / "netem.json").write_text(json.dumps(stats, indent=2), encoding="utf-8")
+            manifest["network"] = {"profile": stats["profile"], "totals": stats["totals"]}
+            stream(f"[Network] {stats['totals']}")
+        if sampler is not None:
+            summary = sampler.stop()
+            sampler = None
+            manifest["telemetry"] = {"summary": "telemetry/summary.json", "series": "telemetry/series.json",
+                                     "interval_s": summary["interval_s"], "hints": summary["hints"]}
+            from .telemetry import summary_line
+            stream(f"[Telemetry] {summary_line(summary)}")
+            for h in summary["hints"]:
+                stream(f"[Telemetry] {h}")
+
+        batcher.close()
+        mpath = write_run_manifest(out_dir, manifest)
+        log(f"[Manifest] {mpath}")
+        log(f"[Index] {write_run_index(out_dir, manifest)}")
+        if env.artifacts.get("pack", True):
+            try:
+                from .store import DEFAULT_KEEP_FULL, apply_retention, pack_run
+                t = pack_run(out_dir)
+                log(f"[Store] {t['files']} files, {t['bytes_raw'] / 1e6:.1f} MB -> {t['bytes_stored'] / 1e6:.1f} MB new "
+                    f"({t['deduplicated']} deduplicated)")
+                r = apply_retention(out_dir.parent, int(env.artifacts.get("keep_full", DEFAULT_KEEP_FULL)))
+                if r["pruned"] or r["objects_deleted"]:
+                    log(f"[Store] retention: {r['pruned']} older run(s) cut to summaries, "
+                        f"{r['bytes_deleted'] / 1e6:.1f} MB freed")
+            except Exception as e:
+                # the run's files are intact when packing fails; never fail the run on it
+                log(f"[Store] not packed: {e}")
+        try:
+            from .history import ingest_run_dir
+            ingest_run_dir(out_dir)
+            log(f"[History] indexed into {out_dir.parent / 'history.sqlite'}")
+        except Exception as e:
+            # the index is a convenience; never fail the run on it
+            log(f"[History] not indexed: {e}")
+        return exit_code, out_dir
+    except Exception as e:
+        batcher.close()
+        log(f"[Error] {e}")
+        return 1, out_dir
+    finally:
+        if netem is not None:
+            netem.stop()
+        if sampler is not None:
+            sampler.stop()
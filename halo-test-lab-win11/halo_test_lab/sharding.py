@@ -0,0 +1,143 @@
+from __future__ import annotations
+import heapq
+import json
+import statistics
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Historical durations come from earlier runs/<ts>/pytest/pytest-junit.xml files
+# (merged sharded runs are written under the same name, so they count too).
+HISTORY_GLOB = "*/pytest/pytest-junit.xml"
+HISTORY_RUNS = 5           # median over the most recent N observations per test
+DEFAULT_DURATION_S = 1.0   # unknown tests when there is no history at all
+
+def junit_key(nodeid: str) -> str:
+    """tests/sub/test_x.py::TestC::test_y[a] -> tests.sub.test_x.TestC::test_y[a] (JUnit classname::name)."""
+    parts = nodeid.split("::")
+    path = parts[0]
+    if path.endswith(".py"):
+        path = path[:-3]
+    classname = ".".join([path.replace("\\", "/").replace("/", ".")] + parts[1:-1])
+    return f"{classname}::{parts[-1]}" if len(parts) > 1 else classname
+
+def load_durations(runs_dir: Path, keep: int = HISTORY_RUNS) -> Dict[str, float]:
+    """Median duration (s) per JUnit key over the latest `keep` runs that contain it."""
+    obs: Dict[str, List[float]] = {}
+    # run folders are timestamped (YYYYmmdd-HHMMSS), newest first
+    for path in sorted(runs_dir.glob(HISTORY_GLOB), reverse=True):
+        try:
+            root = ET.parse(path).getroot()
+        except (ET.ParseError, OSError):
+            continue
+        for tc in root.iter("testcase"):
+            if tc.find("skipped") is not None:
+                continue
+            key = f"{tc.get('classname', '')}::{tc.get('name', '')}"
+            xs = obs.setdefault(key, [])
+            if len(xs) < keep:
+                try:
+                    xs.append(float(tc.get("time") or 0.0))
+                except ValueError:
+                    pass
+    return {k: statistics.median(v) for k, v in obs.items() if v}
+
+def balance(test_ids: Iterable[str], durations: Dict[str, float], shards: int) -> List[List[str]]:
+    """Longest-processing-time-first: heaviest test goes to the lightest shard.
+
+    Tests without history are costed at the median known duration. Empty shards are dropped;
+    each shard keeps collection order so module/session fixtures stay grouped.
+    """
+    ids = list(test_ids)
+    if not ids:
+        return []
+    known = [durations[junit_key(t)] for t in ids if junit_key(t) in durations]
+    fallback = statistics.median(known) if known else DEFAULT_DURATION_S
+    cost = {t: durations.get(junit_key(t), fallback) for t in ids}
+    order = {t: i for i, t in enumerate(ids)}
+
+    n = max(1, min(shards, len(ids)))
+    heap = [(0.0, i) for i in range(n)]
+    out: List[List[str]] = [[] for _ in range(n)]
+    for t in sorted(ids, key=lambda t: (-cost[t], order[t])):
+        load, i = heapq.heappop(heap)
+        out[i].append(t)
+        heapq.heappush(heap, (load + cost[t], i))
+    return [sorted(s, key=order.__getitem__) for s in out if s]
+
+def estimated_loads(shards: List[List[str]], durations: Dict[str, float]) -> List[float]:
+    known = [d for s in shards for t in s if (d := durations.get(junit_key(t))) is not None]
+    fallback = statistics.median(known) if known else DEFAULT_DURATION_S
+    return [round(sum(durations.get(junit_key(t), fallback) for t in s), 3) for s in shards]
+
+# --- merging -----------------------------------------------------------------
+
+_SUITE_COUNTS = ("tests", "errors", "failures", "skipped")
+
+def merge_junit(paths: List[Path], out_path: Path) -> Optional[Path]:
+    """Merge per-shard pytest JUnit files into a single <testsuites><testsuite name="pytest">."""
+    cases: List[ET.Element] = []
+    totals = {k: 0 for k in _SUITE_COUNTS}
+    wall = 0.0
+    first: Optional[ET.Element] = None
+    for p in paths:
+        try:
+            root = ET.parse(p).getroot()
+        except (ET.ParseError, OSError):
+            continue
+        for suite in ([root] if root.tag == "testsuite" else root.findall("testsuite")):
+            if first is None:
+                first = suite
+            for k in _SUITE_COUNTS:
+                totals[k] += int(suite.get(k) or 0)
+            # shards run side by side: suite time is the longest shard
+            wall = max(wall, float(suite.get("time") or 0.0))
+            cases.extend(suite.findall("testcase"))
+    if first is None:
+        return None
+
+    root = ET.Element("testsuites", {"name": "pytest tests"})
+    attrs = {k: v for k, v in first.attrib.items() if k not in _SUITE_COUNTS and k != "time"}
+    attrs.update({k: str(v) for k, v in totals.items()})
+    attrs["time"] = f"{wall:.3f}"
+    suite = ET.SubElement(root, "testsuite", attrs)
+    suite.extend(cases)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(root).write(out_path, encoding="utf-8", xml_declaration=True)
+    return out_path
+
+def merge_json_reports(paths: List[Path], out_path: Path) -> Optional[Path]:
+    """Merge pytest-json-report files (the format qa_summarize.py reads)."""
+    reports = []
+    for p in paths:
+        try:
+            reports.append(json.loads(p.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    if not reports:
+        return None
+
+    summary: Dict[str, int] = {}
+    for r in reports:
+        for k, v in (r.get("summary") or {}).items():
+            if isinstance(v, int):
+                summary[k] = summary.get(k, 0) + v
+    merged = dict(reports[0])
+    merged.update({
+        "created": min(float(r.get("created") or 0.0) for r in reports),
+        "duration": max(float(r.get("duration") or 0.0) for r in reports),
+        "exitcode": merge_exit_codes([int(r.get("exitcode") or 0) for r in reports]),
+        "summary": summary,
+        "collectors": [c for r in reports for c in (r.get("collectors") or [])],
+        "tests": [t for r in reports for t in (r.get("tests") or [])],
+        "warnings": [w for r in reports for w in (r.get("warnings") or [])],
+        "shards": [{"duration": r.get("duration"), "exitcode": r.get("exitcode"), "summary": r.get("summary")} for r in reports],
+    })
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(merged, indent=2), encoding="utf-8")
+    return out_path
+
+def merge_exit_codes(codes: List[int]) -> int:
+    # 5 = "no tests collected" only counts when every shard reports it
+    real = [c for c in codes if c != 5]
+    return max(real) if real else (5 if codes else 0)
@@ -0,0 +1,328 @@
+"""Run artifact store: content-addressed, gzip-compressed blobs and a keep-last-N retention policy.
+
+Blobs live once under runs/.store/objects/<sha[:2]>/<sha256 of the content>[.gz]; a packed run
+folder keeps *hard links* to them, so identical files across runs (stub logs, empty stderr)
+take disk space once and every path still opens directly:
+
+- summaries (run-manifest.json, index.html, *summary*.json, report.json, *.xml, ...) stay
+  as private, uncompressed files under their own name - history, sharding, the perf gate and
+  the browser read (and may rewrite) them as before; store.json only records their hash;
+- everything else (stdout/stderr logs, k6 NDJSON streams, telemetry series, ...) is replaced
+  by `<name>.gz`; run-manifest.json artifacts and index.html are rewritten to those paths.
+  Objects are read-only, so a write through one run's link fails instead of changing every
+  run that shares the blob.
+
+runs/<ts>/store.json maps each original path to (sha256, size, codec). Beyond the newest
+`keep_full` runs only the summaries are kept: the rest is unlinked, marked `pruned` in
+store.json, and objects no run links any more are deleted. Hard links need the store on the
+same volume as the runs (it is: runs/.store); where linking fails the file is copied instead.
+
+    python -m halo_test_lab.store stats
+    python -m halo_test_lab.store pack [runs/<ts> ...]        # default: every unpacked run
+    python -m halo_test_lab.store retain --keep-full 20       # prune older runs, delete orphans
+    python -m halo_test_lab.store cat runs/<ts>/k6/k6.stdout.log
+"""
+from __future__ import annotations
+import argparse
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+STORE_DIRNAME = ".store"
+INDEX_NAME = "store.json"
+DEFAULT_KEEP_FULL = 20
+GZIP_LEVEL = 6
+CHUNK = 1 << 20
+ORPHAN_MIN_AGE_S = 3600.0   # never delete objects a concurrent pack may be about to link
+
+# kept uncompressed (and kept by retention); run-manifest.json / index.html are rewritten, never linked
+SUMMARY_PATTERNS = ("*summary*.json", "*-live.json", "report.json", "netem.json", "shards.json", "*.xml")
+UNPACKED = ("run-manifest.json", "index.html", INDEX_NAME)
+# already compressed: deduplicated but stored as is
+RAW_SUFFIXES = (".gz", ".zip", ".png", ".jpg", ".jpeg", ".sqlite")
+
+def store_root(runs_dir: Path) -> Path:
+    return runs_dir / STORE_DIRNAME
+
+def _is_summary(rel: str) -> bool:
+    name = rel.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(name, pat) for pat in SUMMARY_PATTERNS)
+
+def _codec(rel: str) -> str:
+    return "raw" if _is_summary(rel) or rel.lower().endswith(RAW_SUFFIXES) else "gzip"
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _object(root: Path, sha: str, codec: str) -> Path:
+    return root / "objects" / sha[:2] / (sha + (".gz" if codec == "gzip" else ""))
+
+def _put(root: Path, src: Path, sha: str, codec: str) -> Tuple[Path, bool]:
+    """Object for `src`; returns (path, created). Written to a temp name, then renamed into place."""
+    obj = _object(root, sha, codec)
+    if obj.exists():
+        return obj, False
+    obj.parent.mkdir(parents=True, exist_ok=True)
+    tmp = obj.with_name(f"{obj.name}.{os.getpid()}.tmp")
+    if codec == "gzip":
+        # mtime=0 / no file name: the same content always gives the same bytes
+        with src.open("rb") as fin, open(tmp, "wb") as raw, \
+                gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=GZIP_LEVEL, mtime=0) as fout:
+            shutil.copyfileobj(fin, fout, CHUNK)
+    else:
+        shutil.copyfile(src, tmp)
+    os.chmod(tmp, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+    os.replace(tmp, obj)
+    return obj, True
+
+def _link(obj: Path, dest: Path) -> None:
+    tmp = dest.with_name(dest.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(obj, tmp)
+    except OSError:
+        shutil.copyfile(obj, tmp)  # FAT / network shares without hard links: no dedup, still compressed
+    os.replace(tmp, dest)
+
+def _unlink(path: Path, obj: Optional[Path] = None) -> None:
+    """Remove a (read-only) link. Windows refuses to delete read-only files and its read-only flag
+    belongs to the blob, not the link - so clear it for the delete and set it back on `obj`."""
+    try:
+        path.unlink()
+    except PermissionError:
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+        path.unlink()
+        if obj is not None and obj.exists():
+            os.chmod(obj, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+
+def load_index(run_dir: Path) -> Optional[dict]:
+    try:
+        return json.loads((run_dir / INDEX_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def stored_name(rel: str, codec: str) -> str:
+    return rel + ".gz" if codec == "gzip" else rel
+
+def pack_run(run_dir: Path) -> dict:
+    """Move a run folder's files into its runs/.store (idempotent); returns totals for this run."""
+    root = store_root(run_dir.parent)
+    index = load_index(run_dir) or {"version": 1, "retention": "full", "files": {}}
+    files: Dict[str, dict] = index["files"]
+    stored = {stored_name(rel, e["codec"]) for rel, e in files.items()}
+    totals = {"files": 0, "bytes_raw": 0, "bytes_stored": 0, "deduplicated": 0}
+
+    for path in sorted(p for p in run_dir.rglob("*") if p.is_file()):
+        rel = path.relative_to(run_dir).as_posix()
+        if rel in UNPACKED or rel in stored or rel.endswith(".tmp"):
+            continue
+        codec = _codec(rel)
+        size = path.stat().st_size
+        sha = _sha256(path)
+        files[rel] = {"sha256": sha, "size": size, "codec": codec}
+        totals["files"] += 1
+        totals["bytes_raw"] += size
+        if _is_summary(rel):
+            # rewritten in place by the tools that read them: never share an inode with another run
+            totals["bytes_stored"] += size
+            continue
+        obj, created = _put(root, path, sha, codec)
+        dest = run_dir / stored_name(rel, codec)
+        _link(obj, dest)
+        if dest != path:
+            path.unlink()
+        totals["bytes_stored"] += obj.stat().st_size if created else 0
+        totals["deduplicated"] += 0 if created else 1
+
+    (run_dir / INDEX_NAME).write_text(json.dumps(index, indent=2), encoding="utf-8")
+    _rewrite_manifest(run_dir)
+    return totals
+
+def _rewrite_manifest(run_dir: Path) -> None:
+    mpath = run_dir / "run-manifest.json"
+    try:
+        manifest = json.loads(mpath.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    for suite in manifest.get("suites", []):
+        suite["artifacts"] = [str(resolve(run_dir, a) or a) for a in suite.get("artifacts", [])]
+    tel = manifest.get("telemetry") or {}
+    for key in ("summary", "series"):
+        p = resolve(run_dir, tel[key]) if tel.get(key) else None
+        if p is not None and run_dir in p.parents:
+            tel[key] = p.relative_to(run_dir).as_posix()
+    manifest["store"] = {"index": INDEX_NAME, "objects": str(store_root(run_dir.parent)),
+                         "retention": (load_index(run_dir) or {}).get("retention", "full")}
+    from .executor import write_run_index, write_run_manifest
+    write_run_manifest(run_dir, manifest)
+    write_run_index(run_dir, manifest)
+
+def _entry(run_dir: Path, p: Path) -> Optional[dict]:
+    try:
+        rel = p.resolve().relative_to(run_dir.resolve()).as_posix()
+    except ValueError:
+        return None
+    files = (load_index(run_dir) or {}).get("files") or {}
+    e = files.get(rel)
+    if e is None and rel.endswith(".gz") and (files.get(rel[:-3]) or {}).get("codec") == "gzip":
+        e = files[rel[:-3]]  # the manifest already points at the stored name
+    return e
+
+def resolve(run_dir: Path, artifact: str) -> Optional[Path]:
+    """Where an artifact path (as first written or as rewritten, absolute or run-relative) lives now; None once pruned."""
+    p = Path(artifact)
+    if not p.is_absolute():
+        p = run_dir / p
+    if p.exists():
+        return p
+    gz = p.with_name(p.name + ".gz")
+    if gz.exists():
+        return gz
+    e = _entry(run_dir, p)
+    if e and not e.get("pruned"):
+        obj = _object(store_root(run_dir.parent), e["sha256"], e["codec"])
+        return obj if obj.exists() else None
+    return None
+
+def read_artifact(run_dir: Path, artifact: str) -> Optional[bytes]:
+    """An artifact's original content (decompressed), or None once pruned."""
+    p = resolve(run_dir, artifact)
+    if p is None:
+        return None
+    e = _entry(run_dir, Path(artifact) if Path(artifact).is_absolute() else run_dir / artifact)
+    data = p.read_bytes()
+    return gzip.decompress(data) if e and e["codec"] == "gzip" else data
+
+def run_dirs(runs_dir: Path) -> List[Path]:
+    """Run folders (those with a manifest), oldest first."""
+    if not runs_dir.is_dir():
+        return []
+    return sorted(p for p in runs_dir.iterdir()
+                  if p.is_dir() and p.name != STORE_DIRNAME and (p / "run-manifest.json").exists())
+
+def prune_run(run_dir: Path) -> int:
+    """Drop everything but the summaries from a packed run; returns bytes of links removed."""
+    index = load_index(run_dir)
+    if index is None:
+        pack_run(run_dir)
+        index = load_index(run_dir) or {"files": {}}
+    freed = 0
+    for rel, e in index["files"].items():
+        if (e["codec"] == "raw" and _is_summary(rel)) or e.get("pruned"):
+            continue
+        p = run_dir / stored_name(rel, e["codec"])
+        try:
+            freed += p.stat().st_size
+            _unlink(p, _object(store_root(run_dir.parent), e["sha256"], e["codec"]))
+        except OSError:
+            pass
+        e["pruned"] = True
+    index["retention"] = "summary"
+    (run_dir / INDEX_NAME).write_text(json.dumps(index, indent=2), encoding="utf-8")
+    _rewrite_manifest(run_dir)
+    return freed
+
+def collect_orphans(runs_dir: Path) -> Tuple[int, int]:
+    """Delete objects no run references; returns (objects, bytes)."""
+    root = store_root(runs_dir) / "objects"
+    if not root.is_dir():
+        return 0, 0
+    live = set()
+    for d in run_dirs(runs_dir):
+        for e in ((load_index(d) or {}).get("files") or {}).values():
+            if not e.get("pruned"):
+                live.add(_object(store_root(runs_dir), e["sha256"], e["codec"]).name)
+    now = time.time()
+    n = size = 0
+    for obj in root.glob("*/*"):
+        st = obj.stat()
+        # a link count above 1 means some folder still holds the blob (e.g. a run being packed)
+        if obj.name in live or st.st_nlink > 1 or now - st.st_mtime < ORPHAN_MIN_AGE_S:
+            continue
+        _unlink(obj)
+        n, size = n + 1, size + st.st_size
+    return n, size
+
+def apply_retention(runs_dir: Path, keep_full: int = DEFAULT_KEEP_FULL) -> dict:
+    """Newest `keep_full` runs stay complete (packed); older ones keep summaries only. 0 = keep all."""
+    dirs = run_dirs(runs_dir)
+    pruned = freed = 0
+    if keep_full > 0:
+        for d in dirs[:-keep_full]:
+            if (load_index(d) or {}).get("retention") != "summary":
+                freed += prune_run(d)
+                pruned += 1
+    objects, obj_bytes = collect_orphans(runs_dir)
+    return {"runs": len(dirs), "pruned": pruned, "bytes_unlinked": freed,
+            "objects_deleted": objects, "bytes_deleted": obj_bytes}
+
+def stats(runs_dir: Path) -> dict:
+    dirs = run_dirs(runs_dir)
+    raw = 0
+    packed = full = 0
+    for d in dirs:
+        index = load_index(d)
+        if index is None:
+            continue
+        packed += 1
+        full += index.get("retention") == "full"
+        raw += sum(e["size"] for e in index["files"].values() if not e.get("pruned"))
+    objs = list((store_root(runs_dir) / "objects").glob("*/*"))
+    return {"runs": len(dirs), "packed": packed, "full": full, "objects": len(objs),
+            "bytes_logical": raw, "bytes_stored": sum(o.stat().st_size for o in objs)}
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f}MB"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab.store", description="Run artifact store")
+    ap.add_argument("--runs-dir", type=Path, default=Path(__file__).resolve().parents[1] / "runs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="pack run folders (default: all not packed yet)")
+    p.add_argument("runs", nargs="*", type=Path)
+    r = sub.add_parser("retain", help="apply retention and delete orphaned objects")
+    r.add_argument("--keep-full", type=int, default=DEFAULT_KEEP_FULL)
+    c = sub.add_parser("cat", help="write an artifact (resolved through the store) to stdout")
+    c.add_argument("artifact", type=Path)
+    sub.add_parser("stats")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "pack":
+        for d in args.runs or [d for d in run_dirs(args.runs_dir) if load_index(d) is None]:
+            t = pack_run(d.resolve())
+            print(f"STORE_PACKED={d} FILES={t['files']} RAW={_mb(t['bytes_raw'])} "
+                  f"STORED={_mb(t['bytes_stored'])} DEDUP={t['deduplicated']}")
+        return 0
+    if args.cmd == "retain":
+        t = apply_retention(args.runs_dir, args.keep_full)
+        print(f"STORE_RETAIN=RUNS={t['runs']} PRUNED={t['pruned']} UNLINKED={_mb(t['bytes_unlinked'])} "
+              f"OBJECTS_DELETED={t['objects_deleted']} FREED={_mb(t['bytes_deleted'])}")
+        return 0
+    if args.cmd == "cat":
+        path = args.artifact.resolve()
+        run_dir = next((d for d in path.parents if (d / "run-manifest.json").exists()), None)
+        data = read_artifact(run_dir, str(path)) if run_dir else (path.read_bytes() if path.exists() else None)
+        if data is None:
+            print(f"STORE_ERROR=not found or pruned: {args.artifact}", file=sys.stderr)
+            return 1
+        sys.stdout.buffer.write(data)
+        return 0
+    s = stats(args.runs_dir)
+    print(f"STORE_RUNS={s['runs']} PACKED={s['packed']} FULL={s['full']} OBJECTS={s['objects']} "
+          f"LOGICAL={_mb(s['bytes_logical'])} STORED={_mb(s['bytes_stored'])}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
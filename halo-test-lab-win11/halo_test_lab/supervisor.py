@@ -0,0 +1,459 @@
+"""Simulator supervisor: start/stop/status for the local stubs, concurrent readiness gating, restarts.
+
+Cross-platform replacement for the PID file + fixed 250 ms / 10 s health loop of
+scripts/sim_gateway_stub.ps1 (same commands on the Win11 lab and on Linux CI):
+
+    python -m halo_test_lab.supervisor start [gateway health]   # detached; returns once all are ready
+    python -m halo_test_lab.supervisor status
+    python -m halo_test_lab.supervisor stop
+    python -m halo_test_lab.supervisor run -- python -m pytest -q   # start, gate, run, stop (exit = command's)
+    python -m halo_test_lab.supervisor run                          # foreground until Ctrl+C
+
+All services are probed at once and each probe backs off from 20 ms to 500 ms, so a stub
+that binds in 80 ms is seen right away instead of on the next fixed tick; a process that
+exits while starting fails the gate immediately, with the tail of its stderr. In `run`
+mode crashed services are restarted (exponential backoff, `max_restarts`) and re-gated.
+
+Services are the built-in `gateway` (simulators.gateway_sim) and `health` (health_stub.py);
+the `simulators:` block of a profile YAML overrides their fields or adds new ones:
+
+    simulators:
+      gateway: {port: 8081}
+      conversation: {argv: [python, -m, my_stub], cwd: ., port: 8001, exports: {HALO_BACKEND_URL: "{url}"}}
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+LAB_ROOT = Path(__file__).resolve().parents[1]
+QA_ROOT = LAB_ROOT.parent  # halo-platform-qa checkout (simulators/), when the lab lives inside it
+DEFAULT_STATE_DIR = LAB_ROOT / "runs" / "supervisor"
+
+PROBE_MIN_S = 0.02
+PROBE_MAX_S = 0.5
+PROBE_TIMEOUT_S = 2.0
+STOP_GRACE_S = 5.0
+RESTART_BACKOFF_MAX_S = 10.0
+STDERR_TAIL = 20
+
+@dataclass
+class ServiceSpec:
+    name: str
+    argv: List[str]
+    cwd: Path
+    port: int
+    host: str = "127.0.0.1"
+    health_path: str = "/health"
+    env: Dict[str, str] = field(default_factory=dict)
+    # env vars handed to `run -- cmd`, "{url}" = http://host:port
+    exports: Dict[str, str] = field(default_factory=dict)
+    ready_timeout_s: float = 15.0
+    restart: bool = True
+    max_restarts: int = 5
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def health_url(self) -> str:
+        return self.url + self.health_path
+
+    def process_env(self) -> Dict[str, str]:
+        # both stubs read HOST/PORT (as the ps1 wrapper sets them)
+        env = os.environ.copy()
+        env.update({"HOST": self.host, "PORT": str(self.port), "PYTHONUNBUFFERED": "1"})
+        env.update({k: str(v) for k, v in self.env.items()})
+        return env
+
+    def with_overrides(self, d: dict, base_dir: Path) -> "ServiceSpec":
+        data = asdict(self)
+        for k, v in (d or {}).items():
+            if k in data and k != "name":
+                data[k] = v
+        argv = [sys.executable if a == "python" else str(a) for a in data["argv"]]
+        cwd = Path(data["cwd"])
+        return ServiceSpec(**dict(data, argv=argv, cwd=cwd if cwd.is_absolute() else base_dir / cwd,
+                                  port=int(data["port"]), ready_timeout_s=float(data["ready_timeout_s"]),
+                                  max_restarts=int(data["max_restarts"])))
+
+BUILTIN: Dict[str, ServiceSpec] = {
+    "gateway": ServiceSpec("gateway", [sys.executable, "-m", "simulators.gateway_sim"], QA_ROOT, 8080,
+                           exports={"HALO_GATEWAY_BASE_URL": "{url}"}),
+    "health": ServiceSpec("health", [sys.executable, "health_stub.py"], LAB_ROOT, 8000,
+                          exports={"HALO_HEALTH_URL": "{url}/health"}),
+}
+
+def load_specs(overrides: Optional[dict] = None, base_dir: Path = LAB_ROOT) -> Dict[str, ServiceSpec]:
+    """Built-ins merged with a `simulators:` block; a new name needs at least argv and port."""
+    specs = {n: replace(s) for n, s in BUILTIN.items()}
+    for name, d in (overrides or {}).items():
+        base = specs.get(name) or ServiceSpec(name, [], base_dir, 0)
+        specs[name] = base.with_overrides(d or {}, base_dir)
+        if not specs[name].argv or not specs[name].port:
+            raise ValueError(f"simulators.{name}: argv and port are required")
+    return specs
+
+# --- processes --------------------------------------------------------------------
+
+def _spawn(spec: ServiceSpec, out_path: Path, err_path: Path) -> subprocess.Popen:
+    if not spec.cwd.is_dir():
+        raise FileNotFoundError(f"{spec.name}: working directory not found: {spec.cwd}")
+    kwargs = {}
+    if os.name == "nt":
+        # own process group: Ctrl+C in the console doesn't hit the stubs, taskkill /T gets the tree
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    with out_path.open("ab") as so, err_path.open("ab") as se:
+        return subprocess.Popen(spec.argv, cwd=str(spec.cwd), env=spec.process_env(), stdin=subprocess.DEVNULL,
+                                stdout=so, stderr=se, **kwargs)
+
+def pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+        k32 = ctypes.windll.kernel32
+        h = k32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not h:
+            return False
+        code = ctypes.c_ulong()
+        try:
+            return bool(k32.GetExitCodeProcess(h, ctypes.byref(code))) and code.value == 259  # STILL_ACTIVE
+        finally:
+            k32.CloseHandle(h)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        # a zombie child of ours is dead for our purposes
+        done, _ = os.waitpid(pid, os.WNOHANG)
+        return done == 0
+    except ChildProcessError:
+        return True
+
+def kill_tree(pid: int, grace_s: float = STOP_GRACE_S) -> None:
+    """SIGTERM the service's process group, SIGKILL after `grace_s`; taskkill /T on Windows."""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    for sig, wait_s in ((signal.SIGTERM, grace_s), (signal.SIGKILL, 1.0)):
+        try:
+            os.killpg(pid, sig)
+        except ProcessLookupError:
+            return
+        except PermissionError:
+            os.kill(pid, sig)
+        deadline = time.monotonic() + wait_s
+        while time.monotonic() < deadline:
+            if not pid_alive(pid):
+                return
+            time.sleep(0.05)
+
+# direct: an http_proxy in the environment (e.g. netem's) must not sit between us and a local stub
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+def probe(url: str, timeout_s: float = PROBE_TIMEOUT_S) -> bool:
+    try:
+        with _opener.open(url, timeout=timeout_s) as r:
+            return r.status == 200
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+def _tail(path: Path, n: int = STDERR_TAIL) -> str:
+    try:
+        return "\n".join(path.read_text(encoding="utf-8", errors="replace").splitlines()[-n:])
+    except OSError:
+        return ""
+
+@dataclass
+class Readiness:
+    name: str
+    ready: bool
+    elapsed_ms: float
+    probes: int
+    error: Optional[str] = None
+
+def wait_ready(spec: ServiceSpec, alive: Callable[[], Optional[str]], timeout_s: Optional[float] = None) -> Readiness:
+    """Probe spec.health_url with adaptive backoff until 200, timeout, or `alive()` reports an exit."""
+    t0 = time.monotonic()
+    deadline = t0 + (spec.ready_timeout_s if timeout_s is None else timeout_s)
+    delay = PROBE_MIN_S
+    n = 0
+    while True:
+        n += 1
+        remaining = deadline - time.monotonic()
+        if probe(spec.health_url, max(0.05, min(PROBE_TIMEOUT_S, remaining))):
+            return Readiness(spec.name, True, round((time.monotonic() - t0) * 1000.0, 1), n)
+        gone = alive()
+        if gone:
+            return Readiness(spec.name, False, round((time.monotonic() - t0) * 1000.0, 1), n, gone)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return Readiness(spec.name, False, round((time.monotonic() - t0) * 1000.0, 1), n,
+                             f"not ready after {spec.ready_timeout_s:g}s ({spec.health_url})")
+        time.sleep(min(delay, remaining))
+        delay = min(PROBE_MAX_S, delay * 1.5)
+
+# --- supervisor -------------------------------------------------------------------
+
+class Supervisor:
+    """Owns the service processes; state files in `state_dir` let `status`/`stop` find detached ones."""
+
+    def __init__(self, specs: Dict[str, ServiceSpec], state_dir: Path = DEFAULT_STATE_DIR,
+                 on_event: Callable[[str], None] = print):
+        self.specs = specs
+        self.state_dir = state_dir
+        self.on_event = on_event
+        self.procs: Dict[str, subprocess.Popen] = {}
+        self.restarts: Dict[str, int] = {}
+        # guards procs against the watch thread: launches and stop() don't interleave
+        self._lock = threading.RLock()
+
+    def _paths(self, name: str):
+        d = self.state_dir
+        return d / f"{name}.json", d / f"{name}.out.log", d / f"{name}.err.log"
+
+    def _state(self, name: str) -> Optional[dict]:
+        try:
+            return json.loads(self._paths(name)[0].read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _names(self, names: Optional[List[str]]) -> List[str]:
+        names = list(names or self.specs)
+        unknown = [n for n in names if n not in self.specs]
+        if unknown:
+            raise KeyError(f"unknown service(s): {', '.join(unknown)} (known: {', '.join(self.specs)})")
+        return names
+
+    def _launch(self, name: str) -> subprocess.Popen:
+        spec = self.specs[name]
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        state_path, out_path, err_path = self._paths(name)
+        with self._lock:
+            p = _spawn(spec, out_path, err_path)
+            self.procs[name] = p
+            state_path.write_text(json.dumps({
+                "name": name, "pid": p.pid, "url": spec.url, "health_url": spec.health_url, "argv": spec.argv,
+                "started_at": datetime.now(timezone.utc).isoformat(), "restarts": self.restarts.get(name, 0),
+            }, indent=2), encoding="utf-8")
+        return p
+
+    def _relaunch(self, name: str, crashed: subprocess.Popen, stop: threading.Event) -> Optional[subprocess.Popen]:
+        """Restart a crashed service, unless stop() took it over (or `stop` was set) during the backoff."""
+        with self._lock:
+            if stop.is_set() or self.procs.get(name) is not crashed:
+                return None
+            self.restarts[name] = self.restarts.get(name, 0) + 1
+            return self._launch(name)
+
+    def _exit_reason(self, name: str) -> Optional[str]:
+        p = self.procs.get(name)
+        if p is None or p.poll() is None:
+            return None
+        tail = _tail(self._paths(name)[2])
+        return f"exited rc={p.returncode}" + (f"\n{tail}" if tail else "")
+
+    def start(self, names: Optional[List[str]] = None) -> Dict[str, Readiness]:
+        """Start what isn't already up and gate on all of them concurrently."""
+        names = self._names(names)
+        todo = []
+        for name in names:
+            spec = self.specs[name]
+            st = self._state(name)
+            if st and pid_alive(int(st["pid"])):
+                self.on_event(f"SIM_{name.upper()}=ALREADY_RUNNING PID={st['pid']} URL={spec.url}")
+            elif probe(spec.health_url, 0.5):
+                # something else (another lab, a dev server) already serves it: use it, don't fight for the port
+                self.on_event(f"SIM_{name.upper()}=EXTERNAL URL={spec.url}")
+            else:
+                self._launch(name)
+            todo.append(name)
+        with ThreadPoolExecutor(max_workers=max(1, len(todo))) as ex:
+            futs = {n: ex.submit(wait_ready, self.specs[n], lambda n=n: self._exit_reason(n)) for n in todo}
+            results = {n: f.result() for n, f in futs.items()}
+        for n, r in results.items():
+            pid = self.procs[n].pid if n in self.procs else (self._state(n) or {}).get("pid", "-")
+            if r.ready:
+                self.on_event(f"SIM_{n.upper()}=READY PID={pid} URL={self.specs[n].url} "
+                              f"READY_MS={r.elapsed_ms} PROBES={r.probes}")
+            else:
+                self.on_event(f"SIM_{n.upper()}=FAIL PID={pid} URL={self.specs[n].url} ERROR={r.error}")
+                self.on_event(f"STDERR_LOG={self._paths(n)[2]}")
+        return results
+
+    def stop(self, names: Optional[List[str]] = None) -> List[str]:
+        with self._lock:
+            return self._stop(self._names(names))
+
+    def _stop(self, names: List[str]) -> List[str]:
+        stopped = []
+        for name in names:
+            st = self._state(name)
+            p = self.procs.pop(name, None)
+            pid = p.pid if p is not None else int(st["pid"]) if st else 0
+            if pid and (p is not None and p.poll() is None or p is None and pid_alive(pid)):
+                kill_tree(pid)
+                stopped.append(name)
+            if p is not None:
+                try:
+                    p.wait(timeout=1.0)
+                except subprocess.TimeoutExpired:
+                    pass
+            self._paths(name)[0].unlink(missing_ok=True)
+        return stopped
+
+    def status(self, names: Optional[List[str]] = None) -> Dict[str, dict]:
+        names = self._names(names)
+        out = {}
+
+        def one(name: str) -> dict:
+            spec = self.specs[name]
+            st = self._state(name) or {}
+            running = bool(st) and pid_alive(int(st["pid"]))
+            healthy = probe(spec.health_url, 1.0)
+            state = "READY" if running and healthy else "UP" if running else "EXTERNAL" if healthy else "STOPPED"
+            return {"state": state, "pid": st.get("pid") if running else None, "url": spec.url,
+                    "restarts": st.get("restarts", 0)}
+
+        with ThreadPoolExecutor(max_workers=max(1, len(names))) as ex:
+            for name, res in zip(names, ex.map(one, names)):
+                out[name] = res
+        return out
+
+    def exports(self, names: Optional[List[str]] = None) -> Dict[str, str]:
+        env = {}
+        for name in self._names(names):
+            spec = self.specs[name]
+            env.update({k: v.format(url=spec.url, host=spec.host, port=spec.port) for k, v in spec.exports.items()})
+        return env
+
+    def watch(self, stop: threading.Event, interval_s: float = 0.25) -> None:
+        """Restart services (started by this supervisor) that exit, until `stop` is set."""
+        backoff: Dict[str, float] = {}
+        while not stop.wait(interval_s):
+            for name, p in list(self.procs.items()):
+                if p.poll() is None or stop.is_set():
+                    continue
+                spec = self.specs[name]
+                n = self.restarts.get(name, 0)
+                self.on_event(f"SIM_{name.upper()}=CRASHED RC={p.returncode} RESTARTS={n}")
+                if not spec.restart or n >= spec.max_restarts:
+                    self.on_event(f"SIM_{name.upper()}=GAVE_UP STDERR_LOG={self._paths(name)[2]}")
+                    with self._lock:
+                        if self.procs.get(name) is p:
+                            self.procs.pop(name)
+                    continue
+                delay = backoff.get(name, 0.5)
+                backoff[name] = min(RESTART_BACKOFF_MAX_S, delay * 2)
+                if stop.wait(delay):
+                    return
+                if self._relaunch(name, p, stop) is None:
+                    continue
+                r = wait_ready(spec, lambda name=name: self._exit_reason(name))
+                self.on_event(f"SIM_{name.upper()}={'READY' if r.ready else 'FAIL'} RESTARTS={n + 1} "
+                              f"READY_MS={r.elapsed_ms}" + ("" if r.ready else f" ERROR={r.error}"))
+                if r.ready:
+                    backoff.pop(name, None)
+
+    def __enter__(self) -> "Supervisor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop(list(self.procs))
+
+# --- CLI --------------------------------------------------------------------------
+
+def _load_overrides(config: Optional[Path]) -> dict:
+    if not config:
+        return {}
+    from .config import load_env_config
+    return load_env_config(config).simulators
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    command: List[str] = []
+    if "--" in argv:
+        i = argv.index("--")
+        argv, command = argv[:i], argv[i + 1:]
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab.supervisor", description="Halo simulator supervisor")
+    ap.add_argument("action", choices=("start", "stop", "status", "run"))
+    ap.add_argument("services", nargs="*", help=f"default: all ({', '.join(BUILTIN)} + config)")
+    ap.add_argument("--config", type=Path, default=None, help="profile YAML with a simulators: block")
+    ap.add_argument("--state-dir", type=Path, default=DEFAULT_STATE_DIR)
+    ap.add_argument("--timeout", type=float, default=None, help="readiness deadline per service (s)")
+    ap.add_argument("--json", action="store_true", help="status as JSON")
+    args = ap.parse_args(argv)
+
+    specs = load_specs(_load_overrides(args.config), args.config.parent if args.config else LAB_ROOT)
+    if args.timeout is not None:
+        for s in specs.values():
+            s.ready_timeout_s = args.timeout
+    sup = Supervisor(specs, args.state_dir, on_event=lambda line: print(line, flush=True))
+    names = args.services or None
+
+    if args.action == "status":
+        st = sup.status(names)
+        if args.json:
+            print(json.dumps(st, indent=2))
+        else:
+            for n, s in st.items():
+                print(f"SIM_{n.upper()}_STATUS={s['state']} PID={s['pid'] or '-'} URL={s['url']} RESTARTS={s['restarts']}")
+        return 0
+    if args.action == "stop":
+        stopped = sup.stop(names)
+        print(f"SIM_STOPPED={','.join(stopped) or '-'}")
+        return 0
+
+    results = sup.start(names)
+    ok = sum(r.ready for r in results.values())
+    print(f"SIM_READY={ok}/{len(results)}", flush=True)
+    if args.action == "start":
+        # detached: the services outlive this process; `stop` finds them through the state files
+        return 0 if ok == len(results) else 2
+    if ok != len(results):
+        sup.stop(list(sup.procs))
+        return 2
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=sup.watch, args=(stop,), daemon=True)
+    watcher.start()
+    if os.name != "nt":
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    code = 0
+    try:
+        if command:
+            env = dict(os.environ, **sup.exports(names))
+            code = subprocess.call(command, env=env)
+        else:
+            while not stop.wait(0.5):
+                pass
+    except KeyboardInterrupt:
+        code = 130
+    finally:
+        stop.set()
+        watcher.join(timeout=5)
+        stopped = sup.stop(list(sup.procs))
+        print(f"SIM_STOPPED={','.join(stopped) or '-'}")
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
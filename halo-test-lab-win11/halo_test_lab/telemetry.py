@@ -0,0 +1,425 @@
+"""Resource telemetry for a run: CPU, RSS, open fds, threads and I/O of the load side and the SUT.
+
+A background thread reads /proc every `interval_s` and folds processes into groups:
+
+- `runner:<suite>` - children of this process and their descendants, by what they run
+  (`k6`, `pytest`, `loadgen`; pytest and k6 shards land in one group), plus `runner:lab`
+  for this process itself (orchestration, netem proxy, live k6 parsing);
+- `sut:<name>` - services started by halo_test_lab.supervisor (its state files) and
+  anything named in the profile, with their descendants:
+
+    telemetry:
+      interval_s: 1
+      pids: {backend: 4242}           # explicit PIDs
+      match: {backend: "uvicorn"}     # or a substring of the command line
+
+Per group and tick: CPU (% of one core), RSS, fds, threads, process count and read/write
+rates (/proc/<pid>/io rchar/wchar - sockets included; /proc has no per-process network
+counters). Per host: CPU % of all cores, MemAvailable, load1 and interface bytes/s from
+/proc/net/dev, loopback (local simulators) kept apart from the rest.
+
+Series are columnar (telemetry/series.json, one array per metric, halved in resolution
+past MAX_POINTS); telemetry/summary.json has avg/p95/max per group and `hints` that call
+out a saturated load generator or SUT. Linux only - without /proc the run is not sampled.
+
+    python -m halo_test_lab.telemetry --out runs/adhoc -- k6 run examples/k6/basic.js
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+INTERVAL_S = 1.0
+MAX_POINTS = 3600           # per series; beyond that every other point is dropped
+SATURATED_PCT = 90.0
+PROC = Path("/proc")
+
+GROUP_METRICS = ("cpu_pct", "rss_mb", "fds", "threads", "procs", "read_kbps", "write_kbps")
+HOST_METRICS = ("cpu_pct", "mem_avail_mb", "load1", "lo_rx_kbps", "lo_tx_kbps", "net_rx_kbps", "net_tx_kbps")
+
+def available() -> bool:
+    return (PROC / "self" / "stat").exists()
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+
+def _stat(pid: int) -> Optional[Tuple[int, int, int, int, int]]:
+    """(ppid, cpu ticks, threads, start time, rss pages) from /proc/<pid>/stat."""
+    s = _read(PROC / str(pid) / "stat")
+    if not s:
+        return None
+    # comm may contain spaces and parentheses; the fields after the last ')' are fixed
+    f = s[s.rfind(")") + 2:].split()
+    try:
+        return int(f[1]), int(f[11]) + int(f[12]), int(f[17]), int(f[19]), int(f[21])
+    except (IndexError, ValueError):
+        return None
+
+def _cmdline(pid: int) -> List[str]:
+    s = _read(PROC / str(pid) / "cmdline")
+    return [a for a in (s or "").split("\0") if a]
+
+def _fds(pid: int) -> int:
+    try:
+        return len(os.listdir(PROC / str(pid) / "fd"))
+    except OSError:
+        return 0
+
+def _io(pid: int) -> Tuple[int, int]:
+    r = w = 0
+    for line in (_read(PROC / str(pid) / "io") or "").splitlines():
+        k, _, v = line.partition(":")
+        if k == "rchar":
+            r = int(v)
+        elif k == "wchar":
+            w = int(v)
+    return r, w
+
+def _suite_of(argv: List[str]) -> str:
+    names = [Path(a).name.lower() for a in argv]
+    if any(n in ("k6", "k6.exe") for n in names):
+        return "k6"
+    if "pytest" in names or any(n.endswith("pytest") for n in names):
+        return "pytest"
+    if any("loadgen" in a for a in argv):
+        return "loadgen"
+    return names[0] if names else "unknown"
+
+def _single_core(argv: List[str]) -> bool:
+    # python (GIL) and node (one event loop) top out at one core however many threads they have
+    name = Path(argv[0]).name.lower() if argv else ""
+    return name.startswith(("python", "node", "pytest"))
+
+def _host_cpu() -> Tuple[int, int]:
+    """(busy, total) jiffies over all cores."""
+    line = (_read(PROC / "stat") or "cpu 0").splitlines()[0]
+    v = [int(x) for x in line.split()[1:9]]
+    total = sum(v)
+    idle = v[3] + (v[4] if len(v) > 4 else 0)
+    return total - idle, total
+
+def _net() -> Tuple[int, int, int, int]:
+    """(lo rx, lo tx, other rx, other tx) bytes."""
+    lo_rx = lo_tx = rx = tx = 0
+    for line in (_read(PROC / "net" / "dev") or "").splitlines()[2:]:
+        name, _, rest = line.partition(":")
+        f = rest.split()
+        if len(f) < 9:
+            continue
+        if name.strip() == "lo":
+            lo_rx, lo_tx = lo_rx + int(f[0]), lo_tx + int(f[8])
+        else:
+            rx, tx = rx + int(f[0]), tx + int(f[8])
+    return lo_rx, lo_tx, rx, tx
+
+def _meminfo_mb(key: str) -> float:
+    for line in (_read(PROC / "meminfo") or "").splitlines():
+        if line.startswith(key + ":"):
+            return int(line.split()[1]) / 1024.0
+    return 0.0
+
+def _pct(vals: List[float], q: float) -> float:
+    s = sorted(vals)
+    return s[min(len(s) - 1, int(q * len(s)))] if s else 0.0
+
+def _supervised(state_dir: Optional[Path]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    if state_dir is None or not state_dir.is_dir():
+        return out
+    for p in state_dir.glob("*.json"):
+        try:
+            st = json.loads(p.read_text(encoding="utf-8"))
+            out[str(st["name"])] = int(st["pid"])
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+    return out
+
+class ProcSampler:
+    """Samples /proc on a daemon thread; `stop()` writes series.json + summary.json to `out_dir`."""
+
+    def __init__(self, out_dir: Path, settings: Optional[dict] = None,
+                 supervisor_state: Optional[Path] = None, on_output: Optional[Callable[[str], None]] = None):
+        settings = settings or {}
+        self.out_dir = out_dir
+        self.interval_s = max(0.1, float(settings.get("interval_s", INTERVAL_S)))
+        self.pids = {str(k): int(v) for k, v in (settings.get("pids") or {}).items()}
+        self.match = {str(k): str(v) for k, v in (settings.get("match") or {}).items()}
+        self.supervisor_state = supervisor_state
+        self.on_output = on_output
+        self.root = os.getpid()
+        self.cores = os.cpu_count() or 1
+        self._tck = os.sysconf("SC_CLK_TCK")
+        self._page_mb = os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+        self._prev: Dict[int, Tuple[int, int, int, int]] = {}   # pid -> (start, ticks, rchar, wchar)
+        self._prev_host: Optional[tuple] = None
+        self._roots: Dict[int, Tuple[int, str]] = {}             # pid -> (start, group), cached classification
+        self._pids_seen: Dict[str, set] = {}
+        self._single: Dict[str, bool] = {}                         # group -> capped at one core
+        self._stride = 1
+        self._tick = 0
+        self.t: List[float] = []
+        self.host: Dict[str, List[Optional[float]]] = {m: [] for m in HOST_METRICS}
+        self.groups: Dict[str, Dict[str, List[Optional[float]]]] = {}
+        self.t0 = 0.0
+        self._last = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- process groups ---------------------------------------------------------------
+
+    def _sut_roots(self, table: Dict[int, tuple]) -> Dict[int, str]:
+        roots = {pid: f"sut:{name}" for name, pid in _supervised(self.supervisor_state).items()}
+        roots.update({pid: f"sut:{name}" for name, pid in self.pids.items()})
+        if self.match:
+            # the shell / CI step that launched this run may carry the text too
+            ancestors, p = {self.root}, self.root
+            while p in table and table[p][0] not in ancestors:
+                p = table[p][0]
+                ancestors.add(p)
+            for pid in table:
+                if pid in roots or pid in ancestors:
+                    continue
+                cached = self._roots.get(pid)
+                if cached is not None and cached[0] == table[pid][3]:
+                    if cached[1].startswith("sut:"):
+                        roots[pid] = cached[1]
+                    continue
+                cmd = " ".join(_cmdline(pid))
+                name = next((n for n, sub in self.match.items() if sub in cmd), None)
+                self._roots[pid] = (table[pid][3], f"sut:{name}" if name else "")
+                if name:
+                    roots[pid] = f"sut:{name}"
+        return {pid: g for pid, g in roots.items() if pid in table}
+
+    def _assign(self, table: Dict[int, tuple]) -> Dict[int, str]:
+        self._roots = {pid: v for pid, v in self._roots.items() if pid in table}
+        children: Dict[int, List[int]] = {}
+        for pid, st in table.items():
+            children.setdefault(st[0], []).append(pid)
+        group: Dict[int, str] = {}
+
+        def walk(pid: int, g: str) -> None:
+            stack = [pid]
+            while stack:
+                p = stack.pop()
+                if p in group or p == self.root:
+                    continue
+                group[p] = g
+                stack.extend(children.get(p, ()))
+
+        # SUT first: a simulator launched from a suite still counts as SUT
+        for pid, g in self._sut_roots(table).items():
+            if g not in self._single:
+                self._single[g] = _single_core(_cmdline(pid))
+            walk(pid, g)
+        group.setdefault(self.root, "runner:lab")
+        for pid in children.get(self.root, ()):
+            cached = self._roots.get(pid)
+            if cached is None or cached[0] != table[pid][3] or not cached[1].startswith("runner:"):
+                argv = _cmdline(pid)
+                cached = (table[pid][3], f"runner:{_suite_of(argv)}")
+                self._roots[pid] = cached
+                self._single.setdefault(cached[1], _single_core(argv))
+            walk(pid, cached[1])
+        return group
+
+    # --- sampling ---------------------------------------------------------------------
+
+    def _append(self, series: Dict[str, List[Optional[float]]], values: Dict[str, float]) -> None:
+        for m, arr in series.items():
+            v = values.get(m)
+            arr.append(None if v is None else round(v, 1))
+
+    def sample(self) -> None:
+        now = time.monotonic()
+        dt = max(1e-3, now - self._last) if self._last else self.interval_s
+        self._last = now
+        table: Dict[int, tuple] = {}
+        for d in PROC.iterdir():
+            if d.name.isdigit():
+                st = _stat(int(d.name))
+                if st is not None:
+                    table[int(d.name)] = st
+        groups = self._assign(table)
+
+        agg: Dict[str, Dict[str, float]] = {}
+        prev, self._prev = self._prev, {}
+        for pid, g in groups.items():
+            _ppid, ticks, threads, start, rss = table[pid]
+            rchar, wchar = _io(pid)
+            self._prev[pid] = (start, ticks, rchar, wchar)
+            old = prev.get(pid)
+            d_ticks = d_r = d_w = 0
+            if old is not None and old[0] == start:
+                d_ticks, d_r, d_w = ticks - old[1], rchar - old[2], wchar - old[3]
+            a = agg.setdefault(g, dict.fromkeys(GROUP_METRICS, 0.0))
+            a["cpu_pct"] += d_ticks / self._tck / dt * 100.0
+            a["rss_mb"] += rss * self._page_mb
+            a["fds"] += _fds(pid)
+            a["threads"] += threads
+            a["procs"] += 1
+            a["read_kbps"] += d_r / 1024.0 / dt
+            a["write_kbps"] += d_w / 1024.0 / dt
+            self._pids_seen.setdefault(g, set()).add(pid)
+
+        busy, total = _host_cpu()
+        net = _net()
+        host = {"mem_avail_mb": _meminfo_mb("MemAvailable"),
+                "load1": float((_read(PROC / "loadavg") or "0").split()[0])}
+        if self._prev_host is not None:
+            (pb, pt), pnet = self._prev_host
+            host["cpu_pct"] = (busy - pb) / max(1, total - pt) * 100.0
+            for key, cur, old in zip(("lo_rx_kbps", "lo_tx_kbps", "net_rx_kbps", "net_tx_kbps"), net, pnet):
+                host[key] = (cur - old) / 1024.0 / dt
+        self._prev_host = ((busy, total), net)
+
+        self._tick += 1
+        if (self._tick - 1) % self._stride:
+            return
+        n = len(self.t)
+        self.t.append(round(now - self.t0, 2))
+        self._append(self.host, host)
+        for g, vals in agg.items():
+            if g not in self.groups:
+                self.groups[g] = {m: [None] * n for m in GROUP_METRICS}
+            self._append(self.groups[g], vals)
+        for g, series in self.groups.items():
+            if g not in agg:
+                self._append(series, {})
+        if len(self.t) > MAX_POINTS:
+            self._halve()
+
+    def _halve(self) -> None:
+        self._stride *= 2
+        self.t = self.t[::2]
+        for series in [self.host, *self.groups.values()]:
+            for m in series:
+                series[m] = series[m][::2]
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.sample()
+            except Exception as e:
+                # telemetry never takes the run down; note it once and stop sampling
+                if self.on_output:
+                    self.on_output(f"[Telemetry] sampling stopped: {e}")
+                return
+
+    def start(self) -> "ProcSampler":
+        self.t0 = time.monotonic()
+        self.sample()  # baseline for the first CPU / I/O deltas
+        self._thread = threading.Thread(target=self._loop, name="telemetry", daemon=True)
+        self._thread.start()
+        return self
+
+    # --- results ----------------------------------------------------------------------
+
+    def summary(self) -> dict:
+        def stats(arr: List[Optional[float]]) -> dict:
+            v = [x for x in arr if x is not None]
+            if not v:
+                return {"avg": None, "p95": None, "max": None}
+            return {"avg": round(sum(v) / len(v), 1), "p95": _pct(v, 0.95), "max": max(v)}
+
+        groups = {}
+        for g, series in sorted(self.groups.items()):
+            s = {m: stats(series[m]) for m in GROUP_METRICS}
+            s["pids"] = sorted(self._pids_seen.get(g, ()))
+            groups[g] = s
+        host = {m: stats(self.host[m]) for m in HOST_METRICS}
+        return {
+            "interval_s": self.interval_s * self._stride,
+            "samples": len(self.t),
+            "duration_s": self.t[-1] if self.t else 0.0,
+            "cores": self.cores,
+            "host": host,
+            "groups": groups,
+            "hints": self.hints(host, groups),
+        }
+
+    def hints(self, host: dict, groups: dict) -> List[str]:
+        """Which side ran out of CPU: the load generator, the SUT, or the box they share."""
+        out = []
+        cpu = host["cpu_pct"]["p95"]
+        if cpu is not None and cpu >= SATURATED_PCT:
+            out.append(f"host CPU saturated (p95 {cpu:.0f}% of {self.cores} core(s)): client-side queuing "
+                       "inflates latencies; run the SUT elsewhere or shard the load")
+        for g, s in groups.items():
+            p95 = s["cpu_pct"]["p95"]
+            if p95 is None or g == "runner:lab":
+                continue
+            limit = 100.0 * (1 if self._single.get(g, True) else self.cores)
+            if p95 >= SATURATED_PCT / 100.0 * limit:
+                side = "load generator" if g.startswith("runner:") else "SUT"
+                out.append(f"{side} {g} CPU-bound (p95 {p95:.0f}% of a core, limit ~{limit:.0f}%)")
+        return out
+
+    def stop(self) -> dict:
+        """Stop sampling, write series.json + summary.json; returns the summary."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 5.0)
+            self._thread = None
+        summary = self.summary()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        series = {"interval_s": summary["interval_s"], "t": self.t, "host": self.host, "groups": self.groups}
+        (self.out_dir / "series.json").write_text(json.dumps(series, separators=(",", ":")), encoding="utf-8")
+        (self.out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        return summary
+
+def summary_line(summary: dict) -> str:
+    parts = [f"host cpu p95={summary['host']['cpu_pct']['p95']}%"]
+    for g, s in summary["groups"].items():
+        parts.append(f"{g} cpu p95={s['cpu_pct']['p95']}% rss max={s['rss_mb']['max']}MB")
+    return " | ".join(parts)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m halo_test_lab.telemetry",
+                                 description="Run a command and sample its resources (and the SUT's) from /proc")
+    ap.add_argument("--out", type=Path, required=True, help="folder for series.json / summary.json")
+    ap.add_argument("--interval", type=float, default=INTERVAL_S)
+    ap.add_argument("--pid", action="append", default=[], metavar="NAME=PID", help="SUT process to sample")
+    ap.add_argument("--match", action="append", default=[], metavar="NAME=TEXT",
+                    help="SUT processes whose command line contains TEXT")
+    ap.add_argument("--state-dir", type=Path, default=None,
+                    help="supervisor state folder (default: the supervisor's)")
+    ap.add_argument("cmd", nargs=argparse.REMAINDER, help="-- command to run")
+    args = ap.parse_args(argv)
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        ap.error("missing command (after --)")
+    if not available():
+        print("TELEMETRY_ERROR=no /proc (Linux only)", file=sys.stderr)
+        return 2
+    if args.state_dir is None:
+        from .supervisor import DEFAULT_STATE_DIR
+        args.state_dir = DEFAULT_STATE_DIR
+
+    settings = {"interval_s": args.interval,
+                "pids": dict(kv.split("=", 1) for kv in args.pid),
+                "match": dict(kv.split("=", 1) for kv in args.match)}
+    sampler = ProcSampler(args.out, settings, supervisor_state=args.state_dir,
+                          on_output=lambda line: print(line, file=sys.stderr)).start()
+    try:
+        code = subprocess.call(cmd)
+    except KeyboardInterrupt:
+        code = 130
+    summary = sampler.stop()
+    print(f"TELEMETRY={summary_line(summary)}")
+    for h in summary["hints"]:
+        print(f"TELEMETRY_HINT={h}")
+    print(f"TELEMETRY_SUMMARY={args.out / 'summary.json'}")
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
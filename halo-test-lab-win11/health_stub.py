@@ -1,4 +1,5 @@
-﻿from http.server import BaseHTTPRequestHandler, HTTPServer
+﻿import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
 class H(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -14,4 +15,4 @@ class H(BaseHTTPRequestHandler):
     def log_message(self, *args):
         pass
 
-HTTPServer(("127.0.0.1", 8000), H).serve_forever()
+HTTPServer((os.environ.get("HOST", "127.0.0.1"), int(os.environ.get("PORT", "8000"))), H).serve_forever()
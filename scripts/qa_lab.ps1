@@ -1,21 +1,35 @@
 param(
   [string]$GatewayBaseUrl = "http://127.0.0.1:8080",
   [switch]$StartGatewayStub = $true,
-  [string]$IntegrationRepo = "D:\HaloProject\repos\core\halo-platform-integration"
+  [string]$IntegrationRepo = "D:\HaloProject\repos\core\halo-platform-integration",
+  # In-repo simulator via halo_test_lab.supervisor (concurrent readiness, fail-fast; same as Linux CI)
+  [switch]$Builtin
 )
 
 $ErrorActionPreference = "Stop"
 $repo = Resolve-Path (Join-Path $PSScriptRoot "..")
 
+$env:PYTHONPATH = Join-Path $repo "halo-test-lab-win11"
+$supervisor = @("-m", "halo_test_lab.supervisor")
+
 if ($StartGatewayStub) {
-  & (Join-Path $repo "scripts\sim_gateway_stub.ps1") start -IntegrationRepo $IntegrationRepo
+  if ($Builtin) {
+    & python @supervisor start gateway
+    if ($LASTEXITCODE -ne 0) { throw "gateway simulator not ready" }
+  } else {
+    & (Join-Path $repo "scripts\sim_gateway_stub.ps1") start -IntegrationRepo $IntegrationRepo
+  }
 }
 
 try {
   & (Join-Path $repo "scripts\qa_run.ps1") -GatewayBaseUrl $GatewayBaseUrl
 } finally {
   if ($StartGatewayStub) {
-    & (Join-Path $repo "scripts\sim_gateway_stub.ps1") stop
+    if ($Builtin) {
+      & python @supervisor stop gateway
+    } else {
+      & (Join-Path $repo "scripts\sim_gateway_stub.ps1") stop
+    }
   }
 }
 
@@ -20,6 +20,13 @@ python (Join-Path $repo "tools\qa_assess.py") `
   (Join-Path $repo "artifacts\privacy_assessment.md") `
   (Join-Path $repo "artifacts\links.json")
 
+# Test-phase profile (linked from index.html through links.json)
+python (Join-Path $repo "tools\qa_profile.py") `
+  (Join-Path $repo "artifacts\report.json") `
+  (Join-Path $repo "artifacts\junit.xml") `
+  (Join-Path $repo "artifacts\profile.html") `
+  (Join-Path $repo "artifacts\links.json")
+
 python (Join-Path $repo "tools\qa_summarize.py") `
   (Join-Path $repo "artifacts\report.json") `
   (Join-Path $repo "artifacts\executive.md") `
@@ -27,5 +34,23 @@ python (Join-Path $repo "tools\qa_summarize.py") `
   (Join-Path $repo "artifacts\index.html") `
   (Join-Path $repo "artifacts\links.json")
 
+# Perf regression gate vs. the rolling baseline in artifacts\history (a k6-summary.json
+# dropped into artifacts\ is included too)
+python (Join-Path $repo "tools\qa_perf_gate.py") `
+  (Join-Path $repo "artifacts") `
+  (Join-Path $repo "artifacts\history") `
+  (Join-Path $repo "artifacts\engineering.json") `
+  (Join-Path $repo "artifacts\executive.md")
+$perfGate = $LASTEXITCODE
+
+# This run becomes part of the baseline for the next ones
+$hist = Join-Path $repo ("artifacts\history\" + (Get-Date).ToUniversalTime().ToString("yyyyMMdd-HHmmss"))
+New-Item -ItemType Directory -Force $hist | Out-Null
+foreach ($f in @("report.json", "junit.xml", "k6-summary.json")) {
+  $p = Join-Path $repo ("artifacts\" + $f)
+  if (Test-Path $p) { Copy-Item $p $hist }
+}
+
 Write-Host ("ARTIFACTS_DIR=" + (Join-Path $repo "artifacts"))
-Write-Host "GUI: python -m http.server 7777 --directory artifacts"
\ No newline at end of file
+Write-Host "GUI: python -m http.server 7777 --directory artifacts"
+exit $perfGate
\ No newline at end of file
@@ -6,7 +6,10 @@
   [Alias("Host")][string]$BindHost = "127.0.0.1",
   [int]$Port = 8080,
 
-  [string]$PythonExe = "python"
+  [string]$PythonExe = "python",
+
+  # Use the in-repo asyncio simulator (simulators/gateway_sim.py) instead of the integration repo stub
+  [switch]$Builtin
 )
 
 $ErrorActionPreference = "Stop"
@@ -70,13 +73,20 @@ if (Test-Path $pidFile) {
   }
 }
 
-if (-not (Test-Path $IntegrationRepo)) {
-  throw "IntegrationRepo not found: $IntegrationRepo"
-}
+if ($Builtin) {
+  $serverArgs = @("-m", "simulators.gateway_sim")
+  $serverCwd = $repo
+} else {
+  if (-not (Test-Path $IntegrationRepo)) {
+    throw "IntegrationRepo not found: $IntegrationRepo"
+  }
 
-$serverPy = Join-Path $IntegrationRepo "gateway-stub\app\server.py"
-if (-not (Test-Path $serverPy)) {
-  throw "gateway stub server not found: $serverPy"
+  $serverPy = Join-Path $IntegrationRepo "gateway-stub\app\server.py"
+  if (-not (Test-Path $serverPy)) {
+    throw "gateway stub server not found: $serverPy"
+  }
+  $serverArgs = @($serverPy)
+  $serverCwd = $IntegrationRepo
 }
 
 # clear logs
@@ -87,8 +97,8 @@ $env:HOST = $BindHost
 $env:PORT = "$Port"
 
 $p = Start-Process -FilePath $PythonExe `
-  -ArgumentList @($serverPy) `
-  -WorkingDirectory $IntegrationRepo `
+  -ArgumentList $serverArgs `
+  -WorkingDirectory $serverCwd `
   -PassThru -NoNewWindow `
   -RedirectStandardOutput $logOut `
   -RedirectStandardError  $logErr
@@ -0,0 +1,120 @@
+"""Microbenchmarks for simulators.pairing_client.
+
+Reports key-derivations/sec (X25519 exchange + HKDF) and envelopes/sec for seal/open,
+single and batched, next to the per-call path the tests used before (a new AESGCM per
+message, two X25519 exchanges per derivation) as a reference.
+
+    python -m simulators.bench_pairing --seconds 1 --batch 64 --report artifacts/bench_pairing.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from . import pairing_client as pc
+
+PATH = "/pairing/confirm"
+PAYLOAD = {"pairing_code": "123456", "proof_of_possession": "pop-bench-device-000001"}
+
+def measure(fn: Callable[[], int], seconds: float) -> Dict[str, float]:
+    """Call fn (returns ops done) until `seconds` elapsed; best-effort warm-up first."""
+    fn()
+    ops, t0 = 0, time.perf_counter()
+    while True:
+        ops += fn()
+        dt = time.perf_counter() - t0
+        if dt >= seconds:
+            return {"ops": ops, "seconds": round(dt, 3), "per_s": round(ops / dt, 1)}
+
+def _legacy_derive(priv, gw_pub_raw: bytes, salt: bytes, sid: str) -> bytes:
+    # pre-refactor test helper: the exchange ran twice
+    priv.exchange(X25519PublicKey.from_public_bytes(gw_pub_raw))
+    return pc.derive_key(priv, gw_pub_raw, salt, sid)
+
+def _legacy_encrypt(key: bytes, kid: str, sid: str, seq: int) -> dict:
+    a = pc.aad("POST", PATH, sid, seq)
+    nonce = os.urandom(12)
+    ct = AESGCM(key).encrypt(nonce, pc._dumps(PAYLOAD), a)
+    return {"v": 1, "alg": pc.ALG, "kid": kid, "nonce_b64url": pc.b64ue(nonce), "aad_b64url": pc.b64ue(a),
+            "ct_b64url": pc.b64ue(ct), "seq": seq, "ts": pc.utc_ts()}
+
+def _legacy_decrypt(key: bytes, sid: str, env: dict) -> dict:
+    a = pc.aad("POST", PATH, sid, int(env["seq"]))
+    return json.loads(AESGCM(key).decrypt(pc.b64ud(env["nonce_b64url"]), pc.b64ud(env["ct_b64url"]), a))
+
+def run_bench(seconds: float = 1.0, batch: int = 64) -> dict:
+    gw = X25519PrivateKey.generate()
+    gw_pub = gw.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    dev = X25519PrivateKey.generate()
+    salt, sid, kid = os.urandom(16), "ps-bench-000001", "kid-bench"
+    key = pc.derive_key(dev, gw_pub, salt, sid)
+    sess = pc.PairingSession(key, kid, sid)
+    env = sess.seal("POST", PATH, 1, PAYLOAD)
+    envs = sess.seal_many("POST", PATH, [(i, PAYLOAD) for i in range(1, batch + 1)])
+
+    def times(n: int, f: Callable[[], object]) -> Callable[[], int]:
+        def run() -> int:
+            for _ in range(n):
+                f()
+            return n
+        return run
+
+    def keygen_and_derive() -> int:
+        # what a fresh device pays: key pair + agreement
+        pairs = pc.keygen_batch(50)
+        for priv_raw, _ in pairs:
+            pc.derive_key(X25519PrivateKey.from_private_bytes(priv_raw), gw_pub, salt, sid)
+        return len(pairs)
+
+    derive = {
+        "derive_key": measure(times(50, lambda: pc.derive_key(dev, gw_pub, salt, sid)), seconds),
+        "keygen_and_derive": measure(keygen_and_derive, seconds),
+        "legacy_derive_key": measure(times(50, lambda: _legacy_derive(dev, gw_pub, salt, sid)), seconds),
+    }
+    envelopes = {
+        "seal": measure(times(batch, lambda: sess.seal("POST", PATH, 7, PAYLOAD)), seconds),
+        "open": measure(times(batch, lambda: sess.open("POST", PATH, env)), seconds),
+        "seal_many": measure(lambda: len(sess.seal_many("POST", PATH, [(i, PAYLOAD) for i in range(batch)])), seconds),
+        "open_many": measure(lambda: len(sess.open_many("POST", PATH, envs)), seconds),
+        "encrypt_env": measure(times(batch, lambda: pc.encrypt_env(key, kid, "POST", PATH, sid, 7, PAYLOAD)), seconds),
+        "decrypt_env": measure(times(batch, lambda: pc.decrypt_env(key, "POST", PATH, sid, env)), seconds),
+        "legacy_encrypt": measure(times(batch, lambda: _legacy_encrypt(key, kid, sid, 7)), seconds),
+        "legacy_decrypt": measure(times(batch, lambda: _legacy_decrypt(key, sid, env)), seconds),
+    }
+    return {
+        "tool": "simulators.bench_pairing",
+        "python": sys.version.split()[0],
+        "seconds_per_case": seconds,
+        "batch": batch,
+        "payload_bytes": len(pc._dumps(PAYLOAD)),
+        "key_derivations_per_s": {k: v["per_s"] for k, v in derive.items()},
+        "envelopes_per_s": {k: v["per_s"] for k, v in envelopes.items()},
+        "cases": {**derive, **envelopes},
+    }
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Halo pairing-crypto microbenchmarks")
+    ap.add_argument("--seconds", type=float, default=1.0, help="measurement time per case")
+    ap.add_argument("--batch", type=int, default=64, help="envelopes per seal_many/open_many call")
+    ap.add_argument("--report", type=Path, default=None, help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    report = run_bench(args.seconds, args.batch)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for group in ("key_derivations_per_s", "envelopes_per_s"):
+        for case, rate in report[group].items():
+            print(f"BENCH_{case.upper()}={rate}/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
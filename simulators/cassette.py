@@ -0,0 +1,194 @@
+"""HTTP record/replay cassettes for the E2E suites (requests transport adapters).
+
+record: requests go to the live gateway/backend and every (request, response) pair is stored.
+replay: responses are served in-process from the cassette; no sockets, no services.
+
+Requests match on test node id + method + path (query sorted) + normalized body. JSON bodies
+are re-serialized with sorted keys and the values of volatile fields (VOLATILE_KEYS: client
+nonces, timestamps, random session ids) masked. Identical requests inside one test are
+replayed in recorded order. Encrypted pairing replays because record and replay use the
+same key seed (simulators.pairing_client.seed_keys): device keys and envelope nonces are
+derived from it, so the ciphertext a test sends is the one recorded.
+
+Cassette file (gzip JSON): bodies are stored once and referenced by index.
+
+    {"version": 1, "seed": "...", "recorded_at_utc": "...",
+     "bodies": ["...", ...],
+     "responses": [[status, content_type, body_idx], ...],
+     "index": {"<nodeid>": {"<key>": [response_idx, ...]}}}
+"""
+from __future__ import annotations
+import datetime
+import gzip
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+CASSETTE_VERSION = 1
+DEFAULT_SEED = "halo-cassette-v1"
+VOLATILE_KEYS = frozenset({"nonce", "ts", "session_id"})
+MASK = "<volatile>"
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded response for a request: re-record the cassette."""
+
+def _mask(obj, volatile: frozenset):
+    if isinstance(obj, dict):
+        return {k: (MASK if k in volatile else _mask(v, volatile)) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_mask(v, volatile) for v in obj]
+    return obj
+
+def normalize_body(body, volatile: frozenset = VOLATILE_KEYS) -> bytes:
+    if body is None:
+        return b""
+    raw = body.encode("utf-8") if isinstance(body, str) else bytes(body)
+    try:
+        obj = json.loads(raw)
+    except ValueError:
+        return raw
+    return json.dumps(_mask(obj, volatile), sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def request_key(method: str, url: str, body, volatile: frozenset = VOLATILE_KEYS) -> str:
+    u = urlsplit(url)
+    target = u.path or "/"
+    if u.query:
+        target += "?" + urlencode(sorted(parse_qsl(u.query, keep_blank_values=True)))
+    h = hashlib.sha256(normalize_body(body, volatile)).hexdigest()[:32]
+    return f"{method.upper()} {target} {h}"
+
+class Cassette:
+    def __init__(self, path: Path, seed: str = DEFAULT_SEED, volatile: frozenset = VOLATILE_KEYS):
+        self.path = Path(path)
+        self.seed = seed
+        self.volatile = volatile
+        self.current = ""  # node id of the running test (set by conftest)
+        self._bodies: List[str] = []
+        self._body_idx: Dict[str, int] = {}
+        self._responses: List[list] = []
+        self._index: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        self._cursor: Dict[Tuple[str, str], int] = {}
+
+    @classmethod
+    def load(cls, path: Path, volatile: frozenset = VOLATILE_KEYS) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"{path}: cassette version {data.get('version')!r}, expected {CASSETTE_VERSION}")
+        c = cls(path, seed=data.get("seed") or DEFAULT_SEED, volatile=volatile)
+        c._bodies = data["bodies"]
+        c._responses = data["responses"]
+        for nodeid, keys in data["index"].items():
+            for key, ids in keys.items():
+                c._index[nodeid][key] = list(ids)
+        return c
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": CASSETTE_VERSION,
+            "seed": self.seed,
+            "recorded_at_utc": datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+            "bodies": self._bodies,
+            "responses": self._responses,
+            "index": {n: dict(k) for n, k in sorted(self._index.items())},
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        # mtime=0: same recording -> same bytes
+        with gzip.GzipFile(tmp, "wb", mtime=0) as f:
+            f.write(json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        os.replace(tmp, self.path)
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def record(self, method: str, url: str, body, status: int, content_type: str, content: bytes) -> None:
+        text = content.decode("utf-8", "surrogateescape")
+        idx = self._body_idx.get(text)
+        if idx is None:
+            idx = self._body_idx[text] = len(self._bodies)
+            self._bodies.append(text)
+        self._index[self.current][request_key(method, url, body, self.volatile)].append(len(self._responses))
+        self._responses.append([status, content_type, idx])
+
+    def play(self, method: str, url: str, body) -> Tuple[int, str, bytes]:
+        key = request_key(method, url, body, self.volatile)
+        ids = self._index.get(self.current, {}).get(key)
+        if not ids:
+            raise CassetteMiss(f"{self.path.name}: no recorded response for {key} in {self.current or '<no test>'}")
+        n = self._cursor.get((self.current, key), 0)
+        # past the recorded calls the last response repeats (polling loops)
+        status, ctype, idx = self._responses[ids[min(n, len(ids) - 1)]]
+        self._cursor[(self.current, key)] = n + 1
+        return status, ctype, self._bodies[idx].encode("utf-8", "surrogateescape")
+
+# --- requests adapters ---------------------------------------------------------------
+
+def _adapters():
+    from requests.adapters import BaseAdapter
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+
+    class ReplayAdapter(BaseAdapter):
+        """Serves responses from a cassette without opening connections."""
+
+        def __init__(self, cassette: Cassette):
+            super().__init__()
+            self.cassette = cassette
+
+        def send(self, request, **kwargs):
+            status, ctype, content = self.cassette.play(request.method, request.url, request.body)
+            r = Response()
+            r.status_code = status
+            r.headers = CaseInsensitiveDict({"Content-Type": ctype, "Content-Length": str(len(content))} if ctype
+                                            else {"Content-Length": str(len(content))})
+            r._content = content
+            r.encoding = "utf-8" if "json" in ctype or "text" in ctype else None
+            r.url = request.url
+            r.request = request
+            r.reason = "REPLAY"
+            r.elapsed = timedelta(0)
+            return r
+
+        def close(self):
+            pass
+
+    class RecordingAdapter(BaseAdapter):
+        """Forwards to a real adapter and records each exchange."""
+
+        def __init__(self, inner, cassette: Cassette):
+            super().__init__()
+            self.inner = inner
+            self.cassette = cassette
+
+        def send(self, request, **kwargs):
+            r = self.inner.send(request, **kwargs)
+            self.cassette.record(request.method, request.url, request.body, r.status_code,
+                                 r.headers.get("Content-Type", ""), r.content)
+            return r
+
+        def close(self):
+            self.inner.close()
+
+    return ReplayAdapter, RecordingAdapter
+
+def replay_adapter(cassette: Cassette):
+    return _adapters()[0](cassette)
+
+def recording_adapter(inner, cassette: Cassette):
+    return _adapters()[1](inner, cassette)
+
+def open_cassette(mode: str, path: Path, seed: Optional[str] = None) -> Cassette:
+    """mode "replay" loads path; "record" starts an empty cassette written by save()."""
+    if mode == "replay":
+        if not path.exists():
+            raise FileNotFoundError(f"cassette not found: {path} (record it with HALO_HTTP_CASSETTE=record)")
+        return Cassette.load(path)
+    if mode == "record":
+        return Cassette(path, seed=seed or DEFAULT_SEED)
+    raise ValueError(f"unknown cassette mode {mode!r} (record | replay)")
@@ -0,0 +1,198 @@
+"""Device-fleet pairing simulator.
+
+Drives N virtual devices through /pairing/request -> confirm -> provision
+concurrently. Each device keeps its own X25519 key, derived A256GCM cipher and
+``seq`` counter; key generation and key agreement run on a process pool so the
+driver loop stays free for I/O. Reports pairing completion time (p50/p95/p99) and
+throughput, which is what we use to size the gateway for device rollouts.
+
+    python -m simulators.device_fleet --base-url http://127.0.0.1:8080 --devices 5000 --concurrency 500
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .http_pool import HttpPool
+from .pairing_client import PairingSession, b64ue, derive_key_raw, keygen_batch, utc_ts
+from .stats import summarize_ms
+
+# --- crypto ----------------------------------------------------------------
+# Key generation and X25519/HKDF agreement are the expensive part and run in
+# pool workers (state crosses the process boundary as raw bytes). Envelope
+# AES-GCM is microseconds per message, so it runs inline on the device's
+# PairingSession (cipher built once) instead of paying IPC for every message.
+
+# --- fleet driver -----------------------------------------------------------
+
+KEYGEN_BATCH = 64
+
+@dataclass
+class VirtualDevice:
+    device_id: str
+    priv_raw: bytes = b""
+    session: Optional[PairingSession] = None
+    steps_s: Dict[str, float] = field(default_factory=dict)
+
+class FleetError(Exception):
+    def __init__(self, step: str, detail: str):
+        super().__init__(f"{step}: {detail}")
+        self.step = step
+        self.detail = detail
+
+class Fleet:
+    def __init__(self, base_url: str, pool: Optional[Executor], token: str = "test-token", timeout_s: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.pool = pool
+        self.token = token
+        self.timeout_s = timeout_s
+        self.completion_s: List[float] = []
+        self.steps_s: Dict[str, List[float]] = {"request": [], "confirm": [], "provision": []}
+        self.errors: Dict[str, int] = {}
+        self._keys: Deque[Tuple[bytes, bytes]] = deque()
+        self._keys_lock = asyncio.Lock()
+
+    async def _crypto(self, fn, *args):
+        if self.pool is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    async def _next_keypair(self) -> Tuple[bytes, bytes]:
+        # key pairs are generated in pool batches to amortize IPC
+        async with self._keys_lock:
+            if not self._keys:
+                self._keys.extend(await self._crypto(keygen_batch, KEYGEN_BATCH))
+            return self._keys.popleft()
+
+    async def _post(self, client, dev: VirtualDevice, step: str, body: dict, expect: int, headers: Optional[dict] = None) -> dict:
+        t = time.perf_counter()
+        try:
+            status, obj = await client.post_json("/pairing/" + step, body, headers)
+        except Exception as e:
+            raise FleetError(step, type(e).__name__)
+        dev.steps_s[step] = time.perf_counter() - t
+        if status != expect or obj is None:
+            raise FleetError(step, f"http_{status}")
+        return obj
+
+    @staticmethod
+    def _field(obj: dict, key: str, step: str):
+        # a response without a required field is a protocol error, not a crypto failure
+        v = obj.get(key) if isinstance(obj, dict) else None
+        if v is None:
+            raise FleetError(step, f"missing_{key}")
+        return v
+
+    async def pair(self, client, dev: VirtualDevice) -> None:
+        t0 = time.perf_counter()
+        dev.priv_raw, pub_raw = await self._next_keypair()
+        j1 = await self._post(client, dev, "request", {
+            "device_id": dev.device_id,
+            "device_pubkey": b64ue(pub_raw),
+            "nonce": "n-" + os.urandom(6).hex(),
+            "ts": utc_ts(),
+        }, 200)
+        c = j1.get("crypto")
+        if not c:
+            raise FleetError("request", "no_crypto_block")
+        sid = self._field(j1, "pairing_session_id", "request")
+        key = await self._crypto(derive_key_raw, dev.priv_raw, self._field(c, "gateway_pubkey_b64url", "request"),
+                                 self._field(c, "hkdf_salt_b64url", "request"), sid)
+        sess = dev.session = PairingSession(key, self._field(c, "kid", "request"), sid)
+
+        env = sess.seal("POST", "/pairing/confirm", sess.next_seq(), {"pairing_code": self._field(j1, "pairing_code", "request")})
+        j2 = await self._post(client, dev, "confirm", {"pairing_session_id": sid, "payload_enc": env}, 200,
+                              headers={"Authorization": "Bearer " + self.token})
+        dec = sess.open("POST", "/pairing/confirm", self._field(j2, "payload_enc", "confirm"))
+        if dec.get("status") != "confirmed":
+            raise FleetError("confirm", "not_confirmed")
+
+        env = sess.seal("POST", "/pairing/provision", sess.next_seq(), {"proof_of_possession": "pop-" + dev.device_id})
+        j3 = await self._post(client, dev, "provision", {"pairing_session_id": sid, "payload_enc": env}, 201)
+        dec = sess.open("POST", "/pairing/provision", self._field(j3, "payload_enc", "provision"))
+        if "device_access_token" not in dec:
+            raise FleetError("provision", "no_access_token")
+
+        self.completion_s.append(time.perf_counter() - t0)
+        for step, dt in dev.steps_s.items():
+            self.steps_s[step].append(dt)
+
+    async def run(self, n_devices: int, concurrency: int, id_prefix: str = "dev-fleet") -> dict:
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> None:
+            dev = VirtualDevice(device_id=f"{id_prefix}-{i:06d}")
+            async with gate:
+                try:
+                    await self.pair(client, dev)
+                except FleetError as e:
+                    key = f"{e.step}:{e.detail}"
+                    self.errors[key] = self.errors.get(key, 0) + 1
+                except Exception as e:
+                    key = f"crypto:{type(e).__name__}"
+                    self.errors[key] = self.errors.get(key, 0) + 1
+
+        async with HttpPool(self.base_url, size=concurrency, timeout_s=self.timeout_s) as client:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(n_devices)))
+            wall = time.perf_counter() - t0
+
+        done = len(self.completion_s)
+        return {
+            "tool": "simulators.device_fleet",
+            "base_url": self.base_url,
+            "devices": n_devices,
+            "concurrency": concurrency,
+            "wall_s": round(wall, 3),
+            "paired": done,
+            "failed": n_devices - done,
+            "errors": self.errors,
+            "throughput_pairings_per_s": round(done / wall, 2) if wall else 0.0,
+            "pairing_completion_ms": summarize_ms(self.completion_s),
+            "step_latency_ms": {k: summarize_ms(v) for k, v in self.steps_s.items()},
+        }
+
+def run_fleet(base_url: str, devices: int, concurrency: int = 200, crypto_workers: Optional[int] = None,
+              token: str = "test-token", timeout_s: float = 30.0) -> dict:
+    workers = (os.cpu_count() or 1) if crypto_workers is None else crypto_workers
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    try:
+        report = asyncio.run(Fleet(base_url, pool, token=token, timeout_s=timeout_s).run(devices, concurrency))
+        report["crypto_workers"] = workers
+        return report
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Halo device-fleet pairing simulator")
+    ap.add_argument("--base-url", default=os.environ.get("HALO_GATEWAY_BASE_URL", "http://127.0.0.1:8080"))
+    ap.add_argument("--devices", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=200, help="devices pairing at the same time")
+    ap.add_argument("--crypto-workers", type=int, default=None, help="process pool size (0 = inline; default: CPU count)")
+    ap.add_argument("--token", default="test-token", help="bearer token for /pairing/confirm")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--report", type=Path, default=None, help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    report = run_fleet(args.base_url, args.devices, args.concurrency, args.crypto_workers, args.token, args.timeout)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    c = report["pairing_completion_ms"]
+    print(f"FLEET_PAIRED={report['paired']}/{report['devices']} THROUGHPUT={report['throughput_pairings_per_s']}/s "
+          f"P50={c['p50']}ms P95={c['p95']}ms P99={c['p99']}ms")
+    if report["errors"]:
+        print("FLEET_ERRORS=" + json.dumps(report["errors"]))
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+"""Gateway pairing simulator (asyncio, stdlib HTTP/1.1, keep-alive).
+
+Serves /health, /pairing/request, /pairing/confirm and /pairing/provision with
+both the plain flow and the X25519/HKDF/A256GCM ``payload_enc`` flow, so E2E and
+load runs no longer need the external integration repo.
+
+    python -m simulators.gateway_sim --host 127.0.0.1 --port 8080
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import base64
+import datetime
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+HKDF_INFO_PREFIX = "halo-pairing-v1|"
+
+def b64ud(s: str) -> bytes:
+    s = (s or "").strip()
+    s += "=" * ((4 - (len(s) % 4)) % 4)
+    return base64.urlsafe_b64decode(s.encode("ascii"))
+
+def b64ue(b: bytes) -> str:
+    return base64.urlsafe_b64encode(b).decode("ascii").rstrip("=")
+
+def aad(method: str, path: str, sid: str, seq: int) -> bytes:
+    return f"{method}|{path}|{sid}|{seq}".encode("utf-8")
+
+def utc_ts() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+class PairingError(Exception):
+    def __init__(self, status: int, error: str):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+
+@dataclass
+class PairingSession:
+    sid: str
+    device_id: str
+    code: str
+    created: float
+    aes: Optional[AESGCM] = None
+    last_seq: int = 0
+    confirmed: bool = False
+
+class GatewaySimulator:
+    """Protocol state machine, independent of the HTTP transport."""
+
+    def __init__(self, session_ttl_s: float = 300.0, max_sessions: int = 100_000):
+        self.session_ttl_s = session_ttl_s
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, PairingSession] = {}
+        # One static gateway key per process (like a real gateway behind a kid);
+        # per-session cost is a single X25519 exchange + HKDF.
+        self._priv = X25519PrivateKey.generate()
+        self.pub_raw = self._priv.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+        self.kid = "gw-sim-" + hashlib.sha256(self.pub_raw).hexdigest()[:8]
+        self.stats = {"requests": 0, "paired": 0, "provisioned": 0, "errors": 0}
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        dead = [sid for sid, s in self.sessions.items() if now - s.created > self.session_ttl_s]
+        for sid in dead:
+            del self.sessions[sid]
+        return len(dead)
+
+    def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, dict]:
+        self.stats["requests"] += 1
+        try:
+            if path == "/health" and method in ("GET", "HEAD"):
+                return 200, {"status": "ok", "sessions": len(self.sessions)}
+            if method != "POST" or path not in ("/pairing/request", "/pairing/confirm", "/pairing/provision"):
+                raise PairingError(404, "not_found")
+            try:
+                req = json.loads(body or b"{}")
+            except ValueError:
+                raise PairingError(400, "invalid_json")
+            if not isinstance(req, dict):
+                raise PairingError(400, "invalid_json")
+            if path == "/pairing/request":
+                return self._request(req)
+            if path == "/pairing/confirm":
+                return self._confirm(req, headers)
+            return self._provision(req)
+        except PairingError as e:
+            self.stats["errors"] += 1
+            return e.status, {"error": e.error}
+
+    # --- pairing steps -------------------------------------------------------
+
+    def _request(self, req: dict) -> Tuple[int, dict]:
+        device_id = req.get("device_id")
+        if not device_id or not req.get("device_pubkey"):
+            raise PairingError(400, "missing_fields")
+        if len(self.sessions) >= self.max_sessions:
+            self.evict_expired()
+            if len(self.sessions) >= self.max_sessions:
+                raise PairingError(503, "session_capacity_exhausted")
+
+        sid = "ps-" + secrets.token_hex(12)
+        code = f"{secrets.randbelow(1_000_000):06d}"
+        sess = PairingSession(sid=sid, device_id=str(device_id), code=code, created=time.monotonic())
+        resp = {"pairing_session_id": sid, "pairing_code": code, "expires_in_s": int(self.session_ttl_s)}
+
+        # Encrypted flow only when device_pubkey is a raw X25519 key (b64url, 32 bytes);
+        # anything else (e.g. "pk-test") stays on the plain flow.
+        dev_pub = None
+        try:
+            raw = b64ud(str(req["device_pubkey"]))
+            if len(raw) == 32:
+                dev_pub = X25519PublicKey.from_public_bytes(raw)
+        except ValueError:
+            dev_pub = None
+        if dev_pub is not None:
+            salt = os.urandom(16)
+            try:
+                shared = self._priv.exchange(dev_pub)
+            except ValueError:
+                # low-order point (e.g. all zeros): the shared secret would be all zeros
+                raise PairingError(400, "invalid_device_pubkey")
+            key = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt,
+                       info=(HKDF_INFO_PREFIX + sid).encode("utf-8")).derive(shared)
+            sess.aes = AESGCM(key)
+            resp["crypto"] = {
+                "alg": "A256GCM",
+                "kid": self.kid,
+                "gateway_pubkey_b64url": b64ue(self.pub_raw),
+                "hkdf_salt_b64url": b64ue(salt),
+            }
+
+        self.sessions[sid] = sess
+        return 200, resp
+
+    def _session(self, req: dict) -> PairingSession:
+        sid = req.get("pairing_session_id")
+        sess = self.sessions.get(sid) if isinstance(sid, str) else None
+        if sess is None:
+            raise PairingError(404, "unknown_pairing_session")
+        if time.monotonic() - sess.created > self.session_ttl_s:
+            del self.sessions[sess.sid]
+            raise PairingError(410, "pairing_session_expired")
+        return sess
+
+    def _open(self, sess: PairingSession, path: str, req: dict) -> Tuple[dict, int]:
+        env = req["payload_enc"]
+        if sess.aes is None:
+            raise PairingError(400, "session_not_encrypted")
+        if not isinstance(env, dict) or env.get("alg") != "A256GCM" or env.get("kid") != self.kid:
+            raise PairingError(400, "invalid_envelope")
+        try:
+            seq = int(env["seq"])
+            nonce = b64ud(env["nonce_b64url"])
+            ct = b64ud(env["ct_b64url"])
+        except (KeyError, TypeError, ValueError):
+            raise PairingError(400, "invalid_envelope")
+        if seq <= sess.last_seq:
+            raise PairingError(409, "replayed_seq")
+        try:
+            pt = sess.aes.decrypt(nonce, ct, aad("POST", path, sess.sid, seq))
+            payload = json.loads(pt)
+        except Exception:
+            raise PairingError(400, "decrypt_failed")
+        if not isinstance(payload, dict):
+            raise PairingError(400, "invalid_payload")
+        sess.last_seq = seq
+        return payload, seq
+
+    def _seal(self, sess: PairingSession, path: str, seq: int, payload: dict) -> dict:
+        a = aad("POST", path, sess.sid, seq)
+        nonce = os.urandom(12)
+        pt = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return {
+            "v": 1,
+            "alg": "A256GCM",
+            "kid": self.kid,
+            "nonce_b64url": b64ue(nonce),
+            "aad_b64url": b64ue(a),
+            "ct_b64url": b64ue(sess.aes.encrypt(nonce, pt, a)),
+            "seq": seq,
+            "ts": utc_ts(),
+        }
+
+    def _confirm(self, req: dict, headers: Dict[str, str]) -> Tuple[int, dict]:
+        if not headers.get("authorization", "").startswith("Bearer "):
+            raise PairingError(401, "missing_bearer_token")
+        sess = self._session(req)
+        enc = "payload_enc" in req
+        payload, seq = self._open(sess, "/pairing/confirm", req) if enc else (req, 0)
+        if payload.get("pairing_code") != sess.code:
+            raise PairingError(403, "invalid_pairing_code")
+        sess.confirmed = True
+        self.stats["paired"] += 1
+        out = {"status": "confirmed", "pairing_session_id": sess.sid}
+        if enc:
+            return 200, {"pairing_session_id": sess.sid, "payload_enc": self._seal(sess, "/pairing/confirm", seq, out)}
+        return 200, out
+
+    def _provision(self, req: dict) -> Tuple[int, dict]:
+        sess = self._session(req)
+        enc = "payload_enc" in req
+        payload, seq = self._open(sess, "/pairing/provision", req) if enc else (req, 0)
+        if not sess.confirmed:
+            raise PairingError(409, "pairing_not_confirmed")
+        if not payload.get("proof_of_possession"):
+            raise PairingError(400, "missing_proof_of_possession")
+        out = {
+            "device_id": sess.device_id,
+            "device_access_token": "dat-" + secrets.token_urlsafe(24),
+            "token_type": "Bearer",
+            "expires_in_s": 3600,
+        }
+        # Provisioning is terminal: drop the session so long load runs stay flat in memory.
+        del self.sessions[sess.sid]
+        self.stats["provisioned"] += 1
+        if enc:
+            return 201, {"pairing_session_id": sess.sid, "payload_enc": self._seal(sess, "/pairing/provision", seq, out)}
+        return 201, out
+
+# --- HTTP transport ---------------------------------------------------------
+
+def _response(status: int, obj: Optional[dict], keep_alive: bool, head_only: bool = False) -> bytes:
+    body = b"" if obj is None else json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = "Unknown"
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode("latin-1")
+    return head if head_only else head + body
+
+class _HttpProtocolServer:
+    def __init__(self, sim: GatewaySimulator):
+        self.sim = sim
+
+    async def handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(_response(431, {"error": "headers_too_large"}, False))
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(_response(400, {"error": "bad_request_line"}, False))
+                    break
+                headers: Dict[str, str] = {}
+                for line in lines[1:]:
+                    if line:
+                        k, _, v = line.partition(":")
+                        headers[k.strip().lower()] = v.strip()
+
+                conn_hdr = headers.get("connection", "").lower()
+                keep_alive = (conn_hdr != "close") if version == "HTTP/1.1" else (conn_hdr == "keep-alive")
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    writer.write(_response(411, {"error": "length_required"}, False))
+                    break
+                try:
+                    n = int(headers.get("content-length") or 0)
+                except ValueError:
+                    n = -1
+                if n < 0 or n > MAX_BODY_BYTES:
+                    writer.write(_response(413, {"error": "body_too_large"}, False))
+                    break
+                body = await reader.readexactly(n) if n else b""
+
+                status, obj = self.sim.handle(method.upper(), target.split("?", 1)[0], headers, body)
+                writer.write(_response(status, obj, keep_alive, head_only=(method.upper() == "HEAD")))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+async def _evictor(sim: GatewaySimulator) -> None:
+    while True:
+        await asyncio.sleep(max(1.0, sim.session_ttl_s / 4))
+        sim.evict_expired()
+
+async def start_server(sim: GatewaySimulator, host: str, port: int, backlog: int = 4096) -> asyncio.AbstractServer:
+    proto = _HttpProtocolServer(sim)
+    return await asyncio.start_server(proto.handle_conn, host, port, backlog=backlog, limit=MAX_HEADER_BYTES)
+
+def _raise_nofile_limit() -> None:
+    # thousands of keep-alive clients need more than the usual 1024 fds
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard != resource.RLIM_INFINITY else 65536
+    if soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
+def _install_uvloop() -> bool:
+    try:
+        import uvloop  # optional, Linux/macOS only
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+class SimulatorHandle:
+    """Simulator running on a background event loop (for tests and load tools)."""
+
+    def __init__(self, sim: GatewaySimulator, loop: asyncio.AbstractEventLoop, server, thread: threading.Thread):
+        self.sim = sim
+        self._loop = loop
+        self._server = server
+        self._thread = thread
+        host, port = server.sockets[0].getsockname()[:2]
+        self.base_url = f"http://{host}:{port}"
+
+    def stop(self) -> None:
+        async def _close():
+            self._server.close()
+            # the loop is ours: cancel the evictor and any idle keep-alive connection handlers
+            others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in others:
+                t.cancel()
+            await asyncio.gather(*others, return_exceptions=True)
+            await self._server.wait_closed()
+        asyncio.run_coroutine_threadsafe(_close(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+
+def run_in_thread(host: str = "127.0.0.1", port: int = 0, **sim_kwargs) -> SimulatorHandle:
+    sim = GatewaySimulator(**sim_kwargs)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    box = {}
+
+    def _target():
+        asyncio.set_event_loop(loop)
+        try:
+            box["server"] = loop.run_until_complete(start_server(sim, host, port))
+            loop.create_task(_evictor(sim))
+        except BaseException as e:
+            box["error"] = e
+        finally:
+            started.set()
+        if "server" in box:
+            loop.run_forever()
+        loop.close()
+
+    t = threading.Thread(target=_target, name="gateway-sim", daemon=True)
+    t.start()
+    started.wait()
+    if "error" in box:
+        raise box["error"]
+    return SimulatorHandle(sim, loop, box["server"], t)
+
+async def _serve(args: argparse.Namespace) -> None:
+    sim = GatewaySimulator(session_ttl_s=args.session_ttl, max_sessions=args.max_sessions)
+    server = await start_server(sim, args.host, args.port, backlog=args.backlog)
+    asyncio.get_running_loop().create_task(_evictor(sim))
+    print(f"GATEWAY_SIM_STARTED URL=http://{args.host}:{args.port} KID={sim.kid}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Halo gateway pairing simulator")
+    # HOST/PORT env vars match what scripts/sim_gateway_stub.ps1 exports
+    ap.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    ap.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8080")))
+    ap.add_argument("--session-ttl", type=float, default=300.0, help="seconds before an unfinished pairing expires")
+    ap.add_argument("--max-sessions", type=int, default=100_000)
+    ap.add_argument("--backlog", type=int, default=4096)
+    args = ap.parse_args(argv)
+
+    _raise_nofile_limit()
+    _install_uvloop()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,248 @@
+"""Glasses event-stream simulator with deterministic replay.
+
+Produces timestamped glasses events (session starts, utterances, audio-route changes)
+from a seeded generator or a recorded trace, and replays them against the backend
+conversation endpoint at real time, N x speed or as fast as possible (closed loop,
+--concurrency events in flight). Reports event-to-response latency (from the moment the
+event is due, so queueing behind a slow backend counts: no coordinated omission) and
+sustained events/sec.
+
+Arrivals are a two-state (calm/burst) modulated Poisson process, so the stream has
+the bursts a room full of glasses produces, and events of one session are sent in
+order (the backend locks provider/route per session). Same seed -> same trace.
+
+    python -m simulators.glasses_sim --base-url http://127.0.0.1:8000 --seed 7 --sessions 200 --duration 60 --rate 50 --speed 1
+    python -m simulators.glasses_sim --seed 7 --duration 60 --trace-out artifacts/glasses.trace.jsonl --generate-only
+    python -m simulators.glasses_sim --trace-in artifacts/glasses.trace.jsonl --speed 0 --report artifacts/glasses.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .http_pool import HttpPool
+from .stats import summarize_ms
+
+ENDPOINT = "/api/v1/conversation/message"
+TRACE_FORMAT = "halo-glasses-trace"
+TRACE_VERSION = 1
+
+# what a wearer says; provider switches are ordinary utterances for the backend
+SESSION_START = ("hello", "ciao", "hey halo")
+UTTERANCES = ("ciao", "che tempo fa domani", "news eco", "usa eco", "use perplexity", "passa a perplexity",
+              "ricordami di chiamare Marco alle 18", "what's on my calendar", "traduci 'good morning'", "stop")
+AUDIO_ROUTES = ("use earbuds", "use glasses speaker", "usa le cuffie")
+P_AUDIO_ROUTE = 0.1
+
+@dataclass
+class GlassesEvent:
+    t: float            # seconds from trace start
+    sid: str
+    kind: str           # session_start | utterance | audio_route
+    utterance: str
+
+    def body(self) -> dict:
+        return {"session_id": self.sid, "user_utterance": self.utterance}
+
+# --- trace generation / IO ---------------------------------------------------------
+
+def generate_trace(seed: int, duration_s: float, rate: float, sessions: int = 100, burst_factor: float = 5.0,
+                   calm_s: float = 8.0, burst_s: float = 2.0, sid_prefix: str = "gl") -> Iterator[GlassesEvent]:
+    """Lazily yield events for `duration_s` seconds at `rate` events/s on average in calm periods,
+    `rate * burst_factor` during bursts (mean calm/burst dwell times calm_s/burst_s)."""
+    rng = random.Random(seed)
+    started = set()
+    t = 0.0
+    burst = False
+    switch_at = rng.expovariate(1.0 / calm_s)
+    while True:
+        lam = rate * (burst_factor if burst else 1.0)
+        t += rng.expovariate(lam) if lam > 0 else duration_s
+        while t >= switch_at:
+            burst = not burst
+            switch_at += rng.expovariate(1.0 / (burst_s if burst else calm_s))
+        if t >= duration_s:
+            return
+        sid = f"{sid_prefix}-{seed}-{rng.randrange(sessions):05d}"
+        if sid not in started:
+            started.add(sid)
+            yield GlassesEvent(round(t, 6), sid, "session_start", rng.choice(SESSION_START))
+        elif rng.random() < P_AUDIO_ROUTE:
+            yield GlassesEvent(round(t, 6), sid, "audio_route", rng.choice(AUDIO_ROUTES))
+        else:
+            yield GlassesEvent(round(t, 6), sid, "utterance", rng.choice(UTTERANCES))
+
+def save_trace(path: Path, events: Iterable[GlassesEvent], meta: Optional[dict] = None) -> int:
+    """JSONL: one header line, then one event per line. Returns the number of events."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with path.open("w", encoding="utf-8", newline="\n") as f:
+        f.write(json.dumps({"format": TRACE_FORMAT, "version": TRACE_VERSION, **(meta or {})}) + "\n")
+        for ev in events:
+            f.write(json.dumps(asdict(ev), ensure_ascii=False, separators=(",", ":")) + "\n")
+            n += 1
+    return n
+
+def load_trace(path: Path) -> Iterator[GlassesEvent]:
+    with path.open("r", encoding="utf-8") as f:
+        head = json.loads(f.readline() or "{}")
+        if head.get("format") != TRACE_FORMAT:
+            raise ValueError(f"{path}: not a glasses trace (format={head.get('format')!r})")
+        for line in f:
+            if line.strip():
+                d = json.loads(line)
+                yield GlassesEvent(float(d["t"]), d["sid"], d["kind"], d["utterance"])
+
+# --- replay -----------------------------------------------------------------------
+
+class Replayer:
+    def __init__(self, base_url: str, speed: float = 1.0, concurrency: int = 200, timeout_s: float = 30.0,
+                 endpoint: str = ENDPOINT):
+        self.base_url = base_url.rstrip("/")
+        self.speed = speed  # 1 = real time, N = N x, 0 = as fast as possible
+        self.concurrency = concurrency
+        self.timeout_s = timeout_s
+        self.endpoint = endpoint
+        self.latency_s: Dict[str, List[float]] = {}
+        self.service_s: List[float] = []
+        self.lag_s: List[float] = []
+        self.done_at: List[float] = []
+        self.errors: Counter = Counter()
+        self.sent = 0
+
+    async def _send(self, client: HttpPool, ev: GlassesEvent, due: float, prev: Optional[asyncio.Future],
+                    gate: asyncio.Semaphore, mine: asyncio.Future) -> None:
+        try:
+            if prev is not None:
+                await prev  # keep per-session order
+            if self.speed <= 0:
+                due = time.perf_counter()  # no schedule: the event is due once its session is free
+            async with gate:
+                t_send = time.perf_counter()
+                self.lag_s.append(t_send - due)
+                try:
+                    status, obj = await client.post_json(self.endpoint, ev.body())
+                except Exception as e:
+                    self.errors[f"{ev.kind}:{type(e).__name__}"] += 1
+                    return
+                now = time.perf_counter()
+                if status != 200 or obj is None:
+                    self.errors[f"{ev.kind}:http_{status}"] += 1
+                    return
+                self.service_s.append(now - t_send)
+                self.latency_s.setdefault(ev.kind, []).append(now - due)
+                self.done_at.append(now)
+        finally:
+            mine.set_result(None)
+
+    async def run(self, events: Iterable[GlassesEvent]) -> dict:
+        loop = asyncio.get_running_loop()
+        gate = asyncio.Semaphore(self.concurrency)
+        tails: Dict[str, asyncio.Future] = {}
+        tasks = set()
+        async with HttpPool(self.base_url, size=self.concurrency, timeout_s=self.timeout_s) as client:
+            t0 = time.perf_counter()
+            for ev in events:
+                due = t0 + (ev.t / self.speed if self.speed > 0 else 0.0)
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif self.speed <= 0 and len(tasks) >= self.concurrency:
+                    # as fast as possible = closed loop with `concurrency` events in flight
+                    await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                mine = loop.create_future()
+                prev = tails.get(ev.sid)
+                tails[ev.sid] = mine
+                task = asyncio.ensure_future(self._send(client, ev, due, prev if prev and not prev.done() else None, gate, mine))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                self.sent += 1
+                if len(tails) > 4 * self.concurrency:
+                    # drop finished session tails so long traces stay bounded
+                    tails = {k: f for k, f in tails.items() if not f.done()}
+            if tasks:
+                await asyncio.gather(*tasks)
+            wall = time.perf_counter() - t0
+        return self.report(wall, t0)
+
+    def report(self, wall: float, t0: float) -> dict:
+        ok = len(self.done_at)
+        all_lat = [x for v in self.latency_s.values() for x in v]
+        buckets = Counter(int(t - t0) for t in self.done_at)
+        full = [buckets.get(i, 0) for i in range(1, int(wall))]  # whole seconds, first one excluded (ramp-up)
+        full.sort()
+        return {
+            "tool": "simulators.glasses_sim",
+            "base_url": self.base_url,
+            "endpoint": self.endpoint,
+            "speed": self.speed,
+            "concurrency": self.concurrency,
+            "events": self.sent,
+            "ok": ok,
+            "failed": self.sent - ok,
+            "errors": dict(self.errors),
+            "wall_s": round(wall, 3),
+            "throughput_events_per_s": round(ok / wall, 2) if wall else 0.0,
+            "sustained_events_per_s": full[len(full) // 2] if full else round(ok / wall, 2) if wall else 0.0,
+            "peak_events_per_s": max(buckets.values()) if buckets else 0,
+            "event_to_response_ms": summarize_ms(all_lat),
+            "event_to_response_ms_by_kind": {k: summarize_ms(v) for k, v in sorted(self.latency_s.items())},
+            "service_ms": summarize_ms(self.service_s),
+            "dispatch_lag_ms": summarize_ms(self.lag_s),
+        }
+
+def run_replay(base_url: str, events: Iterable[GlassesEvent], speed: float = 1.0, concurrency: int = 200,
+               timeout_s: float = 30.0) -> dict:
+    return asyncio.run(Replayer(base_url, speed, concurrency, timeout_s).run(events))
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Halo glasses event-stream simulator")
+    ap.add_argument("--base-url", default=os.environ.get("HALO_BACKEND_URL", "http://127.0.0.1:8000"))
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--sessions", type=int, default=100, help="distinct glasses sessions")
+    ap.add_argument("--duration", type=float, default=60.0, help="trace length (s)")
+    ap.add_argument("--rate", type=float, default=20.0, help="mean events/s outside bursts")
+    ap.add_argument("--burst-factor", type=float, default=5.0, help="rate multiplier during bursts")
+    ap.add_argument("--trace-in", type=Path, default=None, help="replay a recorded trace instead of generating")
+    ap.add_argument("--trace-out", type=Path, default=None, help="save the generated trace (JSONL)")
+    ap.add_argument("--generate-only", action="store_true", help="write --trace-out and exit")
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N x, 0 = as fast as possible")
+    ap.add_argument("--concurrency", type=int, default=200, help="requests in flight")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--report", type=Path, default=None, help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    if args.trace_in:
+        events: Iterable[GlassesEvent] = load_trace(args.trace_in)
+    else:
+        gen = lambda: generate_trace(args.seed, args.duration, args.rate, args.sessions, args.burst_factor)
+        events = gen()
+        if args.trace_out:
+            n = save_trace(args.trace_out, events, {"seed": args.seed, "duration_s": args.duration, "rate": args.rate,
+                                                    "sessions": args.sessions, "burst_factor": args.burst_factor})
+            print(f"GLASSES_TRACE={args.trace_out} EVENTS={n}")
+            events = gen()
+    if args.generate_only:
+        return 0
+
+    report = run_replay(args.base_url, events, args.speed, args.concurrency, args.timeout)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    lat = report["event_to_response_ms"]
+    print(f"GLASSES_EVENTS={report['ok']}/{report['events']} SUSTAINED={report['sustained_events_per_s']}/s "
+          f"PEAK={report['peak_events_per_s']}/s P50={lat['p50']}ms P95={lat['p95']}ms P99={lat['p99']}ms")
+    if report["errors"]:
+        print("GLASSES_ERRORS=" + json.dumps(report["errors"]))
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Minimal asyncio HTTP/1.1 keep-alive client pool for the load simulators.
+
+httpx's async pool degrades badly with hundreds of connections, which made
+the load generator (not the SUT) the bottleneck. This pool only does what the
+simulators need: JSON request/response over persistent connections.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import ssl
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+class HttpPool:
+    def __init__(self, base_url: str, size: int = 100, timeout_s: float = 30.0):
+        u = urlsplit(base_url)
+        self.host = u.hostname or "127.0.0.1"
+        self.port = u.port or (443 if u.scheme == "https" else 80)
+        self.prefix = u.path.rstrip("/")
+        self.ssl = ssl.create_default_context() if u.scheme == "https" else None
+        self.timeout_s = timeout_s
+        self._host_hdr = u.netloc.encode("latin-1")
+        self._idle: Deque[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = deque()
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self):
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl, limit=1024 * 1024)
+
+    @staticmethod
+    async def _send(conn, raw: bytes) -> None:
+        writer = conn[1]
+        writer.write(raw)
+        await writer.drain()
+
+    @staticmethod
+    async def _receive(conn) -> Tuple[int, Dict[str, str], bytes, bool]:
+        reader = conn[0]
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ", 2)
+        status = int(parts[1])
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if line:
+                k, _, v = line.partition(":")
+                headers[k.strip().lower()] = v.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+                if size == 0:
+                    await reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        else:
+            n = int(headers.get("content-length") or 0)
+            body = await reader.readexactly(n) if n else b""
+        reusable = headers.get("connection", "").lower() != "close" and parts[0] == "HTTP/1.1"
+        return status, headers, body, reusable
+
+    def _pop_idle(self):
+        # skip connections the server closed while they sat idle (EOF already seen)
+        while self._idle:
+            conn = self._idle.pop()
+            if not (conn[0].at_eof() or conn[1].is_closing()):
+                return conn
+            conn[1].close()
+        return None
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        hdr = [f"{method} {self.prefix}{path} HTTP/1.1".encode("latin-1"), b"Host: " + self._host_hdr,
+               b"Content-Length: " + str(len(body)).encode("ascii")]
+        for k, v in (headers or {}).items():
+            hdr.append(f"{k}: {v}".encode("latin-1"))
+        raw = b"\r\n".join(hdr) + b"\r\n\r\n" + body
+
+        async with self._slots:
+            for attempt in (0, 1):
+                conn = self._pop_idle()
+                reused = conn is not None
+                if conn is None:
+                    conn = await asyncio.wait_for(self._connect(), self.timeout_s)
+                sent = False
+                try:
+                    await asyncio.wait_for(self._send(conn, raw), self.timeout_s)
+                    sent = True
+                    status, rh, rb, reusable = await asyncio.wait_for(self._receive(conn), self.timeout_s)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    # a keep-alive connection may have been closed by the server while idle: retry once
+                    # fresh - but a non-idempotent request that went out may already have been processed
+                    if reused and attempt == 0 and (not sent or method.upper() in IDEMPOTENT):
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if reusable:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return status, rh, rb
+        raise ConnectionError("unreachable")
+
+    async def post_json(self, path: str, obj: dict, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[dict]]:
+        h = {"Content-Type": "application/json"}
+        if headers:
+            h.update(headers)
+        status, _, body = await self.request("POST", path, json.dumps(obj, separators=(",", ":")).encode("utf-8"), h)
+        try:
+            return status, json.loads(body) if body else None
+        except ValueError:
+            return status, None
+
+    async def aclose(self) -> None:
+        while self._idle:
+            _, w = self._idle.pop()
+            w.close()
+
+    async def __aenter__(self) -> "HttpPool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
@@ -0,0 +1,187 @@
+"""Client side of the gateway pairing crypto (X25519 -> HKDF-SHA256 -> A256GCM envelopes).
+
+One implementation for the E2E tests, the device-fleet simulator and the load tools:
+
+    key = derive_key(priv, gw_pub_raw, salt, sid)          # one X25519 exchange + HKDF
+    sess = PairingSession(key, kid, sid)                   # AESGCM built once per session
+    env = sess.seal("POST", "/pairing/confirm", 1, {"pairing_code": code})
+    obj = sess.open("POST", "/pairing/confirm", resp["payload_enc"])
+    envs = sess.seal_many("POST", path, [(seq, payload), ...])
+
+``encrypt_env`` / ``decrypt_env`` keep the original per-call signature (key bytes in) and
+reuse a cached cipher per key. Benchmarks: ``python -m simulators.bench_pairing``.
+
+Record/replay (simulators.cassette): with a key seed (``seed_keys`` or HALO_PAIRING_SEED)
+``device_key(label)`` and envelope nonces are derived from the seed, so a replayed run sends
+byte-identical envelopes. Test-only: seeded nonces are predictable.
+"""
+from __future__ import annotations
+import binascii
+import datetime
+import hashlib
+import hmac
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat, PublicFormat
+
+HKDF_INFO_PREFIX = "halo-pairing-v1|"  # server-side HKDF info corrente nello stub
+ALG = "A256GCM"
+NONCE_LEN = 12
+CIPHER_CACHE_SIZE = 4096  # keys with a cached AESGCM for encrypt_env/decrypt_env
+
+# --- seeding (record/replay) -----------------------------------------------------
+
+_seed: Optional[bytes] = None
+
+def seed_keys(seed: Optional[str]) -> Optional[str]:
+    """Derive device keys and nonces from `seed` (None = random again); returns the previous seed."""
+    global _seed
+    prev = _seed.decode("utf-8") if _seed else None
+    _seed = seed.encode("utf-8") if seed else None
+    return prev
+
+def _nonce(a: bytes) -> bytes:
+    # seeded: unique per (sid, method, path, seq) since the AAD carries all of them
+    if _seed is None:
+        return os.urandom(NONCE_LEN)
+    return hmac.new(_seed, b"nonce|" + a, hashlib.sha256).digest()[:NONCE_LEN]
+
+def device_key(label: str) -> X25519PrivateKey:
+    """A fresh device key; deterministic per label when seeded."""
+    if _seed is None:
+        return X25519PrivateKey.generate()
+    return X25519PrivateKey.from_private_bytes(hmac.new(_seed, b"x25519|" + label.encode("utf-8"), hashlib.sha256).digest())
+
+seed_keys(os.environ.get("HALO_PAIRING_SEED"))
+
+# --- encoding ------------------------------------------------------------------
+# binascii + one translate: no intermediate str, and padding handled on bytes.
+
+_TO_URL = bytes.maketrans(b"+/", b"-_")
+_FROM_URL = bytes.maketrans(b"-_", b"+/")
+_PAD = (b"", b"", b"==", b"=")
+
+def b64ue(b: bytes) -> str:
+    return binascii.b2a_base64(b, newline=False).translate(_TO_URL).rstrip(b"=").decode("ascii")
+
+def b64ud(s: str) -> bytes:
+    raw = (s or "").strip().encode("ascii")
+    return binascii.a2b_base64(raw.translate(_FROM_URL) + _PAD[len(raw) % 4])
+
+def aad(method: str, path: str, sid: str, seq: int) -> bytes:
+    return f"{method}|{path}|{sid}|{seq}".encode("utf-8")
+
+def utc_ts() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+def _dumps(payload: dict) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+# --- key agreement ---------------------------------------------------------------
+
+def derive_key(priv: X25519PrivateKey, gw_pub_raw: bytes, salt: bytes, sid: str) -> bytes:
+    shared = priv.exchange(X25519PublicKey.from_public_bytes(gw_pub_raw))
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=salt,
+                info=(HKDF_INFO_PREFIX + sid).encode("utf-8")).derive(shared)
+
+def keygen_batch(n: int) -> List[Tuple[bytes, bytes]]:
+    """n (private, public) raw X25519 key pairs; picklable, for process-pool workers."""
+    out = []
+    for _ in range(n):
+        priv = X25519PrivateKey.generate()
+        out.append((priv.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption()),
+                    priv.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)))
+    return out
+
+def derive_key_raw(priv_raw: bytes, gw_pub_b64: str, salt_b64: str, sid: str) -> bytes:
+    """derive_key on raw/b64url inputs as they come off the wire (process-pool friendly)."""
+    return derive_key(X25519PrivateKey.from_private_bytes(priv_raw), b64ud(gw_pub_b64), b64ud(salt_b64), sid)
+
+# --- envelopes ---------------------------------------------------------------------
+
+class PairingSession:
+    """A derived pairing key with its AESGCM object and per-(method, path) AAD prefixes."""
+
+    __slots__ = ("kid", "sid", "seq", "_aes", "_aad_prefix")
+
+    def __init__(self, key: bytes, kid: str, sid: str, seq: int = 0):
+        self.kid = kid
+        self.sid = sid
+        self.seq = seq
+        self._aes = AESGCM(key)
+        self._aad_prefix: Dict[Tuple[str, str], bytes] = {}
+
+    def next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def aad(self, method: str, path: str, seq: int) -> bytes:
+        prefix = self._aad_prefix.get((method, path))
+        if prefix is None:
+            prefix = self._aad_prefix[(method, path)] = f"{method}|{path}|{self.sid}|".encode("utf-8")
+        return prefix + b"%d" % seq
+
+    def seal(self, method: str, path: str, seq: int, payload: dict, ts: Optional[str] = None) -> dict:
+        a = self.aad(method, path, seq)
+        nonce = _nonce(a)
+        return {
+            "v": 1,
+            "alg": ALG,
+            "kid": self.kid,
+            "nonce_b64url": b64ue(nonce),
+            "aad_b64url": b64ue(a),
+            "ct_b64url": b64ue(self._aes.encrypt(nonce, _dumps(payload), a)),
+            "seq": seq,
+            "ts": ts or utc_ts(),
+        }
+
+    def open(self, method: str, path: str, env: dict) -> dict:
+        pt = self._aes.decrypt(b64ud(env["nonce_b64url"]), b64ud(env["ct_b64url"]),
+                               self.aad(method, path, int(env["seq"])))
+        return json.loads(pt)
+
+    def seal_many(self, method: str, path: str, items: Iterable[Tuple[int, dict]]) -> List[dict]:
+        """Envelopes for [(seq, payload), ...]; one timestamp and one nonce read for the batch."""
+        items = list(items)
+        ts = utc_ts()
+        nonces = os.urandom(NONCE_LEN * len(items)) if _seed is None else b""
+        out = []
+        for i, (seq, payload) in enumerate(items):
+            a = self.aad(method, path, seq)
+            nonce = nonces[i * NONCE_LEN:(i + 1) * NONCE_LEN] if nonces else _nonce(a)
+            out.append({"v": 1, "alg": ALG, "kid": self.kid, "nonce_b64url": b64ue(nonce), "aad_b64url": b64ue(a),
+                        "ct_b64url": b64ue(self._aes.encrypt(nonce, _dumps(payload), a)), "seq": seq, "ts": ts})
+        return out
+
+    def open_many(self, method: str, path: str, envs: Sequence[dict]) -> List[dict]:
+        return [self.open(method, path, env) for env in envs]
+
+@lru_cache(maxsize=CIPHER_CACHE_SIZE)
+def _cipher(aes_key: bytes) -> AESGCM:
+    return AESGCM(aes_key)
+
+def encrypt_env(aes_key: bytes, kid: str, method: str, path: str, sid: str, seq: int, payload_obj: dict) -> dict:
+    a = aad(method, path, sid, seq)
+    nonce = _nonce(a)
+    return {
+        "v": 1,
+        "alg": ALG,
+        "kid": kid,
+        "nonce_b64url": b64ue(nonce),
+        "aad_b64url": b64ue(a),
+        "ct_b64url": b64ue(_cipher(aes_key).encrypt(nonce, _dumps(payload_obj), a)),
+        "seq": seq,
+        "ts": utc_ts(),
+    }
+
+def decrypt_env(aes_key: bytes, method: str, path: str, sid: str, env: dict) -> dict:
+    a = aad(method, path, sid, int(env["seq"]))
+    pt = _cipher(aes_key).decrypt(b64ud(env["nonce_b64url"]), b64ud(env["ct_b64url"]), a)
+    return json.loads(pt)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+import math
+from typing import Dict, Iterable, Sequence
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0..100) of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(p / 100.0 * len(sorted_values) - 1e-9)))
+    return sorted_values[rank - 1]
+
+def summarize_ms(values_s: Iterable[float], percentiles: Sequence[float] = (50, 95, 99)) -> Dict[str, float]:
+    """Count/min/mean/max + percentiles, input in seconds, output in milliseconds."""
+    xs = sorted(values_s)
+    out = {
+        "count": len(xs),
+        "min": round(xs[0] * 1000.0, 3) if xs else 0.0,
+        "mean": round(sum(xs) / len(xs) * 1000.0, 3) if xs else 0.0,
+        "max": round(xs[-1] * 1000.0, 3) if xs else 0.0,
+    }
+    for p in percentiles:
+        out[f"p{p:g}"] = round(percentile(xs, p) * 1000.0, 3)
+    return out
@@ -0,0 +1,321 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Shared keep-alive HTTP clients for the gateway/backend E2E suites.
+# Tuning via env (same style as HALO_GATEWAY_BASE_URL / HALO_BACKEND_URL):
+#   HALO_HTTP_POOL_SIZE          connections kept alive per host (default 10)
+#   HALO_HTTP_CONNECT_TIMEOUT_S  connect (+TLS) timeout (default 5)
+#   HALO_HTTP_TIMEOUT_S          read timeout (default 60)
+#   HALO_HTTP_RETRIES            retry budget for connection failures only (default 2);
+#                                requests that reached the server are never replayed
+POOL_SIZE = int(os.environ.get("HALO_HTTP_POOL_SIZE", "10"))
+CONNECT_TIMEOUT_S = float(os.environ.get("HALO_HTTP_CONNECT_TIMEOUT_S", "5"))
+READ_TIMEOUT_S = float(os.environ.get("HALO_HTTP_TIMEOUT_S", "60"))
+RETRIES = int(os.environ.get("HALO_HTTP_RETRIES", "2"))
+
+# Record/replay (simulators/cassette.py) for the sync `http` client:
+#   HALO_HTTP_CASSETTE=record   live services, every exchange saved to the cassette
+#   HALO_HTTP_CASSETTE=replay   responses served in-process from the cassette (no gateway/backend)
+#   HALO_HTTP_CASSETTE_PATH     default tests/cassettes/e2e.json.gz
+CASSETTE_MODE = os.environ.get("HALO_HTTP_CASSETTE", "").strip().lower()
+CASSETTE_PATH = Path(os.environ.get("HALO_HTTP_CASSETTE_PATH") or Path(__file__).resolve().parent / "cassettes" / "e2e.json.gz")
+_cassette = None
+_cassette_missing = None  # replay without a cassette file: why tests using `http` are skipped
+
+
+def _get_cassette():
+    global _cassette, _cassette_missing
+    if _cassette is None and CASSETTE_MODE and _cassette_missing is None:
+        from simulators import cassette, pairing_client
+
+        if CASSETTE_MODE == "replay" and not CASSETTE_PATH.is_file():
+            _cassette_missing = (f"HALO_HTTP_CASSETTE=replay but no cassette at {CASSETTE_PATH} "
+                                 f"(record it with HALO_HTTP_CASSETTE=record)")
+            return None
+        _cassette = cassette.open_cassette(CASSETTE_MODE, CASSETTE_PATH, seed=os.environ.get("HALO_PAIRING_SEED"))
+        # same device keys / nonces as the recording
+        pairing_client.seed_keys(_cassette.seed)
+    return _cassette
+
+# --- per-request timings ------------------------------------------------------
+
+_tl = threading.local()
+_records = []  # timings of the test currently running (setup + call)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        t = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _tl.connect_s = getattr(_tl, "connect_s", 0.0) + (time.perf_counter() - t)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):  # includes the TLS handshake
+        t = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _tl.connect_s = getattr(_tl, "connect_s", 0.0) + (time.perf_counter() - t)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+
+def _record(method, url, status, connect_s, ttfb_s, total_s):
+    _records.append({
+        "method": method,
+        "path": urlsplit(url).path,
+        "status": status,
+        "connect_ms": round(connect_s * 1000.0, 3),
+        "ttfb_ms": round(ttfb_s * 1000.0, 3),
+        "total_ms": round(total_s * 1000.0, 3),
+        "reused_connection": connect_s == 0.0,
+    })
+
+
+class TimedSession(requests.Session):
+    """requests.Session with a default (connect, read) timeout and per-request timings."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT_S, READ_TIMEOUT_S))
+        _tl.connect_s = 0.0
+        t0 = time.perf_counter()
+        r = super().request(method, url, **kwargs)
+        total = time.perf_counter() - t0
+        # requests' elapsed stops when the response headers are parsed (body not yet read)
+        _record(method.upper(), url, r.status_code, _tl.connect_s, r.elapsed.total_seconds(), total)
+        return r
+
+
+def make_session(pool_size: int = POOL_SIZE, retries: int = RETRIES) -> TimedSession:
+    s = TimedSession()
+    retry = Retry(total=retries, connect=retries, read=0, status=0, other=0, backoff_factor=0.2, raise_on_status=False)
+    adapter = _PooledAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    cassette = _get_cassette()
+    if _cassette_missing:
+        # never fall through to the live services in replay mode
+        pytest.skip(_cassette_missing)
+    if cassette is not None:
+        from simulators.cassette import recording_adapter, replay_adapter
+
+        adapter = replay_adapter(cassette) if CASSETTE_MODE == "replay" else recording_adapter(adapter, cassette)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+@pytest.fixture(scope="session")
+def http():
+    """Session-wide keep-alive client (sync)."""
+    s = make_session()
+    yield s
+    s.close()
+
+
+@pytest.fixture(scope="session")
+def async_http():
+    """Factory for configured httpx.AsyncClient instances (one per event loop):
+
+        async with async_http() as client: ...
+    """
+    import httpx
+
+    async def _on_request(request):
+        marks = {"t0": time.perf_counter()}
+
+        async def trace(event, info):
+            marks[event] = time.perf_counter()
+
+        request.extensions["trace"] = trace
+        request.extensions["halo_marks"] = marks
+
+    async def _on_response(response):
+        await response.aread()
+        st = response.request.extensions.get("halo_marks") or {"t0": time.perf_counter()}
+        t0 = st["t0"]
+        connect = 0.0
+        if "connection.connect_tcp.started" in st:
+            connect = st.get("connection.start_tls.complete", st.get("connection.connect_tcp.complete", t0)) - st["connection.connect_tcp.started"]
+        ttfb = st.get("http11.receive_response_headers.complete", time.perf_counter()) - t0
+        _record(response.request.method, str(response.request.url), response.status_code, connect, ttfb, time.perf_counter() - t0)
+
+    def make(**kwargs):
+        limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        kwargs.setdefault("timeout", httpx.Timeout(READ_TIMEOUT_S, connect=CONNECT_TIMEOUT_S))
+        kwargs.setdefault("transport", httpx.AsyncHTTPTransport(retries=RETRIES, limits=limits))
+        kwargs.setdefault("event_hooks", {"request": [_on_request], "response": [_on_response]})
+        return httpx.AsyncClient(**kwargs)
+
+    return make
+
+
+# --- in-process backend app (FastAPI TestClient) ------------------------------
+# HALO_BACKEND_ROOT points at a halo-platform-backend checkout; default is the
+# sibling folder of this repo. The backend is imported once per distinct env
+# configuration and its TestClient reused, instead of once per test.
+
+BACKEND_ENV_KEYS = ("HALO_AI_DEFAULT_PROVIDER", "PERPLEXITY_API_KEY")
+
+
+def _backend_root() -> Path:
+    env = os.environ.get("HALO_BACKEND_ROOT")
+    if env:
+        return Path(env).expanduser().resolve()
+    return Path(__file__).resolve().parents[1].parent / "halo-platform-backend"
+
+
+def _is_app_module(name: str) -> bool:
+    return name == "app" or name.startswith("app.")
+
+
+class BackendApps:
+    """One TestClient per env configuration.
+
+    Each configuration keeps its own snapshot of the backend's ``app.*`` modules;
+    switching configuration swaps the snapshot into sys.modules, so settings read
+    at import time and lazy imports inside handlers both see the right config,
+    and a configuration is only imported the first time it is used.
+    """
+
+    def __init__(self, root: Path):
+        from fastapi.testclient import TestClient
+
+        self._TestClient = TestClient
+        self.root = root
+        self.imports = 0
+        self._clients = {}
+        self._modules = {}
+        self._current = None
+        if str(root) not in sys.path:
+            sys.path.insert(0, str(root))
+
+    def activate(self, key):
+        if key == self._current:
+            return self._clients[key]
+        for name in [n for n in sys.modules if _is_app_module(n)]:
+            del sys.modules[name]
+        if key in self._clients:
+            sys.modules.update(self._modules[key])
+        else:
+            importlib.invalidate_caches()
+            app = importlib.import_module("app.main").app
+            self.imports += 1
+            self._modules[key] = {n: m for n, m in sys.modules.items() if _is_app_module(n)}
+            self._clients[key] = self._TestClient(app)
+        self._current = key
+        return self._clients[key]
+
+
+@pytest.fixture(scope="session")
+def backend_apps():
+    pytest.importorskip("fastapi", reason="in-process backend tests need fastapi (halo-platform-backend deps)")
+    root = _backend_root()
+    if not (root / "app" / "main.py").exists():
+        pytest.skip(f"halo-platform-backend not found at {root} (set HALO_BACKEND_ROOT)")
+    return BackendApps(root)
+
+
+@pytest.fixture
+def backend_client(backend_apps, monkeypatch):
+    """backend_client(HALO_AI_DEFAULT_PROVIDER="echo", PERPLEXITY_API_KEY=None) -> TestClient
+
+    Applies the env overrides for this test only (None = unset) and returns the
+    cached client for the resulting configuration.
+    """
+    def get(**env):
+        for k, v in env.items():
+            if v is None:
+                monkeypatch.delenv(k, raising=False)
+            else:
+                monkeypatch.setenv(k, str(v))
+        key = tuple((k, os.environ.get(k)) for k in sorted(set(BACKEND_ENV_KEYS) | set(env)))
+        return backend_apps.activate(key)
+
+    return get
+
+
+# --- pytest-json-report integration -------------------------------------------
+
+_fixtures = []  # fixture setups paid by the test currently running (tools/qa_profile.py)
+
+
+def pytest_runtest_setup(item):
+    _records.clear()
+    _fixtures.clear()
+    if _cassette is not None:
+        _cassette.current = item.nodeid
+
+
+def pytest_sessionstart(session):
+    _get_cassette()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if _cassette is not None and CASSETTE_MODE == "record" and len(_cassette):
+        _cassette.save()
+
+
+def pytest_report_header(config):
+    if CASSETTE_MODE:
+        return f"http cassette: {CASSETTE_MODE} {CASSETTE_PATH}" + (" (missing: http tests skip)" if _cassette_missing else "")
+
+
+class _FixtureTimer:
+    @pytest.hookimpl(wrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        t = time.perf_counter()
+        try:
+            return (yield)
+        finally:
+            _fixtures.append({"name": fixturedef.argname, "scope": fixturedef.scope,
+                              "setup_ms": round((time.perf_counter() - t) * 1000.0, 3)})
+
+
+def pytest_configure(config):
+    # registered as a plugin: conftest-level fixture hooks don't see session-scoped fixtures
+    config.pluginmanager.register(_FixtureTimer(), "halo-fixture-timer")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_json_runtest_metadata(item, call):
+    if call.when != "call":
+        return {}
+    meta = {}
+    if _fixtures:
+        meta["fixture_setup"] = list(_fixtures)
+    if _records:
+        connects = [r["connect_ms"] for r in _records]
+        meta["http_timings"] = list(_records)
+        meta["http_summary"] = {
+            "requests": len(_records),
+            "new_connections": sum(1 for c in connects if c > 0),
+            "connect_ms_total": round(sum(connects), 3),
+            "total_ms": round(sum(r["total_ms"] for r in _records), 3),
+        }
+    return meta
@@ -0,0 +1,81 @@
+import sys
+
+import pytest
+
+import conftest
+
+pytest.importorskip("fastapi")
+
+SETTINGS = '''import os
+from pathlib import Path
+
+PROVIDER = os.environ.get("HALO_AI_DEFAULT_PROVIDER", "echo")
+with open(Path(__file__).resolve().parents[1] / "imports.log", "a", encoding="utf-8") as f:
+    f.write(PROVIDER + "\\n")
+'''
+
+MAIN = '''from fastapi import FastAPI
+
+from app import settings
+
+app = FastAPI()
+
+
+@app.get("/provider")
+def provider():
+    from app.providers import current  # lazy import inside the handler
+    return {"settings": settings.PROVIDER, "lazy": current()}
+'''
+
+PROVIDERS = '''from app import settings
+
+
+def current():
+    return settings.PROVIDER
+'''
+
+
+@pytest.fixture
+def fake_backend(tmp_path, monkeypatch):
+    root = tmp_path / "halo-platform-backend"
+    (root / "app").mkdir(parents=True)
+    for name, text in (("__init__.py", ""), ("settings.py", SETTINGS), ("main.py", MAIN), ("providers.py", PROVIDERS)):
+        (root / "app" / name).write_text(text, encoding="utf-8")
+    monkeypatch.setenv("HALO_BACKEND_ROOT", str(root))
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    saved = {n: m for n, m in sys.modules.items() if conftest._is_app_module(n)}
+    yield root
+    for n in [n for n in sys.modules if conftest._is_app_module(n)]:
+        del sys.modules[n]
+    sys.modules.update(saved)
+
+
+def _imports(root):
+    return (root / "imports.log").read_text(encoding="utf-8").split()
+
+
+def test_backend_apps_imports_once_per_key_and_swaps_modules(fake_backend, monkeypatch):
+    assert conftest._backend_root() == fake_backend
+    apps = conftest.BackendApps(conftest._backend_root())
+
+    monkeypatch.setenv("HALO_AI_DEFAULT_PROVIDER", "echo")
+    a = apps.activate(("echo",))
+    a_modules = {n: sys.modules[n] for n in ("app", "app.main", "app.settings")}
+    assert a.get("/provider").json() == {"settings": "echo", "lazy": "echo"}
+    assert apps.imports == 1 and apps.activate(("echo",)) is a
+
+    monkeypatch.setenv("HALO_AI_DEFAULT_PROVIDER", "perplexity")
+    b = apps.activate(("perplexity",))
+    assert b is not a and apps.imports == 2
+    assert sys.modules["app.settings"] is not a_modules["app.settings"]
+    assert b.get("/provider").json() == {"settings": "perplexity", "lazy": "perplexity"}
+
+    # back to A: its modules return as they were, nothing is imported again
+    assert apps.activate(("echo",)) is a
+    assert apps.imports == 2
+    assert all(sys.modules[n] is m for n, m in a_modules.items())
+    # app.providers was first imported lazily under B: A imports its own copy on first use
+    assert a.get("/provider").json() == {"settings": "echo", "lazy": "echo"}
+    assert apps.activate(("perplexity",)) is b
+    assert b.get("/provider").json() == {"settings": "perplexity", "lazy": "perplexity"}
+    assert _imports(fake_backend) == ["echo", "perplexity"]
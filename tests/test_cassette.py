@@ -0,0 +1,75 @@
+import pytest
+import requests
+
+import conftest
+import test_gateway_pairing_encrypted as enc_flow
+import test_gateway_pairing_plain as plain_flow
+from simulators import cassette, pairing_client
+from simulators.gateway_sim import run_in_thread
+
+
+@pytest.fixture
+def seeded():
+    prev = pairing_client.seed_keys(cassette.DEFAULT_SEED)
+    yield
+    pairing_client.seed_keys(prev)
+
+
+def _session(adapter):
+    s = requests.Session()
+    s.mount("http://", adapter)
+    return s
+
+
+def test_request_key_masks_volatile_fields():
+    a = cassette.request_key("post", "http://h:1/p?b=2&a=1", b'{"ts":"x","nonce":"1","d":{"k":1}}')
+    b = cassette.request_key("POST", "http://other/p?a=1&b=2", '{"d": {"k": 1}, "nonce": "2", "ts": "y"}')
+    assert a == b
+    assert a != cassette.request_key("POST", "http://h/p?a=1&b=2", b'{"d":{"k":2}}')
+
+
+def test_record_then_replay_without_sockets(tmp_path, seeded, monkeypatch):
+    path = tmp_path / "e2e.json.gz"
+    rec = cassette.open_cassette("record", path)
+    sim = run_in_thread()
+    try:
+        with _session(cassette.recording_adapter(requests.adapters.HTTPAdapter(), rec)) as s:
+            for mod, fn in ((plain_flow, plain_flow.test_pairing_plain_happy_path),
+                            (enc_flow, enc_flow.test_pairing_encrypted_confirm_and_provision)):
+                rec.current = fn.__name__
+                monkeypatch.setattr(mod, "BASE", sim.base_url)
+                fn(s)
+    finally:
+        sim.stop()
+    rec.save()
+
+    play = cassette.open_cassette("replay", path)
+    assert len(play) == 6 and play.seed == cassette.DEFAULT_SEED
+    with _session(cassette.replay_adapter(play)) as s:
+        for mod, fn in ((plain_flow, plain_flow.test_pairing_plain_happy_path),
+                        (enc_flow, enc_flow.test_pairing_encrypted_confirm_and_provision)):
+            play.current = fn.__name__
+            monkeypatch.setattr(mod, "BASE", "http://replay.invalid:9")
+            fn(s)
+        play.current = "not_recorded"
+        with pytest.raises(cassette.CassetteMiss):
+            s.get("http://replay.invalid:9/health")
+
+
+def test_seed_keys_returns_the_previous_seed():
+    prev = pairing_client.seed_keys("outer")
+    try:
+        assert pairing_client.seed_keys("inner") == "outer"
+        assert pairing_client.seed_keys("outer") == "inner"
+    finally:
+        pairing_client.seed_keys(prev)
+
+
+def test_replay_without_cassette_skips_http_tests(tmp_path, monkeypatch):
+    monkeypatch.setattr(conftest, "CASSETTE_MODE", "replay")
+    monkeypatch.setattr(conftest, "CASSETTE_PATH", tmp_path / "missing.json.gz")
+    monkeypatch.setattr(conftest, "_cassette", None)
+    monkeypatch.setattr(conftest, "_cassette_missing", None)
+    assert conftest._get_cassette() is None
+    with pytest.raises(pytest.skip.Exception, match="no cassette at .*missing.json.gz"):
+        conftest.make_session()
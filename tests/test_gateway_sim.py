@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from simulators.gateway_sim import run_in_thread
+
+# Same flows the live-gateway tests run, pointed at the in-repo simulator.
+import test_gateway_pairing_encrypted as enc_flow
+import test_gateway_pairing_plain as plain_flow
+
+
+@pytest.fixture(scope="module")
+def gateway_sim():
+    sim = run_in_thread()
+    yield sim
+    sim.stop()
+
+
+def test_sim_plain_flow(gateway_sim, http, monkeypatch):
+    monkeypatch.setattr(plain_flow, "BASE", gateway_sim.base_url)
+    plain_flow.test_health(http)
+    plain_flow.test_pairing_plain_happy_path(http)
+
+
+def test_sim_encrypted_flow(gateway_sim, http, monkeypatch):
+    monkeypatch.setattr(enc_flow, "BASE", gateway_sim.base_url)
+    enc_flow.test_pairing_encrypted_confirm_and_provision(http)
+
+
+def test_sim_health_async_client(gateway_sim, async_http):
+    import asyncio
+
+    async def go():
+        async with async_http() as c:
+            return [(await c.get(gateway_sim.base_url + "/health")).status_code for _ in range(3)]
+
+    assert asyncio.run(go()) == [200, 200, 200]
+
+
+def test_sim_rejects_wrong_code_and_missing_token(gateway_sim):
+    base = gateway_sim.base_url
+    j1 = requests.post(base + "/pairing/request", json={"device_id": "d", "device_pubkey": "pk"}, timeout=10).json()
+    body = {"pairing_session_id": j1["pairing_session_id"], "pairing_code": "x"}
+    assert requests.post(base + "/pairing/confirm", json=body, timeout=10).status_code == 401
+    r = requests.post(base + "/pairing/confirm", json=body, headers={"Authorization": "Bearer t"}, timeout=10)
+    assert r.status_code == 403
+    r = requests.post(base + "/pairing/provision", json={"pairing_session_id": j1["pairing_session_id"], "proof_of_possession": "p"}, timeout=10)
+    assert r.status_code == 409
+
+
+def test_sim_rejects_low_order_device_pubkey(gateway_sim):
+    # all-zero X25519 point: the exchange fails; the gateway must answer, not drop the connection
+    zero = enc_flow.b64ue(bytes(32))
+    r = requests.post(gateway_sim.base_url + "/pairing/request", json={"device_id": "d", "device_pubkey": zero}, timeout=10)
+    assert r.status_code == 400
+    assert r.json()["error"] == "invalid_device_pubkey"
+
+
+def test_sim_rejects_replayed_seq(gateway_sim, monkeypatch):
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+    base = gateway_sim.base_url
+    priv = X25519PrivateKey.generate()
+    pub = enc_flow.b64ue(priv.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw))
+    j1 = requests.post(base + "/pairing/request", json={"device_id": "d", "device_pubkey": pub}, timeout=10).json()
+    sid, c = j1["pairing_session_id"], j1["crypto"]
+    key = enc_flow.derive_key(priv, enc_flow.b64ud(c["gateway_pubkey_b64url"]), enc_flow.b64ud(c["hkdf_salt_b64url"]), sid)
+    env = enc_flow.encrypt_env(key, c["kid"], "POST", "/pairing/confirm", sid, 1, {"pairing_code": j1["pairing_code"]})
+    hdr = {"Authorization": "Bearer t"}
+    body = {"pairing_session_id": sid, "payload_enc": env}
+    assert requests.post(base + "/pairing/confirm", json=body, headers=hdr, timeout=10).status_code == 200
+    assert requests.post(base + "/pairing/confirm", json=body, headers=hdr, timeout=10).status_code == 409
+
+
+def test_sim_concurrent_pairings(gateway_sim):
+    base = gateway_sim.base_url
+
+    def pair(i: int) -> int:
+        with requests.Session() as s:
+            j1 = s.post(base + "/pairing/request", json={"device_id": f"d-{i}", "device_pubkey": "pk"}, timeout=10).json()
+            s.post(base + "/pairing/confirm", json={"pairing_session_id": j1["pairing_session_id"], "pairing_code": j1["pairing_code"]},
+                   headers={"Authorization": "Bearer t"}, timeout=10)
+            return s.post(base + "/pairing/provision", json={"pairing_session_id": j1["pairing_session_id"], "proof_of_possession": "p"},
+                          timeout=10).status_code
+
+    with ThreadPoolExecutor(max_workers=32) as ex:
+        codes = list(ex.map(pair, range(200)))
+    assert codes == [201] * 200
+
+
+@pytest.mark.parametrize("crypto_workers", [0, 2])
+def test_device_fleet_against_sim(gateway_sim, crypto_workers):
+    from simulators.device_fleet import run_fleet
+
+    report = run_fleet(gateway_sim.base_url, devices=60, concurrency=20, crypto_workers=crypto_workers)
+    assert report["paired"] == 60, report["errors"]
+    assert report["pairing_completion_ms"]["p99"] >= report["pairing_completion_ms"]["p50"] > 0
@@ -0,0 +1,69 @@
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from simulators.glasses_sim import generate_trace, load_trace, run_replay, save_trace
+
+
+@pytest.fixture
+def conversation_stub():
+    seen = defaultdict(list)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            seen[body["session_id"]].append(body["user_utterance"])
+            out = json.dumps({"session_id": body["session_id"], "audio_cues": []}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 128
+        daemon_threads = True
+
+    srv = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}", seen
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_trace_is_deterministic_and_roundtrips(tmp_path):
+    a = list(generate_trace(seed=5, duration_s=5, rate=40, sessions=10))
+    assert a == list(generate_trace(seed=5, duration_s=5, rate=40, sessions=10))
+    assert a != list(generate_trace(seed=6, duration_s=5, rate=40, sessions=10))
+    assert all(x.t <= y.t for x, y in zip(a, a[1:]))
+    first = {}
+    for ev in a:
+        first.setdefault(ev.sid, ev.kind)
+    assert set(first.values()) == {"session_start"}
+
+    path = tmp_path / "g.trace.jsonl"
+    assert save_trace(path, a, {"seed": 5}) == len(a)
+    assert list(load_trace(path)) == a
+
+
+@pytest.mark.parametrize("speed", [0, 20])
+def test_replay_keeps_session_order_and_reports(conversation_stub, speed):
+    base, seen = conversation_stub
+    events = list(generate_trace(seed=2, duration_s=4, rate=30, sessions=8))
+    report = run_replay(base, events, speed=speed, concurrency=8)
+    assert report["ok"] == report["events"] == len(events), report["errors"]
+    expected = defaultdict(list)
+    for ev in events:
+        expected[ev.sid].append(ev.utterance)
+    assert dict(seen) == dict(expected)
+    lat = report["event_to_response_ms"]
+    assert lat["count"] == len(events) and lat["p99"] >= lat["p50"] > 0
+    assert report["throughput_events_per_s"] > 0
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from simulators.device_fleet import Fleet, FleetError, VirtualDevice
+from simulators.http_pool import HttpPool
+from simulators.pairing_client import b64ue, keygen_batch
+
+OK = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: application/json\r\n\r\n{}"
+
+
+async def _server(drop_at):
+    """Keep-alive stub: answers every request except number `drop_at`, where it closes instead."""
+    seen = []
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                n = int([l for l in head.split(b"\r\n") if l.lower().startswith(b"content-length")][0].split(b":")[1])
+                await reader.readexactly(n)
+                seen.append(head.split(b" ", 1)[0].decode())
+                if len(seen) == drop_at:
+                    writer.close()
+                    return
+                writer.write(OK)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    srv = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return srv, f"http://127.0.0.1:{srv.sockets[0].getsockname()[1]}", seen
+
+
+def test_post_on_dropped_keepalive_is_not_replayed():
+    async def go():
+        srv, url, seen = await _server(drop_at=2)
+        async with srv, HttpPool(url, size=1, timeout_s=5) as pool:
+            assert (await pool.request("GET", "/a"))[0] == 200
+            # the server read the POST, then dropped the connection: it may have acted on it
+            with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+                await pool.request("POST", "/pairing/confirm", b"{}")
+        return seen
+
+    assert asyncio.run(go()) == ["GET", "POST"]
+
+
+def test_idempotent_request_is_retried_once_on_fresh_connection():
+    async def go():
+        srv, url, seen = await _server(drop_at=2)
+        async with srv, HttpPool(url, size=1, timeout_s=5) as pool:
+            await pool.request("GET", "/a")
+            status = (await pool.request("GET", "/b"))[0]
+        return status, seen
+
+    assert asyncio.run(go()) == (200, ["GET", "GET", "GET"])
+
+
+def test_connection_closed_while_idle_is_skipped_before_sending():
+    async def go():
+        closers = []
+
+        async def handle(reader, writer):
+            head = await reader.readuntil(b"\r\n\r\n")
+            writer.write(OK)
+            await writer.drain()
+            closers.append(head.split(b" ", 1)[0].decode())
+            writer.close()  # idle close without "Connection: close"
+
+        srv = await asyncio.start_server(handle, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{srv.sockets[0].getsockname()[1]}"
+        async with srv, HttpPool(url, size=1, timeout_s=5) as pool:
+            await pool.request("POST", "/x", b"")
+            await asyncio.sleep(0.05)  # let the EOF arrive
+            status = (await pool.request("POST", "/y", b""))[0]
+        return status, closers
+
+    assert asyncio.run(go()) == (200, ["POST", "POST"])
+
+
+class _CannedClient:
+    def __init__(self, replies):
+        self.replies = replies
+
+    async def post_json(self, path, obj, headers=None):
+        return self.replies[path]
+
+
+def test_fleet_counts_missing_payload_as_protocol_error():
+    _, gw_pub = keygen_batch(1)[0]
+    client = _CannedClient({
+        "/pairing/request": (200, {"pairing_session_id": "ps-1", "pairing_code": "123456",
+                                   "crypto": {"kid": "k", "gateway_pubkey_b64url": b64ue(gw_pub),
+                                              "hkdf_salt_b64url": b64ue(b"s" * 16)}}),
+        "/pairing/confirm": (200, {"status": "confirmed"}),
+    })
+    fleet = Fleet("http://unused", pool=None)
+    with pytest.raises(FleetError) as e:
+        asyncio.run(fleet.pair(client, VirtualDevice("d-1")))
+    assert (e.value.step, e.value.detail) == ("confirm", "missing_payload_enc")
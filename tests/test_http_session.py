@@ -0,0 +1,49 @@
+import ast
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+
+import conftest
+
+
+class _Capture(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.timeouts = []
+
+    def send(self, request, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        r = requests.Response()
+        r.status_code = 200
+        r.url = request.url
+        r.request = request
+        r._content = b"{}"
+        return r
+
+    def close(self):
+        pass
+
+
+def test_session_applies_configured_timeouts(monkeypatch):
+    monkeypatch.setattr(conftest, "CONNECT_TIMEOUT_S", 1.5)
+    monkeypatch.setattr(conftest, "READ_TIMEOUT_S", 7.0)
+    s = conftest.make_session()
+    cap = _Capture()
+    s.mount("http://", cap)
+    s.get("http://h/health")
+    s.post("http://h/pairing/request", json={})
+    assert cap.timeouts == [(1.5, 7.0), (1.5, 7.0)]
+
+
+def test_e2e_suites_leave_timeouts_to_the_session():
+    # a per-call timeout= would silently override HALO_HTTP_TIMEOUT_S / HALO_HTTP_CONNECT_TIMEOUT_S
+    offenders = []
+    for path in Path(__file__).parent.glob("test_*.py"):
+        tree = ast.parse(path.read_text(encoding="utf-8-sig"))
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and isinstance(node.func.value, ast.Name) and node.func.value.id == "http"
+                    and any(k.arg == "timeout" for k in node.keywords)):
+                offenders.append(f"{path.name}:{node.lineno}")
+    assert offenders == []
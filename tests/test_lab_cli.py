@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+LAB_ROOT = Path(__file__).resolve().parents[1] / "halo-test-lab-win11"
+
+# runs the CLI with PySide6 made unimportable, and reports every attempt to import it
+_PROBE = r'''
+import sys
+attempts = []
+
+class _NoQt:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in ("PySide6", "shiboken6"):
+            attempts.append(name)
+            raise ImportError("blocked: " + name)
+        return None
+
+sys.meta_path.insert(0, _NoQt())
+from halo_test_lab.__main__ import main
+try:
+    code = main(sys.argv[1:])
+except ImportError:
+    code = "import-error"
+print(f"CLI_EXIT={code} QT_IMPORTS={','.join(attempts) or '-'}")
+'''
+
+
+def _cli(*args, cwd=LAB_ROOT):
+    p = subprocess.run([sys.executable, "-c", _PROBE, *args], cwd=str(cwd), capture_output=True, text=True, timeout=180)
+    return p.stdout.strip().splitlines()[-1]
+
+
+def test_cli_run_never_imports_qt(tmp_path):
+    profile = tmp_path / "p.yaml"
+    profile.write_text("name: cli-test\nbase_url: http://127.0.0.1:9\ntelemetry: false\n"
+                       "loadgen: {rate_per_s: 5, duration_s: 0.3, max_active: 2}\n", encoding="utf-8")
+    last = _cli("run", "--profile", str(profile), "--suites", "loadgen", "--runs-dir", str(tmp_path / "runs"))
+    assert last.endswith("QT_IMPORTS=-")
+    assert list((tmp_path / "runs").glob("*/run-manifest.json"))
+
+
+def test_cli_profiles_never_imports_qt():
+    assert _cli("profiles") == "CLI_EXIT=0 QT_IMPORTS=-"
+
+
+def test_probe_catches_a_qt_import():
+    # control: the gui command does import Qt, and the probe sees it
+    assert "QT_IMPORTS=PySide6" in _cli("gui")
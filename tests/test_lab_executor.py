@@ -0,0 +1,127 @@
+import io
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from halo_test_lab.executor import LineBatcher, RunResult, SuiteResources, SuiteSpec, _pump, _run, run_suites
+
+
+def _spec(name, seconds, log, code=0, res=None):
+    def run(r):
+        log.append(("start", name, r))
+        time.sleep(seconds)
+        log.append(("end", name))
+        return RunResult(name, code, None, None, [])
+    return SuiteSpec(name, run, res)
+
+
+def test_run_suites_concurrent_outcomes_in_spec_order():
+    log, events = [], []
+    res = SuiteResources(cpus=[0], priority="below_normal")
+    specs = [_spec("slow", 0.3, log), _spec("fast", 0.05, log, code=3, res=res)]
+    outs = run_suites(specs, on_event=lambda n, phase, out: events.append((n, phase)))
+    assert [o.name for o in outs] == ["slow", "fast"]
+    assert [o.exit_code for o in outs] == [0, 3]
+    assert outs[1].resources == res and outs[1].to_manifest()["resources"] == {"cpus": [0], "priority": "below_normal"}
+    assert sorted(events) == [("fast", "done"), ("fast", "start"), ("slow", "done"), ("slow", "start")]
+    # side by side: run back to back, "slow" (first in spec order) would end first
+    assert log.index(("end", "fast")) < log.index(("end", "slow"))
+
+
+def test_run_suites_max_parallel_serializes():
+    log = []
+    run_suites([_spec("a", 0.05, log), _spec("b", 0.05, log)], max_parallel=1)
+    assert [e[0] for e in log] == ["start", "end", "start", "end"]
+
+
+def test_run_suites_exception_becomes_failed_outcome():
+    def boom(r):
+        raise RuntimeError("k6 script not found")
+    outs = run_suites([SuiteSpec("k6", boom), _spec("ok", 0.0, [])])
+    assert outs[0].exit_code == 1 and outs[0].error == "RuntimeError: k6 script not found"
+    assert outs[0].to_manifest()["error"].startswith("RuntimeError")
+    assert outs[1].exit_code == 0 and outs[1].error is None
+    assert run_suites([]) == []
+
+
+# every thread of the child, including one started right at interpreter start-up
+_CHILD = r"""
+import os, threading, time
+threading.Thread(target=time.sleep, args=(0.5,), daemon=True).start()
+time.sleep(0.1)
+for tid in sorted(os.listdir("/proc/self/task")):
+    stat = open(f"/proc/self/task/{tid}/stat").read()
+    nice = int(stat[stat.rfind(")") + 2:].split()[16])
+    print(tid, nice, ",".join(map(str, sorted(os.sched_getaffinity(int(tid))))))
+"""
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="per-thread affinity/niceness via /proc")
+def test_run_applies_resources_to_every_child_thread(tmp_path):
+    cpu = min(os.sched_getaffinity(0))
+    res = SuiteResources(cpus=[cpu], priority="below_normal")
+    rr = _run([sys.executable, "-c", _CHILD], cwd=tmp_path, out_dir=tmp_path, name="child", resources=res)
+    assert rr.exit_code == 0
+    rows = [line.split() for line in rr.stdout_path.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) >= 2
+    base = os.getpriority(os.PRIO_PROCESS, 0)
+    for _tid, nice, cpus in rows:
+        assert int(nice) == max(base, 10)
+        assert cpus == str(cpu)
+
+
+def test_line_batcher_one_callback_per_frame():
+    chunks = []
+    b = LineBatcher(chunks.append, fps=5)
+    for i in range(100):
+        b.push(f"line {i}")
+    time.sleep(0.5)
+    assert "\n".join(chunks) == "\n".join(f"line {i}" for i in range(100))
+    assert len(chunks) <= 2  # a frame may fall mid-burst, but never one callback per line
+    n = len(chunks)
+    b.push("tail")
+    b.close()  # the last partial batch is flushed, not lost
+    assert chunks[n:] == ["tail"]
+
+
+def test_line_batcher_drops_oldest_beyond_max_pending():
+    chunks = []
+    b = LineBatcher(chunks.append, fps=0.01, max_pending=3)  # no frame during the test: close() flushes
+    for i in range(10):
+        b.push(f"line {i}")
+    b.close()
+    assert chunks == ["[log] ... 7 lines not shown (see *.log files)\nline 7\nline 8\nline 9"]
+    b.flush()
+    assert len(chunks) == 1  # the counter was reset with the batch
+
+
+def test_pump_writes_every_byte_and_emits_lines():
+    pipe = io.BytesIO(b"one\r\ntwo\n" + b"x" * 70000 + b"\nbad \xff\n")
+    fh, out = io.BytesIO(), []
+    _pump(pipe, fh, "[p] ", out.append)
+    assert fh.getvalue() == b"one\r\ntwo\n" + b"x" * 70000 + b"\nbad \xff\n"
+    # a line longer than the readline bound arrives in pieces
+    assert out[:2] == ["[p] one", "[p] two"] and out[-1] == "[p] bad �"
+    assert "".join(o[4:] for o in out[2:-1]) == "x" * 70000 and len(out) == 5
+    assert pipe.closed
+
+
+def test_run_streams_both_pipes_and_logs_them(tmp_path):
+    code = ("import sys\n"
+            "for i in range(500): print(f'out {i}')\n"
+            "for i in range(50): print(f'err {i}', file=sys.stderr)\n"
+            "sys.exit(3)\n")
+    chunks = []
+    b = LineBatcher(chunks.append, fps=20)
+    rr = _run([sys.executable, "-c", code], tmp_path, tmp_path, "kid", on_output=b.push)
+    b.close()
+    assert rr.exit_code == 3
+    assert rr.stdout_path.read_text(encoding="utf-8").splitlines() == [f"out {i}" for i in range(500)]
+    assert rr.stderr_path.read_text(encoding="utf-8").splitlines() == [f"err {i}" for i in range(50)]
+    lines = "\n".join(chunks).split("\n")
+    assert [l for l in lines if l.startswith("[kid] ")] == [f"[kid] out {i}" for i in range(500)]
+    assert [l for l in lines if l.startswith("[kid:err] ")] == [f"[kid:err] err {i}" for i in range(50)]
+    assert len(chunks) < 550
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import math
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from halo_test_lab import histogram
+from halo_test_lab.histogram import LatencyHistogram
+from halo_test_lab.loadgen import LoadStats, MAX_REASON_KEYS, SCENARIOS, Turn, _turn_order, load_scenario, run_load
+
+
+def _exact(values, p):
+    # nearest-rank percentile (what LatencyHistogram.percentile approximates)
+    s = sorted(values)
+    return s[max(1, math.ceil(p / 100.0 * len(s))) - 1]
+
+
+def test_index_upper_roundtrip_and_monotonic():
+    prev = -1
+    for v in list(range(0, 2048)) + [random.Random(1).randrange(1, 10**9) for _ in range(5000)]:
+        i = histogram._index(v)
+        # v falls in bucket i: at most its highest equivalent value, above the previous bucket's
+        assert v <= histogram._upper(i)
+        if i > 0:
+            assert v > histogram._upper(i - 1)
+    for i in range(0, 5000):
+        assert histogram._upper(i) > prev
+        prev = histogram._upper(i)
+        assert histogram._index(histogram._upper(i)) == i
+
+
+def test_small_values_exact_and_relative_error_below_one_percent():
+    for v in range(histogram._SUB_COUNT):
+        assert histogram._upper(histogram._index(v)) == v
+    for v in (257, 1000, 12_345, 999_999, 123_456_789):
+        assert (histogram._upper(histogram._index(v)) - v) / v < 0.01
+
+
+def test_percentiles_close_to_exact():
+    rng = random.Random(7)
+    values = [int(rng.lognormvariate(10, 1)) for _ in range(20_000)]
+    h = LatencyHistogram()
+    for v in values:
+        h.record(v)
+    assert h.total == len(values)
+    assert h.min_us == min(values) and h.max_us == max(values)
+    for p in (50, 90, 95, 99, 99.9, 100):
+        exact = _exact(values, p)
+        assert exact <= h.percentile(p) <= exact * 1.01
+    assert h.percentile(100) == max(values)
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def test_merge_equals_pooled_recording():
+    rng = random.Random(3)
+    a_vals = [rng.randrange(1, 500_000) for _ in range(3000)]
+    b_vals = [rng.randrange(200_000, 2_000_000) for _ in range(1000)]
+    a, b, pooled = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for v in a_vals:
+        a.record(v)
+        pooled.record(v)
+    for v in b_vals:
+        b.record(v)
+        pooled.record(v)
+    merged = LatencyHistogram().merge(a).merge(b)
+    assert merged.counts == pooled.counts
+    assert (merged.total, merged.sum_us, merged.min_us, merged.max_us) == (pooled.total, pooled.sum_us, pooled.min_us, pooled.max_us)
+    for p in (50, 95, 99):
+        assert merged.percentile(p) == pooled.percentile(p)
+
+
+def test_dict_roundtrip_and_summary():
+    h = LatencyHistogram()
+    for ms in (1, 2, 3, 400):
+        h.record_ms(ms)
+    again = LatencyHistogram.from_dict(json.loads(json.dumps(h.to_dict())))
+    assert again.counts == h.counts and again.total == 4 and again.max_us == 400_000
+    s = h.summary_ms((50, 99))
+    assert s["count"] == 4 and s["min"] == 1.0 and s["max"] == 400.0
+    assert s["p50"] == pytest.approx(2.0, rel=0.01) and s["p99"] == pytest.approx(400.0, rel=0.01)
+
+
+def test_load_stats_buckets_and_reason_cap():
+    st = LoadStats()
+    for n in (10, 2, 1):
+        st.record(n, "default_policy:x", 0.010, 0.005)
+    assert [k for k, _ in _turn_order(st.per_turn)] == ["turn_1", "turn_2", "turn_10"]
+    for i in range(MAX_REASON_KEYS + 5):
+        st.record(1, f"r{i}", 0.001, 0.001)
+    assert len(st.per_reason) == MAX_REASON_KEYS + 1 and st.per_reason["other"].total == 6
+    st.error("http_500")
+    st.error("http_500")
+    assert st.errors == {"http_500": 2}
+
+
+def test_load_scenario_from_file(tmp_path):
+    assert load_scenario("single_turn") == SCENARIOS["single_turn"]
+    p = tmp_path / "s.json"
+    p.write_text(json.dumps({"turns": [{"utterance": "hi", "think_s": 0.5, "expect_reason": "a:"}]}), encoding="utf-8")
+    assert load_scenario(str(p)) == [Turn("hi", 0.5, "a:")]
+
+
+@pytest.fixture
+def conversation_stub():
+    calls = []
+
+    class H(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            calls.append(body)
+            code = 500 if body["user_utterance"] == "boom" else 200
+            data = json.dumps({"ai_routing_reason": "default_policy:echo"}).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *a):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), H)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}", calls
+    srv.shutdown()
+
+
+def test_run_load_open_loop_counts(conversation_stub):
+    pytest.importorskip("httpx")
+    base, calls = conversation_stub
+    turns = [Turn("ciao", expect_reason="default_policy:"), Turn("ciao", expect_reason="session_locked:")]
+    rep = asyncio.run(run_load(base, turns, rate_per_s=40, duration_s=0.5, timeout_s=5))
+    assert rep["sessions"] == {"scheduled": 20, "completed": 20, "failed": 0}
+    assert rep["requests"]["total"] == 40 == len(calls)
+    # second turn expects another reason: a failed check, not an error
+    assert rep["requests"]["checks_failed"] == 20 and rep["requests"]["errors"] == {}
+    assert list(rep["latency_ms"]["per_turn"]) == ["turn_1", "turn_2"]
+    # latency runs from the intended start, so it is never below the service time
+    assert rep["latency_ms"]["overall"]["max"] >= rep["service_time_ms"]["max"] * 0.99
+
+
+def test_run_load_stops_session_on_error(conversation_stub):
+    pytest.importorskip("httpx")
+    base, calls = conversation_stub
+    rep = asyncio.run(run_load(base, [Turn("boom"), Turn("never")], rate_per_s=20, duration_s=0.2, timeout_s=5))
+    assert rep["sessions"]["failed"] == 4
+    assert rep["requests"]["errors"] == {"http_500": 4}
+    assert all(c["user_utterance"] == "boom" for c in calls)
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+from halo_test_lab.history import RunHistory, ingest_run_dir
+
+
+JUNIT = ('<?xml version="1.0"?><testsuites><testsuite name="pytest" tests="3">'
+         '<testcase classname="tests.test_a" name="test_fast" time="0.5"/>'
+         '<testcase classname="tests.test_a" name="test_slow" time="{slow}"><failure message="boom"/></testcase>'
+         '<testcase classname="tests.test_a" name="test_skip" time="9.0"><skipped/></testcase>'
+         '</testsuite></testsuites>')
+
+K6 = {"metrics": {"http_req_duration": {"avg": 12.0, "med": 10.0, "p(95)": 30.0},
+                  "http_req_duration{name:GET /health}": {"p(95)": 5.0},
+                  "checks": {"passes": 3, "fails": 0, "thresholds": {"rate>0.9": False}}}}
+
+
+def _make_run(runs, ts, slow="2.0", k6=True):
+    run = runs / ts
+    (run / "pytest").mkdir(parents=True)
+    (run / "pytest" / "pytest-junit.xml").write_text(JUNIT.format(slow=slow), encoding="utf-8")
+    manifest = {"timestamp": ts, "env": {"name": "local", "base_url": "http://x", "api_key": "s3cret"},
+                "suites": [{"name": "pytest", "exit_code": 1, "wall_s": 3.0}], "wall_s": 3.5}
+    (run / "run-manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    if k6:
+        (run / "k6").mkdir()
+        (run / "k6" / "k6-summary.json").write_text(json.dumps(K6), encoding="utf-8")
+    return run
+
+
+@pytest.fixture
+def runs(tmp_path):
+    d = tmp_path / "runs"
+    d.mkdir()
+    return d
+
+
+def test_ingest_is_incremental_on_fingerprint(runs):
+    run = _make_run(runs, "20260101-000000")
+    _make_run(runs, "20260102-000000", slow="4.0", k6=False)
+    (runs / "empty").mkdir()
+    with RunHistory(runs / "history.sqlite") as h:
+        assert h.ingest_all(runs) == (2, 1)
+        assert h.ingest_all(runs) == (0, 3)
+
+        # rewriting an artifact (size or mtime) re-indexes only that run, replacing its rows
+        junit = run / "pytest" / "pytest-junit.xml"
+        junit.write_text(JUNIT.format(slow="6.00"), encoding="utf-8")
+        st = junit.stat()
+        os.utime(junit, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert h.ingest_all(runs) == (1, 2)
+        assert h.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 2
+        assert h.conn.execute("SELECT COUNT(*) FROM tests").fetchone()[0] == 6
+
+        assert h.ingest_run(run) is False
+        assert h.ingest_run(run, force=True) is True
+        assert h.conn.execute("SELECT COUNT(*) FROM tests").fetchone()[0] == 6
+
+
+def test_ingest_redacts_secrets_and_indexes_metrics(runs):
+    run = _make_run(runs, "20260101-000000")
+    assert ingest_run_dir(run) is True
+    assert ingest_run_dir(run) is False
+    with RunHistory(runs / "history.sqlite") as h:
+        row = h.conn.execute("SELECT env_name, exit_code, env_json FROM runs").fetchone()
+        assert (row["env_name"], row["exit_code"]) == ("local", 1)
+        assert json.loads(row["env_json"])["api_key"] == "***"
+        trend = h.p95_trend()
+        assert {(r["endpoint"], r["p95"]) for r in trend} == {("*", 30.0), ("GET /health", 5.0)}
+        assert h.p95_trend(stat="p50")[0]["p50"] == 10.0
+
+
+def test_slowest_tests_over_last_runs(runs):
+    _make_run(runs, "20260101-000000", slow="2.0")
+    _make_run(runs, "20260102-000000", slow="4.0")
+    _make_run(runs, "20260103-000000", slow="6.0")
+    with RunHistory(runs / "history.sqlite") as h:
+        h.ingest_all(runs)
+        top = h.slowest_tests(last_runs=2)
+        assert top[0] == {"test": "tests.test_a::test_slow", "runs": 2, "mean_s": 5.0, "max_s": 6.0, "failures": 2}
+        assert [t["test"] for t in top] == ["tests.test_a::test_slow", "tests.test_a::test_fast"]
+        assert h.slowest_tests(env_name="other") == []
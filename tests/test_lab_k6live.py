@@ -0,0 +1,198 @@
+import json
+import math
+import os
+import random
+import stat
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from halo_test_lab.executor import run_k6
+from halo_test_lab.k6live import K6Live, LiveK6Monitor, Threshold
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _metric(name, kind, thresholds=()):
+    return json.dumps({"type": "Metric", "metric": name, "data": {"name": name, "type": kind, "thresholds": list(thresholds)}})
+
+
+def _point(name, sec, value, tag=None):
+    ts = (T0 + timedelta(seconds=sec, milliseconds=250)).isoformat().replace("+00:00", "Z")
+    return json.dumps({"type": "Point", "metric": name,
+                       "data": {"time": ts, "value": value, "tags": {"name": tag} if tag else {}}})
+
+
+def _feed(live, lines):
+    for line in lines:
+        live.ingest_line(line)
+
+
+@pytest.mark.parametrize("expr, agg, p, op, limit", [
+    ("p(95)<500", "p(95)", 95.0, "<", 500.0),
+    ("p(99.9) <= 1e3", "p(99.9)", 99.9, "<=", 1000.0),
+    ("rate<0.01", "rate", None, "<", 0.01),
+    ("count>=10", "count", None, ">=", 10.0),
+    ("med===2", "med", None, "===", 2.0),
+])
+def test_threshold_parsing(expr, agg, p, op, limit):
+    th = Threshold("m", expr)
+    assert (th.agg, th.p, th.op, th.limit, th.reason) == (agg, p, op, limit, "")
+
+
+def test_unsupported_threshold_is_reported_not_evaluated():
+    live = K6Live({"thresholds": {"http_reqs": "count in [1, 2]"}})
+    _feed(live, [_metric("http_reqs", "counter"), _point("http_reqs", 0, 1)])
+    assert live.evaluate() == []
+    (th,) = live.thresholds.values()
+    assert th.ok is None and th.reason == "unsupported expression"
+
+
+def test_monotonic_threshold_is_lost_right_away():
+    # a count over its limit can't come back: no grace, no sustain, no min_samples
+    live = K6Live({"grace_s": 600, "sustain_s": 600, "min_samples": 10_000})
+    _feed(live, [_metric("http_reqs", "counter", ["count<5"]), _metric("http_req_duration", "trend", ["max<100"])])
+    _feed(live, [_point("http_reqs", 0, 1) for _ in range(4)] + [_point("http_req_duration", 0, 50)])
+    assert live.evaluate() == []
+    _feed(live, [_point("http_reqs", 1, 1), _point("http_req_duration", 1, 150)])
+    lost = live.evaluate()
+    assert {(t.target, t.expr) for t in lost} == {("http_reqs", "count<5"), ("http_req_duration", "max<100")}
+    assert all(t.reason == "can no longer pass" for t in lost)
+    assert live.evaluate() == []  # reported once
+
+
+def test_statistical_threshold_waits_for_grace_and_sustain():
+    live = K6Live({"grace_s": 10, "sustain_s": 5, "min_samples": 20})
+    _feed(live, [_metric("http_req_duration", "trend", ["p(95)<100"])])
+    lost_at = None
+    for sec in range(30):
+        value = 50 if sec < 3 else 400  # fine for 3 s, then slow for good
+        _feed(live, [_point("http_req_duration", sec, value) for _ in range(10)])
+        if live.evaluate():
+            lost_at = sec
+            break
+    (th,) = live.thresholds.values()
+    # p95 fails from sec 3 on; lost once elapsed >= 10 s and it has failed for 5 s
+    assert th.failing_since == int(T0.timestamp()) + 3
+    assert lost_at == 9 and th.lost and th.reason == "failing for 6s"
+
+
+def test_recovery_resets_the_sustain_clock():
+    live = K6Live({"grace_s": 0, "sustain_s": 5, "min_samples": 1})
+    _feed(live, [_metric("http_req_failed", "rate", ["rate<0.5"])])
+    (th,) = live.thresholds.values()
+    # cumulative rate: 1, 1, .67, .5 (failing 3 s < sustain), then .4, .33, ... passes
+    for sec, value in enumerate([1, 1, 0, 0, 0, 0, 0, 0]):
+        _feed(live, [_point("http_req_failed", sec, value)])
+        assert live.evaluate() == []
+        if sec == 3:
+            assert th.failing_since == int(T0.timestamp())
+    assert th.ok is True and th.failing_since is None and not th.lost
+
+
+def test_rolling_window_only_sees_the_last_seconds():
+    live = K6Live({"window_s": 5})
+    _feed(live, [_metric("http_reqs", "counter"), _metric("http_req_duration", "trend"), _metric("http_req_failed", "rate")])
+    for sec in range(20):
+        slow = sec >= 15
+        for _ in range(10 if slow else 4):
+            _feed(live, [_point("http_reqs", sec, 1, "GET /x"), _point("http_req_failed", sec, 1 if slow else 0),
+                         _point("http_req_duration", sec, 500 if slow else 10, "GET /x")])
+    snap = live.snapshot(per_series=True)
+    assert snap["t_s"] == 20
+    assert snap["rps"] == 10.0                       # last 5 s: 10 per second
+    assert snap["error_rate"] == 1.0
+    assert snap["http_req_duration"]["p50"] == pytest.approx(500, rel=0.01)
+    total = snap["series"]["http_req_duration"]["total"]
+    assert total["count"] == 110 and total["p50"] == pytest.approx(10, rel=0.01)
+    assert snap["series"]["http_reqs{name:GET /x}"]["total"]["count"] == 110
+    # the ring holds the window, not the run
+    assert len(live.series["http_reqs"].ring) <= 5
+
+
+def test_bad_lines_and_unknown_records_are_counted():
+    live = K6Live()
+    _feed(live, ["{not json", json.dumps({"type": "Point", "metric": "x", "data": {"value": 1}}),
+                 json.dumps({"type": "Other"})])
+    assert (live.bad_lines, live.points) == (2, 0)
+
+
+def test_sharded_streams_merge_to_the_pooled_percentiles(tmp_path):
+    rng = random.Random(7)
+    # the shards see different latency distributions: averaging their p95s would be far off
+    samples = [[rng.expovariate(1 / 40) for _ in range(3000)], [rng.expovariate(1 / 400) for _ in range(300)]]
+    paths = []
+    for i, values in enumerate(samples):
+        lines = [_metric("http_req_duration", "trend", ["p(95)<2000"]), _metric("vus", "gauge")]
+        lines += [_point("vus", sec, v) for sec, v in enumerate([2 + i, 8 + i, 5 + i])]
+        lines += [_point("http_req_duration", n % 10, v) for n, v in enumerate(values)]
+        paths.append(tmp_path / f"k6-shard{i}.ndjson")
+        paths[-1].write_text("\n".join(lines) + "\n", encoding="utf-8")
+    mon = LiveK6Monitor(paths, {"abort": False})
+    mon.close()
+    merged = mon.live.summary_export(10.0)["metrics"]
+
+    pooled = sorted(samples[0] + samples[1])
+    exact_p95 = pooled[math.ceil(0.95 * len(pooled)) - 1]
+    per_shard = [sorted(v)[math.ceil(0.95 * len(v)) - 1] for v in samples]
+    assert merged["http_req_duration"]["p(95)"] == pytest.approx(exact_p95, rel=0.01)
+    assert abs(sum(per_shard) / 2 - exact_p95) > 0.1 * exact_p95
+    assert merged["http_req_duration"]["thresholds"] == {"p(95)<2000": False}
+
+    # gauges: the last values add up; the extremes are only kept per shard
+    vus = merged["vus"]
+    assert vus["value"] == 5 + 6
+    assert vus["per_shard"] == [{"value": 5, "min": 2, "max": 8}, {"value": 6, "min": 3, "max": 9}]
+    assert "min" not in vus and "max" not in vus
+
+
+def test_single_source_gauge_keeps_min_max():
+    live = K6Live()
+    _feed(live, [_metric("vus", "gauge")] + [_point("vus", sec, v) for sec, v in enumerate([3, 7, 4])])
+    assert live.summary_export(3.0)["metrics"]["vus"] == {"value": 4, "min": 3, "max": 7}
+
+
+# a k6 stand-in: declares count<3 on http_reqs, crosses it, then waits for SIGINT and exits 105 like k6
+_FAKE_K6 = r'''#!{python}
+import json, signal, sys, time
+from datetime import datetime, timezone
+args = sys.argv[1:]
+out = [a[5:] for a in args if a.startswith("json=")][0]
+summary = args[args.index("--summary-export") + 1]
+stop = []
+signal.signal(signal.SIGINT, lambda *_: stop.append(1))
+with open(out, "w") as f:
+    f.write(json.dumps({{"type": "Metric", "metric": "http_reqs", "data": {{"name": "http_reqs", "type": "counter",
+                                                                            "thresholds": ["count<3"]}}}}) + "\n")
+    ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    for _ in range(5):
+        f.write(json.dumps({{"type": "Point", "metric": "http_reqs", "data": {{"time": ts, "value": 1, "tags": {{}}}}}}) + "\n")
+    f.flush()
+    t0 = time.time()
+    while not stop and time.time() - t0 < 20:
+        time.sleep(0.05)
+open(summary, "w").write(json.dumps({{"metrics": {{}}}}))
+sys.exit(105 if stop else 0)
+'''
+
+
+@pytest.fixture
+def fake_k6(tmp_path):
+    if os.name == "nt":
+        pytest.skip("fake k6 is a shebang script")
+    exe = tmp_path / "k6"
+    exe.write_text(_FAKE_K6.format(python=sys.executable), encoding="utf-8")
+    exe.chmod(exe.stat().st_mode | stat.S_IXUSR)
+    (tmp_path / "script.js").write_text("export default function () {}\n", encoding="utf-8")
+    return exe
+
+
+@pytest.mark.parametrize("shards", [1, 2])
+def test_live_abort_exits_99_even_though_k6_exits_105(fake_k6, tmp_path, shards):
+    lines = []
+    rr = run_k6(tmp_path, tmp_path / "out", tmp_path / "script.js", k6_exe=str(fake_k6), on_output=lines.append,
+                live={"report_s": 0.2}, shards=shards)
+    assert rr.exit_code == 99
+    assert rr.live["aborted"] and "count<3" in rr.live["aborted"]
+    assert any("threshold lost, stopping k6" in line for line in lines)
@@ -0,0 +1,183 @@
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import urlsplit
+
+import pytest
+
+from halo_test_lab.netem import LinkProfile, run_in_thread, start_for_env
+
+
+class _Echo(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            if data.startswith(b"BULK "):
+                self.request.sendall(b"x" * int(data[5:]))
+            else:
+                self.request.sendall(data)
+
+
+@pytest.fixture
+def echo():
+    srv = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Echo)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address
+    srv.shutdown()
+    srv.server_close()
+
+
+def _connect(url):
+    u = urlsplit(url)
+    s = socket.create_connection((u.hostname, u.port), timeout=10)
+    return s
+
+
+def _exchange(s, payload):
+    s.sendall(payload)
+    got = b""
+    while len(got) < len(payload):
+        chunk = s.recv(65536)
+        if not chunk:
+            break
+        got += chunk
+    return got
+
+
+def test_latency_adds_to_each_round_trip(echo):
+    proxy = run_in_thread(LinkProfile(latency_ms=40), echo)
+    try:
+        with _connect(proxy.url) as s:
+            t0 = time.perf_counter()
+            assert _exchange(s, b"ping") == b"ping"
+            elapsed = time.perf_counter() - t0
+    finally:
+        proxy.stop()
+    assert elapsed >= 0.08  # one way each direction
+
+
+def test_bandwidth_caps_the_download(echo):
+    proxy = run_in_thread(LinkProfile(down_kbps=800), echo)  # 100 kB/s
+    try:
+        with _connect(proxy.url) as s:
+            t0 = time.perf_counter()
+            s.sendall(b"BULK 40000")
+            got = 0
+            while got < 40000:
+                chunk = s.recv(65536)
+                assert chunk
+                got += len(chunk)
+            elapsed = time.perf_counter() - t0
+    finally:
+        stats = proxy.stop()
+    assert elapsed >= 0.35
+    assert stats["totals"]["bytes_down"] == 40000
+
+
+def test_reset_drops_the_connection(echo):
+    proxy = run_in_thread(LinkProfile(reset_pct=100, seed=3), echo)
+    try:
+        with _connect(proxy.url) as s:
+            with pytest.raises(OSError):
+                s.sendall(b"a" * 4096)
+                for _ in range(100):
+                    if not s.recv(65536):
+                        raise ConnectionResetError("closed")
+    finally:
+        stats = proxy.stop()
+    assert stats["totals"]["resets"] == 1
+    assert stats["flows"][0]["reset"] is True
+
+
+def test_round_trips_are_counted_per_exchange(echo):
+    proxy = run_in_thread(LinkProfile(), echo)
+    try:
+        with _connect(proxy.url) as s:
+            for i in range(3):
+                assert _exchange(s, b"req %d" % i) == b"req %d" % i
+        with _connect(proxy.url) as s:
+            assert _exchange(s, b"one") == b"one"
+    finally:
+        stats = proxy.stop()
+    t = stats["totals"]
+    assert (t["flows"], t["requests"], t["round_trips"]) == (2, 4, 4)
+    assert sorted(f["round_trips"] for f in stats["flows"]) == [1, 3]
+    assert t["bytes_up"] == t["bytes_down"] == 3 * 5 + 3
+
+
+def test_start_for_env_routes_every_sut_url(echo):
+    other = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Echo)
+    other.daemon_threads = True
+    threading.Thread(target=other.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{echo[1]}"
+    gateway = f"http://127.0.0.1:{other.server_address[1]}/gw"
+    extra = {"HALO_BASE_URL": base + "/api", "HALO_HEALTH_URL": base + "/health", "HALO_CLIENT_ID": "c"}
+    handle, env = start_for_env({"profile": "lan"}, base, extra, environ={"HALO_GATEWAY_BASE_URL": gateway})
+    try:
+        # same target, same listener; the unset backend URL is set to its default, through the proxy
+        assert urlsplit(env["HALO_BASE_URL"]).netloc == urlsplit(env["HALO_HEALTH_URL"]).netloc == urlsplit(handle.url).netloc
+        assert env["HALO_BASE_URL"].endswith("/api") and env["HALO_GATEWAY_BASE_URL"].endswith("/gw")
+        netlocs = {k: urlsplit(env[k]).netloc for k in ("HALO_BASE_URL", "HALO_GATEWAY_BASE_URL", "HALO_BACKEND_URL")}
+        assert len(set(netlocs.values())) == 3
+        assert env["HALO_CLIENT_ID"] == "c" and "HTTPS_PROXY" not in env
+        for key in ("HALO_BASE_URL", "HALO_GATEWAY_BASE_URL"):
+            with _connect(env[key]) as s:
+                assert _exchange(s, key.encode()) == key.encode()
+    finally:
+        stats = handle.stop()
+        other.shutdown()
+        other.server_close()
+    assert {l["target"] for l in stats["listeners"]} == {
+        f"127.0.0.1:{echo[1]}", f"127.0.0.1:{other.server_address[1]}", "127.0.0.1:8000"}
+    assert stats["totals"]["round_trips"] == 2
+
+
+def test_start_for_env_tunnels_https_targets():
+    handle, env = start_for_env({}, "https://sut.example", {"HALO_BASE_URL": "https://sut.example"},
+                                environ={"HALO_GATEWAY_BASE_URL": "https://gw.example", "HALO_BACKEND_URL": "https://be.example"})
+    try:
+        assert env["HALO_BASE_URL"] == "https://sut.example"
+        assert env["HTTPS_PROXY"] == env["https_proxy"] == handle.url
+    finally:
+        handle.stop()
+    handle, env = start_for_env({}, "http://127.0.0.1:9", {}, environ={"HALO_BACKEND_URL": "https://be.example"})
+    try:
+        assert env["HTTPS_PROXY"] != handle.url
+        assert urlsplit(env["HALO_BASE_URL"]).netloc == urlsplit(handle.url).netloc
+    finally:
+        stats = handle.stop()
+    assert [l["target"] for l in stats["listeners"]] == ["127.0.0.1:9", "127.0.0.1:8080", None]
+
+
+def test_bandwidth_is_shared_by_concurrent_connections(echo):
+    proxy = run_in_thread(LinkProfile(down_kbps=800), echo)  # 100 kB/s for the whole link
+    done = []
+
+    def download():
+        with _connect(proxy.url) as s:
+            s.sendall(b"BULK 20000")
+            got = 0
+            while got < 20000:
+                chunk = s.recv(65536)
+                assert chunk
+                got += len(chunk)
+        done.append(got)
+
+    try:
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=download) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        elapsed = time.perf_counter() - t0
+    finally:
+        stats = proxy.stop()
+    assert done == [20000] * 4
+    # 80 kB over one 100 kB/s link; per-connection caps would finish in ~0.2 s
+    assert elapsed >= 0.7
+    assert stats["totals"]["bytes_down"] == 80000
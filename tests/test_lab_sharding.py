@@ -0,0 +1,114 @@
+import json
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from halo_test_lab.executor import run_pytest
+from halo_test_lab.sharding import (balance, estimated_loads, junit_key, load_durations, merge_exit_codes,
+                                    merge_json_reports, merge_junit)
+
+
+def _junit(path, cases, time="1.0"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    body = "".join(
+        f'<testcase classname="{c}" name="{n}" time="{t}">{"<skipped/>" if skip else ""}</testcase>'
+        for c, n, t, skip in cases)
+    path.write_text(f'<?xml version="1.0"?><testsuites><testsuite name="pytest" tests="{len(cases)}" errors="0" '
+                    f'failures="0" skipped="{sum(1 for c in cases if c[3])}" time="{time}">{body}</testsuite></testsuites>',
+                    encoding="utf-8")
+
+
+def test_junit_key():
+    assert junit_key("tests/sub/test_x.py::TestC::test_y[a]") == "tests.sub.test_x.TestC::test_y[a]"
+    assert junit_key("tests\\test_x.py::test_y") == "tests.test_x::test_y"
+    assert junit_key("tests/test_x.py") == "tests.test_x"
+
+
+def test_balance_lpt():
+    ids = [f"t.py::t{i}" for i in range(6)]
+    durations = {junit_key(t): d for t, d in zip(ids, [8, 7, 6, 5, 4, 3])}
+    plan = balance(ids, durations, 2)
+    # LPT: 8, 7 | 6 -> B, 5 -> A, 4 -> B, 3 -> A  =>  16 / 17
+    assert sorted(estimated_loads(plan, durations)) == [16.0, 17.0]
+    assert sorted(t for s in plan for t in s) == sorted(ids)
+    for s in plan:
+        assert s == sorted(s, key=ids.index)
+
+
+def test_balance_unknown_tests_get_median_and_empty_shards_drop():
+    ids = ["a.py::x", "a.py::y", "a.py::new"]
+    durations = {"a::x": 1.0, "a::y": 3.0}
+    plan = balance(ids, durations, 5)
+    assert len(plan) == 3
+    assert sorted(estimated_loads(plan, durations)) == [1.0, 2.0, 3.0]
+    assert balance([], durations, 3) == []
+    assert balance(ids, {}, 1) == [ids]
+
+
+def test_load_durations_median_of_latest_runs(tmp_path):
+    for i, t in enumerate(["1.0", "2.0", "9.0", "3.0"]):
+        _junit(tmp_path / f"20260101-00000{i}" / "pytest" / "pytest-junit.xml",
+               [("tests.test_a", "test_x", t, False), ("tests.test_a", "test_skip", "5.0", True)])
+    (tmp_path / "20260101-000009" / "pytest").mkdir(parents=True)
+    (tmp_path / "20260101-000009" / "pytest" / "pytest-junit.xml").write_text("<broken", encoding="utf-8")
+    assert load_durations(tmp_path, keep=3) == {"tests.test_a::test_x": 3.0}  # median of 3.0, 9.0, 2.0
+    assert load_durations(tmp_path, keep=5) == {"tests.test_a::test_x": 2.5}
+
+
+def test_merge_junit_sums_counts_and_takes_longest_shard(tmp_path):
+    _junit(tmp_path / "0.xml", [("m", "a", "1", False), ("m", "b", "1", True)], time="4.0")
+    _junit(tmp_path / "1.xml", [("m", "c", "2", False)], time="6.5")
+    out = merge_junit([tmp_path / "0.xml", tmp_path / "1.xml", tmp_path / "missing.xml"], tmp_path / "m.xml")
+    suite = ET.parse(out).getroot().find("testsuite")
+    assert (suite.get("tests"), suite.get("skipped"), suite.get("time")) == ("3", "1", "6.500")
+    assert [c.get("name") for c in suite.findall("testcase")] == ["a", "b", "c"]
+    assert merge_junit([tmp_path / "missing.xml"], tmp_path / "none.xml") is None
+
+
+def test_merge_json_reports(tmp_path):
+    a = {"created": 10.0, "duration": 3.0, "exitcode": 1, "summary": {"passed": 2, "failed": 1, "total": 3},
+         "tests": [{"nodeid": "a"}], "collectors": [], "warnings": []}
+    b = {"created": 9.0, "duration": 5.0, "exitcode": 0, "summary": {"passed": 1, "total": 1}, "tests": [{"nodeid": "b"}]}
+    for n, r in (("a", a), ("b", b)):
+        (tmp_path / f"{n}.json").write_text(json.dumps(r), encoding="utf-8")
+    out = merge_json_reports([tmp_path / "a.json", tmp_path / "b.json"], tmp_path / "report.json")
+    m = json.loads(out.read_text(encoding="utf-8"))
+    assert m["summary"] == {"passed": 3, "failed": 1, "total": 4}
+    assert (m["created"], m["duration"], m["exitcode"]) == (9.0, 5.0, 1)
+    assert [t["nodeid"] for t in m["tests"]] == ["a", "b"] and len(m["shards"]) == 2
+
+
+def test_merge_exit_codes():
+    assert merge_exit_codes([0, 5]) == 0
+    assert merge_exit_codes([5, 5]) == 5
+    assert merge_exit_codes([0, 1, 5]) == 1
+    assert merge_exit_codes([]) == 0
+
+
+@pytest.fixture
+def tiny_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "tests").mkdir(parents=True)
+    (repo / "pytest.ini").write_text("[pytest]\nmarkers =\n    e2e: e2e\n", encoding="utf-8")
+    for i in range(4):
+        (repo / "tests" / f"test_{i}.py").write_text(
+            f"import pytest\n\n@pytest.mark.e2e\ndef test_{i}():\n    print('ran {i}')\n", encoding="utf-8")
+    return repo
+
+
+def test_sharded_and_single_runs_produce_the_same_artifacts(tiny_repo, tmp_path):
+    single = run_pytest(tiny_repo, tmp_path / "single", runs_dir=tmp_path / "runs")
+    sharded = run_pytest(tiny_repo, tmp_path / "sharded", shards=2, runs_dir=tmp_path / "runs")
+    assert single.exit_code == sharded.exit_code == 0
+    names = lambda rr: {p.name for p in rr.artifact_paths}
+    assert {"pytest.stdout.log", "pytest.stderr.log", "pytest-junit.xml"} <= names(single) & names(sharded)
+    if "report.json" in names(single):
+        assert "report.json" in names(sharded)
+    # the suite's log covers every shard, not just collection
+    assert sharded.stdout_path.name == "pytest.stdout.log"
+    log = sharded.stdout_path.read_text(encoding="utf-8")
+    assert "===== shard 0 =====" in log and "===== shard 1 =====" in log and "4 passed" not in log
+    assert log.count("passed") == 2
+    suite = ET.parse(tmp_path / "sharded" / "pytest-junit.xml").getroot().find("testsuite")
+    assert suite.get("tests") == "4"
@@ -0,0 +1,161 @@
+import gzip
+import json
+import os
+import stat
+
+import pytest
+
+import qa_perf_gate
+from halo_test_lab import store
+from halo_test_lab.history import RunHistory, ingest_run_dir
+from halo_test_lab.sharding import load_durations
+
+
+JUNIT = ('<?xml version="1.0"?><testsuites><testsuite name="pytest" tests="1">'
+         '<testcase classname="tests.test_a" name="test_one" time="{t}"/></testsuite></testsuites>')
+
+
+def _make_run(runs, ts, t=1.5, log="shared stub log\n" * 100):
+    d = runs / ts
+    (d / "pytest").mkdir(parents=True)
+    (d / "k6").mkdir()
+    files = {
+        "pytest/report.json": json.dumps({"tests": [{"nodeid": "tests/test_a.py::test_one", "outcome": "passed",
+                                                     "call": {"duration": t}}]}),
+        "pytest/pytest-junit.xml": JUNIT.format(t=t),
+        "pytest/pytest.stdout.log": log,
+        "pytest/pytest.stderr.log": "",
+        "k6/k6-summary.json": json.dumps({"metrics": {"http_req_duration": {"p(95)": 40.0 * t, "med": 10.0}}}),
+        "k6/k6.stdout.log": f"k6 output of {ts}\n" * 50,
+    }
+    for rel, text in files.items():
+        (d / rel).write_text(text, encoding="utf-8")
+    manifest = {"timestamp": ts, "suites": [
+        {"name": "pytest", "exit_code": 0, "wall_s": 3.0, "artifacts": [str(d / "pytest" / n) for n in
+                                                         ("pytest.stdout.log", "pytest-junit.xml", "report.json")]},
+        {"name": "k6", "exit_code": 0, "wall_s": 2.0, "artifacts": [str(d / "k6" / "k6.stdout.log"), "k6/k6-summary.json"]}]}
+    (d / "run-manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    return d
+
+
+def test_pack_links_logs_once_and_keeps_summaries(tmp_path):
+    runs = tmp_path / "runs"
+    a, b = _make_run(runs, "20260101-000000"), _make_run(runs, "20260102-000000")
+    ta = store.pack_run(a)
+    tb = store.pack_run(b)
+    assert (ta["files"], ta["deduplicated"]) == (6, 0)
+    assert tb["deduplicated"] == 2  # the shared stdout log and the empty stderr
+
+    for d in (a, b):
+        assert not (d / "pytest" / "pytest.stdout.log").exists()
+        assert (d / "pytest" / "pytest.stdout.log.gz").exists()
+        for rel in ("pytest/report.json", "pytest/pytest-junit.xml", "k6/k6-summary.json"):
+            assert (d / rel).exists() and (d / rel).stat().st_nlink == 1
+    la, lb = (d / "pytest" / "pytest.stdout.log.gz" for d in (a, b))
+    assert os.path.samefile(la, lb)
+    assert la.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH) == 0
+    assert gzip.decompress(la.read_bytes()).decode("utf-8") == "shared stub log\n" * 100
+
+    # a summary rewritten in place stays private to its run
+    (a / "pytest" / "report.json").write_text("{}", encoding="utf-8")
+    assert json.loads((b / "pytest" / "report.json").read_text(encoding="utf-8"))["tests"]
+
+    manifest = json.loads((a / "run-manifest.json").read_text(encoding="utf-8"))
+    assert manifest["suites"][0]["artifacts"][0].endswith("pytest.stdout.log.gz")
+    assert manifest["suites"][1]["artifacts"][1] == str(a / "k6" / "k6-summary.json")
+    assert manifest["store"]["retention"] == "full"
+    assert store.pack_run(a)["files"] == 0  # idempotent
+
+
+def test_resolve_and_read_artifact(tmp_path):
+    d = _make_run(tmp_path / "runs", "20260101-000000")
+    original = str(d / "k6" / "k6.stdout.log")
+    store.pack_run(d)
+    assert store.resolve(d, original) == d / "k6" / "k6.stdout.log.gz"
+    assert store.resolve(d, "k6/k6.stdout.log.gz") == d / "k6" / "k6.stdout.log.gz"
+    assert store.resolve(d, "k6/k6-summary.json") == d / "k6" / "k6-summary.json"
+    assert store.resolve(d, "k6/nope.log") is None
+    expected = "k6 output of 20260101-000000\n" * 50
+    assert store.read_artifact(d, original).decode("utf-8") == expected
+    assert store.read_artifact(d, "k6/k6.stdout.log.gz").decode("utf-8") == expected
+
+    # the run folder lost its link: the object still serves it
+    (d / "k6" / "k6.stdout.log.gz").unlink()
+    assert store.read_artifact(d, original).decode("utf-8") == expected
+
+    store.prune_run(d)
+    assert store.resolve(d, original) is None and store.read_artifact(d, original) is None
+
+
+def test_retention_prunes_old_runs_and_collects_orphans(tmp_path, monkeypatch):
+    runs = tmp_path / "runs"
+    dirs = [_make_run(runs, f"2026010{i}-000000", t=1.0 + i) for i in range(1, 4)]
+    for d in dirs:
+        store.pack_run(d)
+    before = store.stats(runs)
+    assert (before["runs"], before["packed"], before["full"]) == (3, 3, 3)
+
+    # objects younger than ORPHAN_MIN_AGE_S are left for a concurrent pack
+    r = store.apply_retention(runs, keep_full=1)
+    assert (r["runs"], r["pruned"], r["objects_deleted"]) == (3, 2, 0)
+    assert r["bytes_unlinked"] > 0
+
+    monkeypatch.setattr(store, "ORPHAN_MIN_AGE_S", 0.0)
+    r = store.apply_retention(runs, keep_full=1)
+    assert (r["pruned"], r["objects_deleted"]) == (0, 2)  # the old runs' own k6 logs
+
+    old, new = dirs[0], dirs[2]
+    assert (store.load_index(old) or {})["retention"] == "summary"
+    assert not (old / "pytest" / "pytest.stdout.log.gz").exists()
+    assert not (old / "k6" / "k6.stdout.log.gz").exists()
+    assert (old / "pytest" / "report.json").exists() and (old / "k6" / "k6-summary.json").exists()
+    # the log the newest run still links survives
+    assert store.read_artifact(new, "pytest/pytest.stdout.log").decode("utf-8") == "shared stub log\n" * 100
+    after = store.stats(runs)
+    assert (after["full"], after["objects"]) == (1, 3)
+    assert after["bytes_logical"] < before["bytes_logical"]
+
+
+def test_orphan_collection_spares_linked_objects(tmp_path, monkeypatch):
+    runs = tmp_path / "runs"
+    d = _make_run(runs, "20260101-000000")
+    store.pack_run(d)
+    monkeypatch.setattr(store, "ORPHAN_MIN_AGE_S", 0.0)
+    # a run being packed right now has linked an object before writing its store.json
+    stray = runs / "20260102-000000"
+    stray.mkdir()
+    src = tmp_path / "incoming.log"
+    src.write_text("not indexed anywhere yet", encoding="utf-8")
+    sha = store._sha256(src)
+    obj, _ = store._put(store.store_root(runs), src, sha, "gzip")
+    store._link(obj, stray / "incoming.log.gz")
+    assert store.collect_orphans(runs) == (0, 0)
+
+    (stray / "incoming.log.gz").unlink()
+    n, size = store.collect_orphans(runs)
+    assert n == 1 and size > 0 and not obj.exists()
+    assert store.read_artifact(d, "pytest/pytest.stdout.log") is not None
+
+
+def test_packed_and_pruned_runs_still_feed_perf_gate_sharding_and_history(tmp_path, monkeypatch):
+    runs = tmp_path / "runs"
+    dirs = [_make_run(runs, f"2026010{i}-000000", t=float(i)) for i in range(1, 4)]
+    for d in dirs:
+        store.pack_run(d)
+    monkeypatch.setattr(store, "ORPHAN_MIN_AGE_S", 0.0)
+    store.apply_retention(runs, keep_full=1)
+    assert (store.load_index(dirs[0]) or {})["retention"] == "summary"
+
+    for i, d in enumerate(dirs, 1):
+        got = qa_perf_gate.load_run(d)
+        assert got[("test", "tests/test_a.py::test_one")] == float(i)
+        assert got[("k6", "http_req_duration p(95)")] == 40.0 * i
+
+    assert load_durations(runs) == {"tests.test_a::test_one": 2.0}
+
+    for d in dirs:
+        assert ingest_run_dir(d)
+    with RunHistory(runs / "history.sqlite") as h:
+        assert h.slowest_tests() == [{"test": "tests.test_a::test_one", "runs": 3, "mean_s": 2.0, "max_s": 3.0,
+                                      "failures": 0}]
+        assert h.conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0] == 6
@@ -0,0 +1,102 @@
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from halo_test_lab import supervisor as sv
+from halo_test_lab.supervisor import BUILTIN, Supervisor, pid_alive, wait_ready
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def sup(tmp_path):
+    spec = BUILTIN["health"].with_overrides({"port": _free_port(), "ready_timeout_s": 15, "max_restarts": 2},
+                                            BUILTIN["health"].cwd)
+    events = []
+    s = Supervisor({"health": spec}, tmp_path / "state", on_event=events.append)
+    s.events = events
+    yield s
+    s.stop(list(s.procs))
+
+
+def test_wait_ready_backs_off_until_ready(monkeypatch):
+    answers = iter([False] * 10 + [True])
+    sleeps = []
+    monkeypatch.setattr(sv, "probe", lambda url, timeout_s: next(answers))
+    monkeypatch.setattr(sv.time, "sleep", sleeps.append)
+    r = wait_ready(BUILTIN["health"], alive=lambda: None, timeout_s=60)
+    assert (r.ready, r.probes) == (True, 11)
+    assert sleeps[:3] == pytest.approx([0.02, 0.03, 0.045])
+    assert all(b >= a for a, b in zip(sleeps, sleeps[1:]))
+    assert max(sleeps) == sv.PROBE_MAX_S
+
+
+def test_wait_ready_stops_on_exit_and_deadline(monkeypatch):
+    monkeypatch.setattr(sv, "probe", lambda url, timeout_s: False)
+    r = wait_ready(BUILTIN["health"], alive=lambda: "exited rc=3", timeout_s=60)
+    assert (r.ready, r.probes, r.error) == (False, 1, "exited rc=3")
+    r = wait_ready(BUILTIN["health"], alive=lambda: None, timeout_s=0.1)
+    assert not r.ready and r.error.startswith("not ready after")
+
+
+def test_stale_pid_file_is_ignored(sup):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    state = sup._paths("health")[0]
+    state.parent.mkdir(parents=True, exist_ok=True)
+    state.write_text('{"name": "health", "pid": %d}' % dead.pid, encoding="utf-8")
+    assert sup.status()["health"]["state"] == "STOPPED"
+    assert sup.stop() == [] and not state.exists()
+
+    state.write_text('{"name": "health", "pid": %d}' % dead.pid, encoding="utf-8")
+    assert sup.start()["health"].ready
+    assert sup.procs["health"].pid != dead.pid
+    assert not any("ALREADY_RUNNING" in e for e in sup.events)
+    assert sup.status()["health"]["state"] == "READY"
+
+
+def test_watch_restarts_a_crashed_service(sup):
+    assert sup.start()["health"].ready
+    first = sup.procs["health"]
+    stop = threading.Event()
+    watcher = threading.Thread(target=sup.watch, args=(stop, 0.05), daemon=True)
+    watcher.start()
+    try:
+        first.kill()
+        deadline = time.monotonic() + 20
+        while not any("READY RESTARTS=1" in e for e in sup.events) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        watcher.join(timeout=20)
+    assert any(e.startswith("SIM_HEALTH=CRASHED") for e in sup.events)
+    assert any("READY RESTARTS=1" in e for e in sup.events)
+    second = sup.procs["health"]
+    assert second is not first and second.poll() is None
+    assert sup._state("health")["restarts"] == 1
+    assert sup.stop() == ["health"]
+    assert not pid_alive(second.pid)
+
+
+def test_no_relaunch_after_stop(sup):
+    assert sup.start()["health"].ready
+    crashed = sup.procs["health"]
+    crashed.kill()
+    crashed.wait()
+    sup.stop()
+    # the watch thread woke up from its backoff after stop() took the service over
+    assert sup._relaunch("health", crashed, threading.Event()) is None
+    assert "health" not in sup.procs
+    stop = threading.Event()
+    stop.set()
+    sup.procs["health"] = crashed
+    assert sup._relaunch("health", crashed, stop) is None
+    sup.procs.pop("health")
@@ -0,0 +1,186 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from halo_test_lab import telemetry
+from halo_test_lab.telemetry import ProcSampler, _single_core, _stat, _suite_of
+
+
+def _stat_line(pid, comm, ppid, ticks, threads, start, rss):
+    # proc(5): pid (comm) state ppid pgrp session tty tpgid flags minflt cminflt majflt cmajflt utime stime
+    #          cutime cstime priority nice num_threads itrealvalue starttime vsize rss ...
+    utime, stime = ticks // 2, ticks - ticks // 2
+    fields = ["S", ppid, 0, 0, 0, 0, 0, 0, 0, 0, 0, utime, stime, 0, 0, 20, 0, threads, 0, start, 1 << 20, rss, 0]
+    return f"{pid} ({comm}) " + " ".join(str(f) for f in fields) + "\n"
+
+
+class FakeProc:
+    def __init__(self, root):
+        self.root = root
+        self.procs = {}
+        (root / "self").mkdir(parents=True)
+        (root / "self" / "stat").write_text(_stat_line(1, "self", 0, 0, 1, 1, 1), encoding="utf-8")
+        (root / "net").mkdir()
+        (root / "meminfo").write_text("MemTotal: 8000000 kB\nMemAvailable: 2048000 kB\n", encoding="utf-8")
+        (root / "loadavg").write_text("1.50 1.00 0.50 2/300 999\n", encoding="utf-8")
+        self.host(0, 0)
+        self.net(0, 0)
+
+    def add(self, pid, ppid, argv, comm=None, threads=1, start=1000, rss=256, fds=3):
+        d = self.root / str(pid)
+        (d / "fd").mkdir(parents=True, exist_ok=True)
+        for i in range(fds):
+            (d / "fd" / str(i)).touch()
+        (d / "cmdline").write_text("\0".join(argv) + "\0", encoding="utf-8")
+        self.procs[pid] = dict(ppid=ppid, comm=comm or os.path.basename(argv[0]), threads=threads, start=start, rss=rss)
+        self.tick(pid, 0, 0, 0)
+
+    def tick(self, pid, ticks, rchar, wchar):
+        p = self.procs[pid]
+        d = self.root / str(pid)
+        (d / "stat").write_text(_stat_line(pid, p["comm"], p["ppid"], ticks, p["threads"], p["start"], p["rss"]),
+                                encoding="utf-8")
+        (d / "io").write_text(f"rchar: {rchar}\nwchar: {wchar}\nsyscr: 1\n", encoding="utf-8")
+
+    def host(self, busy, idle):
+        (self.root / "stat").write_text(f"cpu  {busy} 0 0 {idle} 0 0 0 0 0 0\ncpu0 0 0 0 0\n", encoding="utf-8")
+
+    def net(self, lo, eth):
+        (self.root / "net" / "dev").write_text(
+            "Inter-|   Receive                            |  Transmit\n"
+            " face |bytes    packets errs drop fifo frame compressed multicast|bytes ...\n"
+            f"    lo: {lo} 1 0 0 0 0 0 0 {lo} 1 0 0 0 0 0 0\n"
+            f"  eth0: {eth} 1 0 0 0 0 0 0 {eth // 2} 1 0 0 0 0 0 0\n", encoding="utf-8")
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    fake = FakeProc(tmp_path / "proc")
+    monkeypatch.setattr(telemetry, "PROC", fake.root)
+    return fake
+
+
+def test_stat_parses_comm_with_spaces_and_parentheses(proc):
+    proc.add(42, 7, ["/usr/bin/weird"], comm="we ird) (x", threads=9, start=4242, rss=77)
+    proc.tick(42, 31, 0, 0)
+    assert _stat(42) == (7, 31, 9, 4242, 77)
+    assert _stat(43) is None
+    (proc.root / "44").mkdir()
+    (proc.root / "44" / "stat").write_text("44 (short) S 1\n", encoding="utf-8")
+    assert _stat(44) is None
+
+
+@pytest.mark.parametrize("argv, suite", [
+    (["/usr/local/bin/k6", "run", "x.js"], "k6"),
+    (["/opt/k6/k6.exe", "run"], "k6"),
+    (["/usr/bin/python3", "-m", "pytest", "-q"], "pytest"),
+    (["/venv/bin/pytest", "-q"], "pytest"),
+    (["python", "-m", "halo_test_lab.loadgen"], "loadgen"),
+    (["/usr/bin/node", "server.js"], "node"),
+    ([], "unknown"),
+])
+def test_suite_of(argv, suite):
+    assert _suite_of(argv) == suite
+
+
+def test_single_core():
+    assert _single_core(["/usr/bin/python3.12", "x"]) and _single_core(["node"]) and _single_core(["pytest"])
+    assert not _single_core(["/usr/local/bin/k6"]) and not _single_core([])
+
+
+def _tree(proc, state_dir):
+    proc.add(50, 1, ["bash", "-c", "run uvicorn tests"])              # the CI shell that started us
+    proc.add(100, 50, ["python", "-m", "halo_test_lab", "run"])        # this process
+    proc.add(200, 100, ["/usr/local/bin/k6", "run", "a.js"], threads=12)
+    proc.add(210, 100, ["/usr/local/bin/k6", "run", "a.js"], threads=12)   # second k6 shard
+    proc.add(300, 100, ["python", "-m", "pytest", "-q"])
+    proc.add(301, 300, ["python", "-m", "pytest", "-q", "--shard"])   # pytest shard worker
+    proc.add(302, 300, ["python", "-m", "simulators.gateway_sim"])     # simulator launched by a suite
+    proc.add(400, 1, ["python", "-m", "uvicorn", "app:main"])
+    proc.add(401, 400, ["python", "worker.py"])
+    proc.add(600, 1, ["/usr/sbin/sshd"])
+    state_dir.mkdir()
+    (state_dir / "gateway.json").write_text(json.dumps({"name": "gateway", "pid": 302}), encoding="utf-8")
+    (state_dir / "bad.json").write_text("{", encoding="utf-8")
+
+
+def _sampler(proc, tmp_path, monkeypatch, clock):
+    s = ProcSampler(tmp_path / "telemetry", {"interval_s": 1, "match": {"backend": "uvicorn"}},
+                    supervisor_state=tmp_path / "state")
+    s.root, s.cores, s._tck, s._page_mb = 100, 2, 100, 4096 / (1024.0 * 1024.0)
+    monkeypatch.setattr(telemetry.time, "monotonic", lambda: clock[0])
+    return s
+
+
+def test_grouping(proc, tmp_path, monkeypatch):
+    _tree(proc, tmp_path / "state")
+    clock = [10.0]
+    s = _sampler(proc, tmp_path, monkeypatch, clock)
+    table = {pid: _stat(pid) for pid in proc.procs}
+    groups = s._assign(table)
+    assert groups == {100: "runner:lab", 200: "runner:k6", 210: "runner:k6", 300: "runner:pytest", 301: "runner:pytest",
+                      302: "sut:gateway", 400: "sut:backend", 401: "sut:backend"}
+    # the ancestor shell mentions "uvicorn" too but is not the SUT; unrelated processes are left out
+    assert 50 not in groups and 600 not in groups
+
+    # a recycled PID (new start time) is classified again
+    proc.procs[200]["start"] = 5000
+    proc.add(200, 100, ["python", "-m", "halo_test_lab.loadgen"], start=5000)
+    assert s._assign({pid: _stat(pid) for pid in proc.procs})[200] == "runner:loadgen"
+
+
+def test_rates_summary_and_hints(proc, tmp_path, monkeypatch):
+    _tree(proc, tmp_path / "state")
+    clock = [10.0]
+    s = _sampler(proc, tmp_path, monkeypatch, clock)
+    s.t0 = clock[0]
+    s.sample()
+    for i in range(1, 6):
+        clock[0] += 2.0
+        # k6: 190% of a core per shard pair (both cores); SUT backend: 95% of one core (python)
+        proc.tick(200, 190 * i, 0, 0)
+        proc.tick(210, 190 * i, 0, 0)
+        proc.tick(400, 190 * i, 2048 * i, 1024 * i)
+        proc.tick(300, 10 * i, 0, 0)
+        proc.host(busy=380 * i, idle=20 * i)
+        proc.net(lo=10240 * i, eth=2048 * i)
+        s.sample()
+    summary = s.stop()
+    k6, sut, pytest_g = summary["groups"]["runner:k6"], summary["groups"]["sut:backend"], summary["groups"]["runner:pytest"]
+    assert k6["cpu_pct"]["max"] == pytest.approx(190.0)
+    assert (k6["threads"]["max"], k6["procs"]["max"], k6["pids"]) == (24, 2, [200, 210])
+    assert sut["cpu_pct"]["p95"] == pytest.approx(95.0)
+    assert sut["read_kbps"]["max"] == pytest.approx(1.0) and sut["write_kbps"]["max"] == pytest.approx(0.5)
+    assert sut["rss_mb"]["max"] == pytest.approx(2.0) and sut["fds"]["max"] == 6
+    assert pytest_g["cpu_pct"]["max"] == pytest.approx(5.0)
+    host = summary["host"]
+    assert host["cpu_pct"]["max"] == pytest.approx(95.0)
+    assert host["lo_rx_kbps"]["max"] == pytest.approx(5.0) and host["net_tx_kbps"]["max"] == pytest.approx(0.5)
+    assert (host["mem_avail_mb"]["max"], host["load1"]["max"]) == (2000.0, 1.5)
+    hints = summary["hints"]
+    assert any(h.startswith("host CPU saturated") for h in hints)
+    assert any(h.startswith("load generator runner:k6 CPU-bound") and "limit ~200%" in h for h in hints)
+    assert any(h.startswith("SUT sut:backend CPU-bound") and "limit ~100%" in h for h in hints)
+    assert not any("runner:pytest" in h or "runner:lab" in h for h in hints)
+    written = json.loads((tmp_path / "telemetry" / "series.json").read_text(encoding="utf-8"))
+    assert len(written["t"]) == 6 and written["groups"]["runner:k6"]["cpu_pct"][0] == 0.0
+
+
+@pytest.mark.skipif(not telemetry.available(), reason="needs /proc")
+def test_samples_a_real_child_process(tmp_path):
+    s = ProcSampler(tmp_path / "telemetry", {"interval_s": 0.1}).start()
+    child = subprocess.Popen([sys.executable, "-c", "import time\nt = time.time()\nwhile time.time() - t < 0.8: pass"])
+    try:
+        child.wait(timeout=30)
+        time.sleep(0.2)
+    finally:
+        summary = s.stop()
+    groups = summary["groups"]
+    py = next(g for g in groups if g.startswith("runner:") and g != "runner:lab")
+    assert child.pid in groups[py]["pids"]
+    assert groups[py]["cpu_pct"]["max"] > 20
+    assert "runner:lab" in groups and summary["samples"] >= 3
@@ -0,0 +1,60 @@
+import base64
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from simulators import pairing_client as pc
+
+
+def _pair():
+    gw, dev = X25519PrivateKey.generate(), X25519PrivateKey.generate()
+    salt, sid = os.urandom(16), "ps-000001"
+    gw_pub = gw.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    dev_pub = dev.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    return pc.derive_key(dev, gw_pub, salt, sid), pc.derive_key(gw, dev_pub, salt, sid), sid
+
+
+@pytest.mark.parametrize("n", range(0, 8))
+def test_b64url_roundtrip_matches_stdlib(n):
+    raw = os.urandom(n) + b"\xfb\xff"
+    enc = pc.b64ue(raw)
+    assert enc == base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    assert pc.b64ud(enc) == raw
+    assert pc.b64ud(" " + enc + "\n") == raw
+
+
+def test_derive_key_agrees_both_sides():
+    dev_key, gw_key, _ = _pair()
+    assert dev_key == gw_key and len(dev_key) == 32
+
+
+def test_session_and_per_call_api_interoperate():
+    key, _, sid = _pair()
+    sess = pc.PairingSession(key, "kid-1", sid)
+    env = sess.seal("POST", "/pairing/confirm", sess.next_seq(), {"pairing_code": "é123"})
+    assert pc.b64ud(env["aad_b64url"]) == pc.aad("POST", "/pairing/confirm", sid, 1)
+    assert pc.decrypt_env(key, "POST", "/pairing/confirm", sid, env) == {"pairing_code": "é123"}
+    env2 = pc.encrypt_env(key, "kid-1", "POST", "/pairing/provision", sid, 2, {"x": 1})
+    assert sess.open("POST", "/pairing/provision", env2) == {"x": 1}
+    with pytest.raises(InvalidTag):
+        sess.open("POST", "/pairing/provision", dict(env2, seq=3))
+
+
+def test_batch_seal_open():
+    key, _, sid = _pair()
+    sess = pc.PairingSession(key, "kid-1", sid)
+    envs = sess.seal_many("POST", "/telemetry", [(i, {"i": i}) for i in range(1, 33)])
+    assert [e["seq"] for e in envs] == list(range(1, 33))
+    assert len({e["nonce_b64url"] for e in envs}) == 32
+    assert sess.open_many("POST", "/telemetry", envs) == [{"i": i} for i in range(1, 33)]
+
+
+def test_bench_reports_rates():
+    from simulators.bench_pairing import run_bench
+
+    report = run_bench(seconds=0.01, batch=4)
+    assert report["key_derivations_per_s"]["derive_key"] > 0
+    assert set(report["envelopes_per_s"]) >= {"seal", "open", "seal_many", "open_many"}
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+import pytest
+
+import qa_assess
+
+needs_proc = pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="process groups via /proc")
+
+
+def _group_alive(pgid):
+    # live members of a process group; zombies (left to a minimal container init) count as gone
+    for d in os.listdir("/proc"):
+        try:
+            with open(f"/proc/{d}/stat", encoding="ascii", errors="replace") as f:
+                state, _, pgrp = f.read().rsplit(")", 1)[1].split()[:3]
+        except (OSError, ValueError):
+            continue
+        if int(pgrp) == pgid and state != "Z":
+            return True
+    return False
+
+
+@pytest.mark.parametrize("code", [0, 1])
+def test_run_tool_normal_exit(tmp_path, code):
+    cmd = [sys.executable, "-c", f"import sys; print('out'); print('err', file=sys.stderr); sys.exit({code})"]
+    res = qa_assess.run_tool(cmd, tmp_path, tmp_path / "tool.json", 30)
+    assert (res["rc"], res["executed"], res["timed_out"]) == (code, True, False)
+    assert (tmp_path / "tool.json").read_text(encoding="utf-8").strip() == "out"
+    assert (tmp_path / "tool.json.stderr.log").read_text(encoding="utf-8").strip() == "err"
+    assert res["output"] == "tool.json" and res["stderr"] == "tool.json.stderr.log" and res["output_bytes"] > 0
+
+
+def test_run_tool_other_exit_codes_are_not_executed(tmp_path):
+    res = qa_assess.run_tool([sys.executable, "-c", "raise SystemExit(2)"], tmp_path, tmp_path / "t.json", 30)
+    assert (res["rc"], res["executed"]) == (2, False)
+
+
+@needs_proc
+def test_run_tool_kills_the_whole_group_on_timeout(tmp_path):
+    code = ("import os, subprocess, sys, time\n"
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+            "print(os.getpgid(0), flush=True)\n"
+            "time.sleep(60)\n")
+    t0 = time.monotonic()
+    res = qa_assess.run_tool([sys.executable, "-c", code], tmp_path, tmp_path / "slow.json", 1.0)
+    assert time.monotonic() - t0 < 10
+    assert (res["rc"], res["timed_out"], res["executed"]) == (124, True, False)
+    pgid = int((tmp_path / "slow.json").read_text(encoding="utf-8"))
+    assert pgid != os.getpgid(0)  # its own session: killing it can't take the test run down
+    deadline = time.monotonic() + 5
+    while _group_alive(pgid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _group_alive(pgid)
+
+
+def test_run_tool_missing_binary(tmp_path):
+    res = qa_assess.run_tool(["halo-no-such-scanner"], tmp_path, tmp_path / "x.json", 5)
+    assert (res["rc"], res["executed"], res["timed_out"]) == (99, False, False)
+    err = (tmp_path / "x.json.stderr.log").read_text(encoding="utf-8")
+    assert err.startswith("EXCEPTION: FileNotFoundError") and "halo-no-such-scanner" in err
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="VmHWM needs /proc")
+def test_run_tool_peak_rss_is_the_scanners_own(tmp_path):
+    cmd = [sys.executable, "-c", "import time; x = bytearray(150 << 20); time.sleep(0.5)"]
+    res = qa_assess.run_tool(cmd, tmp_path, tmp_path / "m.json", 30)
+    assert res["peak_rss_source"] == "vmhwm"
+    assert 150 <= res["peak_rss_mb"] < 400
@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+import qa_perf_gate as gate
+
+
+@pytest.mark.parametrize("a, b, x, expected", [
+    (2.0, 3.0, 0.4, 0.5248),          # binomial identity: P(Bin(4, 0.4) >= 2)
+    (1.0, 1.0, 0.3, 0.3),             # uniform
+    (0.5, 0.5, 0.5, 0.5),             # arcsine, symmetric
+    (5.0, 0.5, 0.9, 0.3166429),       # x above the switch point (symmetry branch); midpoint quadrature
+])
+def test_incomplete_beta_known_values(a, b, x, expected):
+    assert gate._betainc(a, b, x) == pytest.approx(expected, abs=1e-6)
+
+
+def test_incomplete_beta_edges():
+    assert gate._betainc(2.0, 3.0, 0.0) == 0.0
+    assert gate._betainc(2.0, 3.0, 1.0) == 1.0
+
+
+@pytest.mark.parametrize("t, df, expected", [
+    (1.0, 1, 0.25),                                   # Cauchy: 1/2 - atan(t)/pi
+    (1.0, 2, 0.5 - 1.0 / (2.0 * math.sqrt(3.0))),     # closed form for df=2
+    (2.228138851986274, 10, 0.025),                   # t table
+    (1.812461122811676, 10, 0.05),
+    (0.0, 7, 0.5),
+    (-2.228138851986274, 10, 0.975),
+])
+def test_t_sf_known_values(t, df, expected):
+    assert gate.t_sf(t, df) == pytest.approx(expected, abs=1e-9)
+
+
+def test_t_sf_tends_to_normal():
+    assert gate.t_sf(1.6448536269514722, 1e7) == pytest.approx(0.05, abs=1e-6)
+
+
+def test_benjamini_hochberg():
+    # Benjamini & Hochberg (1995)-style example: only the two smallest survive at q=0.05
+    p = [0.041, 0.001, 0.205, 0.008, 0.039, 0.06, 0.074, 0.042]
+    assert gate.benjamini_hochberg(p, 0.05) == [1, 3]
+    # step-up: a larger p-value under its threshold rescues the smaller one above its own
+    assert gate.benjamini_hochberg([0.04, 0.03], 0.05) == [0, 1]
+    assert gate.benjamini_hochberg([0.2, 0.5], 0.05) == []
+    assert gate.benjamini_hochberg([], 0.05) == []
+
+
+def test_wilcoxon_all_positive():
+    n, w, z, p = gate.wilcoxon_greater([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert (n, w) == (5, 15.0)
+    assert z == pytest.approx(7.0 / math.sqrt(13.75))
+    assert p == pytest.approx(0.029529, abs=1e-6)
+
+
+def test_wilcoxon_ties_and_zeros():
+    # |d| = 1, 1 tie at rank 1.5; zeros are dropped; variance loses (2^3 - 2) / 48
+    n, w, z, p = gate.wilcoxon_greater([1.0, 0.0, 1.0, -2.0, 3.0])
+    assert (n, w) == (4, 7.0)
+    assert z == pytest.approx(1.5 / math.sqrt(7.5 - 6 / 48))
+    assert gate.wilcoxon_greater([0.0, 0.0]) == (0, 0.0, 0.0, 1.0)
+    assert gate.wilcoxon_greater([-1.0, -2.0, -3.0])[3] > 0.9
+
+
+def test_prediction_pvalue_floor_on_spread():
+    base = [math.log(0.1)] * 10
+    # identical baseline: spread is floored at ~2%, so a 1% change is not significant
+    assert gate.prediction_pvalue(base, math.log(0.101)) > 0.3
+    assert gate.prediction_pvalue(base, math.log(0.2)) < 1e-6
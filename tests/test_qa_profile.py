@@ -0,0 +1,92 @@
+import json
+import sys
+
+import pytest
+
+import qa_profile
+from qa_profile import Profile, from_junit, lpt_makespan, parallel_estimates, tc_id
+
+
+@pytest.mark.parametrize("nodeid, keywords, expected", [
+    ("tests/test_x.py::test_anything", ["test_anything", "TC-UI-GLASS-004", "e2e"], "TC-UI-GLASS-004"),
+    ("tests/test_x.py::test_anything", ["TC-API-7"], "TC-API-7"),
+    ("tests/test_tc_ui_glass_004_005_earphones.py::test_tc_ui_glass_004_005_earphones", [], "TC-UI-GLASS-004"),
+    ("tests/test_p.py::TestPair::test_tc_pair_001_plain[param-1]", None, "TC-PAIR-001"),
+    ("tests/test_p.py::test_plain", ["tc-lower", 3], "(no TC-ID)"),
+])
+def test_tc_id(nodeid, keywords, expected):
+    assert tc_id(nodeid, keywords) == expected
+
+
+JUNIT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="5" time="9.5">
+  <testcase classname="tests.test_pairing" name="test_plain" time="1.5"/>
+  <testcase classname="tests.test_pairing.TestEncrypted" name="test_confirm" time="2.0"><failure message="x"/></testcase>
+  <testcase classname="tests.test_pairing.TestEncrypted" name="test_skip" time="0.0"><skipped/></testcase>
+  <testcase classname="tests.sim.gateway_test" name="test_tc_ui_glass_004_ok" time="3.0"><error message="y"/></testcase>
+  <testcase classname="tests.test_http_pool" name="test_reuse[2]" time="0.5"/>
+</testsuite></testsuites>
+"""
+
+
+def test_from_junit_rebuilds_module_and_class_nodeids(tmp_path):
+    p = tmp_path / "junit.xml"
+    p.write_text(JUNIT, encoding="utf-8")
+    prof = from_junit(p)
+    assert prof.tests == 5 and prof.wall_s == 9.5 and prof.source == "junit.xml"
+    rows = {n: (tot, o) for tot, _, n, _, _, _, o in prof.slowest}
+    assert rows == {
+        "tests/test_pairing.py::test_plain": (1.5, "passed"),
+        "tests/test_pairing.py::TestEncrypted::test_confirm": (2.0, "failed"),
+        "tests/test_pairing.py::TestEncrypted::test_skip": (0.0, "skipped"),
+        "tests/sim/gateway_test.py::test_tc_ui_glass_004_ok": (3.0, "failed"),
+        "tests/test_http_pool.py::test_reuse[2]": (0.5, "passed"),
+    }
+    assert prof.by_module == {"tests/test_pairing.py": [3.5, 3], "tests/sim/gateway_test.py": [3.0, 1],
+                              "tests/test_http_pool.py": [0.5, 1]}
+    assert prof.by_tc["TC-UI-GLASS-004"] == [3.0, 1]
+    assert prof.phase_s == {"setup": 0.0, "call": 7.0, "teardown": 0.0}
+
+
+def test_lpt_makespan():
+    assert lpt_makespan([5, 4, 3, 3, 2, 2, 1], 2) == 10
+    assert lpt_makespan([5, 4, 3, 3, 2, 2, 1], 4) == 5
+    assert lpt_makespan([3, 3, 2, 2, 2], 2) == 7  # LPT, not optimal (6)
+    assert lpt_makespan([1.5], 8) == 1.5
+    assert lpt_makespan([], 4) == 0.0
+
+
+def test_parallel_estimates():
+    prof = Profile()
+    for i, d in enumerate([5, 4, 3, 3, 2, 2, 1]):
+        prof.add(f"tests/test_a.py::test_{i}", {"call": float(d)}, "passed")
+    rows = {r["workers"]: r for r in parallel_estimates(prof)}
+    assert sorted(rows) == list(qa_profile.WORKERS)
+    assert rows[2] == {"workers": 2, "estimated_s": 10.0, "lower_bound_s": 10.0, "speedup": 2.0}
+    assert rows[4] == {"workers": 4, "estimated_s": 5.0, "lower_bound_s": 5.0, "speedup": 4.0}
+    assert rows[16] == {"workers": 16, "estimated_s": 5.0, "lower_bound_s": 5.0, "speedup": 4.0}
+    empty = parallel_estimates(Profile())
+    assert all(r["estimated_s"] == 0.0 and r["lower_bound_s"] == 0.0 and r["speedup"] == 1.0 for r in empty)
+
+
+def test_main_keeps_other_links_and_replaces_its_own(tmp_path, monkeypatch):
+    junit = tmp_path / "junit.xml"
+    junit.write_text(JUNIT, encoding="utf-8")
+    links = tmp_path / "links.json"
+    links.write_text(json.dumps({"title": "control room", "reports": [
+        {"label": "Coverage", "href": "coverage.html"},
+        {"label": "old profile", "href": "profile.html"},
+        {"label": "Security", "href": "security-assessment.md"}]}), encoding="utf-8")
+    out = tmp_path / "profile.html"
+    monkeypatch.setattr(sys, "argv", ["qa_profile.py", "-", str(junit), str(out), str(links)])
+    assert qa_profile.main() == 0
+    assert qa_profile.main() == 0  # idempotent
+    data = json.loads(links.read_text(encoding="utf-8"))
+    assert data["title"] == "control room"
+    assert [r["href"] for r in data["reports"]] == ["coverage.html", "security-assessment.md", "profile.html"]
+    assert data["reports"][-1]["label"].startswith("Test profile")
+    page = out.read_text(encoding="utf-8")
+    assert "tests/test_pairing.py::TestEncrypted::test_confirm" in page and "TC-UI-GLASS-004" in page
+
+    monkeypatch.setattr(sys, "argv", ["qa_profile.py", str(tmp_path / "none.json"), "-", str(out), str(links)])
+    assert qa_profile.main() == 3
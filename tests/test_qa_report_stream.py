@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from report_stream import ReportStream
+
+
+REPORT = {
+    "created": 1760000000.5,
+    "duration": 12,
+    "exitcode": 0,
+    "collectors": [{"nodeid": "", "outcome": "passed", "result": []}],
+    "tests": [{"nodeid": f"tests/test_a.py::test_{i}[é{'x' * i}]", "outcome": "passed",
+               "call": {"duration": i / 1000.0}, "keywords": ["a", "b"]} for i in range(40)],
+    "warnings": [{"message": "w"}],
+    "summary": {"passed": 40, "total": 40, "collected": 40},
+    "empty": [],
+    "flag": True,
+    "last": 12345678901234567890,
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 20])
+def test_chunked_decode_matches_json_load(tmp_path, chunk_size):
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(REPORT, indent=2), encoding="utf-8")
+    rs = ReportStream(path, chunk_size=chunk_size)
+    assert list(rs.tests()) == REPORT["tests"]
+    assert rs.counts == {"tests": 40, "collectors": 1, "warnings": 1}
+    # numbers and literals cut at a chunk boundary are not truncated
+    assert rs.meta == {k: v for k, v in REPORT.items() if k not in ("tests", "collectors", "warnings")}
+
+
+def test_empty_object(tmp_path):
+    path = tmp_path / "report.json"
+    path.write_text(" {} ", encoding="utf-8")
+    rs = ReportStream(path, chunk_size=1)
+    assert list(rs.tests()) == [] and rs.meta == {}
+
+
+def test_malformed_record_stops_at_the_buffer_cap(tmp_path):
+    path = tmp_path / "report.json"
+    bad = '{"tests": [{"nodeid": "a"}, {"nodeid": "b" "oops": ' + '"' + "x" * 5000 + '"}], "summary": {}}'
+    path.write_text(bad, encoding="utf-8")
+    rs = ReportStream(path, chunk_size=16, max_record=256)
+    it = rs.tests()
+    assert next(it) == {"nodeid": "a"}
+    with pytest.raises(ValueError, match="no valid record within 256"):
+        next(it)
+    assert len(rs._buf) < 256 + 64
+
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(REPORT)[:-200], encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(ReportStream(path, chunk_size=32).tests())
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("packaging")
+
+import qa_sca
+
+
+def _stamp(hours_ago):
+    t = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return t.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def test_cached_online_result_expires(tmp_path):
+    path = tmp_path / "sca_cache.json"
+    report = {"dependencies": [], "fixes": []}
+    qa_sca.save_cached(path, "k", report, {"rc": 0, "audited_at_utc": _stamp(2), "source": "pypi"})
+    assert qa_sca.load_cached(path, "k")["report"] == report
+    assert qa_sca.load_cached(path, "k", max_age_s=3 * 3600) is not None
+    assert qa_sca.load_cached(path, "k", max_age_s=3600) is None
+    assert qa_sca.load_cached(path, "other") is None
+    qa_sca.save_cached(path, "k", report, {"rc": 0})
+    assert qa_sca.load_cached(path, "k", max_age_s=3600) is None
+
+
+def _record(rng_type, events, versions=()):
+    return {"id": "OSV-1", "affected": [{"package": {"ecosystem": "PyPI", "name": "Demo_Pkg"},
+                                         "ranges": [{"type": rng_type, "events": events}], "versions": list(versions)}]}
+
+
+@pytest.mark.parametrize("installed, rng_type, events, vulnerable, fixes", [
+    ("1.4.0", "ECOSYSTEM", [{"introduced": "0"}, {"fixed": "1.5.0"}], True, ["1.5.0"]),
+    ("1.5.0", "ECOSYSTEM", [{"introduced": "0"}, {"fixed": "1.5.0"}], False, []),
+    ("2.0", "ECOSYSTEM", [{"introduced": "1.0"}, {"last_affected": "2.0"}], True, []),
+    ("1.2.0rc1", "SEMVER", [{"introduced": "1.2.0-rc.1"}, {"fixed": "1.2.0"}], True, ["1.2.0"]),
+    # build metadata is dropped: 1.3.0+build.7 is 1.3.0, not a later local version
+    ("1.3.0", "SEMVER", [{"introduced": "1.0.0"}, {"fixed": "1.3.0+build.7"}], False, []),
+    # an unparseable bound skips the whole range instead of widening it
+    ("3.0.0", "SEMVER", [{"introduced": "1.0.0-alpha.beta"}, {"fixed": "2.0.0"}], False, []),
+])
+def test_offline_audit_ranges(tmp_path, installed, rng_type, events, vulnerable, fixes):
+    snap = tmp_path / "osv.json"
+    snap.write_text(json.dumps([_record(rng_type, events)]), encoding="utf-8")
+    report = qa_sca.offline_audit(snap, {"demo-pkg": ("Demo_Pkg", installed)})
+    vulns = report["dependencies"][0]["vulns"]
+    assert bool(vulns) is vulnerable
+    if vulnerable:
+        assert vulns[0]["fix_versions"] == fixes
+
+
+def test_explicit_versions_still_apply_when_a_range_is_skipped(tmp_path):
+    snap = tmp_path / "osv.json"
+    snap.write_text(json.dumps([_record("SEMVER", [{"introduced": "bogus"}], versions=["1.0.0"])]), encoding="utf-8")
+    report = qa_sca.offline_audit(snap, {"demo-pkg": ("Demo_Pkg", "1.0.0")})
+    assert [v["id"] for v in report["dependencies"][0]["vulns"]] == ["OSV-1"]
@@ -1,20 +1,9 @@
-﻿import sys
-from pathlib import Path
+﻿# Backend app comes from the backend_client fixture (tests/conftest.py);
+# set HALO_BACKEND_ROOT if the backend checkout is not the sibling folder.
 
-from fastapi.testclient import TestClient
 
-
-def _load_backend_app():
-    # backend repo in sibling folder
-    backend_path = Path(r"D:\Halo Project\dev\halo-platform-backend").resolve()
-    sys.path.insert(0, str(backend_path))
-    from app.main import app  # noqa: E402
-    return app
-
-
-def test_tc_ui_glass_004_audio_output_routing_override_to_earbuds():
-    app = _load_backend_app()
-    client = TestClient(app)
+def test_tc_ui_glass_004_audio_output_routing_override_to_earbuds(backend_client):
+    client = backend_client()
 
     sid = "tc-ui-glass-004"
     r1 = client.post("/api/v1/conversation/message", json={"session_id": sid, "user_utterance": "use earbuds"})
@@ -24,9 +13,8 @@ def test_tc_ui_glass_004_audio_output_routing_override_to_earbuds():
     assert "confirm" in j1["audio_cues"]
 
 
-def test_tc_ui_glass_005_audio_cues_session_start_present():
-    app = _load_backend_app()
-    client = TestClient(app)
+def test_tc_ui_glass_005_audio_cues_session_start_present(backend_client):
+    client = backend_client()
 
     sid = "tc-ui-glass-005"
     r = client.post("/api/v1/conversation/message", json={"session_id": sid, "user_utterance": "hello"})
@@ -1,20 +1,202 @@
 import json
 import os
+import signal
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00","Z")
 
-def run_cmd(cmd: list[str], cwd: Path) -> tuple[int, str]:
+# Per-tool timeout (s); HALO_QA_TOOL_TIMEOUT_S overrides all of them
+TOOL_TIMEOUT_S = {"pip_audit": 600, "bandit": 900, "detect_secrets": 900}
+RSS_POLL_S = 0.05
+
+def _vm_hwm_kb(pid: int) -> int | None:
+    # the process's own peak RSS since exec (Linux); gone once it is reaped
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii", errors="replace") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _peak_rss_windows(p: subprocess.Popen) -> int | None:
+    # PeakWorkingSetSize of the (exited) child; the Popen handle keeps it queryable
+    import ctypes
+    from ctypes import wintypes
+
+    class PMC(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+    try:
+        pmc = PMC()
+        pmc.cb = ctypes.sizeof(PMC)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(int(p._handle), ctypes.byref(pmc), pmc.cb):
+            return int(pmc.PeakWorkingSetSize)
+    except Exception:
+        pass
+    return None
+
+def _kill_tree(p: subprocess.Popen) -> None:
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(p.pid)], capture_output=True)
+        else:
+            os.killpg(p.pid, signal.SIGKILL)
+    except Exception:
+        p.kill()
+
+def run_tool(cmd: list[str], cwd: Path, out_path: Path, timeout_s: float) -> dict:
+    """Run a scanner with stdout streamed to out_path (stderr to <out_path>.stderr.log).
+
+    Returns rc, wall time, peak RSS of the scanner process and whether it timed out.
+    rc 99 = could not start, rc 124 = killed on timeout.
+
+    Peak RSS is the scanner's own VmHWM, polled every RSS_POLL_S while it runs (Linux) or its
+    PeakWorkingSetSize (Windows). Elsewhere, or when the scanner exits before the first poll, it
+    falls back to wait4's ru_maxrss (peak_rss_source "ru_maxrss"), which carries the forked
+    parent's high-water mark across exec - a floor (about this process's own RSS), not the scanner's peak.
+    """
+    err_path = out_path.with_name(out_path.name + ".stderr.log")
+    t0 = time.perf_counter()
+    res = {"rc": 99, "timed_out": False, "timeout_s": timeout_s, "output": out_path.name, "stderr": err_path.name}
+    try:
+        with out_path.open("wb") as so, err_path.open("wb") as se:
+            posix = os.name != "nt"
+            p = subprocess.Popen(cmd, cwd=str(cwd), stdout=so, stderr=se, start_new_session=posix)
+            rusage = {}
+            if posix:
+                # wait4 reaps the child and hands back its rusage (ru_maxrss); Popen never sees the exit
+                def reap():
+                    _, status, ru = os.wait4(p.pid, 0)
+                    rusage["rc"] = os.waitstatus_to_exitcode(status)
+                    rusage["maxrss_kb"] = ru.ru_maxrss
+                waiter = threading.Thread(target=reap, daemon=True)
+                waiter.start()
+                deadline = time.monotonic() + timeout_s
+                hwm_kb = 0
+                while waiter.is_alive() and time.monotonic() < deadline:
+                    hwm_kb = max(hwm_kb, _vm_hwm_kb(p.pid) or 0)
+                    waiter.join(min(RSS_POLL_S, max(0.0, deadline - time.monotonic())))
+                if waiter.is_alive():
+                    res["timed_out"] = True
+                    _kill_tree(p)
+                    waiter.join()
+                p.returncode = rusage.get("rc", 124)
+                # ru_maxrss is KiB on Linux, bytes on macOS
+                kb = hwm_kb or rusage.get("maxrss_kb", 0) / (1024.0 if sys.platform == "darwin" else 1.0)
+                res["peak_rss_mb"] = round(kb / 1024.0, 1)
+                res["peak_rss_source"] = "vmhwm" if hwm_kb else "ru_maxrss"
+            else:
+                try:
+                    p.wait(timeout_s)
+                except subprocess.TimeoutExpired:
+                    res["timed_out"] = True
+                    _kill_tree(p)
+                    p.wait()
+                peak = _peak_rss_windows(p)
+                res["peak_rss_mb"] = round(peak / (1024.0 * 1024.0), 1) if peak else None
+        res["rc"] = 124 if res["timed_out"] else p.returncode
+    except Exception as e:
+        err_path.write_text(f"EXCEPTION: {type(e).__name__}: {e}\n", encoding="utf-8")
+    res["wall_s"] = round(time.perf_counter() - t0, 3)
+    res["output_bytes"] = out_path.stat().st_size if out_path.exists() else 0
+    res["executed"] = res["rc"] in (0, 1)
+    return res
+
+def _incremental_available(repo: Path):
+    # content-hash cached bandit/detect-secrets (qa_scan_cache); None -> full CLI scans
+    try:
+        import bandit  # noqa: F401
+        import detect_secrets  # noqa: F401
+        from qa_scan_cache import ScanCache, default_cache_path
+    except ImportError:
+        return None
+    return ScanCache(default_cache_path(repo))
+
+def run_sca(repo: Path, artifacts: Path, timeout_s: float, use_cache: bool) -> dict:
+    """pip-audit stage: reuse the cached result while requirements/installed packages are unchanged,
+    audit offline against HALO_QA_VULN_DB when set, write pip_audit.clean.json + summary directly."""
+    import qa_sca
+    t0 = time.perf_counter()
+    snapshot = os.environ.get("HALO_QA_VULN_DB")
+    req = qa_sca.requirements_hashes(repo)
+    dists = qa_sca.installed_distributions()
+    source = qa_sca.snapshot_source(Path(snapshot)) if snapshot else "pypi"
+    key = qa_sca.cache_key(req, dists, source)
+    cache_path = qa_sca.default_cache_path(repo)
+    res = {"timeout_s": timeout_s, "requirements_sha256": req, "source": "offline" if snapshot else "online",
+           "cache_key": key, "cached": False}
+    if snapshot:
+        res["vuln_db"] = str(Path(snapshot).resolve())
+    # online results age out (new advisories); an offline snapshot is part of the key
+    cached = qa_sca.load_cached(cache_path, key, None if snapshot else qa_sca.MAX_AGE_S) if use_cache else None
+    if cached:
+        report = cached["report"]
+        res.update(rc=cached.get("rc", 0), cached=True, audited_at_utc=cached.get("audited_at_utc"), timed_out=False)
+    elif snapshot:
+        try:
+            report = qa_sca.offline_audit(Path(snapshot), dists)
+            res.update(rc=1 if qa_sca.summary_line(report).startswith("Found") else 0, timed_out=False)
+        except Exception as e:
+            res.update(rc=99, timed_out=False, error=f"{type(e).__name__}: {e}"[:2000])
+            report = None
+    else:
+        # raw output + stderr stay in the cache dir; only the structured files land in artifacts
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        raw = cache_path.parent / "pip_audit.raw.json"
+        res.update(run_tool(["pip-audit", "-f", "json"], repo, raw, timeout_s))
+        report = None
+        if res["executed"]:
+            try:
+                report = qa_sca.parse_pip_audit(raw.read_text(encoding="utf-8", errors="replace"))
+            except ValueError as e:
+                res.update(rc=99, executed=False, error=f"pip-audit output: {e}")
+        res["raw_output"], res["stderr"] = str(raw), str(raw.with_name(raw.name + ".stderr.log"))
+    if report is not None:
+        clean, summary = qa_sca.write_outputs(report, artifacts, note="cached" if res["cached"] else res["source"])
+        res.update(output=clean.name, summary=summary.name, executed=True)
+        if not res["cached"] and use_cache:
+            qa_sca.save_cached(cache_path, key, report, {"rc": res["rc"], "audited_at_utc": utc_now_iso(), "source": source})
+    else:
+        res["executed"] = False
+    res["wall_s"] = round(time.perf_counter() - t0, 3)
+    return res
+
+def _timed(fn, out_path: Path, timeout_s: float, *args) -> dict:
+    t0 = time.perf_counter()
+    res = {"mode": "incremental", "timeout_s": timeout_s, "output": out_path.name}
     try:
-        p = subprocess.run(cmd, cwd=str(cwd), capture_output=True, text=True)
-        out = (p.stdout or "") + ("\n" + p.stderr if p.stderr else "")
-        return p.returncode, out.strip()
+        res.update(fn(*args, out_path, time.monotonic() + timeout_s))
+        res["timed_out"] = False
+    except (subprocess.TimeoutExpired, TimeoutError):
+        res.update(rc=124, timed_out=True)
     except Exception as e:
-        return 99, f"EXCEPTION: {type(e).__name__}: {e}"
+        res.update(rc=99, timed_out=False, error=f"{type(e).__name__}: {e}"[:2000])
+    res["wall_s"] = round(time.perf_counter() - t0, 3)
+    res["executed"] = res["rc"] in (0, 1)
+    return res
+
+def run_incremental(ex: ThreadPoolExecutor, cache, repo: Path, artifacts: Path, timeouts: dict) -> dict:
+    from qa_scan_cache import bandit_incremental, iter_units, secrets_incremental
+    # each scanner walks the tree lazily on its own worker; only cache misses are held
+    units = lambda tool: iter_units(repo, tool, exclude_dirs=[artifacts])
+    return {
+        "bandit": ex.submit(_timed, bandit_incremental, artifacts / "bandit.json", timeouts["bandit"], units("bandit"),
+                            cache, repo),
+        "detect_secrets": ex.submit(_timed, secrets_incremental, artifacts / "detect_secrets.json", timeouts["detect_secrets"],
+                                    units("secrets"), cache, repo),
+    }
 
 def main() -> int:
     if len(sys.argv) != 6:
@@ -29,23 +211,34 @@ def main() -> int:
 
     artifacts.mkdir(parents=True, exist_ok=True)
 
-    # Evidence hooks (SCA/SAST/Secrets)  esecuzione best-effort
+    # Evidence hooks (SCA/SAST/Secrets)  esecuzione best-effort, in parallelo, ciascuno con timeout
     evidence = {"generated_at_utc": utc_now_iso(), "repo": str(repo), "tools": {}}
-
-    # SCA: pip-audit
-    rc, out = run_cmd(["pip-audit", "-f", "json"], cwd=repo)
-    evidence["tools"]["pip_audit"] = {"rc": rc, "executed": (rc in (0,1)), "raw": out[:20000]}
-    (artifacts / "pip_audit.json").write_text(out + "\n", encoding="utf-8") if out else None
-
-    # SAST: bandit (scansione repo QA; in seguito potremo puntare a SUT repo)
-    rc, out = run_cmd(["bandit", "-r", str(repo), "-f", "json", "-q"], cwd=repo)
-    evidence["tools"]["bandit"] = {"rc": rc, "executed": (rc in (0,1)), "raw": out[:20000]}
-    (artifacts / "bandit.json").write_text(out + "\n", encoding="utf-8") if out else None
-
-    # Secrets: detect-secrets
-    rc, out = run_cmd(["detect-secrets", "scan", str(repo)], cwd=repo)
-    evidence["tools"]["detect_secrets"] = {"rc": rc, "executed": (rc in (0,1)), "raw": out[:20000]}
-    (artifacts / "detect_secrets.json").write_text(out + "\n", encoding="utf-8") if out else None
+    override = os.environ.get("HALO_QA_TOOL_TIMEOUT_S")
+    jobs = {
+        # SAST: bandit (scansione repo QA; in seguito potremo puntare a SUT repo)
+        "bandit": (["bandit", "-r", str(repo), "-f", "json", "-q"], artifacts / "bandit.json"),
+        # Secrets: detect-secrets
+        "detect_secrets": (["detect-secrets", "scan", str(repo)], artifacts / "detect_secrets.json"),
+    }
+    timeouts = {name: float(override or TOOL_TIMEOUT_S[name]) for name in TOOL_TIMEOUT_S}
+    use_cache = os.environ.get("HALO_QA_INCREMENTAL", "1") != "0"
+    incremental = _incremental_available(repo) if use_cache else None
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(TOOL_TIMEOUT_S)) as ex:
+        # SCA: pip-audit (cached on requirements + installed packages; offline with HALO_QA_VULN_DB)
+        futs = {"pip_audit": ex.submit(run_sca, repo, artifacts, timeouts["pip_audit"], use_cache)}
+        if incremental:
+            # bandit / detect-secrets: only files whose content changed since the cached run
+            futs.update(run_incremental(ex, incremental, repo, artifacts, timeouts))
+        else:
+            futs.update({name: ex.submit(run_tool, cmd, repo, out, timeouts[name]) for name, (cmd, out) in jobs.items()})
+        for name, f in futs.items():
+            evidence["tools"][name] = f.result()
+    if incremental:
+        incremental.save()
+        evidence["scan_cache"] = str(incremental.path)
+    evidence["wall_s"] = round(time.perf_counter() - t0, 3)
+    (artifacts / "qa_assess_evidence.json").write_text(json.dumps(evidence, indent=2) + "\n", encoding="utf-8")
 
     # SECURITY ASSESSMENT (template + evidence pointers)
     sec = []
@@ -60,7 +253,7 @@ def main() -> int:
     sec.append("- OWASP ASVS / OWASP API Security Top 10  application-layer expectations (high-level)")
     sec.append("")
     sec.append("## Evidence inventory (audit trail)")
-    sec.append("- pip-audit (SCA): artifacts/pip_audit.json")
+    sec.append("- pip-audit (SCA): artifacts/pip_audit.clean.json, artifacts/pip_audit.summary.txt")
     sec.append("- bandit (SAST): artifacts/bandit.json")
     sec.append("- detect-secrets: artifacts/detect_secrets.json")
     sec.append("")
@@ -98,9 +291,11 @@ def main() -> int:
         "reports": [
             {"label": "Security assessment (markdown)", "href": "security_assessment.md"},
             {"label": "Privacy assessment (markdown)", "href": "privacy_assessment.md"},
-            {"label": "pip-audit (json)", "href": "pip_audit.json"},
+            {"label": "pip-audit (json)", "href": "pip_audit.clean.json"},
+            {"label": "pip-audit (summary)", "href": "pip_audit.summary.txt"},
             {"label": "bandit (json)", "href": "bandit.json"},
             {"label": "detect-secrets (json)", "href": "detect_secrets.json"},
+            {"label": "Tool runs (rc, wall time, peak RSS)", "href": "qa_assess_evidence.json"},
         ]
     }
     links_json.write_text(json.dumps(links, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
@@ -0,0 +1,297 @@
+"""Performance regression gate.
+
+Compares the current run against a rolling baseline of earlier runs:
+- per test: pytest call duration from report.json
+- per k6 trend metric: avg / med / p(90) / p(95) from k6-summary.json
+
+Timings are compared on a log scale (latencies are roughly log-normal). Each item gets a
+one-sided p-value from the Student-t prediction interval of its baseline samples. False
+alarms across many items are controlled with Benjamini-Hochberg, and an item only
+counts as a regression when it is also slower by a practical margin. A Wilcoxon
+signed-rank test over all tests catches broad drift that no single test shows on its
+own. The verdict is added to engineering.json and executive.md. Exit code 1 means a
+significant slowdown.
+
+Env knobs: HALO_PERF_ALPHA (0.01), HALO_PERF_BASELINE_RUNS (20), HALO_PERF_MIN_BASELINE (5),
+HALO_PERF_MIN_RATIO_TESTS (1.20), HALO_PERF_MIN_RATIO_K6 (1.10).
+"""
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from statistics import NormalDist, fmean, median, stdev
+from datetime import datetime, timezone
+
+from report_stream import ReportStream
+
+ALPHA = float(os.environ.get("HALO_PERF_ALPHA", "0.01"))
+BASELINE_RUNS = int(os.environ.get("HALO_PERF_BASELINE_RUNS", "20"))
+MIN_BASELINE = int(os.environ.get("HALO_PERF_MIN_BASELINE", "5"))
+MIN_RATIO_TESTS = float(os.environ.get("HALO_PERF_MIN_RATIO_TESTS", "1.20"))
+MIN_RATIO_K6 = float(os.environ.get("HALO_PERF_MIN_RATIO_K6", "1.10"))
+
+# durations below this are timer noise; clamp before taking logs (seconds / ms)
+TEST_FLOOR_S = 0.005
+K6_FLOOR_MS = 0.5
+# a test must also be this much slower in absolute terms (ms-scale tests jitter by large ratios)
+TEST_MIN_DELTA_S = 0.05
+# spread assumed at least ~2% so an identical baseline doesn't make every tick "significant"
+MIN_LOG_SD = math.log(1.02)
+K6_STATS = ("avg", "med", "p(90)", "p(95)")
+MIN_DRIFT_TESTS = 10
+DRIFT_MIN_RATIO = 1.05
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+# --- statistics (stdlib only) -------------------------------------------------
+
+def _betacf(a: float, b: float, x: float) -> float:
+    # continued fraction for the incomplete beta function (Lentz)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        de = d * c
+        h *= de
+        if abs(de - 1.0) < 1e-12:
+            break
+    return h
+
+def _betainc(a: float, b: float, x: float) -> float:
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    ln = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x)
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(ln) * _betacf(a, b, x) / a
+    return 1.0 - math.exp(ln) * _betacf(b, a, 1.0 - x) / b
+
+def t_sf(t: float, df: float) -> float:
+    """P(T > t) for Student's t with df degrees of freedom."""
+    tail = 0.5 * _betainc(df / 2.0, 0.5, df / (df + t * t))
+    return tail if t > 0 else 1.0 - tail
+
+def prediction_pvalue(baseline: list, x: float) -> float:
+    """One-sided p-value that x is slower than a new draw from the baseline distribution."""
+    n = len(baseline)
+    m = fmean(baseline)
+    s = max(stdev(baseline), MIN_LOG_SD)
+    return t_sf((x - m) / (s * math.sqrt(1.0 + 1.0 / n)), n - 1)
+
+def benjamini_hochberg(pvalues: list, alpha: float) -> list:
+    """Indices rejected at false discovery rate alpha."""
+    order = sorted(range(len(pvalues)), key=lambda i: pvalues[i])
+    k = 0
+    for rank, i in enumerate(order, start=1):
+        if pvalues[i] <= alpha * rank / len(pvalues):
+            k = rank
+    return sorted(order[:k])
+
+def wilcoxon_greater(diffs: list) -> tuple:
+    """Signed-rank test that the median difference is > 0 (normal approx., tie-corrected).
+    Returns (n, W+, z, p)."""
+    d = [x for x in diffs if x != 0.0]
+    n = len(d)
+    if n == 0:
+        return 0, 0.0, 0.0, 1.0
+    order = sorted(range(n), key=lambda i: abs(d[i]))
+    ranks = [0.0] * n
+    ties = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and abs(d[order[j + 1]]) == abs(d[order[i]]):
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2.0 + 1.0
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    w = sum(r for r, x in zip(ranks, d) if x > 0)
+    mean = n * (n + 1) / 4.0
+    var = n * (n + 1) * (2 * n + 1) / 24.0 - ties / 48.0
+    if var <= 0:
+        return n, w, 0.0, 1.0
+    z = (w - mean - 0.5) / math.sqrt(var)
+    return n, w, z, 1.0 - NormalDist().cdf(z)
+
+# --- loading runs -----------------------------------------------------------------
+
+def _find(run_dir: Path, name: str, subdirs: tuple) -> Path | None:
+    for sub in ("",) + subdirs:
+        p = run_dir / sub / name if sub else run_dir / name
+        if p.exists():
+            return p
+    return None
+
+def load_run(run_dir: Path) -> dict:
+    """{("test", nodeid): seconds, ("k6", "metric p(95)"): ms} for one run folder.
+
+    Works on artifacts/ and artifacts/history/<ts>/ (flat) and on the GUI's runs/<ts>/
+    layout (pytest/, k6/ subfolders).
+    """
+    out = {}
+    rj = _find(run_dir, "report.json", ("pytest",))
+    if rj:
+        try:
+            for t in ReportStream(rj).tests():
+                call = t.get("call") or {}
+                if t.get("outcome") == "passed" and isinstance(call.get("duration"), (int, float)):
+                    out[("test", t.get("nodeid"))] = max(float(call["duration"]), TEST_FLOOR_S)
+        except (OSError, ValueError):
+            pass
+    ks = _find(run_dir, "k6-summary.json", ("k6",))
+    if ks:
+        try:
+            data = json.loads(ks.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        for metric, stats in (data.get("metrics") or {}).items():
+            if not isinstance(stats, dict) or "p(95)" not in stats:
+                continue  # counters/rates/gauges: not timings
+            for st in K6_STATS:
+                v = stats.get(st)
+                if isinstance(v, (int, float)):
+                    out[("k6", f"{metric} {st}")] = max(float(v), K6_FLOOR_MS)
+    return out
+
+def baseline_dirs(history_dir: Path, current_dir: Path, limit: int) -> list:
+    if not history_dir.exists():
+        return []
+    cur = current_dir.resolve()
+    dirs = [p for p in sorted(history_dir.iterdir()) if p.is_dir() and p.resolve() != cur]
+    return dirs[-limit:]
+
+# --- gate ---------------------------------------------------------------------------
+
+def evaluate(current: dict, baseline_runs: list) -> dict:
+    samples = {}
+    for run in baseline_runs:
+        for key, v in run.items():
+            samples.setdefault(key, []).append(math.log(v))
+
+    items = []
+    for key, v in current.items():
+        base = samples.get(key) or []
+        if len(base) < MIN_BASELINE:
+            continue
+        lx = math.log(v)
+        items.append({
+            "kind": key[0],
+            "name": key[1],
+            "current": round(v, 6),
+            "baseline_median": round(math.exp(median(base)), 6),
+            "ratio": round(math.exp(lx - median(base)), 3),
+            "baseline_n": len(base),
+            "p_value": prediction_pvalue(base, lx),
+            "_dlog": lx - median(base),
+        })
+
+    rejected = set(benjamini_hochberg([it["p_value"] for it in items], ALPHA)) if items else set()
+    regressions = []
+    for i, it in enumerate(items):
+        min_ratio = MIN_RATIO_TESTS if it["kind"] == "test" else MIN_RATIO_K6
+        big_enough = it["kind"] != "test" or it["current"] - it["baseline_median"] >= TEST_MIN_DELTA_S
+        if i in rejected and it["ratio"] >= min_ratio and big_enough:
+            regressions.append(it)
+
+    test_diffs = [it["_dlog"] for it in items if it["kind"] == "test"]
+    drift = {"tests": len(test_diffs), "status": "not_evaluated"}
+    if len(test_diffs) >= MIN_DRIFT_TESTS:
+        n, w, z, p = wilcoxon_greater(test_diffs)
+        med_ratio = math.exp(median(test_diffs))
+        drift.update({"n": n, "w_plus": w, "z": round(z, 3), "p_value": p, "median_ratio": round(med_ratio, 3),
+                      "status": "regression" if p < ALPHA and med_ratio >= DRIFT_MIN_RATIO else "pass"})
+
+    for it in items:
+        it.pop("_dlog")
+        it["p_value"] = float(f"{it['p_value']:.3g}")
+    if "p_value" in drift:
+        drift["p_value"] = float(f"{drift['p_value']:.3g}")
+
+    if not items:
+        status = "insufficient_baseline"
+    elif regressions or drift["status"] == "regression":
+        status = "regression"
+    else:
+        status = "pass"
+    return {
+        "status": status,
+        "evaluated_at_utc": utc_now_iso(),
+        "method": "log-scale t prediction interval per item + Benjamini-Hochberg; Wilcoxon signed-rank drift across tests",
+        "alpha": ALPHA,
+        "min_ratio": {"test": MIN_RATIO_TESTS, "k6": MIN_RATIO_K6},
+        "baseline_runs": len(baseline_runs),
+        "items_checked": len(items),
+        "regressions": sorted(regressions, key=lambda it: it["p_value"]),
+        "drift": drift,
+    }
+
+def executive_section(verdict: dict) -> list:
+    md = ["", "## Performance regression gate"]
+    label = {"pass": "PASS", "regression": "FAIL (regression)", "insufficient_baseline": "N/A (baseline insufficiente)"}
+    md.append(f"- Verdict: {label.get(verdict['status'], verdict['status'])}")
+    md.append(f"- Baseline runs: {verdict['baseline_runs']} | Items checked: {verdict['items_checked']} | alpha: {verdict['alpha']}")
+    d = verdict["drift"]
+    if d.get("status") != "not_evaluated":
+        md.append(f"- Drift (Wilcoxon, {d['n']} tests): median ratio x{d['median_ratio']}, p={d['p_value']} -> {d['status']}")
+    for r in verdict["regressions"][:20]:
+        unit = "s" if r["kind"] == "test" else "ms"
+        md.append(f"  - {r['kind']} `{r['name']}`: {r['current']}{unit} vs {r['baseline_median']}{unit} "
+                  f"(x{r['ratio']}, p={r['p_value']})")
+    return md
+
+def main() -> int:
+    if len(sys.argv) != 5:
+        print("usage: qa_perf_gate.py <current_run_dir> <history_dir> <engineering.json> <executive.md>")
+        return 2
+
+    current_dir = Path(sys.argv[1])
+    history_dir = Path(sys.argv[2])
+    out_eng = Path(sys.argv[3])
+    out_exec = Path(sys.argv[4])
+
+    current = load_run(current_dir)
+    if not current:
+        print("ERR: no report.json / k6-summary.json timings in:", str(current_dir))
+        return 3
+    baseline = [load_run(d) for d in baseline_dirs(history_dir, current_dir, BASELINE_RUNS)]
+    verdict = evaluate(current, [b for b in baseline if b])
+
+    eng = {}
+    if out_eng.exists():
+        eng = json.loads(out_eng.read_text(encoding="utf-8"))
+    eng["perf_gate"] = verdict
+    out_eng.write_text(json.dumps(eng, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    md = out_exec.read_text(encoding="utf-8").rstrip("\n").split("\n") if out_exec.exists() else []
+    if "## Performance regression gate" in md:
+        # re-run on the same artifacts: replace the previous section
+        md = md[:md.index("## Performance regression gate")]
+        while md and not md[-1].strip():
+            md.pop()
+    out_exec.write_text("\n".join(md + executive_section(verdict)) + "\n", encoding="utf-8")
+
+    print(f"PERF_GATE={verdict['status'].upper()} BASELINE_RUNS={verdict['baseline_runs']} "
+          f"CHECKED={verdict['items_checked']} REGRESSIONS={len(verdict['regressions'])}")
+    return 1 if verdict["status"] == "regression" else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
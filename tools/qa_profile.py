@@ -0,0 +1,258 @@
+"""Test-phase profile: where the suite's wall time goes.
+
+Builds a static, self-contained profile.html from report.json (setup/call/teardown per
+test, plus fixture setup times recorded by tests/conftest.py) or, when only JUnit is
+available, from junit.xml test times. It shows:
+- slowest tests, split by phase
+- slowest fixtures (setup time, inclusive of the fixtures they request)
+- time per test module and per TC-ID (TC-XXX-NNN marker/keyword, or test_tc_xxx_nnn_* names)
+- estimated wall time if the tests ran on N parallel workers
+
+The page is also registered in links.json, so the control room (index.html) links it.
+"""
+import heapq
+import html
+import json
+import re
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from report_stream import ReportStream
+
+TOP_TESTS = 30
+TOP_FIXTURES = 20
+WORKERS = (2, 4, 8, 16)
+PHASES = ("setup", "call", "teardown")
+
+_TC_KEYWORD = re.compile(r"^TC-[A-Z0-9]+(?:-[A-Z0-9]+)*$")
+_TC_NAME = re.compile(r"tc_((?:[a-z0-9]+_)*?[a-z]+)_(\d{3})")
+
+def tc_id(nodeid: str, keywords) -> str:
+    for k in keywords or []:
+        if isinstance(k, str) and _TC_KEYWORD.match(k):
+            return k
+    name = nodeid.rsplit("::", 1)[-1].lower()
+    m = _TC_NAME.search(name)
+    if m:
+        return "TC-" + m.group(1).replace("_", "-").upper() + "-" + m.group(2)
+    return "(no TC-ID)"
+
+def module_of(nodeid: str) -> str:
+    return nodeid.split("::", 1)[0]
+
+class Profile:
+    def __init__(self):
+        self.tests = 0
+        self.phase_s = {p: 0.0 for p in PHASES}
+        self.durations = []  # per-test total, for the parallel estimate
+        self.slowest = []    # min-heap (total, seq, nodeid, setup, call, teardown, outcome)
+        self.by_module = {}  # module -> [seconds, tests]
+        self.by_tc = {}
+        self.fixtures = {}   # (name, scope) -> [count, total_ms, max_ms]
+        self.wall_s = None
+        self.source = ""
+
+    def add(self, nodeid: str, phases: dict, outcome: str, keywords=None, fixtures=None) -> None:
+        total = sum(phases.values())
+        self.tests += 1
+        for p, v in phases.items():
+            self.phase_s[p] += v
+        self.durations.append(total)
+        row = (total, self.tests, nodeid, phases.get("setup", 0.0), phases.get("call", 0.0), phases.get("teardown", 0.0), outcome)
+        if len(self.slowest) < TOP_TESTS:
+            heapq.heappush(self.slowest, row)
+        elif total > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, row)
+        for key, agg in ((module_of(nodeid), self.by_module), (tc_id(nodeid, keywords), self.by_tc)):
+            a = agg.setdefault(key, [0.0, 0])
+            a[0] += total
+            a[1] += 1
+        for f in fixtures or []:
+            a = self.fixtures.setdefault((f.get("name"), f.get("scope")), [0, 0.0, 0.0])
+            ms = float(f.get("setup_ms") or 0.0)
+            a[0] += 1
+            a[1] += ms
+            a[2] = max(a[2], ms)
+
+def from_report(path: Path) -> Profile:
+    prof = Profile()
+    stream = ReportStream(path)
+    for t in stream.tests():
+        phases = {p: float((t.get(p) or {}).get("duration") or 0.0) for p in PHASES if t.get(p)}
+        meta = t.get("metadata") or {}
+        prof.add(t.get("nodeid", ""), phases, t.get("outcome", ""), t.get("keywords"), meta.get("fixture_setup"))
+    prof.wall_s = stream.meta.get("duration")
+    prof.source = path.name
+    return prof
+
+def from_junit(path: Path) -> Profile:
+    prof = Profile()
+    wall = 0.0
+    for _, el in ET.iterparse(str(path), events=("end",)):
+        if el.tag == "testcase":
+            cls = el.get("classname", "")
+            parts = cls.split(".")
+            # classname is dotted module[.Class]; the module is the longest prefix ending in a
+            # test_*/*_test part (pytest's python_files), so a tests/ folder or a Test* class isn't it
+            idx = max((i for i, p in enumerate(parts) if p.startswith("test_") or p.endswith("_test")),
+                      default=len(parts) - 1)
+            nodeid = "/".join(parts[:idx + 1]) + ".py::" + "::".join(parts[idx + 1:] + [el.get("name", "")])
+            outcome = "failed" if el.find("failure") is not None or el.find("error") is not None else (
+                "skipped" if el.find("skipped") is not None else "passed")
+            prof.add(nodeid, {"call": float(el.get("time") or 0.0)}, outcome)
+            el.clear()
+        elif el.tag == "testsuite":
+            wall = max(wall, float(el.get("time") or 0.0))
+    prof.wall_s = wall or None
+    prof.source = path.name
+    return prof
+
+def lpt_makespan(durations: list, workers: int) -> float:
+    """Longest-processing-time-first schedule of the tests on N workers (xdist-like)."""
+    loads = [0.0] * workers
+    heapq.heapify(loads)
+    for d in sorted(durations, reverse=True):
+        heapq.heapreplace(loads, loads[0] + d)
+    return max(loads) if loads else 0.0
+
+def parallel_estimates(prof: Profile) -> list:
+    total = sum(prof.durations)
+    longest = max(prof.durations, default=0.0)
+    rows = []
+    for n in WORKERS:
+        span = lpt_makespan(prof.durations, n)
+        rows.append({"workers": n, "estimated_s": span, "lower_bound_s": max(total / n, longest),
+                     "speedup": (total / span) if span else 1.0})
+    return rows
+
+# --- rendering ----------------------------------------------------------------------
+
+def _bar(frac: float, color: str = "#4a7bd0") -> str:
+    w = max(0.0, min(1.0, frac)) * 100.0
+    return f'<div class="bar"><span style="width:{w:.1f}%;background:{color}"></span></div>'
+
+def _table(headers: list, rows: list) -> str:
+    if not rows:
+        return "<p><i>no data</i></p>"
+    th = "".join(f"<th>{h}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in r) + "</tr>" for r in rows)
+    return f"<table><tr>{th}</tr>{body}</table>"
+
+def render(prof: Profile) -> str:
+    e = html.escape
+    serial = sum(prof.durations)
+    wall = prof.wall_s
+    colors = {"setup": "#e3a33b", "call": "#4a7bd0", "teardown": "#8c6bc8"}
+
+    phase_bar = "".join(
+        f'<span title="{p}: {prof.phase_s[p]:.2f}s" style="width:{(prof.phase_s[p] / serial * 100.0 if serial else 0):.2f}%;background:{colors[p]}"></span>'
+        for p in PHASES)
+    legend = " ".join(f'<span class="dot" style="background:{colors[p]}"></span>{p} {prof.phase_s[p]:.2f}s' for p in PHASES)
+
+    slow = sorted(prof.slowest, reverse=True)
+    top = slow[0][0] if slow else 0.0
+    slow_rows = [[f"<code>{e(n)}</code>", e(o), f"{s:.3f}", f"{c:.3f}", f"{td:.3f}", f"{tot:.3f}", _bar(tot / top if top else 0)]
+                 for tot, _, n, s, c, td, o in slow]
+
+    fx = sorted(prof.fixtures.items(), key=lambda kv: kv[1][1], reverse=True)[:TOP_FIXTURES]
+    fx_top = fx[0][1][1] if fx else 0.0
+    fx_rows = [[f"<code>{e(str(name))}</code>", e(str(scope)), cnt, f"{tot / 1000.0:.3f}", f"{mx / 1000.0:.3f}", _bar(tot / fx_top if fx_top else 0, "#e3a33b")]
+               for (name, scope), (cnt, tot, mx) in fx]
+
+    def group_rows(agg: dict) -> list:
+        items = sorted(agg.items(), key=lambda kv: kv[1][0], reverse=True)
+        return [[f"<code>{e(k)}</code>", n, f"{s:.3f}", f"{(s / serial * 100.0 if serial else 0):.1f}%", _bar(s / serial if serial else 0)]
+                for k, (s, n) in items]
+
+    par_rows = [[r["workers"], f"{r['estimated_s']:.2f}", f"{r['lower_bound_s']:.2f}", f"x{r['speedup']:.2f}"] for r in parallel_estimates(prof)]
+    fixtures_note = ("" if prof.fixtures else
+                     "<p><i>No fixture timings in this report (they are recorded by tests/conftest.py into pytest-json-report metadata).</i></p>")
+
+    return f"""<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8"/>
+  <title>Halo QA  Test profile</title>
+  <style>
+    body {{ font-family: Arial, sans-serif; margin: 24px; }}
+    .kpi {{ display:flex; gap:16px; flex-wrap:wrap; }}
+    .card {{ padding:12px 14px; border:1px solid #ddd; border-radius:10px; min-width:140px; }}
+    table {{ border-collapse: collapse; margin-bottom: 18px; }}
+    td, th {{ border-bottom: 1px solid #eee; padding: 4px 10px; text-align: left; font-size: 13px; }}
+    .bar {{ width: 180px; height: 10px; background: #f0f0f0; border-radius: 3px; overflow: hidden; }}
+    .bar span {{ display: block; height: 100%; }}
+    .phases {{ display:flex; height: 18px; border-radius: 4px; overflow: hidden; max-width: 720px; background:#f0f0f0; }}
+    .phases span {{ display:block; height:100%; }}
+    .dot {{ display:inline-block; width:10px; height:10px; border-radius:2px; margin: 0 4px 0 12px; }}
+  </style>
+</head>
+<body>
+  <h1>Test profile</h1>
+  <p>Source: {e(prof.source)}</p>
+  <div class="kpi">
+    <div class="card"><b>Tests</b><br/>{prof.tests}</div>
+    <div class="card"><b>Sum of test time (s)</b><br/>{serial:.2f}</div>
+    <div class="card"><b>Reported wall (s)</b><br/>{(f"{wall:.2f}" if wall else "n/a")}</div>
+    <div class="card"><b>Outside tests (s)</b><br/>{(f"{max(wall - serial, 0.0):.2f}" if wall else "n/a")}</div>
+  </div>
+
+  <h2>Phases</h2>
+  <div class="phases">{phase_bar}</div>
+  <p>{legend}</p>
+
+  <h2>Slowest tests</h2>
+  {_table(["test", "outcome", "setup (s)", "call (s)", "teardown (s)", "total (s)", ""], slow_rows)}
+
+  <h2>Slowest fixtures</h2>
+  {fixtures_note}
+  {_table(["fixture", "scope", "setups", "total (s)", "max (s)", ""], fx_rows)}
+
+  <h2>Time by module</h2>
+  {_table(["module", "tests", "seconds", "share", ""], group_rows(prof.by_module))}
+
+  <h2>Time by TC-ID</h2>
+  {_table(["TC-ID", "tests", "seconds", "share", ""], group_rows(prof.by_tc))}
+
+  <h2>Parallel estimate</h2>
+  <p>Tests scheduled longest-first on N workers (per-test times from this run). Module/session fixtures are
+  set up once per worker, so real runs land somewhat above the estimate.</p>
+  {_table(["workers", "estimated wall (s)", "lower bound (s)", "speedup"], par_rows)}
+</body>
+</html>
+"""
+
+def main() -> int:
+    if len(sys.argv) != 5:
+        print("usage: qa_profile.py <report.json|-> <junit.xml|-> <profile.html> <links.json>")
+        return 2
+
+    report_json = Path(sys.argv[1]) if sys.argv[1] != "-" else None
+    junit_xml = Path(sys.argv[2]) if sys.argv[2] != "-" else None
+    out_html = Path(sys.argv[3])
+    links_json = Path(sys.argv[4])
+
+    if report_json and report_json.exists():
+        prof = from_report(report_json)
+    elif junit_xml and junit_xml.exists():
+        prof = from_junit(junit_xml)
+    else:
+        print("ERR: neither report.json nor junit.xml found")
+        return 3
+
+    out_html.parent.mkdir(parents=True, exist_ok=True)
+    out_html.write_text(render(prof), encoding="utf-8")
+
+    links = {"reports": []}
+    if links_json.exists():
+        links = json.loads(links_json.read_text(encoding="utf-8"))
+    reports = [r for r in links.get("reports", []) if r.get("href") != out_html.name]
+    reports.append({"label": "Test profile (phases, slowest tests/fixtures, parallel estimate)", "href": out_html.name})
+    links["reports"] = reports
+    links_json.write_text(json.dumps(links, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    print("OK_PROFILE_WRITTEN", str(out_html))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
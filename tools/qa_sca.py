@@ -0,0 +1,247 @@
+"""Dependency audit (SCA) stage for qa_assess: cached, optionally offline.
+
+The audit result is reused while nothing it depends on changed. The key is the sha256 of
+requirements.txt / requirements-win11.txt, the installed distributions (name==version),
+the pip-audit version and the vulnerability source. It is kept in
+<repo>/.qa_cache/sca_cache.json (next to the scan cache, HALO_QA_SCAN_CACHE). An online
+result also expires after HALO_QA_SCA_MAX_AGE_S (24 h): advisories are published against
+versions that did not change. Offline results never expire, the snapshot hash is in the key.
+
+HALO_QA_VULN_DB=<snapshot> audits offline against a local OSV snapshot instead of querying
+the vulnerability service: a .zip of OSV records (e.g. the PyPI "all.zip" export), a
+directory of OSV .json files, or one .json file holding a record or a list of records.
+
+Outputs are written directly in the pip-audit -f json layout:
+pip_audit.clean.json (dependencies + fixes) and pip_audit.summary.txt (one line).
+"""
+import hashlib
+import json
+import os
+import re
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+SCA_CACHE_VERSION = 1
+REQUIREMENTS = ("requirements.txt", "requirements-win11.txt")
+# online (pip-audit) results older than this are re-audited
+MAX_AGE_S = float(os.environ.get("HALO_QA_SCA_MAX_AGE_S", str(24 * 3600)))
+
+def canonical_name(name: str) -> str:
+    # PEP 503
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def requirements_hashes(repo: Path) -> dict:
+    return {name: (_sha256_file(repo / name) if (repo / name).is_file() else None) for name in REQUIREMENTS}
+
+def installed_distributions() -> dict:
+    """{canonical name: (name, version)} of the running interpreter (what pip-audit audits)."""
+    from importlib.metadata import distributions
+    out = {}
+    for d in distributions():
+        name = d.metadata["Name"]
+        if name and d.version:
+            out.setdefault(canonical_name(name), (name, d.version))
+    return out
+
+def pip_audit_version() -> str | None:
+    try:
+        from importlib.metadata import version
+        return version("pip-audit")
+    except Exception:
+        return None
+
+def cache_key(req_hashes: dict, dists: dict, source: str) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps({"v": SCA_CACHE_VERSION, "requirements": req_hashes, "source": source,
+                         "pip_audit": pip_audit_version()}, sort_keys=True).encode())
+    for key in sorted(dists):
+        h.update(f"\n{key}=={dists[key][1]}".encode())
+    return h.hexdigest()
+
+def default_cache_path(repo: Path) -> Path:
+    scan = os.environ.get("HALO_QA_SCAN_CACHE")
+    base = Path(scan).resolve().parent if scan else repo / ".qa_cache"
+    return base / "sca_cache.json"
+
+def _age_s(stamp) -> float | None:
+    try:
+        t = datetime.fromisoformat(str(stamp).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - t).total_seconds()
+
+def load_cached(path: Path, key: str, max_age_s: float | None = None) -> dict | None:
+    """The cached entry for key; with max_age_s, None once audited_at_utc is older (or missing)."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("key") != key or not isinstance(data.get("report"), dict):
+        return None
+    if max_age_s is not None:
+        age = _age_s(data.get("audited_at_utc"))
+        if age is None or age > max_age_s:
+            return None
+    return data
+
+def save_cached(path: Path, key: str, report: dict, meta: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"key": key, "report": report, **meta}, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+# --- pip-audit output ----------------------------------------------------------------
+
+def parse_pip_audit(raw: str) -> dict:
+    """The JSON document at the start of pip-audit's stdout (anything after it is ignored)."""
+    report, _ = json.JSONDecoder().raw_decode(raw.lstrip())
+    if not isinstance(report, dict) or "dependencies" not in report:
+        raise ValueError("pip-audit output has no 'dependencies'")
+    report.setdefault("fixes", [])
+    return report
+
+def summary_line(report: dict) -> str:
+    # same wording as pip-audit's own last stderr line
+    vulnerable = [d for d in report.get("dependencies", []) if d.get("vulns")]
+    n = sum(len(d["vulns"]) for d in vulnerable)
+    if not n:
+        return "No known vulnerabilities found"
+    return (f"Found {n} known vulnerabilit{'y' if n == 1 else 'ies'} "
+            f"in {len(vulnerable)} package{'' if len(vulnerable) == 1 else 's'}")
+
+def write_outputs(report: dict, artifacts: Path, note: str = "") -> tuple[Path, Path]:
+    clean = artifacts / "pip_audit.clean.json"
+    summary = artifacts / "pip_audit.summary.txt"
+    clean.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    summary.write_text(summary_line(report) + (f" ({note})" if note else "") + "\n", encoding="utf-8")
+    return clean, summary
+
+# --- offline OSV snapshot ------------------------------------------------------------
+
+def snapshot_source(path: Path) -> str:
+    """Cache-key component: the snapshot content (file hash, or hash of a directory listing)."""
+    if path.is_dir():
+        h = hashlib.sha256()
+        for f in sorted(path.rglob("*.json")):
+            h.update(f"{f.relative_to(path).as_posix()}:{_sha256_file(f)}\n".encode())
+        return "osv-dir:" + h.hexdigest()
+    return "osv:" + _sha256_file(path)
+
+def iter_osv_records(path: Path) -> Iterator[dict]:
+    def expand(doc):
+        if isinstance(doc, list):
+            yield from (r for r in doc if isinstance(r, dict))
+        elif isinstance(doc, dict):
+            yield from (expand(doc["vulns"]) if isinstance(doc.get("vulns"), list) else [doc])
+
+    if path.is_dir():
+        for f in sorted(path.rglob("*.json")):
+            yield from expand(json.loads(f.read_text(encoding="utf-8")))
+    elif path.suffix.lower() == ".zip":
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if info.filename.endswith(".json"):
+                    yield from expand(json.loads(zf.read(info)))
+    else:
+        yield from expand(json.loads(path.read_text(encoding="utf-8")))
+
+def _semver(v: str) -> str:
+    # build metadata does not order in SemVer, but PEP 440 would read it as a local version
+    return v.split("+", 1)[0]
+
+def _in_ranges(version, ranges: list, parse) -> tuple[bool, list]:
+    """Whether version falls in any ECOSYSTEM / SEMVER range, and the fixed versions above it.
+
+    Every bound is compared with `parse` (PEP 440): PyPI ranges are ECOSYSTEM, and the
+    installed version is PEP 440 anyway. SEMVER bounds lose their build metadata first;
+    most pre-releases ("1.2.0-rc.1") then parse and order as in SemVer. A range with a
+    bound that still does not parse ("1.0.0-alpha.beta") is skipped as a whole, since
+    dropping only its "fixed" or "introduced" event would move the range; the record's
+    explicit "versions" list still applies.
+    """
+    fixes = []
+    hit = False
+    for r in ranges:
+        kind_of_range = r.get("type")
+        if kind_of_range not in ("ECOSYSTEM", "SEMVER"):
+            continue
+        events = []
+        try:
+            for ev in r.get("events") or []:
+                for kind in ("introduced", "fixed", "last_affected"):
+                    if kind in ev:
+                        raw = _semver(ev[kind]) if kind_of_range == "SEMVER" else ev[kind]
+                        events.append((parse(raw), kind))
+        except ValueError:
+            continue
+        affected = False
+        for v, kind in sorted(events, key=lambda e: e[0]):
+            if kind == "introduced" and version >= v:
+                affected = True
+            elif kind == "fixed" and version >= v:
+                affected = False
+            elif kind == "last_affected" and version > v:
+                affected = False
+        if affected:
+            hit = True
+            fixes += [str(v) for v, kind in events if kind == "fixed" and v > version]
+    return hit, fixes
+
+def offline_audit(snapshot: Path, dists: dict) -> dict:
+    """pip-audit -f json shaped report of the installed distributions against an OSV snapshot."""
+    from packaging.version import InvalidVersion, Version
+
+    def parse(v: str) -> Version:
+        try:
+            return Version(v)
+        except InvalidVersion as e:
+            raise ValueError(str(e)) from None
+
+    versions = {}
+    for key, (_, ver) in dists.items():
+        try:
+            versions[key] = parse(ver)
+        except ValueError:
+            versions[key] = None
+    vulns: dict = {key: {} for key in dists}
+    for rec in iter_osv_records(snapshot):
+        if rec.get("withdrawn"):
+            continue
+        for aff in rec.get("affected") or []:
+            pkg = aff.get("package") or {}
+            if pkg.get("ecosystem") != "PyPI":
+                continue
+            key = canonical_name(pkg.get("name", ""))
+            if key not in dists or versions[key] is None:
+                continue
+            ver = versions[key]
+            hit = dists[key][1] in (aff.get("versions") or [])
+            in_range, fixes = _in_ranges(ver, aff.get("ranges") or [], parse)
+            if not (hit or in_range):
+                continue
+            entry = vulns[key].setdefault(rec.get("id", "?"), {
+                "id": rec.get("id", "?"), "fix_versions": [],
+                "aliases": sorted(set(rec.get("aliases") or [])),
+                "description": rec.get("details") or rec.get("summary") or "",
+            })
+            entry["fix_versions"] = sorted(set(entry["fix_versions"]) | set(fixes), key=Version)
+
+    deps = []
+    for key in sorted(dists):
+        ver = dists[key][1]
+        if versions[key] is None:
+            deps.append({"name": key, "skip_reason": f"Invalid version, could not be audited: {key} ({ver})"})
+        else:
+            deps.append({"name": key, "version": ver, "vulns": [vulns[key][i] for i in sorted(vulns[key])]})
+    return {"dependencies": deps, "fixes": []}
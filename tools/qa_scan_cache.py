@@ -0,0 +1,262 @@
+"""Incremental bandit / detect-secrets scanning for qa_assess.
+
+Every scanned unit (a file on disk, or a member of a committed .zip read in memory)
+is keyed by the sha256 of its content. Findings are cached per key, so a run only scans
+what changed since the cached run, and the merged output keeps the format of
+`bandit -r -f json` / `detect-secrets scan`. Each scanner walks the tree lazily and
+holds only its pending cache misses; zip members that miss are spilled in batches to a
+temporary directory (never next to the archive) so one scanner call covers many of them.
+
+Bandit results depend only on content, so bandit keys are the bare hash and identical
+files share an entry. detect-secrets plugins and filters look at the file name (type,
+lock files, ...) and at the active settings, so its keys also carry the repo-relative path
+and a digest of the settings.
+
+Cache: HALO_QA_SCAN_CACHE (default <repo>/.qa_cache/scan_cache.json). It is invalidated
+when the bandit / detect-secrets version changes, and entries not seen in a run are dropped.
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+CACHE_VERSION = 2
+# never scanned: VCS/tool caches and generated evidence
+EXCLUDE_DIRS = {".git", "__pycache__", ".venv", "venv", ".tox", ".nox", ".eggs", ".pytest_cache",
+                ".mypy_cache", ".ruff_cache", ".qa_cache", "artifacts", "runs"}
+BANDIT_BATCH = 100  # files per bandit invocation (Windows command-line limit)
+TOOLS = ("bandit", "secrets")
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+class Unit:
+    __slots__ = ("name", "rel", "disk_path", "data", "sha")
+
+    def __init__(self, name: str, rel: str, disk_path: Path | None, data: bytes):
+        self.name = name            # bandit-style name (absolute path, or <zip>!/<member>)
+        self.rel = rel              # detect-secrets-style name (repo-relative)
+        self.disk_path = disk_path  # None for zip members
+        self.sha = hashlib.sha256(data).hexdigest()
+        # files on disk are re-read by the scanners; only zip members keep their bytes
+        self.data = data if disk_path is None else b""
+
+def _walk(repo: Path, exclude: set) -> Iterator[Path]:
+    for root, dirs, files in os.walk(repo):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDE_DIRS and (Path(root) / d).resolve() not in exclude)
+        for f in sorted(files):
+            yield Path(root) / f
+
+def _tracked(repo: Path) -> set | None:
+    # detect-secrets scans git-tracked files only (same as the CLI default)
+    try:
+        p = subprocess.run(["git", "ls-files", "-z"], cwd=str(repo), capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if p.returncode != 0:
+        return None
+    return {x for x in p.stdout.decode("utf-8", "replace").split("\0") if x}
+
+def iter_units(repo: Path, tool: str, exclude_dirs=()) -> Iterator[Unit]:
+    """Units one scanner needs ("bandit": Python sources, "secrets": git-tracked text), lazily.
+
+    Nothing is read that the scanner skips, and zip members are read one at a time.
+    """
+    if tool not in TOOLS:
+        raise ValueError(f"unknown scanner {tool!r}")
+    exclude = {Path(d).resolve() for d in exclude_dirs}
+    tracked = _tracked(repo) if tool == "secrets" else None
+    for path in _walk(repo, exclude):
+        rel = path.relative_to(repo).as_posix()
+        in_secrets = tool == "secrets" and (tracked is None or rel in tracked)
+        if path.suffix.lower() == ".zip":
+            if tool == "secrets" and not in_secrets:
+                continue
+            try:
+                zf = zipfile.ZipFile(path)
+            except (zipfile.BadZipFile, OSError):
+                continue
+            with zf:
+                for info in zf.infolist():
+                    if info.is_dir() or (tool == "bandit" and not info.filename.endswith(".py")):
+                        continue
+                    data = zf.read(info)
+                    if tool == "secrets" and b"\0" in data[:8192]:
+                        continue
+                    yield Unit(f"{path}!/{info.filename}", f"{rel}!/{info.filename}", None, data)
+            continue
+        if not (in_secrets if tool == "secrets" else path.suffix in (".py", ".pyw")):
+            continue
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        yield Unit(str(path), rel, path, data)
+
+def _spill(units: list, tmp: Path) -> dict:
+    """Write in-memory zip members to tmp/<n>/<basename> (the name keeps its extension); {path: unit}."""
+    out = {}
+    for n, u in enumerate(units):
+        d = tmp / str(n)
+        d.mkdir()
+        p = d / (Path(u.rel.rsplit("!/", 1)[-1]).name or "member")
+        p.write_bytes(u.data)
+        out[str(p)] = u
+    return out
+
+# --- cache -------------------------------------------------------------------------
+
+def _tool_versions() -> dict:
+    out = {}
+    try:
+        import bandit
+        out["bandit"] = bandit.__version__
+    except Exception:
+        out["bandit"] = None
+    try:
+        from detect_secrets.__version__ import VERSION
+        out["detect_secrets"] = VERSION
+    except Exception:
+        out["detect_secrets"] = None
+    return out
+
+class ScanCache:
+    def __init__(self, path: Path):
+        self.path = path
+        self.versions = _tool_versions()
+        self.bandit: dict = {}
+        self.secrets: dict = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if data.get("cache_version") == CACHE_VERSION:
+            if data.get("versions", {}).get("bandit") == self.versions["bandit"]:
+                self.bandit = data.get("bandit") or {}
+            if data.get("versions", {}).get("detect_secrets") == self.versions["detect_secrets"]:
+                self.secrets = data.get("detect_secrets") or {}
+        self.used_bandit: set = set()
+        self.used_secrets: set = set()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "cache_version": CACHE_VERSION,
+            "versions": self.versions,
+            "bandit": {k: v for k, v in self.bandit.items() if k in self.used_bandit},
+            "detect_secrets": {k: v for k, v in self.secrets.items() if k in self.used_secrets},
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+def default_cache_path(repo: Path) -> Path:
+    env = os.environ.get("HALO_QA_SCAN_CACHE")
+    return Path(env).resolve() if env else repo / ".qa_cache" / "scan_cache.json"
+
+# --- bandit ------------------------------------------------------------------------
+
+def _bandit_json(args: list, cwd: Path, timeout_s: float, stdin: bytes | None = None) -> dict:
+    p = subprocess.run([sys.executable, "-m", "bandit", "-f", "json", "-q"] + args, cwd=str(cwd), input=stdin,
+                       capture_output=True, timeout=timeout_s)
+    if p.returncode not in (0, 1):
+        raise RuntimeError(p.stderr.decode("utf-8", "replace")[-2000:])
+    return json.loads(p.stdout)
+
+def _split_bandit(report: dict, name: str) -> dict:
+    # per-file entry without the filename, so identical content at another path reuses it
+    strip = lambda items: [{k: v for k, v in it.items() if k != "filename"} for it in items if it.get("filename") == name]
+    return {"metrics": (report.get("metrics") or {}).get(name) or {}, "results": strip(report.get("results") or []),
+            "errors": strip(report.get("errors") or [])}
+
+def _bandit_batch(pending: dict, cache: ScanCache, repo: Path, deadline: float) -> None:
+    # one bandit process per batch, zip members included
+    with tempfile.TemporaryDirectory(prefix="qa-bandit-") as tmp:
+        names = {u.name: u for u in pending.values() if u.disk_path}
+        names.update(_spill([u for u in pending.values() if not u.disk_path], Path(tmp)))
+        report = _bandit_json(list(names), repo, max(deadline - time.monotonic(), 1.0))
+        for name, u in names.items():
+            cache.bandit[u.sha] = _split_bandit(report, name)
+
+def bandit_incremental(units: Iterable[Unit], cache: ScanCache, repo: Path, out_path: Path, deadline: float) -> dict:
+    seen = []      # (name, key) per unit in walk order; the units themselves are not kept
+    pending = {}   # cache misses waiting for the next batch
+    scanned = 0
+    for u in units:
+        cache.used_bandit.add(u.sha)
+        seen.append((u.name, u.sha))
+        if u.sha not in cache.bandit and u.sha not in pending:
+            pending[u.sha] = u
+            if len(pending) >= BANDIT_BATCH:
+                _bandit_batch(pending, cache, repo, deadline)
+                scanned += len(pending)
+                pending = {}
+    if pending:
+        _bandit_batch(pending, cache, repo, deadline)
+        scanned += len(pending)
+
+    metrics, results, errors = {}, [], []
+    for name, key in seen:
+        entry = cache.bandit[key]
+        metrics[name] = entry["metrics"]
+        results += [dict(r, filename=name) for r in entry["results"]]
+        errors += [dict(e, filename=name) for e in entry["errors"]]
+    totals = {}
+    for m in metrics.values():
+        for k, v in m.items():
+            if isinstance(v, (int, float)):
+                totals[k] = totals.get(k, 0) + v
+    metrics["_totals"] = totals
+    results.sort(key=lambda r: (r["filename"], r.get("line_number", 0), r.get("test_id", "")))
+    out = {"errors": errors, "generated_at": utc_now_iso(), "metrics": metrics, "results": results}
+    out_path.write_text(json.dumps(out, indent=2) + "\n", encoding="utf-8")
+    return {"rc": 1 if results else 0, "scanned": scanned, "cached": len(seen) - scanned,
+            "units": len(seen), "findings": len(results)}
+
+# --- detect-secrets -------------------------------------------------------------------
+
+def _secrets_key(u: Unit, settings_digest: str) -> str:
+    return hashlib.sha256(f"{u.sha}|{u.rel}|{settings_digest}".encode("utf-8")).hexdigest()
+
+def secrets_incremental(units: Iterable[Unit], cache: ScanCache, repo: Path, out_path: Path, deadline: float) -> dict:
+    from detect_secrets import SecretsCollection
+    from detect_secrets.core import baseline
+    from detect_secrets.settings import default_settings, get_settings
+
+    scanned = total = 0
+    results = {}
+    with default_settings(), tempfile.TemporaryDirectory(prefix="qa-secrets-") as tmp:
+        digest = hashlib.sha256(json.dumps(get_settings().json(), sort_keys=True).encode("utf-8")).hexdigest()
+        for u in units:
+            if time.monotonic() > deadline:
+                raise TimeoutError("detect-secrets incremental scan")
+            total += 1
+            key = _secrets_key(u, digest)
+            cache.used_secrets.add(key)
+            if key not in cache.secrets:
+                scanned += 1
+                if u.disk_path:
+                    found = SecretsCollection(root=str(repo))
+                    found.scan_file(u.rel)
+                else:
+                    spilled = Path(next(iter(_spill([u], Path(tmp)))))
+                    found = SecretsCollection(root=str(spilled.parent))
+                    found.scan_file(spilled.name)
+                    shutil.rmtree(spilled.parent)
+                cache.secrets[key] = sorted(({k: v for k, v in s.json().items() if k != "filename"} for _, s in found),
+                                            key=lambda s: (s.get("line_number", 0), s["type"], s["hashed_secret"]))
+            if cache.secrets[key]:
+                results[u.rel] = [dict(s, filename=u.rel) for s in cache.secrets[key]]
+        out = baseline.format_for_output(SecretsCollection())
+    out["results"] = {k: results[k] for k in sorted(results)}
+    out_path.write_text(json.dumps(out, indent=2) + "\n", encoding="utf-8")
+    return {"rc": 0, "scanned": scanned, "cached": total - scanned, "units": total,
+            "findings": sum(len(v) for v in results.values())}
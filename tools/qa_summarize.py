@@ -1,11 +1,28 @@
+import heapq
 import json
 import sys
 from pathlib import Path
 from datetime import datetime, timezone
 
+from report_stream import ReportStream
+
+# engineering.json keeps bounded lists; every failure's full longrepr goes to the sidecar
+TOP_SLOWEST = 25
+TOP_FAILURES = 50
+LONGREPR_INLINE = 4000  # chars kept inline (head + tail of the traceback)
+
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
+def _longrepr_text(v) -> str:
+    return v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)
+
+def _clip(text: str, limit: int = LONGREPR_INLINE) -> str:
+    if len(text) <= limit:
+        return text
+    head = limit // 4
+    return text[:head] + f"\n... [{len(text) - limit} chars truncated, see longrepr_ref] ...\n" + text[-(limit - head):]
+
 def main() -> int:
     if len(sys.argv) != 6:
         print("usage: qa_summarize.py <report.json> <executive.md> <engineering.json> <index.html> <links.json>")
@@ -21,9 +38,40 @@ def main() -> int:
         print("ERR: report.json not found:", str(report_json))
         return 3
 
-    data = json.loads(report_json.read_text(encoding="utf-8"))
-    summary = data.get("summary") or {}
-    tests = data.get("tests") or []
+    # Stream the tests: counters + bounded top-K, full tracebacks to an indexed JSONL sidecar
+    sidecar = out_eng.with_name(out_eng.stem + ".longrepr.jsonl")
+    stream = ReportStream(report_json)
+    outcomes = {}
+    slowest = []  # min-heap of (duration, seq, nodeid)
+    failures = []
+    failed_seen = 0
+    offset = 0
+    with sidecar.open("wb") as side:
+        for seq, t in enumerate(stream.tests()):
+            outcome = t.get("outcome")
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            nodeid = t.get("nodeid")
+            dur = sum(float((t.get(ph) or {}).get("duration") or 0.0) for ph in ("setup", "call", "teardown"))
+            if len(slowest) < TOP_SLOWEST:
+                heapq.heappush(slowest, (dur, seq, nodeid, outcome))
+            elif dur > slowest[0][0]:
+                heapq.heapreplace(slowest, (dur, seq, nodeid, outcome))
+
+            if outcome != "failed":
+                continue
+            failed_seen += 1
+            call = t.get("call") or {}
+            longrepr = _longrepr_text(call.get("longrepr") or call.get("crash") or "no longrepr")
+            line = (json.dumps({"nodeid": nodeid, "when": call.get("when"), "longrepr": longrepr}, ensure_ascii=False) + "\n").encode("utf-8")
+            ref = {"file": sidecar.name, "offset": offset, "length": len(line)}
+            side.write(line)
+            offset += len(line)
+            if len(failures) < TOP_FAILURES:
+                failures.append({"nodeid": nodeid, "when": call.get("when"), "duration": call.get("duration"),
+                                 "longrepr": _clip(longrepr), "longrepr_ref": ref})
+
+    data = stream.meta
+    summary = data.get("summary") or outcomes
     duration = float(data.get("duration") or 0.0)
     created = data.get("created") or utc_now_iso()
 
@@ -31,15 +79,7 @@ def main() -> int:
     failed = int(summary.get("failed") or 0)
     skipped = int(summary.get("skipped") or 0)
     total = passed + failed + skipped + int(summary.get("xfailed") or 0) + int(summary.get("xpassed") or 0)
-
-    failures = []
-    for t in tests:
-        if t.get("outcome") != "failed":
-            continue
-        call = t.get("call") or {}
-        nodeid = t.get("nodeid")
-        longrepr = call.get("longrepr") or call.get("crash") or "no longrepr"
-        failures.append({"nodeid": nodeid, "when": call.get("when"), "duration": call.get("duration"), "longrepr": longrepr})
+    slowest_tests = [{"nodeid": n, "duration_s": round(d, 6), "outcome": o} for d, _, n, o in sorted(slowest, reverse=True)]
 
     pass_rate = (passed / total * 100.0) if total else 0.0
 
@@ -66,11 +106,14 @@ def main() -> int:
         "duration_s": duration,
         "summary": {"total": total, "passed": passed, "failed": failed, "skipped": skipped},
         "failures": failures,
+        "failures_total": failed_seen,
+        "slowest_tests": slowest_tests,
         "artifacts": {
             "pytest_html": "report.html",
             "junit_xml": "junit.xml",
             "pytest_json": "report.json",
             "executive_md": "executive.md",
+            "failures_longrepr_jsonl": sidecar.name,
         },
     }
     out_eng.write_text(json.dumps(eng, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
@@ -112,6 +155,7 @@ def main() -> int:
     <li><a href="engineering.json">Engineering report (json)</a></li>
     <li><a href="junit.xml">JUnit XML</a></li>
     <li><a href="report.json">Pytest JSON report</a></li>
+    <li><a href="{sidecar.name}">Failure tracebacks (jsonl, indexed from engineering.json)</a></li>
     {li}
   </ul>
 </body>
@@ -0,0 +1,134 @@
+"""Incremental reader for pytest-json-report files.
+
+report.json is one big object whose "tests" (and "collectors") arrays grow with the
+suite. ReportStream decodes the top level key by key and yields test records one at a
+time, so memory is bounded by the largest single record, not by the file. A record
+that is still undecodable after max_record characters (truncated or malformed JSON) raises
+ValueError instead of pulling the rest of the file into memory.
+
+    rs = ReportStream(path)
+    for t in rs.tests():
+        ...
+    rs.meta["summary"]      # every top-level key except tests/collectors/warnings
+"""
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+CHUNK = 1 << 20
+# largest single record (in characters) buffered before giving up on it
+MAX_RECORD = 64 << 20
+# large arrays never kept in memory; tests are yielded, the others skipped
+STREAMED_KEYS = {"tests"}
+SKIPPED_KEYS = {"collectors", "warnings"}
+
+_WS = " \t\r\n"
+# characters that can continue a number ("12" + ".5", "1" + "e3")
+_NUM_TAIL = "0123456789.eE+-"
+
+class ReportStream:
+    def __init__(self, path: Path, chunk_size: int = CHUNK, max_record: int = MAX_RECORD):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.max_record = max(max_record, chunk_size)
+        self.meta: dict = {}
+        self.counts: dict = {}
+        self._dec = json.JSONDecoder()
+        self._fh = None
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    # buffer management
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        data = self._fh.read(self.chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        if self._pos > self.chunk_size:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += data
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, ch: str) -> None:
+        got = self._peek()
+        if got != ch:
+            raise ValueError(f"report.json: expected {ch!r} at offset ~{self._pos}, got {got!r}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                obj, end = self._dec.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # incomplete record in the buffer: read more and retry
+                if len(self._buf) - self._pos > self.max_record:
+                    raise ValueError(f"report.json: no valid record within {self.max_record} chars "
+                                     f"at offset ~{self._pos}") from e
+                if not self._fill():
+                    raise
+                continue
+            # a number cut at the buffer end ("17", "17." or "1e") decodes short; read on
+            if not self._eof and all(c in _NUM_TAIL for c in self._buf[end:]) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def _array(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            ch = self._peek()
+            self._pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"report.json: expected ',' or ']' at offset ~{self._pos}")
+
+    # public
+
+    def tests(self) -> Iterator[dict]:
+        """Yield test records; self.meta is complete once the generator is exhausted."""
+        with self.path.open("r", encoding="utf-8") as fh:
+            self._fh, self._buf, self._pos, self._eof = fh, "", 0, False
+            self._expect("{")
+            if self._peek() == "}":
+                return
+            while True:
+                key = self._value()
+                self._expect(":")
+                if key in STREAMED_KEYS and self._peek() == "[":
+                    n = 0
+                    for item in self._array():
+                        n += 1
+                        yield item
+                    self.counts[key] = n
+                elif key in SKIPPED_KEYS and self._peek() == "[":
+                    self.counts[key] = sum(1 for _ in self._array())
+                else:
+                    self.meta[key] = self._value()
+                ch = self._peek()
+                self._pos += 1
+                if ch == "}":
+                    break
+                if ch != ",":
+                    raise ValueError(f"report.json: expected ',' or '}}' at offset ~{self._pos}")
+            self._fh = None
+            self._buf = ""